@@ -10,6 +10,7 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
 import os
+import re
 import sys
 
 # Add parent directory to path so we can import our models
@@ -17,6 +18,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 # Import the database configuration
 from database import Base, DATABASE_URL
+from config.settings import settings
 
 # Import ALL models so Alembic can detect them
 # This is CRITICAL - if you don't import models, Alembic won't detect schema changes
@@ -44,7 +46,13 @@ from app.models import (
     # Branch config
     BranchTaxRate, BranchPaymentMethod,
     # Audit
-    ConfigChangeLog, SecurityAuditLog, ChangeAction
+    ConfigChangeLog, SecurityAuditLog, ChangeAction,
+    # Background jobs
+    BackgroundJob,
+    # Stock reservations
+    StockReservation,
+    # Idempotency
+    IdempotencyKey
 )
 
 # This is the Alembic Config object
@@ -62,6 +70,20 @@ config.set_main_option("sqlalchemy.url", DATABASE_URL)
 # Add your model's MetaData object here for 'autogenerate' support
 target_metadata = Base.metadata
 
+# Tablas que existen sólo en la base, no en los modelos (migración
+# 20261019_170000): particiones mensuales/por defecto y sale_keys. El
+# esquema de particiones archivadas tampoco se compara.
+_DB_ONLY_TABLE = re.compile(r"^(sales|sale_items|inventory_movements)_(p\d{4}_\d{2}|default)$|^sale_keys$")
+
+
+def include_name(name, type_, parent_names):
+    """Excluye el esquema de archivo de particiones del autogenerate."""
+    if type_ == "schema":
+        return name != settings.partition_archive_schema
+    if type_ == "table":
+        return not _DB_ONLY_TABLE.match(name)
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -86,6 +108,7 @@ def run_migrations_offline() -> None:
         dialect_opts={"paramstyle": "named"},
         # Include schemas to track schema changes
         include_schemas=True,
+        include_name=include_name,
         # Compare types to detect column type changes
         compare_type=True,
         # Compare server defaults
@@ -116,6 +139,7 @@ def run_migrations_online() -> None:
             target_metadata=target_metadata,
             # Include schemas to track schema changes
             include_schemas=True,
+            include_name=include_name,
             # Compare types to detect column type changes
             compare_type=True,
             # Compare server defaults
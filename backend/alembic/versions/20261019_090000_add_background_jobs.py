@@ -0,0 +1,78 @@
+"""Add background_jobs table for the durable job queue
+
+Revision ID: 20261019_090000
+Revises: 20260204_143700
+Create Date: 2026-10-19
+
+Crea la tabla background_jobs usada por job_worker.py para ejecutar
+operaciones pesadas (importaciones, actualizaciones masivas de precios,
+limpiezas) fuera de las requests HTTP.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_090000'
+down_revision = '20260204_143700'  # Depende de version columns
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Crear tabla de trabajos en segundo plano."""
+
+    print("Creating background_jobs table...")
+
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_type', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='PENDING'),
+        sa.Column('priority', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('input_data', sa.LargeBinary(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('progress', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('progress_message', sa.String(length=255), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+        sa.Column('error_details', sa.Text(), nullable=True),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('run_after', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_background_jobs_id', 'background_jobs', ['id'], unique=False)
+    op.create_index('ix_background_jobs_job_type', 'background_jobs', ['job_type'], unique=False)
+    op.create_index('ix_background_jobs_user_id', 'background_jobs', ['user_id'], unique=False)
+
+    # Reclamo del worker:
+    # WHERE status = 'PENDING' AND run_after <= now ORDER BY priority DESC, id
+    op.create_index(
+        'idx_background_jobs_claim',
+        'background_jobs',
+        ['status', 'priority', 'run_after'],
+        unique=False
+    )
+
+    print("✅ background_jobs table created successfully")
+
+
+def downgrade():
+    """Eliminar tabla de trabajos en segundo plano."""
+
+    print("Dropping background_jobs table...")
+
+    op.drop_index('idx_background_jobs_claim', table_name='background_jobs')
+    op.drop_index('ix_background_jobs_user_id', table_name='background_jobs')
+    op.drop_index('ix_background_jobs_job_type', table_name='background_jobs')
+    op.drop_index('ix_background_jobs_id', table_name='background_jobs')
+    op.drop_table('background_jobs')
+
+    print("✅ background_jobs table dropped successfully")
@@ -0,0 +1,313 @@
+"""Replace Product.stock_quantity recalculation trigger with delta maintenance
+
+Revision ID: 20261019_100000
+Revises: 20261019_090000
+Create Date: 2026-10-19
+
+El trigger recalculate_product_stock() (20260204_143600) volvía a sumar
+TODAS las filas de branch_stock / product_sizes del producto en cada
+cambio de fila: una carga masiva o la edición de una grilla de talles
+hacía trabajo O(filas²) y tomaba el lock de products por cada talle.
+
+Ahora Product.stock_quantity se mantiene por deltas:
+
+    - Triggers por fila: stock_quantity += NEW - OLD (solo si cambia
+      stock_quantity o product_id; deltas 0 no tocan products)
+    - Triggers por sentencia con transition tables: un único UPDATE
+      agregado por producto para toda la sentencia. Se activan con
+      SET LOCAL app.stock_bulk_mode = 'on' (ver
+      app.services.stock_consistency_service.bulk_stock_mode); en ese
+      modo los triggers por fila no hacen nada, así cada sentencia se
+      cuenta exactamente una vez.
+
+El delta solo se aplica si la tabla corresponde al tipo de producto
+(branch_stock para has_sizes=false, product_sizes para has_sizes=true),
+igual que el cálculo anterior. El desvío que pueda aparecer (p.ej. al
+cambiar has_sizes) lo repara StockConsistencyService.repair_drift().
+"""
+from alembic import op
+
+
+revision = '20261019_100000'
+down_revision = '20261019_090000'
+branch_labels = None
+depends_on = None
+
+
+STOCK_TABLES = ("branch_stock", "product_sizes")
+
+
+def upgrade():
+    """Reemplazar trigger de recálculo por triggers de delta."""
+
+    print("Replacing Product.stock_quantity recalculation triggers with delta triggers...")
+
+    op.execute("DROP TRIGGER IF EXISTS trigger_branch_stock_insert_update ON branch_stock;")
+    op.execute("DROP TRIGGER IF EXISTS trigger_branch_stock_delete ON branch_stock;")
+    op.execute("DROP TRIGGER IF EXISTS trigger_product_size_insert_update ON product_sizes;")
+    op.execute("DROP TRIGGER IF EXISTS trigger_product_size_delete ON product_sizes;")
+    op.execute("DROP FUNCTION IF EXISTS recalculate_product_stock();")
+
+    # ========================================
+    # FUNCIÓN: Aplicar delta a un producto
+    # ========================================
+
+    op.execute("""
+    CREATE OR REPLACE FUNCTION add_product_stock_delta(
+        p_product_id INTEGER,
+        p_delta INTEGER,
+        p_has_sizes BOOLEAN
+    )
+    RETURNS VOID AS $$
+    BEGIN
+        IF p_delta = 0 THEN
+            RETURN;
+        END IF;
+
+        UPDATE products
+        SET stock_quantity = stock_quantity + p_delta,
+            updated_at = NOW()
+        WHERE id = p_product_id
+          AND has_sizes = p_has_sizes;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+    # ========================================
+    # FUNCIÓN: Delta por fila
+    # ========================================
+
+    op.execute("""
+    CREATE OR REPLACE FUNCTION apply_product_stock_delta()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        v_has_sizes BOOLEAN := (TG_TABLE_NAME = 'product_sizes');
+    BEGIN
+        -- En modo masivo se encarga el trigger por sentencia
+        IF current_setting('app.stock_bulk_mode', true) = 'on' THEN
+            RETURN NULL;
+        END IF;
+
+        IF TG_OP = 'INSERT' THEN
+            PERFORM add_product_stock_delta(NEW.product_id, NEW.stock_quantity, v_has_sizes);
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM add_product_stock_delta(OLD.product_id, -OLD.stock_quantity, v_has_sizes);
+        ELSIF OLD.product_id = NEW.product_id THEN
+            PERFORM add_product_stock_delta(NEW.product_id, NEW.stock_quantity - OLD.stock_quantity, v_has_sizes);
+        ELSE
+            -- Fila movida a otro producto
+            PERFORM add_product_stock_delta(OLD.product_id, -OLD.stock_quantity, v_has_sizes);
+            PERFORM add_product_stock_delta(NEW.product_id, NEW.stock_quantity, v_has_sizes);
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+    # ========================================
+    # FUNCIÓN: Delta por sentencia (transition tables)
+    # ========================================
+
+    op.execute("""
+    CREATE OR REPLACE FUNCTION apply_product_stock_delta_statement()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        v_has_sizes BOOLEAN := (TG_TABLE_NAME = 'product_sizes');
+    BEGIN
+        IF current_setting('app.stock_bulk_mode', true) IS DISTINCT FROM 'on' THEN
+            RETURN NULL;
+        END IF;
+
+        IF TG_OP = 'INSERT' THEN
+            UPDATE products p
+            SET stock_quantity = p.stock_quantity + d.delta,
+                updated_at = NOW()
+            FROM (
+                SELECT product_id, SUM(stock_quantity) AS delta
+                FROM new_rows
+                GROUP BY product_id
+            ) d
+            WHERE p.id = d.product_id
+              AND p.has_sizes = v_has_sizes
+              AND d.delta <> 0;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE products p
+            SET stock_quantity = p.stock_quantity - d.delta,
+                updated_at = NOW()
+            FROM (
+                SELECT product_id, SUM(stock_quantity) AS delta
+                FROM old_rows
+                GROUP BY product_id
+            ) d
+            WHERE p.id = d.product_id
+              AND p.has_sizes = v_has_sizes
+              AND d.delta <> 0;
+        ELSE
+            UPDATE products p
+            SET stock_quantity = p.stock_quantity + d.delta,
+                updated_at = NOW()
+            FROM (
+                SELECT product_id, SUM(change) AS delta
+                FROM (
+                    SELECT product_id, stock_quantity AS change FROM new_rows
+                    UNION ALL
+                    SELECT product_id, -stock_quantity AS change FROM old_rows
+                ) changes
+                GROUP BY product_id
+            ) d
+            WHERE p.id = d.product_id
+              AND p.has_sizes = v_has_sizes
+              AND d.delta <> 0;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+    # ========================================
+    # TRIGGERS en BranchStock y ProductSize
+    # ========================================
+
+    for table in STOCK_TABLES:
+        op.execute(f"""
+        CREATE TRIGGER trigger_{table}_stock_delta
+        AFTER INSERT OR DELETE OR UPDATE OF stock_quantity, product_id ON {table}
+        FOR EACH ROW
+        EXECUTE FUNCTION apply_product_stock_delta();
+        """)
+
+        # Transition tables requieren un trigger por evento
+        op.execute(f"""
+        CREATE TRIGGER trigger_{table}_stock_delta_insert_stmt
+        AFTER INSERT ON {table}
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION apply_product_stock_delta_statement();
+        """)
+
+        op.execute(f"""
+        CREATE TRIGGER trigger_{table}_stock_delta_update_stmt
+        AFTER UPDATE ON {table}
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION apply_product_stock_delta_statement();
+        """)
+
+        op.execute(f"""
+        CREATE TRIGGER trigger_{table}_stock_delta_delete_stmt
+        AFTER DELETE ON {table}
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION apply_product_stock_delta_statement();
+        """)
+
+    # ========================================
+    # Punto de partida consistente para los deltas
+    # ========================================
+
+    print("Recalculating existing product stock...")
+
+    op.execute("""
+    UPDATE products p
+    SET stock_quantity = COALESCE(
+        (SELECT SUM(stock_quantity) FROM branch_stock bs WHERE bs.product_id = p.id),
+        0
+    ),
+    updated_at = NOW()
+    WHERE has_sizes = false;
+    """)
+
+    op.execute("""
+    UPDATE products p
+    SET stock_quantity = COALESCE(
+        (SELECT SUM(stock_quantity) FROM product_sizes ps WHERE ps.product_id = p.id),
+        0
+    ),
+    updated_at = NOW()
+    WHERE has_sizes = true;
+    """)
+
+    print("✅ Delta triggers created and stock recalculated successfully")
+
+
+def downgrade():
+    """Volver al trigger de recálculo completo."""
+
+    print("Restoring Product.stock_quantity recalculation triggers...")
+
+    for table in STOCK_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trigger_{table}_stock_delta ON {table};")
+        op.execute(f"DROP TRIGGER IF EXISTS trigger_{table}_stock_delta_insert_stmt ON {table};")
+        op.execute(f"DROP TRIGGER IF EXISTS trigger_{table}_stock_delta_update_stmt ON {table};")
+        op.execute(f"DROP TRIGGER IF EXISTS trigger_{table}_stock_delta_delete_stmt ON {table};")
+
+    op.execute("DROP FUNCTION IF EXISTS apply_product_stock_delta_statement();")
+    op.execute("DROP FUNCTION IF EXISTS apply_product_stock_delta();")
+    op.execute("DROP FUNCTION IF EXISTS add_product_stock_delta(INTEGER, INTEGER, BOOLEAN);")
+
+    op.execute("""
+    CREATE OR REPLACE FUNCTION recalculate_product_stock()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        v_product_id INTEGER;
+        v_has_sizes BOOLEAN;
+        v_total_stock INTEGER;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            v_product_id := OLD.product_id;
+        ELSE
+            v_product_id := NEW.product_id;
+        END IF;
+
+        SELECT has_sizes INTO v_has_sizes
+        FROM products
+        WHERE id = v_product_id;
+
+        IF v_has_sizes THEN
+            SELECT COALESCE(SUM(stock_quantity), 0) INTO v_total_stock
+            FROM product_sizes
+            WHERE product_id = v_product_id;
+        ELSE
+            SELECT COALESCE(SUM(stock_quantity), 0) INTO v_total_stock
+            FROM branch_stock
+            WHERE product_id = v_product_id;
+        END IF;
+
+        UPDATE products
+        SET stock_quantity = v_total_stock,
+            updated_at = NOW()
+        WHERE id = v_product_id;
+
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+    op.execute("""
+    CREATE TRIGGER trigger_branch_stock_insert_update
+    AFTER INSERT OR UPDATE ON branch_stock
+    FOR EACH ROW
+    EXECUTE FUNCTION recalculate_product_stock();
+    """)
+    op.execute("""
+    CREATE TRIGGER trigger_branch_stock_delete
+    AFTER DELETE ON branch_stock
+    FOR EACH ROW
+    EXECUTE FUNCTION recalculate_product_stock();
+    """)
+    op.execute("""
+    CREATE TRIGGER trigger_product_size_insert_update
+    AFTER INSERT OR UPDATE ON product_sizes
+    FOR EACH ROW
+    EXECUTE FUNCTION recalculate_product_stock();
+    """)
+    op.execute("""
+    CREATE TRIGGER trigger_product_size_delete
+    AFTER DELETE ON product_sizes
+    FOR EACH ROW
+    EXECUTE FUNCTION recalculate_product_stock();
+    """)
+
+    print("✅ Recalculation triggers restored successfully")
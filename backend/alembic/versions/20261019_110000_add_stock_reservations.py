@@ -0,0 +1,90 @@
+"""Add stock reservations for e-commerce checkouts
+
+Revision ID: 20261019_110000
+Revises: 20261019_100000
+Create Date: 2026-10-19
+
+Crea la tabla stock_reservations y los contadores reserved_stock en
+branch_stock, product_sizes y products. Los contadores los mantiene
+ReservationService en la misma transacción que las reservas, por lo que
+el stock disponible se lee en O(1): stock_quantity - reserved_stock.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_110000'
+down_revision = '20261019_100000'
+branch_labels = None
+depends_on = None
+
+
+COUNTER_TABLES = ("branch_stock", "product_sizes", "products")
+
+
+def upgrade():
+    """Crear tabla de reservas y contadores de stock reservado."""
+
+    print("Adding reserved_stock counters...")
+
+    for table in COUNTER_TABLES:
+        op.add_column(
+            table,
+            sa.Column('reserved_stock', sa.Integer(), nullable=False, server_default='0')
+        )
+        op.create_check_constraint(
+            f'ck_{table}_reserved_stock_non_negative',
+            table,
+            'reserved_stock >= 0'
+        )
+
+    print("Creating stock_reservations table...")
+
+    op.create_table(
+        'stock_reservations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sale_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('branch_id', sa.Integer(), nullable=False),
+        sa.Column('size', sa.String(length=10), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='ACTIVE'),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('resolved_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['sale_id'], ['sales.id']),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.ForeignKeyConstraint(['branch_id'], ['branches.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_reservations_id', 'stock_reservations', ['id'], unique=False)
+    op.create_index('ix_stock_reservations_sale_id', 'stock_reservations', ['sale_id'], unique=False)
+    op.create_index('ix_stock_reservations_product_id', 'stock_reservations', ['product_id'], unique=False)
+
+    # Sweeper: WHERE status = 'ACTIVE' AND expires_at < now
+    op.create_index(
+        'idx_stock_reservations_status_expires',
+        'stock_reservations',
+        ['status', 'expires_at'],
+        unique=False
+    )
+
+    print("✅ stock_reservations created successfully")
+
+
+def downgrade():
+    """Eliminar reservas y contadores."""
+
+    print("Dropping stock_reservations table...")
+
+    op.drop_index('idx_stock_reservations_status_expires', table_name='stock_reservations')
+    op.drop_index('ix_stock_reservations_product_id', table_name='stock_reservations')
+    op.drop_index('ix_stock_reservations_sale_id', table_name='stock_reservations')
+    op.drop_index('ix_stock_reservations_id', table_name='stock_reservations')
+    op.drop_table('stock_reservations')
+
+    for table in COUNTER_TABLES:
+        op.drop_constraint(f'ck_{table}_reserved_stock_non_negative', table, type_='check')
+        op.drop_column(table, 'reserved_stock')
+
+    print("✅ stock_reservations dropped successfully")
@@ -0,0 +1,60 @@
+"""Add multi-branch fulfilment allocation fields
+
+Revision ID: 20261019_120000
+Revises: 20261019_110000
+Create Date: 2026-10-19
+
+Registra la decisión de FulfillmentService: política usada y cantidad de
+envíos en sales, sucursal de origen en cada sale_item, y coordenadas de
+las sucursales para la política nearest.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_120000'
+down_revision = '20261019_110000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Agregar campos de fulfillment multi-sucursal."""
+
+    print("Adding fulfillment fields to sales and sale_items...")
+
+    op.add_column('sales', sa.Column('fulfillment_policy', sa.String(length=30), nullable=True))
+    op.add_column('sales', sa.Column('shipment_count', sa.Integer(), nullable=True))
+
+    op.add_column('sale_items', sa.Column('fulfillment_branch_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_sale_items_fulfillment_branch_id',
+        'sale_items', 'branches',
+        ['fulfillment_branch_id'], ['id']
+    )
+    op.create_index('ix_sale_items_fulfillment_branch_id', 'sale_items', ['fulfillment_branch_id'], unique=False)
+
+    print("Adding branch coordinates...")
+
+    op.add_column('branches', sa.Column('latitude', sa.Numeric(precision=9, scale=6), nullable=True))
+    op.add_column('branches', sa.Column('longitude', sa.Numeric(precision=9, scale=6), nullable=True))
+
+    print("✅ Fulfillment fields added successfully")
+
+
+def downgrade():
+    """Eliminar campos de fulfillment multi-sucursal."""
+
+    print("Dropping fulfillment fields...")
+
+    op.drop_column('branches', 'longitude')
+    op.drop_column('branches', 'latitude')
+
+    op.drop_index('ix_sale_items_fulfillment_branch_id', table_name='sale_items')
+    op.drop_constraint('fk_sale_items_fulfillment_branch_id', 'sale_items', type_='foreignkey')
+    op.drop_column('sale_items', 'fulfillment_branch_id')
+
+    op.drop_column('sales', 'shipment_count')
+    op.drop_column('sales', 'fulfillment_policy')
+
+    print("✅ Fulfillment fields dropped successfully")
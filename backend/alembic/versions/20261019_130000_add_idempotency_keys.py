@@ -0,0 +1,55 @@
+"""Add idempotency keys table
+
+Revision ID: 20261019_130000
+Revises: 20261019_120000
+Create Date: 2026-10-19
+
+Claves Idempotency-Key de POST /sales/ y POST /ecommerce/sales: la
+restricción única (scope, key) serializa requests duplicados concurrentes
+y la respuesta guardada se reproduce en los reintentos.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_130000'
+down_revision = '20261019_120000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Crear tabla idempotency_keys."""
+
+    print("Creating idempotency_keys table...")
+
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=100), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('response_status', sa.Integer(), nullable=True),
+        sa.Column('response_body', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('scope', 'key', name='uq_idempotency_keys_scope_key')
+    )
+    op.create_index('ix_idempotency_keys_id', 'idempotency_keys', ['id'], unique=False)
+    op.create_index('idx_idempotency_keys_expires', 'idempotency_keys', ['expires_at'], unique=False)
+
+    print("✅ idempotency_keys table created successfully")
+
+
+def downgrade():
+    """Eliminar tabla idempotency_keys."""
+
+    print("Dropping idempotency_keys table...")
+
+    op.drop_index('idx_idempotency_keys_expires', table_name='idempotency_keys')
+    op.drop_index('ix_idempotency_keys_id', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+
+    print("✅ idempotency_keys table dropped successfully")
@@ -0,0 +1,40 @@
+"""Add client_uuid to sales for offline register sync
+
+Revision ID: 20261019_140000
+Revises: 20261019_130000
+Create Date: 2026-10-19
+
+Las cajas sin conexión generan un UUID por ticket; al sincronizar el lote
+(POST /sales/offline-batch) el índice único evita duplicar ventas si la
+caja reenvía un lote ya aplicado.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_140000'
+down_revision = '20261019_130000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Agregar sales.client_uuid."""
+
+    print("Adding client_uuid to sales...")
+
+    op.add_column('sales', sa.Column('client_uuid', sa.String(length=36), nullable=True))
+    op.create_index('ix_sales_client_uuid', 'sales', ['client_uuid'], unique=True)
+
+    print("✅ sales.client_uuid added successfully")
+
+
+def downgrade():
+    """Eliminar sales.client_uuid."""
+
+    print("Dropping sales.client_uuid...")
+
+    op.drop_index('ix_sales_client_uuid', table_name='sales')
+    op.drop_column('sales', 'client_uuid')
+
+    print("✅ sales.client_uuid dropped successfully")
@@ -0,0 +1,41 @@
+"""Add change-cursor indexes for POS catalog delta sync
+
+Revision ID: 20261019_150000
+Revises: 20261019_140000
+Create Date: 2026-10-19
+
+GET /products/sync devuelve los productos cuyo registro, stock de sucursal
+o talles cambiaron después del cursor (updated_at, id). Estos índices
+permiten resolver los cambios de una sucursal sin recorrer las tablas.
+"""
+from alembic import op
+
+
+revision = '20261019_150000'
+down_revision = '20261019_140000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Crear índices del cursor de sincronización."""
+
+    print("Creating catalog sync cursor indexes...")
+
+    op.create_index('ix_products_updated_at_id', 'products', ['updated_at', 'id'])
+    op.create_index('ix_branch_stock_branch_updated_at', 'branch_stock', ['branch_id', 'updated_at'])
+    op.create_index('ix_product_sizes_branch_updated_at', 'product_sizes', ['branch_id', 'updated_at'])
+
+    print("✅ Catalog sync indexes created successfully")
+
+
+def downgrade():
+    """Eliminar índices del cursor de sincronización."""
+
+    print("Dropping catalog sync cursor indexes...")
+
+    op.drop_index('ix_product_sizes_branch_updated_at', table_name='product_sizes')
+    op.drop_index('ix_branch_stock_branch_updated_at', table_name='branch_stock')
+    op.drop_index('ix_products_updated_at_id', table_name='products')
+
+    print("✅ Catalog sync indexes dropped successfully")
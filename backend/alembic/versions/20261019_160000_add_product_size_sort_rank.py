@@ -0,0 +1,59 @@
+"""Add precomputed sort rank to product sizes
+
+Revision ID: 20261019_160000
+Revises: 20261019_150000
+Create Date: 2026-10-19
+
+product_sizes.sort_rank guarda el rango de orden de cada talle
+(utils.size_validators.size_sort_rank): numéricos por valor, luego XS..XXL,
+luego otros. Los endpoints de talles ordenan con ORDER BY sort_rank sobre
+el índice (product_id, branch_id, sort_rank) en lugar de claves en Python.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from utils.size_validators import size_sort_rank
+
+
+revision = '20261019_160000'
+down_revision = '20261019_150000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Agregar sort_rank, completarlo por talle y crear el índice."""
+
+    print("Adding product_sizes.sort_rank...")
+
+    op.add_column(
+        'product_sizes',
+        sa.Column('sort_rank', sa.Integer(), nullable=False, server_default='0')
+    )
+
+    # Un UPDATE por talle distinto (pocas decenas de valores)
+    connection = op.get_bind()
+    sizes = connection.execute(sa.text("SELECT DISTINCT size FROM product_sizes")).scalars().all()
+    for size in sizes:
+        connection.execute(
+            sa.text("UPDATE product_sizes SET sort_rank = :rank WHERE size = :size"),
+            {"rank": size_sort_rank(size), "size": size}
+        )
+
+    op.create_index(
+        'ix_product_sizes_product_branch_rank', 'product_sizes',
+        ['product_id', 'branch_id', 'sort_rank']
+    )
+
+    print(f"✅ sort_rank populated for {len(sizes)} distinct sizes")
+
+
+def downgrade():
+    """Eliminar sort_rank y su índice."""
+
+    print("Dropping product_sizes.sort_rank...")
+
+    op.drop_index('ix_product_sizes_product_branch_rank', table_name='product_sizes')
+    op.drop_column('product_sizes', 'sort_rank')
+
+    print("✅ sort_rank dropped successfully")
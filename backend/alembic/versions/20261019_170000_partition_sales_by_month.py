@@ -0,0 +1,239 @@
+"""Partition sales, sale_items and inventory_movements by month
+
+Revision ID: 20261019_170000
+Revises: 20261019_160000
+Create Date: 2026-10-19
+
+Las tres tablas crecen sin límite y todos los reportes filtran por rangos
+de created_at. Pasan a ser tablas particionadas por RANGE (created_at), una
+partición por mes más una partición por defecto:
+
+    sales_p2026_10, sale_items_p2026_10, inventory_movements_p2026_10, ...
+    sales_default, sale_items_default, inventory_movements_default
+
+Cambios:
+    - sale_items.created_at (copia de sales.created_at; el ORM la asigna al
+      insertar la línea) para que la venta y sus líneas caigan en el mismo mes
+    - created_at NOT NULL en las tres tablas (clave de partición)
+    - PK (id, created_at): PostgreSQL exige la clave de partición en la PK
+    - Los índices únicos sin created_at (sales.sale_number, sales.client_uuid)
+      pasan a índices simples; la unicidad global la mantiene la tabla
+      sale_keys con un trigger sobre sales
+    - Las FKs que apuntan a sales (sale_items, stock_reservations,
+      whatsapp_sales) se eliminan: una FK a una tabla particionada tiene que
+      incluir la clave de partición. La integridad la sigue manejando el ORM
+      (relaciones con cascade)
+
+Las particiones nuevas y el archivo de las viejas los hace
+app/services/partition_service.py desde notification_scheduler.py. Esta
+migración crea los meses desde el dato más antiguo hasta 3 meses adelante.
+
+La conversión copia cada tabla (INSERT ... SELECT): correrla en una
+ventana de mantenimiento. El downgrade vuelve a tablas simples con las
+particiones adjuntas; las ya archivadas (desacopladas) no se reincorporan.
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_170000'
+down_revision = '20261019_160000'
+branch_labels = None
+depends_on = None
+
+
+PARTITIONED_TABLES = ("sales", "sale_items", "inventory_movements")
+MONTHS_AHEAD = 3
+
+# FKs hacia sales que no pueden existir con sales particionada (se restauran en el downgrade)
+SALE_REFERENCES = ("sale_items", "stock_reservations", "whatsapp_sales")
+
+# Índices únicos de sales reemplazados por sale_keys (se restauran en el downgrade)
+SALE_UNIQUE_INDEXES = ("ix_sales_sale_number", "ix_sales_client_uuid")
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _index_definitions(bind, table):
+    """CREATE INDEX de la tabla (sin el de la PK), para recrearlos tras la copia."""
+    return bind.execute(sa.text("""
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = :table AND indexname <> :pkey
+    """), {"table": table, "pkey": f"{table}_pkey"}).all()
+
+
+def _foreign_keys(bind, table):
+    """FKs salientes de la tabla (nombre y definición)."""
+    return bind.execute(sa.text("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = to_regclass(:table) AND contype = 'f'
+    """), {"table": table}).all()
+
+
+def _rebuild(bind, table, partitioned, months=()):
+    """
+    Copia la tabla a una nueva con la misma estructura, particionada o no.
+
+    Los índices se recrean con su nombre después de la copia (más rápido que
+    mantenerlos durante el INSERT) y la secuencia del id pasa a la tabla nueva.
+    """
+    indexes = _index_definitions(bind, table)
+    foreign_keys = _foreign_keys(bind, table)
+    old = f"{table}_old"
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}).scalar()
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    op.execute(f"ALTER INDEX {table}_pkey RENAME TO {old}_pkey")
+
+    if partitioned:
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+                   f"PARTITION BY RANGE (created_at)")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)")
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        for month in months:
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            )
+    else:
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {old} CASCADE")
+
+    for name, definition in indexes:
+        # Los índices de una tabla particionada se listan como "ON ONLY tabla"
+        definition = definition.replace(" ON ONLY ", " ON ")
+        if partitioned and "created_at" not in definition:
+            definition = definition.replace("CREATE UNIQUE INDEX", "CREATE INDEX")
+        elif not partitioned and name in SALE_UNIQUE_INDEXES:
+            definition = definition.replace("CREATE INDEX", "CREATE UNIQUE INDEX")
+        op.execute(definition)
+    for name, definition in foreign_keys:
+        if partitioned and "REFERENCES sales(" in definition:
+            continue
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+    op.execute(f"ANALYZE {table}")
+
+
+def upgrade():
+    """Convertir sales, sale_items e inventory_movements en tablas particionadas por mes."""
+
+    bind = op.get_bind()
+    print("Partitioning sales, sale_items and inventory_movements by month...")
+
+    # ========================================
+    # CLAVE DE PARTICIÓN
+    # ========================================
+
+    op.add_column('sale_items', sa.Column('created_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE sales SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL")
+    op.execute("""
+        UPDATE sale_items SET created_at = sales.created_at
+        FROM sales WHERE sales.id = sale_items.sale_id
+    """)
+    op.execute("UPDATE sale_items SET created_at = now() WHERE created_at IS NULL")
+    op.execute("UPDATE inventory_movements SET created_at = now() WHERE created_at IS NULL")
+    for table in PARTITIONED_TABLES:
+        op.alter_column(table, 'created_at', nullable=False)
+
+    # ========================================
+    # FKs HACIA sales
+    # ========================================
+
+    for table in SALE_REFERENCES:
+        for name, definition in _foreign_keys(bind, table):
+            if "REFERENCES sales(" in definition:
+                op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+
+    # ========================================
+    # TABLAS PARTICIONADAS
+    # ========================================
+
+    oldest = bind.execute(sa.text(
+        "SELECT LEAST((SELECT MIN(created_at) FROM sales), (SELECT MIN(created_at) FROM inventory_movements))"
+    )).scalar()
+    current = date.today().replace(day=1)
+    month = date(oldest.year, oldest.month, 1) if oldest else current
+    months = []
+    while month <= _add_months(current, MONTHS_AHEAD):
+        months.append(month)
+        month = _add_months(month, 1)
+
+    for table in PARTITIONED_TABLES:
+        print(f"  {table}: {len(months)} monthly partitions")
+        _rebuild(bind, table, partitioned=True, months=months)
+
+    # ========================================
+    # UNICIDAD GLOBAL: sale_keys
+    # ========================================
+
+    op.execute("""
+    CREATE TABLE sale_keys (
+        sale_id INTEGER PRIMARY KEY,
+        sale_number VARCHAR(50) NOT NULL,
+        client_uuid VARCHAR(36),
+        CONSTRAINT uq_sale_keys_sale_number UNIQUE (sale_number),
+        CONSTRAINT uq_sale_keys_client_uuid UNIQUE (client_uuid)
+    );
+    """)
+    op.execute("INSERT INTO sale_keys (sale_id, sale_number, client_uuid) SELECT id, sale_number, client_uuid FROM sales")
+
+    op.execute("""
+    CREATE OR REPLACE FUNCTION sync_sale_keys()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO sale_keys (sale_id, sale_number, client_uuid)
+            VALUES (NEW.id, NEW.sale_number, NEW.client_uuid);
+        ELSIF TG_OP = 'UPDATE' THEN
+            UPDATE sale_keys
+            SET sale_id = NEW.id, sale_number = NEW.sale_number, client_uuid = NEW.client_uuid
+            WHERE sale_id = OLD.id;
+        ELSE
+            DELETE FROM sale_keys WHERE sale_id = OLD.id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+    CREATE TRIGGER trigger_sales_keys
+    AFTER INSERT OR DELETE OR UPDATE OF id, sale_number, client_uuid ON sales
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_sale_keys();
+    """)
+
+    print("✅ Monthly partitions created successfully")
+
+
+def downgrade():
+    """Volver a tablas sin particionar."""
+
+    bind = op.get_bind()
+    print("Converting partitioned tables back to plain tables...")
+
+    op.execute("DROP TRIGGER IF EXISTS trigger_sales_keys ON sales;")
+    op.execute("DROP FUNCTION IF EXISTS sync_sale_keys();")
+    op.execute("DROP TABLE IF EXISTS sale_keys;")
+
+    for table in PARTITIONED_TABLES:
+        _rebuild(bind, table, partitioned=False)
+
+    for table in SALE_REFERENCES:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_sale_id_fkey "
+                   f"FOREIGN KEY (sale_id) REFERENCES sales(id)")
+
+    op.drop_column('sale_items', 'created_at')
+    op.alter_column('sales', 'created_at', nullable=True)
+    op.alter_column('inventory_movements', 'created_at', nullable=True)
+
+    print("✅ Partitioned tables converted back successfully")
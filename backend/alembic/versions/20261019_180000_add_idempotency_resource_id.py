@@ -0,0 +1,38 @@
+"""Add resource_id to idempotency keys
+
+Revision ID: 20261019_180000
+Revises: 20261019_170000
+Create Date: 2026-10-19
+
+La clave pasa a COMPLETED con el id de la venta en la misma transacción que
+confirma la venta. Si el proceso cae antes de guardar la respuesta, el
+reintento la rearma desde la venta en lugar de crear otra.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_180000'
+down_revision = '20261019_170000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Agregar idempotency_keys.resource_id."""
+
+    print("Adding idempotency_keys.resource_id...")
+
+    op.add_column('idempotency_keys', sa.Column('resource_id', sa.Integer(), nullable=True))
+
+    print("✅ idempotency_keys.resource_id added successfully")
+
+
+def downgrade():
+    """Eliminar idempotency_keys.resource_id."""
+
+    print("Dropping idempotency_keys.resource_id...")
+
+    op.drop_column('idempotency_keys', 'resource_id')
+
+    print("✅ idempotency_keys.resource_id dropped successfully")
@@ -0,0 +1,154 @@
+"""
+Cache en memoria con TTL para lecturas calientes.
+
+Cada proceso de la API tiene su propia instancia: la invalidación es local
+al proceso y el TTL acota cuánto puede quedar desactualizado el resto de
+los workers. Pensado para respuestas de lectura que se arman con varias
+consultas y cambian mucho menos de lo que se leen (storefront, configs).
+
+Invalidación transaccional:
+    invalidate_on_commit(db, cache, keys) agenda la invalidación y la
+    aplica recién cuando la sesión confirma, para no invalidar por cambios
+    que terminan en rollback ni dejar que una lectura previa al commit
+    vuelva a poblar el cache con datos viejos.
+
+Example:
+    product_cache = TTLCache("product_detail", ttl_seconds=300)
+
+    detail = product_cache.get_or_load(product_id, lambda: build_detail(db, product_id))
+
+    # Al modificar el producto
+    invalidate_on_commit(db, product_cache, [product_id])
+    db.commit()
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+
+# Clave en Session.info con las invalidaciones pendientes del commit
+_PENDING_KEY = "cache_invalidations"
+
+# Caches creados en el proceso (clear_all_caches)
+_CACHES: List["TTLCache"] = []
+
+
+class TTLCache:
+    """
+    Cache LRU con vencimiento por entrada, seguro entre threads.
+
+    Attributes:
+        name: Nombre descriptivo (logs y métricas)
+        ttl_seconds: Vida de cada entrada
+        max_entries: Máximo de entradas (se descarta la menos usada)
+        hits / misses: Contadores de aciertos y fallos
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int = 1000):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Se incrementa en cada invalidación: una carga que empezó antes
+        # no guarda su resultado (podría ser anterior al cambio)
+        self._generation = 0
+        _CACHES.append(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Valor vigente para key o default."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Guarda value para key (ttl_seconds reemplaza el TTL por defecto)."""
+        with self._lock:
+            self._store(key, value, ttl_seconds)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Valor cacheado o el resultado de loader() (que se cachea).
+
+        loader() corre fuera del lock; dos cargas concurrentes de la misma
+        clave pueden ejecutarse ambas, lo que es aceptable para lecturas.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        generation = self._generation
+        value = loader()
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, value, None)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Descarta la entrada de key."""
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Descarta todas las entradas."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: Hashable, value: Any, ttl_seconds: Optional[float]) -> None:
+        """Guarda la entrada (con el lock tomado) respetando max_entries."""
+        expires_at = time.monotonic() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def clear_all_caches() -> None:
+    """Vacía todos los caches del proceso (tests, cambios masivos de datos)."""
+    for cache in list(_CACHES):
+        cache.clear()
+
+
+def invalidate_on_commit(db: Session, cache: TTLCache, keys: Optional[Iterable[Hashable]] = None) -> None:
+    """
+    Agenda la invalidación de keys (None = todo el cache) para el próximo commit.
+
+    Args:
+        db: Sesión cuya transacción contiene el cambio
+        cache: Cache a invalidar
+        keys: Claves afectadas, o None para vaciar el cache completo
+    """
+    db.info.setdefault(_PENDING_KEY, []).append(
+        (cache, None if keys is None else list(keys))
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_invalidations(session: Session) -> None:
+    """Aplica las invalidaciones agendadas una vez confirmada la transacción."""
+    for cache, keys in session.info.pop(_PENDING_KEY, []):
+        if keys is None:
+            cache.clear()
+        else:
+            for key in keys:
+                cache.invalidate(key)
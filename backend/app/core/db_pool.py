@@ -0,0 +1,152 @@
+"""
+Configuración y diagnóstico del pool de conexiones.
+
+Tamaño según el rol del proceso (DB_POOL_ROLE):
+    - api: DB_CONNECTION_BUDGET (conexiones para todos los workers de la API)
+      repartido entre WEB_CONCURRENCY workers, 1/3 permanentes y el resto
+      overflow. Sin presupuesto: 10 + 20 por worker (comportamiento previo)
+    - jobs (job_worker.py): un hilo de ejecución por conexión, más una
+    - scheduler (notification_scheduler.py): tareas secuenciales, 2 + 2
+DB_POOL_SIZE / DB_MAX_OVERFLOW pisan el cálculo para cualquier rol.
+
+Modo PgBouncer (DB_POOL_MODE=pgbouncer, transaction pooling): el pooling
+lo hace PgBouncer; la app usa NullPool (una conexión por checkout, sin
+estado de sesión entre transacciones), sin pre-ping y sin prepared
+statements del lado del servidor (psycopg 3: prepare_threshold=None;
+psycopg2 no los usa). El único estado de sesión del código es
+SET LOCAL, que termina con la transacción.
+
+Diagnóstico: PoolHolders registra qué ruta (o hilo) tiene cada conexión
+prestada; ante un timeout del pool se loggea quién la retiene, y
+GET /diagnostics/pool lo expone.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+from config.settings import settings
+
+logger = logging.getLogger("pos.db_pool")
+
+POOL_ROLES = ("api", "jobs", "scheduler")
+POOL_MODES = ("session", "pgbouncer")
+
+
+class PoolConfig(NamedTuple):
+    """Parámetros del pool resueltos para este proceso."""
+    role: str
+    mode: str
+    workers: int
+    pool_size: int
+    max_overflow: int
+    timeout: float
+    recycle: int
+    pre_ping: bool
+
+
+def resolve_pool_config() -> PoolConfig:
+    """Pool del proceso según rol, workers y presupuesto de conexiones."""
+    role = settings.db_pool_role if settings.db_pool_role in POOL_ROLES else "api"
+    mode = settings.db_pool_mode if settings.db_pool_mode in POOL_MODES else "session"
+    workers = max(1, settings.web_concurrency) if role == "api" else 1
+
+    if role == "jobs":
+        pool_size, max_overflow = settings.job_worker_threads + 1, 2
+    elif role == "scheduler":
+        pool_size, max_overflow = 2, 2
+    elif settings.db_connection_budget > 0:
+        per_worker = max(2, settings.db_connection_budget // workers)
+        pool_size = max(1, per_worker // 3)
+        max_overflow = per_worker - pool_size
+    else:
+        pool_size, max_overflow = 10, 20
+
+    if settings.db_pool_size is not None:
+        pool_size = settings.db_pool_size
+    if settings.db_max_overflow is not None:
+        max_overflow = settings.db_max_overflow
+
+    return PoolConfig(
+        role=role,
+        mode=mode,
+        workers=workers,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        timeout=settings.db_pool_timeout,
+        recycle=settings.db_pool_recycle,
+        pre_ping=settings.db_pool_pre_ping and mode != "pgbouncer",
+    )
+
+
+def engine_options(config: PoolConfig, url: str, poolclass) -> Dict:
+    """Argumentos de create_engine para el pool resuelto."""
+    if config.mode == "pgbouncer":
+        options: Dict = {"poolclass": NullPool, "pool_pre_ping": False}
+        if url.startswith("postgresql+psycopg:"):
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+    return {
+        "poolclass": poolclass,
+        "pool_size": config.pool_size,
+        "max_overflow": config.max_overflow,
+        "pool_timeout": config.timeout,
+        "pool_recycle": config.recycle,
+        "pool_pre_ping": config.pre_ping,
+    }
+
+
+class PoolHolders:
+    """Conexiones prestadas por el pool y quién las tiene (ruta del request o hilo)."""
+
+    def __init__(self, owner: Callable[[], Optional[str]]):
+        self._owner = owner
+        self._holders: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, "checkout", self._checked_out)
+        event.listen(engine, "checkin", self._checked_in)
+
+    def _checked_out(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        owner = self._owner() or f"thread {threading.current_thread().name}"
+        with self._lock:
+            self._holders[id(connection_record)] = (owner, time.monotonic())
+
+    def _checked_in(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self._holders.pop(id(connection_record), None)
+
+    def snapshot(self) -> List[Dict]:
+        """Conexiones prestadas, la más antigua primero."""
+        now = time.monotonic()
+        with self._lock:
+            holders = list(self._holders.values())
+        return [
+            {"owner": owner, "held_ms": round((now - since) * 1000, 1)}
+            for owner, since in sorted(holders, key=lambda holder: holder[1])
+        ]
+
+    def by_owner(self) -> List[Dict]:
+        """Conexiones prestadas agrupadas por ruta/hilo, las que más retienen primero."""
+        groups: Dict[str, Dict] = {}
+        for holder in self.snapshot():
+            group = groups.setdefault(holder["owner"], {"owner": holder["owner"], "connections": 0, "oldest_ms": 0.0})
+            group["connections"] += 1
+            group["oldest_ms"] = max(group["oldest_ms"], holder["held_ms"])
+        return sorted(groups.values(), key=lambda group: (group["connections"], group["oldest_ms"]), reverse=True)
+
+    def report_exhaustion(self, config: PoolConfig, waited: float) -> None:
+        """Loggea quién retiene las conexiones cuando un checkout agota pool_timeout."""
+        holders = self.by_owner()
+        logger.error(
+            "Pool de conexiones agotado tras %.1fs (pool_size=%d, max_overflow=%d). Retienen: %s",
+            waited, config.pool_size, config.max_overflow,
+            ", ".join(f"{h['owner']} ×{h['connections']} ({h['oldest_ms']:.0f} ms)" for h in holders[:10]) or "-",
+            extra={"pool_holders": holders, "pool_role": config.role}
+        )
@@ -0,0 +1,67 @@
+"""
+Respuestas HTTP cacheables con validación condicional.
+
+Arma respuestas JSON con ETag, Last-Modified y Cache-Control, y responde
+304 Not Modified cuando el cliente ya tiene la versión vigente
+(If-None-Match tiene prioridad sobre If-Modified-Since, RFC 9110).
+"""
+
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+
+def cached_json_response(
+    request: Request,
+    content: Any,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    max_age: int = 60,
+    stale_while_revalidate: Optional[int] = None
+) -> Response:
+    """
+    Respuesta JSON con headers de cache, o 304 si el cliente está al día.
+
+    Args:
+        request: Request actual (headers condicionales)
+        content: Cuerpo JSON-serializable
+        etag: ETag entre comillas (ej: '"a1b2c3"')
+        last_modified: Fecha de la versión (UTC, con tzinfo)
+        max_age: Segundos que el cliente puede reutilizar sin revalidar
+        stale_while_revalidate: Segundos extra sirviendo la copia vencida
+            mientras se revalida en segundo plano
+
+    Returns:
+        JSONResponse 200 o Response 304 sin cuerpo
+    """
+    cache_control = f"public, max-age={max_age}"
+    if stale_while_revalidate:
+        cache_control += f", stale-while-revalidate={stale_while_revalidate}"
+
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if _is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evalúa If-None-Match / If-Modified-Since contra la versión actual."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # Comparación débil: W/"x" equivale a "x"
+        return "*" in candidates or etag in [tag.removeprefix("W/") for tag in candidates]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
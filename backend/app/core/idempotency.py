@@ -0,0 +1,185 @@
+"""
+Soporte del header Idempotency-Key para endpoints de creación.
+
+El decorador idempotent() envuelve un endpoint que recibe `request` y `db`:
+
+    - Sin header: el endpoint se ejecuta como siempre
+    - Primera vez con la clave: se ejecuta y se guarda la respuesta
+    - Reintento con la misma clave y el mismo cuerpo: se reproduce la
+      respuesta guardada (header Idempotent-Replayed: true) sin ejecutar
+    - Misma clave con otro cuerpo: 422
+    - Duplicado mientras la primera ejecución sigue en curso: espera a que
+      termine (hasta IDEMPOTENCY_WAIT_SECONDS) y reproduce su respuesta; si
+      no termina a tiempo, 409 con Retry-After
+
+Si la ejecución falla (excepción o HTTPException) la clave se libera y el
+cliente puede reintentar con la misma clave.
+
+Con resource (el modelo que crea el endpoint) la clave pasa a COMPLETED con
+el id del recurso en la misma transacción que lo confirma. Si el proceso cae
+antes de guardar la respuesta, el reintento la rearma con rebuild() en
+lugar de volver a ejecutar el endpoint.
+
+Example:
+    @router.post("/sales")
+    @idempotent("POST /sales", response_model=SaleSchema, resource=Sale)
+    async def create_sale(request: Request, sale: SaleCreate, db: Session = Depends(get_db)):
+        ...
+"""
+
+import asyncio
+import functools
+import hashlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.models import IdempotencyStatus
+from app.services.idempotency_service import IdempotencyKeyReusedError, IdempotencyService
+from config.settings import settings
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Ejecuciones en curso en este proceso: los duplicados esperan el evento en
+# lugar de consultar la base (entre workers se consulta periódicamente)
+_in_flight: Dict[Tuple[str, str], asyncio.Event] = {}
+
+_POLL_SECONDS = 0.2
+
+
+def idempotent(
+    scope: str,
+    response_model: Optional[Any] = None,
+    resource: Optional[type] = None,
+    rebuild: Optional[Callable[[Session, int], Any]] = None
+) -> Callable:
+    """
+    Decorador de endpoints con soporte de Idempotency-Key.
+
+    Args:
+        scope: Identificador del endpoint (las claves son únicas por scope)
+        response_model: Schema Pydantic para serializar el resultado igual
+            que lo haría el response_model de la ruta
+        resource: Modelo que crea el endpoint (ej: Sale)
+        rebuild: rebuild(db, resource_id) devuelve el resultado del endpoint
+            a partir del recurso creado (por defecto, la instancia de resource)
+    """
+    if rebuild is None and resource is not None:
+        def rebuild(db: Session, resource_id: int) -> Any:
+            return db.query(resource).filter(resource.id == resource_id).first()
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs["request"]
+            db: Session = kwargs["db"]
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return await _call(func, args, kwargs)
+            if len(key) > 255:
+                raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_HEADER} demasiado largo")
+
+            request_hash = hashlib.sha256(await request.body()).hexdigest()
+            service = IdempotencyService(db)
+            record = await _claim_or_wait(service, scope, key, request_hash)
+            if record.status == IdempotencyStatus.COMPLETED.value:
+                return _replay(db, record, rebuild, response_model)
+
+            event = _in_flight.setdefault((scope, key), asyncio.Event())
+            stop_tracking = service.complete_on_commit(record, resource) if resource is not None else None
+            try:
+                result = await _call(func, args, kwargs)
+                status_code, body = _serialize(result, response_model)
+                service.complete(record, status_code, body.decode("utf-8"))
+            except BaseException:
+                service.release(record)
+                raise
+            finally:
+                if stop_tracking is not None:
+                    stop_tracking()
+                _in_flight.pop((scope, key), None)
+                event.set()
+
+            return Response(content=body, status_code=status_code, media_type="application/json")
+        return wrapper
+    return decorator
+
+
+async def _call(func: Callable, args, kwargs) -> Any:
+    if asyncio.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await run_in_threadpool(func, *args, **kwargs)
+
+
+async def _claim_or_wait(service: IdempotencyService, scope: str, key: str, request_hash: str):
+    """
+    Reclama la clave, o espera a que termine la ejecución en curso.
+
+    Returns:
+        Registro reclamado (IN_PROGRESS, a ejecutar) o completado (a reproducir)
+    """
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + settings.idempotency_wait_seconds
+    while True:
+        try:
+            claimed, record = service.begin(scope, key, request_hash)
+        except IdempotencyKeyReusedError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if claimed or record.status == IdempotencyStatus.COMPLETED.value:
+            return record
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=409,
+                detail="Hay un request con la misma Idempotency-Key en curso. Reintentar más tarde.",
+                headers={"Retry-After": "1"}
+            )
+        event = _in_flight.get((scope, key))
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(min(_POLL_SECONDS, remaining))
+
+
+def _serialize(result: Any, response_model: Optional[Any]) -> Tuple[int, bytes]:
+    """Código y cuerpo JSON de la respuesta del endpoint."""
+    if isinstance(result, Response):
+        return result.status_code, bytes(result.body)
+    if response_model is not None:
+        result = response_model.model_validate(result, from_attributes=True)
+    response = JSONResponse(content=jsonable_encoder(result))
+    return response.status_code, bytes(response.body)
+
+
+def _replay(
+    db: Session,
+    record,
+    rebuild: Optional[Callable[[Session, int], Any]],
+    response_model: Optional[Any]
+) -> Response:
+    """Respuesta guardada, o rearmada desde el recurso si no llegó a guardarse."""
+    status_code, body = record.response_status, record.response_body
+    if body is None:
+        result = rebuild(db, record.resource_id) if rebuild is not None else None
+        if result is None:
+            raise HTTPException(
+                status_code=409,
+                detail="La operación con esta Idempotency-Key ya se ejecutó pero su respuesta no está disponible"
+            )
+        status_code, content = _serialize(result, response_model)
+        body = content.decode("utf-8")
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"}
+    )
@@ -0,0 +1,246 @@
+"""
+Métricas de la API en formato de exposición de Prometheus (text 0.0.4).
+
+Registro propio y liviano (sin prometheus_client): contadores, gauges e
+histogramas en memoria por proceso, con labels posicionales. Cada
+observación en el camino caliente es un lock, un bisect y dos sumas; el
+armado del texto se hace solo al scrapear GET /metrics.
+
+Métricas del proceso:
+    - http_requests_total{method,route,status}
+    - http_request_duration_seconds{method,route} (histograma)
+    - http_requests_in_flight
+    - db_pool_checkout_wait_seconds (histograma, MeteredQueuePool en database.py)
+    - db_pool_timeouts_total
+    - sales_created_total{channel}
+    - stock_conflicts_total
+
+Los valores que ya existen en otro lado (estado del pool, conexiones
+WebSocket, cola de trabajos) se leen al scrapear con collectors
+registrados con register_collector().
+
+Con varios workers cada proceso expone sus propias métricas; Prometheus
+las agrega por instancia (o usar un único worker por puerto).
+
+Example:
+    from app.core.metrics import sales_created
+
+    sales_created.inc("pos")
+"""
+
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Familia de métricas ya armada: (nombre, tipo, ayuda, [(sufijo, labels, valor)])
+Sample = Tuple[str, Dict[str, str], float]
+MetricFamily = Tuple[str, str, str, List[Sample]]
+
+# Buckets de latencia HTTP (segundos)
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets de espera del pool de conexiones (segundos)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class _Metric(ABC):
+    """Base de las métricas con labels posicionales."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self.reset()
+        _REGISTRY.append(self)
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def _zero(self):
+        """Valor inicial de una serie."""
+        return 0
+
+    def reset(self) -> None:
+        """Vuelve a cero (tests); sin labels, la serie única se expone desde el inicio."""
+        with self._lock:
+            self._values.clear()
+            if not self.labelnames:
+                self._values[()] = self._zero()
+
+    @abstractmethod
+    def collect(self) -> MetricFamily:
+        """Familia de la métrica con todas sus series (al scrapear)."""
+
+
+class Counter(_Metric):
+    """Contador monótono."""
+
+    kind = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Suma amount a la serie de esos labels."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            items = list(self._values.items())
+        return self.name, self.kind, self.documentation, [
+            ("", self._labels(values), value) for values, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Valor que sube y baja."""
+
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Histograma con buckets fijos (acumulados al exponer)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ):
+        # labels → [conteo por bucket (+Inf al final), suma, cantidad]
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Registra una observación."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = self._zero()
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _zero(self) -> list:
+        return [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+    def count(self, *label_values: str) -> int:
+        series = self._values.get(label_values)
+        return series[2] if series else 0
+
+    def total(self, *label_values: str) -> float:
+        """Suma de las observaciones de la serie."""
+        series = self._values.get(label_values)
+        return series[1] if series else 0.0
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            items = [(values, (list(counts), total, count)) for values, (counts, total, count) in self._values.items()]
+        samples: List[Sample] = []
+        for values, (counts, total, count) in items:
+            labels = self._labels(values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", dict(labels, le=_format_value(bound)), cumulative))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, count))
+        return self.name, self.kind, self.documentation, samples
+
+
+# ===== REGISTRO =====
+
+_REGISTRY: List[_Metric] = []
+_COLLECTORS: List[Callable[[], Iterable[MetricFamily]]] = []
+
+
+def register_collector(collector: Callable[[], Iterable[MetricFamily]]) -> None:
+    """
+    Registra una función que arma familias de métricas al scrapear.
+
+    Un collector que falla se omite (no rompe /metrics).
+    """
+    _COLLECTORS.append(collector)
+
+
+def gauge_family(name: str, documentation: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> MetricFamily:
+    """Familia gauge armada por un collector."""
+    return name, "gauge", documentation, [("", labels, value) for labels, value in samples]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_family(family: MetricFamily) -> List[str]:
+    name, kind, documentation, samples = family
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+        series = f"{name}{suffix}{{{label_text}}}" if label_text else f"{name}{suffix}"
+        lines.append(f"{series} {_format_value(value)}")
+    return lines
+
+
+def render_metrics(extra: Iterable[MetricFamily] = ()) -> str:
+    """Texto de exposición de todas las métricas registradas."""
+    families = [metric.collect() for metric in _REGISTRY]
+    for collector in _COLLECTORS:
+        try:
+            families.extend(collector())
+        except Exception:
+            continue
+    families.extend(extra)
+
+    lines: List[str] = []
+    for family in families:
+        lines.extend(_format_family(family))
+    return "\n".join(lines) + "\n"
+
+
+# ===== MÉTRICAS DEL PROCESO =====
+
+http_requests = Counter(
+    "http_requests_total", "Requests HTTP atendidos", ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Duración de los requests HTTP", ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests HTTP en curso"
+)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Espera para obtener una conexión del pool (incluye abrir una conexión nueva)",
+    buckets=POOL_WAIT_BUCKETS
+)
+db_pool_timeouts = Counter(
+    "db_pool_timeouts_total", "Checkouts que agotaron DB_POOL_TIMEOUT sin conseguir conexión"
+)
+sales_created = Counter(
+    "sales_created_total", "Ventas confirmadas", ("channel",)
+)
+stock_conflicts = Counter(
+    "stock_conflicts_total", "Conflictos de concurrencia de stock (deadlock/serialización, HTTP 409)"
+)
@@ -0,0 +1,211 @@
+"""
+Registro de consultas lentas con captura de plan (EXPLAIN).
+
+Opcional (SLOW_QUERY_LOG_ENABLED). El listener after_cursor_execute de
+database.py llama a record() con cada consulta que supera
+SLOW_QUERY_THRESHOLD_MS; el costo para las consultas rápidas es una
+comparación.
+
+Por cada consulta lenta se guarda:
+    - SQL normalizado (literales → ?, listas IN colapsadas) para agrupar
+      la misma consulta con distintos valores
+    - Forma de los parámetros (nombre → tipo), nunca los valores
+    - Ruta del request que la ejecutó ("GET /reports/sales")
+    - Plan de ejecución: EXPLAIN (sin ANALYZE, no ejecuta la consulta)
+      capturado en un hilo aparte con otra conexión del pool, una vez por
+      SQL normalizado; el request no espera el EXPLAIN
+
+Las entradas quedan en un ring buffer en memoria por proceso
+(SLOW_QUERY_BUFFER_SIZE) y se consultan en GET /diagnostics/slow-queries
+(ADMIN), junto con un resumen por SQL normalizado para detectar qué
+consultas (p. ej. de ReportsRepository) necesitan índices. También se
+loggean en el logger "pos.slow_query".
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger("pos.slow_query")
+
+# Planes ya capturados por SQL normalizado (los más recientes)
+_MAX_PLANS = 256
+
+# EXPLAIN encolados como máximo; el resto se omite
+_MAX_PENDING_EXPLAINS = 8
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.%])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(r"\(\s*" + _PLACEHOLDER + r"(?:\s*,\s*" + _PLACEHOLDER + r")+\s*\)")
+_NAMED_PLACEHOLDER = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    SQL con literales y placeholders reemplazados por ?, listas IN colapsadas.
+
+    Example:
+        "SELECT * FROM sales WHERE id IN (%(id_1)s, %(id_2)s) AND total > 10"
+        → "SELECT * FROM sales WHERE id IN (...) AND total > ?"
+    """
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    sql = _NAMED_PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return sql
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Tipos de los parámetros (sin valores): {"nombre": "int"} o ["int", "str"]."""
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return {"rows": len(parameters), "row": parameter_shape(parameters[0])}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class SlowQueryLog:
+    """Ring buffer de consultas lentas del proceso con planes capturados en segundo plano."""
+
+    def __init__(self, max_entries: int):
+        self._entries: deque = deque(maxlen=max_entries)
+        self._plans: "OrderedDict[str, str]" = OrderedDict()
+        self._explaining: set = set()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def record(
+        self,
+        engine: Any,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        elapsed_ms: float,
+        route: Optional[str]
+    ) -> None:
+        """Registra una consulta lenta y agenda su EXPLAIN si hace falta."""
+        normalized = normalize_sql(statement)
+        entry = {
+            "recorded_at": datetime.now().isoformat(),
+            "duration_ms": round(elapsed_ms, 1),
+            "route": route,
+            "sql": normalized,
+            "parameters": parameter_shape(parameters, executemany),
+            "plan": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            entry["plan"] = self._plans.get(normalized)
+            needs_plan = (
+                settings.slow_query_explain
+                and entry["plan"] is None
+                and not executemany
+                and normalized not in self._explaining
+                and len(self._explaining) < _MAX_PENDING_EXPLAINS
+                and _is_explainable(statement)
+            )
+            if needs_plan:
+                self._explaining.add(normalized)
+
+        logger.warning(
+            "Consulta lenta (%.1f ms) en %s: %s", elapsed_ms, route or "-", normalized,
+            extra={
+                "db_duration_ms": entry["duration_ms"],
+                "route": route,
+                "normalized_sql": normalized,
+                "parameter_shape": entry["parameters"],
+            }
+        )
+
+        if needs_plan:
+            self._get_executor().submit(self._explain, engine, statement, parameters, normalized)
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict]:
+        """Consultas lentas, las más recientes primero (con el plan si ya se capturó)."""
+        with self._lock:
+            entries = [dict(entry) for entry in reversed(self._entries)]
+            for entry in entries:
+                if entry["plan"] is None:
+                    entry["plan"] = self._plans.get(entry["sql"])
+        return entries[:limit] if limit else entries
+
+    def summary(self) -> List[Dict]:
+        """Resumen por SQL normalizado: cantidad, máxima y promedio, ordenado por tiempo total."""
+        groups: Dict[str, Dict] = {}
+        for entry in self.entries():
+            group = groups.setdefault(entry["sql"], {
+                "sql": entry["sql"], "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "routes": set(), "plan": entry["plan"]
+            })
+            group["count"] += 1
+            group["total_ms"] += entry["duration_ms"]
+            group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+            if entry["route"]:
+                group["routes"].add(entry["route"])
+
+        result = []
+        for group in sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True):
+            group["avg_ms"] = round(group["total_ms"] / group["count"], 1)
+            group["total_ms"] = round(group["total_ms"], 1)
+            group["routes"] = sorted(group["routes"])
+            result.append(group)
+        return result
+
+    def clear(self) -> None:
+        """Vacía el buffer y los planes capturados."""
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+    def wait_for_explains(self) -> None:
+        """Espera los EXPLAIN en curso (tests y apagado)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+            return self._executor
+
+    def _explain(self, engine: Any, statement: str, parameters: Any, normalized: str) -> None:
+        """Captura el plan con una conexión propia (no ejecuta la consulta)."""
+        try:
+            prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+            with engine.connect() as connection:
+                rows = connection.exec_driver_sql(prefix + statement, parameters or ()).all()
+            plan = "\n".join(" ".join(str(column) for column in row) for row in rows)
+        except Exception as e:
+            plan = f"EXPLAIN no disponible: {e}"
+
+        with self._lock:
+            self._explaining.discard(normalized)
+            self._plans[normalized] = plan
+            self._plans.move_to_end(normalized)
+            while len(self._plans) > _MAX_PLANS:
+                self._plans.popitem(last=False)
+            for entry in self._entries:
+                if entry["sql"] == normalized and entry["plan"] is None:
+                    entry["plan"] = plan
+
+
+def _is_explainable(statement: str) -> bool:
+    """Solo lecturas: EXPLAIN de un INSERT/UPDATE no aporta para índices de reportes."""
+    head = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return head in ("SELECT", "WITH")
+
+
+slow_query_log = SlowQueryLog(settings.slow_query_buffer_size)
@@ -16,6 +16,9 @@ Estructura por Dominio:
     - Branch Config: BranchTaxRate, BranchPaymentMethod (config por sucursal)
     - Notifications: Notification, NotificationSetting (alertas en tiempo real)
     - Audit: ConfigChangeLog, SecurityAuditLog (trazabilidad y seguridad)
+    - Jobs: BackgroundJob (cola de trabajos en segundo plano)
+    - Reservations: StockReservation (holds de stock para checkouts e-commerce)
+    - Idempotency: IdempotencyKey (reintentos seguros de creación de ventas)
 
 Enums Disponibles:
     - UserRole: ADMIN, MANAGER, SELLER, ECOMMERCE
@@ -107,6 +110,15 @@ from app.models.audit import (
     ChangeAction
 )
 
+# Import background job models
+from app.models.job import BackgroundJob, JobStatus
+
+# Import stock reservation models
+from app.models.reservation import StockReservation, ReservationStatus
+
+# Import idempotency models
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+
 # Define __all__ for explicit exports
 __all__ = [
     # Enums
@@ -158,4 +170,13 @@ __all__ = [
     "ConfigChangeLog",
     "SecurityAuditLog",
     "ChangeAction",
+    # Background jobs
+    "BackgroundJob",
+    "JobStatus",
+    # Stock reservations
+    "StockReservation",
+    "ReservationStatus",
+    # Idempotency
+    "IdempotencyKey",
+    "IdempotencyStatus",
 ]
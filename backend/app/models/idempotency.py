@@ -0,0 +1,68 @@
+"""
+Modelo de claves de idempotencia para endpoints de creación de ventas.
+
+Un cliente que reintenta un POST (timeout, HTTP 409, doble click) envía el
+mismo header Idempotency-Key: la primera ejecución registra la respuesta y
+los reintentos la reciben sin volver a ejecutar la operación.
+
+Ciclo de vida de una clave:
+    primer request → IN_PROGRESS (reclamada, la operación se ejecuta)
+        → COMPLETED: respuesta guardada, se reproduce en los reintentos
+        → (borrada): la operación falló, el cliente puede reintentar
+    vencida (expires_at) → el sweeper la elimina
+
+Modelos:
+    - IdempotencyStatus: Enum de estados de la clave
+    - IdempotencyKey: Clave reclamada con hash del request y respuesta
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, UniqueConstraint
+from datetime import datetime
+import enum
+from database import Base
+
+
+class IdempotencyStatus(str, enum.Enum):
+    """Estados posibles de una clave de idempotencia."""
+    IN_PROGRESS = "IN_PROGRESS"   # Primera ejecución en curso
+    COMPLETED = "COMPLETED"       # Respuesta guardada para reintentos
+
+
+class IdempotencyKey(Base):
+    """
+    Clave de idempotencia reclamada por un request.
+
+    Attributes:
+        id: ID único
+        scope: Endpoint al que pertenece la clave (ej: "POST /sales/")
+        key: Valor del header Idempotency-Key enviado por el cliente
+        request_hash: SHA-256 del cuerpo del request (detecta reutilización
+            de la clave con otro payload)
+        status: Estado actual (IdempotencyStatus)
+        response_status: Código HTTP de la respuesta guardada
+        response_body: Cuerpo JSON de la respuesta guardada
+        resource_id: ID del recurso creado (ej: la venta), guardado en la
+            misma transacción que lo confirma
+        created_at: Momento del primer request
+        expires_at: A partir de cuándo la clave puede reutilizarse
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String(100), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default=IdempotencyStatus.IN_PROGRESS.value)
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    resource_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # La unicidad es la que serializa requests duplicados concurrentes
+        UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+        # Sweeper: claves vencidas
+        Index("idx_idempotency_keys_expires", "expires_at"),
+        {"extend_existing": True},
+    )
@@ -38,17 +38,19 @@ Reglas de negocio críticas:
     - SIEMPRE actualizar via BranchStock o ProductSize
     - TODO movimiento debe generar InventoryMovement
     - Stock negativo está prohibido (validar antes de descontar)
-    - Stock reservado se implementa a futuro (columna comentada)
+    - Stock reservado (reserved_stock) lo mantiene ReservationService;
+      disponible = stock_quantity - reserved_stock
 
 Note:
     La suma de BranchStock.stock_quantity de todas las sucursales
     debe coincidir con Product.stock_quantity calculado.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from database import Base
+from utils.size_validators import size_sort_rank
 
 
 class BranchStock(Base):
@@ -87,7 +89,7 @@ class BranchStock(Base):
     Business Rules:
         - Un producto puede tener múltiples BranchStock (uno por sucursal)
         - Stock negativo NO permitido (validar antes de descontar)
-        - reserved_stock (comentado) se implementará para reservas de e-commerce
+        - reserved_stock: unidades retenidas por checkouts e-commerce pendientes
         - Al vender en POS, descontar de BranchStock de esa sucursal
         - Al vender en e-commerce, descontar de sucursal con mayor stock
         - Transferencias entre sucursales: descontar origen, sumar destino
@@ -179,13 +181,15 @@ class BranchStock(Base):
             "Cuando stock_quantity < min_stock, notificar al manager."
     )
     
-    # FUTURO: Stock reservado para pedidos online pendientes
-    # reserved_stock = Column(
-    #     Integer, 
-    #     default=0,
-    #     doc="Stock reservado para pedidos de e-commerce pendientes de pago. "
-    #         "available_stock = stock_quantity - reserved_stock"
-    # )
+    reserved_stock = Column(
+        Integer, 
+        default=0,
+        server_default="0",
+        nullable=False,
+        doc="Stock reservado para pedidos de e-commerce pendientes de pago. "
+            "available_stock = stock_quantity - reserved_stock. "
+            "Mantenido por ReservationService junto con StockReservation."
+    )
     
     # ===== AUDITORÍA Y CONCURRENCIA =====
     
@@ -233,6 +237,8 @@ class BranchStock(Base):
         # para (branch_id, product_id) pero está implícito en el negocio
         # TODO: Agregar en próxima migración:
         # UniqueConstraint('branch_id', 'product_id', name='uq_branch_product')
+        # Cursor de sincronización incremental del catálogo por sucursal
+        Index("ix_branch_stock_branch_updated_at", "branch_id", "updated_at"),
         {"extend_existing": True},
     )
     
@@ -241,27 +247,20 @@ class BranchStock(Base):
     @property
     def available_stock(self) -> int:
         """
-        Stock disponible para venta (por ahora igual a stock_quantity).
+        Stock disponible para venta (descontando reservas de e-commerce).
         
-        En el futuro, cuando se implemente reserved_stock:
-            available_stock = stock_quantity - reserved_stock
+        available_stock = stock_quantity - reserved_stock
         
         Returns:
             int: Cantidad disponible para venta inmediata
         
         Example:
             >>> branch_stock.stock_quantity = 100
-            >>> branch_stock.available_stock
-            100
-            
-            # Futuro con reservas:
             >>> branch_stock.reserved_stock = 20
             >>> branch_stock.available_stock
             80
         """
-        # TODO: Cuando se implemente reserved_stock:
-        # return self.stock_quantity - (self.reserved_stock or 0)
-        return self.stock_quantity
+        return (self.stock_quantity or 0) - (self.reserved_stock or 0)
     
     # ===== MÉTODOS DE NEGOCIO =====
     
@@ -270,7 +269,7 @@ class BranchStock(Base):
         Verifica si hay stock suficiente para una cantidad solicitada.
         
         Usa available_stock en lugar de stock_quantity para considerar
-        stock reservado cuando se implemente.
+        stock reservado.
         
         Args:
             quantity: Cantidad solicitada para venta o reserva
@@ -510,7 +509,8 @@ class InventoryMovement(Base):
     created_at = Column(
         DateTime, 
         default=func.now(),
-        index=True,  # Índice para ordenar por fecha
+        nullable=False,
+        index=True,  # Índice para ordenar por fecha; clave de partición mensual (PostgreSQL)
         doc="Timestamp del movimiento (inmutable, NO debe actualizarse)"
     )
     
@@ -597,7 +597,9 @@ class ProductSize(Base):
         product_id (int): ID del producto padre (FK → products.id)
         branch_id (int): ID de la sucursal (FK → branches.id)
         size (str): Denominación del talle (XS, S, M, 35, 36, etc.)
+        sort_rank (int): Rango de orden del talle (derivado de size)
         stock_quantity (int): Cantidad disponible de este talle
+        reserved_stock (int): Unidades reservadas por checkouts pendientes
         created_at (datetime): Timestamp de creación
         updated_at (datetime): Timestamp de última modificación
     
@@ -711,6 +713,14 @@ class ProductSize(Base):
         doc="Denominación del talle: XS, S, M, L, XL, 35, 36, 37, etc."
     )
     
+    sort_rank = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+        doc="Rango de orden del talle (size_sort_rank): numéricos, luego XS..XXL, luego otros"
+    )
+    
     stock_quantity = Column(
         Integer, 
         default=0, 
@@ -718,6 +728,14 @@ class ProductSize(Base):
         doc="Cantidad disponible de este talle específico en esta sucursal"
     )
     
+    reserved_stock = Column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False,
+        doc="Unidades de este talle reservadas por pedidos e-commerce pendientes"
+    )
+    
     # ===== AUDITORÍA Y CONCURRENCIA =====
     
     # TODO: Re-enable when migration is applied in production
@@ -761,9 +779,26 @@ class ProductSize(Base):
         # para (product_id, branch_id, size) pero está implícito
         # TODO: Agregar en próxima migración:
         # UniqueConstraint('product_id', 'branch_id', 'size', name='uq_product_branch_size')
+        # Cursor de sincronización incremental del catálogo por sucursal
+        Index("ix_product_sizes_branch_updated_at", "branch_id", "updated_at"),
+        # Talles de un producto en una sucursal ya ordenados
+        Index("ix_product_sizes_product_branch_rank", "product_id", "branch_id", "sort_rank"),
         {"extend_existing": True},
     )
     
+    @validates("size")
+    def _set_sort_rank(self, key: str, size: str) -> str:
+        """Mantiene sort_rank sincronizado con el talle."""
+        self.sort_rank = size_sort_rank(size)
+        return size
+    
+    # ===== PROPIEDADES CALCULADAS =====
+    
+    @property
+    def available_stock(self) -> int:
+        """Stock del talle disponible para venta (stock_quantity - reserved_stock)."""
+        return (self.stock_quantity or 0) - (self.reserved_stock or 0)
+    
     # ===== REPRESENTACIÓN =====
     
     def __repr__(self) -> str:
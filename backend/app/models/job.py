@@ -0,0 +1,125 @@
+"""
+Modelos de cola de trabajos en segundo plano para POS Cesariel.
+
+Cola durable respaldada en PostgreSQL para operaciones pesadas que no deben
+ejecutarse dentro de una request HTTP (importaciones masivas, actualizaciones
+de precios, limpiezas, generación de reportes).
+
+Flujo de un trabajo:
+    API encola → background_jobs (PENDING)
+        → job_worker.py reclama con FOR UPDATE SKIP LOCKED (RUNNING)
+        → handler reporta progreso / chequea cancelación
+        → COMPLETED | FAILED | CANCELLED (o PENDING de nuevo si hay reintento)
+
+Modelos:
+    - JobStatus: Enum de estados del trabajo
+    - BackgroundJob: Trabajo encolado con payload, progreso y resultado
+"""
+
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, LargeBinary, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+import enum
+from database import Base
+
+
+class JobStatus(str, enum.Enum):
+    """Estados posibles de un trabajo en segundo plano."""
+    PENDING = "PENDING"       # Encolado, esperando worker (o reintento programado)
+    RUNNING = "RUNNING"       # Reclamado por un worker
+    COMPLETED = "COMPLETED"   # Finalizado exitosamente
+    FAILED = "FAILED"         # Agotó los reintentos
+    CANCELLED = "CANCELLED"   # Cancelado por el usuario
+
+
+class BackgroundJob(Base):
+    """
+    Trabajo en segundo plano persistido en base de datos.
+
+    Attributes:
+        id: ID único
+        job_type: Tipo de trabajo (nombre del handler registrado, ej: "product_import")
+        status: Estado actual (JobStatus)
+        priority: Prioridad (mayor valor = se ejecuta antes)
+        payload: Parámetros del trabajo en JSON
+        input_data: Archivo adjunto opcional (ej: Excel/CSV a importar)
+        result: Resultado del trabajo en JSON (al completar)
+        progress: Porcentaje de avance (0-100)
+        progress_message: Descripción del paso actual
+        attempts: Intentos realizados
+        max_attempts: Máximo de intentos antes de marcar FAILED
+        error_details: Último error ocurrido
+        cancel_requested: Flag de cancelación cooperativa para trabajos RUNNING
+        run_after: No ejecutar antes de este instante (backoff de reintentos)
+        locked_by: Identificador del worker que lo reclamó
+        locked_at: Instante del reclamo (para detectar workers caídos)
+        user_id: Usuario que encoló el trabajo (NULL = sistema)
+        created_at / started_at / completed_at: Timestamps del ciclo de vida
+
+    Ejemplo:
+        BackgroundJob(
+            job_type="product_import",
+            priority=0,
+            payload={"filename": "productos.xlsx", "import_log_id": 12},
+            input_data=file_bytes,
+            user_id=3
+        )
+    """
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Tipo, estado y prioridad
+    job_type = Column(String(50), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default=JobStatus.PENDING.value)
+    priority = Column(Integer, nullable=False, default=0)
+
+    # Entrada y salida
+    payload = Column(JSON, nullable=True,
+                     doc="Parámetros del trabajo en formato JSON")
+    input_data = Column(LargeBinary, nullable=True,
+                        doc="Archivo adjunto (se libera al finalizar el trabajo)")
+    result = Column(JSON, nullable=True,
+                    doc="Resultado del trabajo en formato JSON")
+
+    # Progreso
+    progress = Column(Integer, nullable=False, default=0)
+    progress_message = Column(String(255), nullable=True)
+
+    # Reintentos y errores
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    error_details = Column(Text, nullable=True)
+
+    # Control de ejecución
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+
+    # Auditoría
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+    # Relaciones
+    user = relationship("User")
+
+    __table_args__ = (
+        # Índice para el reclamo del worker:
+        # WHERE status = 'PENDING' AND run_after <= now ORDER BY priority DESC, id
+        Index("idx_background_jobs_claim", "status", "priority", "run_after"),
+        {"extend_existing": True},
+    )
+
+    def is_finished(self) -> bool:
+        """Verifica si el trabajo llegó a un estado terminal."""
+        return self.status in (
+            JobStatus.COMPLETED.value,
+            JobStatus.FAILED.value,
+            JobStatus.CANCELLED.value,
+        )
+
+    def __repr__(self):
+        return f"<BackgroundJob {self.id}: {self.job_type} ({self.status}, {self.progress}%)>"
@@ -5,7 +5,7 @@ This module contains product-related models including Category and Product entit
 which handle inventory management, pricing, and product catalog.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -72,6 +72,7 @@ class Product(Base):
         price (decimal): Precio de venta en POS (10 dígitos, 2 decimales)
         cost (decimal): Costo del producto para cálculo de margen
         stock_quantity (int): Stock general del producto (suma de todas las sucursales)
+        reserved_stock (int): Stock retenido por reservas e-commerce activas
         min_stock (int): Stock mínimo para alertas de reposición
         is_active (bool): Estado activo/inactivo del producto
         show_in_ecommerce (bool): Visibilidad en tienda online
@@ -124,6 +125,8 @@ class Product(Base):
     # Control de inventario
     stock_quantity = Column(Integer, default=0,
                             doc="Stock global calculado (suma de todas las sucursales)")
+    reserved_stock = Column(Integer, default=0, server_default="0", nullable=False,
+                            doc="Unidades reservadas por checkouts e-commerce pendientes (todas las sucursales)")
     min_stock = Column(Integer, default=0,
                        doc="Stock mínimo global para alertas de reposición")
     
@@ -160,6 +163,11 @@ class Product(Base):
                                 doc="Talles/variantes disponibles del producto")
     product_images = relationship("ProductImage", back_populates="product",
                                  doc="Imágenes adicionales del producto")
+
+    __table_args__ = (
+        # Cursor de sincronización incremental del catálogo (GET /products/sync)
+        Index("ix_products_updated_at_id", "updated_at", "id"),
+    )
     
     def get_stock_for_branch(self, branch_id):
         """
@@ -174,19 +182,7 @@ class Product(Base):
         """
         if self.has_sizes:
             # Para productos con talles, sumar stock de ProductSize de la sucursal
-            from sqlalchemy.orm import Session
-            from sqlalchemy import func as sqlalchemy_func
-            from database import SessionLocal
-            from app.models.inventory import ProductSize  # Import necesario para la query
-            db = SessionLocal()
-            try:
-                total = db.query(sqlalchemy_func.sum(ProductSize.stock_quantity)).filter(
-                    ProductSize.product_id == self.id,
-                    ProductSize.branch_id == branch_id
-                ).scalar() or 0
-                return int(total)
-            finally:
-                db.close()
+            return self._size_stock_total(branch_id)
         else:
             # Para productos sin talles, usar BranchStock
             branch_stock = next((bs for bs in self.branch_stocks if bs.branch_id == branch_id), None)
@@ -221,47 +217,51 @@ class Product(Base):
         """
         if self.has_sizes:
             # Para productos con talles, sumar todo el stock de ProductSize
-            from sqlalchemy.orm import Session
-            from sqlalchemy import func as sqlalchemy_func
-            from database import SessionLocal
-            from app.models.inventory import ProductSize
-            db = SessionLocal()
-            try:
-                total = db.query(sqlalchemy_func.sum(ProductSize.stock_quantity)).filter(
-                    ProductSize.product_id == self.id
-                ).scalar() or 0
-                return int(total)
-            finally:
-                db.close()
+            return self._size_stock_total()
         else:
             # Para productos sin talles, sumar BranchStock
             return sum(bs.stock_quantity for bs in self.branch_stocks)
     
+    def _size_stock_total(self, branch_id=None):
+        """
+        Suma de ProductSize.stock_quantity (de una sucursal o de todas).
+
+        Usa la sesión que cargó el producto; solo abre una sesión propia si
+        el producto está desasociado (antes cada escaneo tomaba una segunda
+        conexión del pool).
+        """
+        from sqlalchemy import func as sqlalchemy_func
+        from sqlalchemy.orm import object_session
+        from app.models.inventory import ProductSize
+
+        session = object_session(self)
+        db = session
+        if db is None:
+            from database import SessionLocal
+            db = SessionLocal()
+        try:
+            query = db.query(sqlalchemy_func.sum(ProductSize.stock_quantity)).filter(
+                ProductSize.product_id == self.id
+            )
+            if branch_id is not None:
+                query = query.filter(ProductSize.branch_id == branch_id)
+            return int(query.scalar() or 0)
+        finally:
+            if session is None:
+                db.close()
+
     def calculate_total_available_stock(self):
         """
-        Calcula el stock disponible total sumando todas las sucursales.
-        Para productos con talles, suma ProductSize, sino suma BranchStock.
+        Calcula el stock disponible total de todas las sucursales.
+        
+        Lectura O(1) sobre contadores mantenidos: stock_quantity (triggers
+        de delta sobre BranchStock/ProductSize) menos reserved_stock
+        (ReservationService). No consulta las tablas de stock.
         
         Returns:
             int: Stock disponible total del producto
         """
-        if self.has_sizes:
-            # Para productos con talles, sumar todo el stock de ProductSize (sin reserved_stock por ahora)
-            from sqlalchemy.orm import Session
-            from sqlalchemy import func as sqlalchemy_func
-            from database import SessionLocal
-            from app.models.inventory import ProductSize
-            db = SessionLocal()
-            try:
-                total = db.query(sqlalchemy_func.sum(ProductSize.stock_quantity)).filter(
-                    ProductSize.product_id == self.id
-                ).scalar() or 0
-                return int(total)
-            finally:
-                db.close()
-        else:
-            # Para productos sin talles, sumar BranchStock disponible
-            return sum(bs.available_stock for bs in self.branch_stocks)
+        return max(0, (self.stock_quantity or 0) - (self.reserved_stock or 0))
     
     def has_stock_in_branch(self, branch_id, quantity=1):
         """
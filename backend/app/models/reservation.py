@@ -0,0 +1,86 @@
+"""
+Modelos de reservas de stock para checkouts de e-commerce.
+
+Un pedido e-commerce PENDING retiene stock durante un tiempo limitado (TTL)
+para que pedidos concurrentes no vendan las mismas unidades mientras se
+coordina el pago por WhatsApp.
+
+Ciclo de vida de una reserva:
+    checkout → ACTIVE (reserved_stock += cantidad)
+        → CONVERTED: pago confirmado, se descuenta stock_quantity y reserved_stock
+        → RELEASED: pedido cancelado, se libera reserved_stock
+        → EXPIRED: venció el TTL sin confirmación (sweeper), se libera reserved_stock
+
+Contadores mantenidos (lecturas O(1)):
+    - BranchStock.reserved_stock / ProductSize.reserved_stock por ubicación
+    - Product.reserved_stock total del producto
+
+Modelos:
+    - ReservationStatus: Enum de estados de la reserva
+    - StockReservation: Reserva de un producto/talle en una sucursal
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+import enum
+from database import Base
+
+
+class ReservationStatus(str, enum.Enum):
+    """Estados posibles de una reserva de stock."""
+    ACTIVE = "ACTIVE"         # Reteniendo stock hasta expires_at
+    CONVERTED = "CONVERTED"   # Convertida en descuento real al confirmar la venta
+    RELEASED = "RELEASED"     # Liberada por cancelación del pedido
+    EXPIRED = "EXPIRED"       # Liberada por el sweeper al vencer el TTL
+
+
+class StockReservation(Base):
+    """
+    Reserva de stock de un producto (y talle) en una sucursal para una venta.
+
+    Attributes:
+        id: ID único
+        sale_id: Venta e-commerce que origina la reserva
+        product_id: Producto reservado
+        branch_id: Sucursal donde se retiene el stock
+        size: Talle reservado (NULL para productos sin talles)
+        quantity: Unidades reservadas
+        status: Estado actual (ReservationStatus)
+        expires_at: Vencimiento del hold (lo libera el sweeper)
+        created_at: Momento del checkout
+        resolved_at: Momento de conversión, liberación o expiración
+    """
+    __tablename__ = "stock_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sale_id = Column(Integer, nullable=False, index=True)  # Sin FK: sales está particionada
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
+    size = Column(String(10), nullable=True)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default=ReservationStatus.ACTIVE.value)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    resolved_at = Column(DateTime, nullable=True)
+
+    sale = relationship("Sale", primaryjoin="Sale.id == foreign(StockReservation.sale_id)")
+    product = relationship("Product")
+    branch = relationship("Branch")
+
+    __table_args__ = (
+        # Sweeper: reservas activas por vencimiento
+        Index("idx_stock_reservations_status_expires", "status", "expires_at"),
+        {"extend_existing": True},
+    )
+
+    def is_active(self) -> bool:
+        """True si la reserva todavía retiene stock."""
+        return self.status == ReservationStatus.ACTIVE.value
+
+    def __repr__(self) -> str:
+        return (
+            f"<StockReservation(sale_id={self.sale_id}, product_id={self.product_id}, "
+            f"branch_id={self.branch_id}, size={self.size}, quantity={self.quantity}, "
+            f"status={self.status})>"
+        )
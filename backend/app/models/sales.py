@@ -58,7 +58,7 @@ See Also:
     - app/services/sales_service.py: Lógica de negocio
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Numeric, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Numeric, Enum, event, inspect, select
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -127,6 +127,11 @@ class Sale(Base):
         
         # === E-COMMERCE ===
         order_status (OrderStatus): Estado del pedido (NULL para POS)
+        fulfillment_policy (str): Política que asignó el pedido a sucursales
+        shipment_count (int): Cantidad de sucursales que envían el pedido
+        
+        # === SINCRONIZACIÓN OFFLINE ===
+        client_uuid (str): UUID de la caja para ventas cargadas sin conexión
         
         # === NOTAS ===
         notes (str): Observaciones adicionales de la venta
@@ -345,6 +350,29 @@ class Sale(Base):
             "Valores: PENDING, PROCESSING, SHIPPED, DELIVERED, CANCELLED"
     )
     
+    fulfillment_policy = Column(
+        String(30),
+        nullable=True,
+        doc="Política de asignación a sucursales usada (FulfillmentService). NULL para POS"
+    )
+    
+    shipment_count = Column(
+        Integer,
+        nullable=True,
+        doc="Cantidad de sucursales que envían el pedido e-commerce. NULL para POS"
+    )
+
+    # ===== SINCRONIZACIÓN OFFLINE =====
+
+    client_uuid = Column(
+        String(36),
+        nullable=True,
+        unique=True,
+        index=True,
+        doc="UUID generado por la caja para ventas registradas sin conexión. "
+            "Evita duplicar la venta si la caja reenvía el lote. NULL para ventas online"
+    )
+
     # ===== IMPUESTOS (SNAPSHOT PARA TRAZABILIDAD) =====
     
     tax_rate_id = Column(
@@ -378,7 +406,8 @@ class Sale(Base):
     created_at = Column(
         DateTime, 
         default=func.now(),
-        index=True,  # Índice para reportes por fecha
+        nullable=False,
+        index=True,  # Índice para reportes por fecha; clave de partición mensual (PostgreSQL)
         doc="Timestamp de creación de la venta (fecha y hora de la transacción)"
     )
     
@@ -405,6 +434,7 @@ class Sale(Base):
     
     sale_items = relationship(
         "SaleItem", 
+        primaryjoin="Sale.id == foreign(SaleItem.sale_id)",
         back_populates="sale",
         cascade="all, delete-orphan",  # Al eliminar Sale, eliminar sus SaleItems
         doc="Lista de productos vendidos en esta transacción (líneas de venta)"
@@ -509,16 +539,18 @@ class SaleItem(Base):
     
     Attributes:
         id (int): Identificador único de la línea
-        sale_id (int): ID de la venta padre (FK → sales.id)
+        sale_id (int): ID de la venta padre (sales.id; sin FK, sales está particionada)
         product_id (int): ID del producto vendido (FK → products.id)
         quantity (int): Cantidad vendida del producto
         unit_price (Decimal): Precio unitario al momento de venta (snapshot)
         total_price (Decimal): Precio total (quantity * unit_price)
         size (str): Talle específico si aplica (XS, S, M, L, 35, 36, etc.)
+        fulfillment_branch_id (int): Sucursal que envía la línea (e-commerce)
     
     Relationships:
         sale: Venta padre que contiene esta línea
         product: Producto vendido (para acceder a nombre, SKU, etc.)
+        fulfillment_branch: Sucursal que envía la línea
     
     Business Rules:
         - unit_price es snapshot (NO reflejar Product.price actual)
@@ -612,10 +644,9 @@ class SaleItem(Base):
     
     sale_id = Column(
         Integer, 
-        ForeignKey("sales.id"),
         nullable=False,
         index=True,  # Índice para queries por venta
-        doc="ID de la venta padre a la que pertenece esta línea"
+        doc="ID de la venta padre a la que pertenece esta línea (sin FK: sales está particionada)"
     )
     
     product_id = Column(
@@ -656,10 +687,32 @@ class SaleItem(Base):
             "Obligatorio si Product.has_sizes = True, NULL si has_sizes = False"
     )
     
+    # ===== FULFILLMENT (E-COMMERCE) =====
+    
+    fulfillment_branch_id = Column(
+        Integer,
+        ForeignKey("branches.id"),
+        nullable=True,
+        index=True,  # Índice para picking por sucursal
+        doc="Sucursal desde la que se envía esta línea. Una línea que no entra en una "
+            "sola sucursal se divide en varios SaleItems. NULL para POS (usa Sale.branch_id)"
+    )
+    
+    # ===== AUDITORÍA =====
+
+    created_at = Column(
+        DateTime,
+        default=func.now(),
+        nullable=False,
+        doc="Copia de Sale.created_at (la asigna _copy_sale_created_at). Clave de partición: "
+            "la línea cae en la misma partición mensual que su venta"
+    )
+    
     # ===== RELACIONES =====
     
     sale = relationship(
         "Sale", 
+        primaryjoin="Sale.id == foreign(SaleItem.sale_id)",
         back_populates="sale_items",
         doc="Venta padre que contiene esta línea (permite acceder a Sale.sale_number, totales, etc.)"
     )
@@ -670,6 +723,12 @@ class SaleItem(Base):
         doc="Producto vendido en esta línea (permite acceder a Product.name, SKU, categoría, etc.)"
     )
     
+    fulfillment_branch = relationship(
+        "Branch",
+        foreign_keys=[fulfillment_branch_id],
+        doc="Sucursal que envía esta línea (e-commerce)"
+    )
+    
     # ===== MÉTODOS DE NEGOCIO =====
     
     def validate_total_price(self) -> bool:
@@ -718,3 +777,28 @@ class SaleItem(Base):
             f"{size_info}"
             f")>"
         )
+
+
+@event.listens_for(SaleItem, "before_insert")
+def _copy_sale_created_at(mapper, connection, target):
+    """
+    sale_items se particiona por mes igual que sales: cada línea lleva el
+    created_at de su venta para caer en la partición del mismo mes y que los
+    reportes filtren ambas tablas por el mismo rango.
+
+    La venta ya está insertada (el flush inserta Sale antes que sus líneas);
+    si su created_at no quedó cargado en la sesión se lee con la conexión
+    del flush.
+    """
+    if target.created_at is not None:
+        return
+    sale = inspect(target).dict.get("sale")
+    if sale is not None:
+        created_at = inspect(sale).dict.get("created_at")
+        if created_at is not None:
+            target.created_at = created_at
+            return
+    if target.sale_id is not None:
+        target.created_at = connection.execute(
+            select(Sale.__table__.c.created_at).where(Sale.__table__.c.id == target.sale_id)
+        ).scalar()
@@ -5,7 +5,7 @@ This module contains user-related models including Branch and User entities,
 which handle multi-branch management and role-based access control.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Numeric
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -26,6 +26,8 @@ class Branch(Base):
         phone (str): Número de teléfono de contacto (máx. 20 caracteres)
         email (str): Email de contacto de la sucursal (máx. 100 caracteres)
         is_active (bool): Indica si la sucursal está activa operativamente
+        latitude (Decimal): Latitud para asignar pedidos e-commerce por cercanía
+        longitude (Decimal): Longitud para asignar pedidos e-commerce por cercanía
         created_at (datetime): Fecha y hora de creación del registro
         updated_at (datetime): Fecha y hora de última modificación
         
@@ -46,6 +48,10 @@ class Branch(Base):
                    doc="Número de teléfono de contacto")
     email = Column(String(100),
                    doc="Email de contacto institucional")
+    latitude = Column(Numeric(9, 6), nullable=True,
+                      doc="Latitud (política de fulfillment nearest)")
+    longitude = Column(Numeric(9, 6), nullable=True,
+                       doc="Longitud (política de fulfillment nearest)")
     
     # Campos de control
     is_active = Column(Boolean, default=True,
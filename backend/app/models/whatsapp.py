@@ -10,7 +10,7 @@ Modelos:
     - SocialMediaConfig: Enlaces a redes sociales (Instagram, Facebook, etc.)
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Numeric
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -78,7 +78,7 @@ class WhatsAppSale(Base):
     
     Attributes:
         id: ID único
-        sale_id: ID de la venta (FK → sales.id)
+        sale_id: ID de la venta (sales.id; sin FK, sales está particionada)
         customer_whatsapp: Número de WhatsApp del cliente
         customer_name: Nombre del cliente
         customer_address: Dirección de envío (si aplica)
@@ -102,7 +102,7 @@ class WhatsAppSale(Base):
     __tablename__ = "whatsapp_sales"
     
     id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
+    sale_id = Column(Integer, nullable=False)  # Sin FK: sales está particionada
     
     # Información del cliente
     customer_whatsapp = Column(String(20), nullable=False)
@@ -122,7 +122,7 @@ class WhatsAppSale(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relación
-    sale = relationship("Sale")
+    sale = relationship("Sale", primaryjoin="Sale.id == foreign(WhatsAppSale.sale_id)")
     
     __table_args__ = ({"extend_existing": True},)
 
@@ -20,6 +20,8 @@ Repositories Disponibles:
     - Notification: Sistema de notificaciones
     - Config: Configuraciones por sucursal y audit logs
     - Reports: Analíticas y reportes empresariales
+    - SalesArchive: Meses de ventas archivados en Parquet (reportes incluidos)
+    - Job: Cola durable de trabajos en segundo plano
 
 Uso:
     from app.repositories import ProductRepository
@@ -52,6 +54,8 @@ from app.repositories.config import (
     SecurityAuditLogRepository
 )
 from app.repositories.reports import ReportsRepository
+from app.repositories.sales_archive import SalesArchive, ArchiveAwareReportsRepository
+from app.repositories.job import BackgroundJobRepository
 
 __all__ = [
     "BaseRepository",
@@ -78,4 +82,7 @@ __all__ = [
     "ConfigChangeLogRepository",
     "SecurityAuditLogRepository",
     "ReportsRepository",
+    "SalesArchive",
+    "ArchiveAwareReportsRepository",
+    "BackgroundJobRepository",
 ]
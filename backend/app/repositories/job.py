@@ -0,0 +1,180 @@
+"""
+Repository de Trabajos en Segundo Plano.
+
+Acceso a datos para la cola durable de trabajos (background_jobs).
+
+Características:
+    - Reclamo atómico con FOR UPDATE SKIP LOCKED (varios workers sin bloquearse)
+    - Orden por prioridad y antigüedad
+    - Recuperación de trabajos huérfanos (worker caído con lease vencido)
+    - Purga de trabajos finalizados antiguos
+"""
+
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import desc, asc, func
+from datetime import datetime, timedelta
+from app.models.job import BackgroundJob, JobStatus
+from app.repositories.base import BaseRepository
+
+
+class BackgroundJobRepository(BaseRepository[BackgroundJob]):
+    """
+    Repository para la cola de trabajos en segundo plano.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(BackgroundJob, db)
+
+    def claim_next(
+        self,
+        worker_id: str,
+        job_types: Optional[List[str]] = None
+    ) -> Optional[BackgroundJob]:
+        """
+        Reclama el próximo trabajo pendiente y lo marca RUNNING.
+
+        Usa SELECT ... FOR UPDATE SKIP LOCKED para que varios workers puedan
+        reclamar en paralelo sin esperar locks entre ellos. Confirma la
+        transacción antes de retornar para liberar el lock de fila de inmediato.
+
+        Args:
+            worker_id: Identificador del worker que reclama
+            job_types: Restringir a estos tipos (None = todos)
+
+        Returns:
+            Trabajo reclamado o None si la cola está vacía
+        """
+        now = datetime.utcnow()
+        query = self.db.query(BackgroundJob).filter(
+            BackgroundJob.status == JobStatus.PENDING.value,
+            BackgroundJob.run_after <= now
+        )
+        if job_types:
+            query = query.filter(BackgroundJob.job_type.in_(job_types))
+
+        job = query.order_by(
+            desc(BackgroundJob.priority),
+            asc(BackgroundJob.id)
+        ).with_for_update(skip_locked=True).first()
+
+        if not job:
+            self.db.rollback()
+            return None
+
+        job.status = JobStatus.RUNNING.value
+        job.attempts = (job.attempts or 0) + 1
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.started_at = job.started_at or now
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """
+        Renueva el lease (locked_at) de un trabajo RUNNING de este worker.
+
+        Returns:
+            False si el trabajo ya no pertenece al worker (reencolado,
+            cancelado o terminado)
+        """
+        updated = self.db.query(BackgroundJob).filter(
+            BackgroundJob.id == job_id,
+            BackgroundJob.status == JobStatus.RUNNING.value,
+            BackgroundJob.locked_by == worker_id
+        ).update({BackgroundJob.locked_at: datetime.utcnow()}, synchronize_session=False)
+        self.db.commit()
+        return updated > 0
+
+    def get_by_user(
+        self,
+        user_id: Optional[int] = None,
+        job_type: Optional[str] = None,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50
+    ) -> List[BackgroundJob]:
+        """Listar trabajos (de un usuario o todos) más recientes primero."""
+        query = self.db.query(BackgroundJob)
+        if user_id is not None:
+            query = query.filter(BackgroundJob.user_id == user_id)
+        if job_type:
+            query = query.filter(BackgroundJob.job_type == job_type)
+        if status:
+            query = query.filter(BackgroundJob.status == status)
+        return query.order_by(desc(BackgroundJob.id)).offset(skip).limit(limit).all()
+
+    def count_pending(self) -> int:
+        """Cantidad de trabajos esperando worker (profundidad de la cola)."""
+        return self.db.query(BackgroundJob).filter(
+            BackgroundJob.status == JobStatus.PENDING.value
+        ).count()
+
+    def count_active_by_type(self) -> List[Tuple[str, str, int]]:
+        """Trabajos PENDING/RUNNING agrupados por tipo y estado: [(job_type, status, cantidad)]."""
+        return self.db.query(
+            BackgroundJob.job_type, BackgroundJob.status, func.count(BackgroundJob.id)
+        ).filter(
+            BackgroundJob.status.in_([JobStatus.PENDING.value, JobStatus.RUNNING.value])
+        ).group_by(BackgroundJob.job_type, BackgroundJob.status).all()
+
+    def requeue_stale(self, lease_seconds: int) -> int:
+        """
+        Devuelve a PENDING los trabajos RUNNING cuyo worker dejó de reportar.
+
+        El heartbeat del worker (JobHeartbeat) renueva locked_at mientras el
+        handler corre, reporte o no progreso; si el lease vence se asume que
+        el proceso murió y el trabajo vuelve a la cola (cuenta
+        como intento consumido).
+
+        Los que ya agotaron max_attempts se marcan FAILED en lugar de
+        reencolarse, para que un trabajo que tumba al worker no cicle
+        indefinidamente.
+
+        Returns:
+            Cantidad de trabajos reencolados
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=lease_seconds)
+        stale = self.db.query(BackgroundJob).filter(
+            BackgroundJob.status == JobStatus.RUNNING.value,
+            BackgroundJob.locked_at < cutoff
+        )
+
+        stale.filter(BackgroundJob.attempts >= BackgroundJob.max_attempts).update(
+            {
+                BackgroundJob.status: JobStatus.FAILED.value,
+                BackgroundJob.locked_by: None,
+                BackgroundJob.locked_at: None,
+                BackgroundJob.completed_at: now,
+                BackgroundJob.error_details: "Worker sin respuesta y sin reintentos disponibles",
+            },
+            synchronize_session=False
+        )
+
+        count = stale.filter(BackgroundJob.attempts < BackgroundJob.max_attempts).update(
+            {
+                BackgroundJob.status: JobStatus.PENDING.value,
+                BackgroundJob.locked_by: None,
+                BackgroundJob.locked_at: None,
+                BackgroundJob.error_details: "Worker sin respuesta, trabajo reencolado",
+            },
+            synchronize_session=False
+        )
+        self.db.commit()
+        return count
+
+    def purge_finished(self, days: int = 30) -> int:
+        """Eliminar trabajos finalizados hace más de `days` días."""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        count = self.db.query(BackgroundJob).filter(
+            BackgroundJob.status.in_([
+                JobStatus.COMPLETED.value,
+                JobStatus.FAILED.value,
+                JobStatus.CANCELLED.value,
+            ]),
+            BackgroundJob.completed_at < cutoff
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return count
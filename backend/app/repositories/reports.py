@@ -20,7 +20,7 @@ Tipos de Reportes:
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import and_, func, desc
 from datetime import datetime
 from decimal import Decimal
 from typing import List, Optional, Dict, Any
@@ -31,6 +31,15 @@ from app.models import (
 )
 
 
+def _items_in_period(start: datetime, end: datetime) -> tuple:
+    """
+    Mismo rango sobre sale_items.created_at (copia del created_at de su
+    venta): con las tablas particionadas por mes, PostgreSQL descarta las
+    particiones fuera del período también en sale_items, no sólo en sales.
+    """
+    return (SaleItem.created_at >= start, SaleItem.created_at <= end)
+
+
 class ReportsRepository:
     """
     Repository for reports and analytics data access.
@@ -203,9 +212,10 @@ class ReportsRepository:
             Product.name,
             func.sum(SaleItem.quantity).label('total_quantity'),
             func.sum(SaleItem.total_price).label('total_revenue')
-        ).join(SaleItem).join(Sale).filter(
+        ).join(SaleItem).join(SaleItem.sale).filter(
             Sale.created_at >= start,
             Sale.created_at <= end,
+            *_items_in_period(start, end),
             Sale.order_status != OrderStatus.CANCELLED,
             Sale.order_status != OrderStatus.PENDING
         )
@@ -247,9 +257,10 @@ class ReportsRepository:
         query = self.db.query(
             Product.name,
             func.sum(SaleItem.quantity).label('total_quantity')
-        ).join(SaleItem).join(Sale).filter(
+        ).join(SaleItem).join(SaleItem.sale).filter(
             Sale.created_at >= start,
             Sale.created_at <= end,
+            *_items_in_period(start, end),
             Sale.order_status != OrderStatus.CANCELLED,
             Sale.order_status != OrderStatus.PENDING
         )
@@ -301,6 +312,7 @@ class ReportsRepository:
         ).filter(
             Sale.created_at >= start,
             Sale.created_at <= end,
+            *_items_in_period(start, end),
             Sale.order_status != OrderStatus.CANCELLED,
             Sale.order_status != OrderStatus.PENDING,
             Product.brand_id.isnot(None)  # Only products with assigned brand
@@ -515,7 +527,7 @@ class ReportsRepository:
         ).join(
             Branch, Sale.branch_id == Branch.id
         ).outerjoin(
-            SaleItem, SaleItem.sale_id == Sale.id
+            SaleItem, and_(SaleItem.sale_id == Sale.id, *_items_in_period(start, end))
         ).filter(
             Sale.created_at >= start,
             Sale.created_at <= end
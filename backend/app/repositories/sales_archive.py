@@ -0,0 +1,552 @@
+"""
+Repository del Archivo Frío de Ventas (Parquet).
+
+Los meses cerrados de sales, sale_items y whatsapp_sales se exportan a
+Parquet comprimido y se borran de las tablas vivas
+(app/services/sales_archive_service.py). Estructura en disco:
+
+    {SALES_ARCHIVE_DIR}/month=2025-03/sales.parquet
+                                      sale_items.parquet
+                                      whatsapp_sales.parquet
+
+Los meses archivados siempre son un prefijo de la historia (se archivan del
+más antiguo al más nuevo), así que basta un corte: todo lo anterior a
+cutoff() vive en el archivo y lo posterior en la BD. No hay manifiesto; los
+meses salen del listado del directorio.
+
+ArchiveAwareReportsRepository parte cada período de reporte en el tramo
+archivado y el vivo, agrega el archivado con pyarrow (sólo lee los meses y
+columnas necesarios y empuja los filtros al scan de Parquet) y suma ambos
+resultados por clave, con los mismos campos que ReportsRepository. Sin meses
+archivados se comporta exactamente como ReportsRepository y no importa pyarrow.
+"""
+
+import re
+import shutil
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import Sale, SaleItem, Product, Branch, OrderStatus, SaleType
+from app.repositories.reports import ReportsRepository, _items_in_period
+from config.settings import settings
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+
+ARCHIVE_TABLES = ("sales", "sale_items", "whatsapp_sales")
+
+# Estados que los reportes excluyen (como exclude_cancelled en ReportsRepository)
+EXCLUDED_STATUSES = (OrderStatus.CANCELLED.name, OrderStatus.PENDING.name)
+
+_MONTH_DIR = re.compile(r"^month=(?P<year>\d{4})-(?P<month>\d{2})$")
+
+Period = Tuple[datetime, datetime]
+
+
+def next_month(month: date) -> date:
+    """Primer día del mes siguiente."""
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+class SalesArchive:
+    """
+    Meses archivados en disco y lectura de sus archivos Parquet.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Args:
+            root: Directorio del archivo (default: SALES_ARCHIVE_DIR)
+        """
+        path = Path(root or settings.sales_archive_dir)
+        self.root = path if path.is_absolute() else BACKEND_DIR / path
+
+    def months(self) -> List[date]:
+        """Meses archivados, el más antiguo primero."""
+        if not self.root.is_dir():
+            return []
+        months = []
+        for entry in self.root.iterdir():
+            match = _MONTH_DIR.match(entry.name)
+            if match and entry.is_dir():
+                months.append(date(int(match.group("year")), int(match.group("month")), 1))
+        return sorted(months)
+
+    def cutoff(self) -> Optional[datetime]:
+        """Inicio del primer mes no archivado; None si no hay meses archivados."""
+        months = self.months()
+        if not months:
+            return None
+        return datetime.combine(next_month(months[-1]), datetime.min.time())
+
+    def month_dir(self, month: date) -> Path:
+        return self.root / f"month={month:%Y-%m}"
+
+    def path(self, name: str, month: date) -> Path:
+        return self.month_dir(month) / f"{name}.parquet"
+
+    def staging_dir(self, month: date) -> Path:
+        """Directorio temporal de la exportación; no cuenta como mes archivado."""
+        return self.root / f".staging-{month:%Y-%m}"
+
+    def publish(self, month: date, staging: Path) -> None:
+        """Renombra la exportación terminada a su directorio definitivo (atómico)."""
+        staging.replace(self.month_dir(month))
+
+    def remove(self, month: date) -> None:
+        shutil.rmtree(self.month_dir(month), ignore_errors=True)
+
+    def scan(self, name: str, start: datetime, end: datetime, columns: Sequence[str], filter: Any = None):
+        """
+        Filas archivadas de `name` con created_at en [start, end].
+
+        Sólo abre los archivos de los meses que se solapan con el rango y
+        lee las columnas pedidas; el rango y `filter` (expresión de
+        pyarrow.dataset) se evalúan contra las estadísticas de cada row
+        group antes de leerlo.
+
+        Returns:
+            pyarrow.Table, o None si ningún mes archivado se solapa
+        """
+        paths = [
+            str(self.path(name, month)) for month in self.months()
+            if datetime.combine(month, datetime.min.time()) <= end
+            and datetime.combine(next_month(month), datetime.min.time()) > start
+        ]
+        if not paths:
+            return None
+
+        import pyarrow.dataset as ds
+
+        expression = (ds.field("created_at") >= start) & (ds.field("created_at") <= end)
+        if filter is not None:
+            expression = expression & filter
+        return ds.dataset(paths, format="parquet").to_table(columns=list(columns), filter=expression)
+
+
+def _group(table, keys: Sequence[str], aggregations: Sequence[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """group_by de pyarrow como lista de dicts ({columna}_{función} por agregado)."""
+    if table is None or table.num_rows == 0:
+        return []
+    return table.group_by(list(keys)).aggregate(list(aggregations)).to_pylist()
+
+
+def _combine(
+    groups: Iterable[Iterable[Any]],
+    fields: Sequence[str],
+    keys: Sequence[str],
+    order_by: Optional[str] = None,
+    limit: Optional[int] = None
+) -> List[Any]:
+    """
+    Suma por clave filas con los mismos campos (BD y archivo).
+
+    Los campos que no son clave se suman; el resultado son namedtuples con
+    los nombres de ReportsRepository, ordenadas por `order_by` descendente.
+    """
+    row_type = namedtuple("ReportRow", fields)
+    merged: Dict[Tuple, Dict[str, Any]] = {}
+    for rows in groups:
+        for row in rows:
+            key = tuple(getattr(row, field) for field in keys)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = {field: getattr(row, field) for field in fields}
+                continue
+            for field in fields:
+                if field not in keys:
+                    current[field] = (current[field] or 0) + (getattr(row, field) or 0)
+
+    result = [row_type(**values) for values in merged.values()]
+    if order_by is not None:
+        result.sort(key=lambda row: getattr(row, order_by) or 0, reverse=True)
+    return result[:limit] if limit is not None else result
+
+
+def _rows(fields: Sequence[str], records: Iterable[Dict[str, Any]]) -> List[Any]:
+    row_type = namedtuple("ReportRow", fields)
+    return [row_type(**{field: record[field] for field in fields}) for record in records]
+
+
+def _as_date(value: Any) -> date:
+    # func.date() devuelve texto en SQLite y date en PostgreSQL
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class ArchiveAwareReportsRepository(ReportsRepository):
+    """
+    ReportsRepository que incluye los meses archivados en Parquet.
+
+    Cubre las agregaciones por período. get_sales_list (listado paginado de
+    ventas individuales) sigue leyendo sólo la BD.
+    """
+
+    def __init__(self, db: Session, archive: Optional[SalesArchive] = None):
+        """
+        Args:
+            db: Database session
+            archive: Archivo de ventas (default: SALES_ARCHIVE_DIR)
+        """
+        super().__init__(db)
+        self.archive = archive or SalesArchive()
+
+    # ==================== SPLIT ====================
+
+    def _split(self, start: datetime, end: datetime) -> Tuple[Optional[Period], Optional[Period]]:
+        """(tramo archivado, tramo vivo) del período; None si el tramo queda vacío."""
+        cutoff = self.archive.cutoff()
+        if cutoff is None or start >= cutoff:
+            return None, (start, end)
+        if end < cutoff:
+            return (start, end), None
+        return (start, cutoff - timedelta(microseconds=1)), (cutoff, end)
+
+    def _archived_sales(
+        self,
+        period: Period,
+        columns: Sequence[str],
+        branch_id: Optional[int] = None,
+        sale_type: Optional[SaleType] = None,
+        exclude_cancelled: bool = True
+    ):
+        """Ventas archivadas del período con los mismos filtros que las consultas vivas."""
+        import pyarrow.dataset as ds
+
+        conditions = []
+        if exclude_cancelled:
+            # En SQL "order_status != X" también descarta los NULL
+            conditions.append(ds.field("order_status").is_valid())
+            conditions.append(~ds.field("order_status").isin(list(EXCLUDED_STATUSES)))
+        if branch_id is not None:
+            conditions.append(ds.field("branch_id") == branch_id)
+        if sale_type is not None:
+            conditions.append(ds.field("sale_type") == sale_type.name)
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return self.archive.scan("sales", period[0], period[1], columns, expression)
+
+    def _archived_items(self, period: Period, columns: Sequence[str], branch_id: Optional[int] = None):
+        """Líneas archivadas de las ventas del período que cuentan para los reportes."""
+        import pyarrow.dataset as ds
+
+        sales = self._archived_sales(period, ["id"], branch_id=branch_id)
+        if sales is None or sales.num_rows == 0:
+            return None
+        return self.archive.scan(
+            "sale_items", period[0], period[1], columns, ds.field("sale_id").isin(sales["id"].combine_chunks())
+        )
+
+    def _current_products(self, product_ids: Iterable[int]) -> Dict[int, Any]:
+        """Nombre y marca actuales de los productos (como los joins de las consultas vivas)."""
+        from app.models import Brand
+
+        ids = [product_id for product_id in set(product_ids) if product_id is not None]
+        if not ids:
+            return {}
+        rows = self.db.query(
+            Product.id, Product.name, Product.brand_id, Brand.name.label("brand_name")
+        ).outerjoin(Brand, Brand.id == Product.brand_id).filter(Product.id.in_(ids)).all()
+        return {row.id: row for row in rows}
+
+    def _current_branches(self, branch_ids: Iterable[int]) -> Dict[int, str]:
+        ids = [branch_id for branch_id in set(branch_ids) if branch_id is not None]
+        if not ids:
+            return {}
+        return dict(self.db.query(Branch.id, Branch.name).filter(Branch.id.in_(ids)).all())
+
+    # ==================== SALES AGGREGATIONS ====================
+
+    def get_sales_total_for_period(
+        self,
+        start: datetime,
+        end: datetime,
+        branch_id: Optional[int] = None,
+        sale_type: Optional[SaleType] = None,
+        exclude_cancelled: bool = True
+    ) -> Decimal:
+        archived, hot = self._split(start, end)
+        if archived is None:
+            return super().get_sales_total_for_period(start, end, branch_id, sale_type, exclude_cancelled)
+
+        import pyarrow.compute as pc
+
+        total = Decimal("0.00")
+        sales = self._archived_sales(archived, ["total_amount"], branch_id, sale_type, exclude_cancelled)
+        if sales is not None and sales.num_rows:
+            total += pc.sum(sales["total_amount"]).as_py() or Decimal("0.00")
+        if hot is not None:
+            total += super().get_sales_total_for_period(*hot, branch_id, sale_type, exclude_cancelled)
+        return total
+
+    def get_sales_count_for_period(
+        self,
+        start: datetime,
+        end: datetime,
+        branch_id: Optional[int] = None,
+        sale_type: Optional[SaleType] = None,
+        exclude_cancelled: bool = True
+    ) -> int:
+        archived, hot = self._split(start, end)
+        if archived is None:
+            return super().get_sales_count_for_period(start, end, branch_id, sale_type, exclude_cancelled)
+
+        sales = self._archived_sales(archived, ["id"], branch_id, sale_type, exclude_cancelled)
+        count = sales.num_rows if sales is not None else 0
+        if hot is not None:
+            count += super().get_sales_count_for_period(*hot, branch_id, sale_type, exclude_cancelled)
+        return count
+
+    def get_daily_sales(
+        self,
+        start: datetime,
+        end: datetime,
+        branch_id: Optional[int] = None,
+        exclude_cancelled: bool = True
+    ) -> List[Any]:
+        archived, hot = self._split(start, end)
+        if archived is None:
+            return super().get_daily_sales(start, end, branch_id, exclude_cancelled)
+
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        fields = ("sale_date", "daily_sales", "daily_transactions")
+        sales = self._archived_sales(archived, ["id", "created_at", "total_amount"], branch_id,
+                                     exclude_cancelled=exclude_cancelled)
+        if sales is not None:
+            sales = sales.append_column("sale_date", pc.cast(sales["created_at"], pa.date32()))
+        days = _rows(fields, (
+            {"sale_date": group["sale_date"], "daily_sales": group["total_amount_sum"],
+             "daily_transactions": group["id_count"]}
+            for group in _group(sales, ["sale_date"], [("total_amount", "sum"), ("id", "count")])
+        ))
+        if hot is not None:
+            days += _rows(fields, (
+                {"sale_date": _as_date(row.sale_date), "daily_sales": row.daily_sales,
+                 "daily_transactions": row.daily_transactions}
+                for row in super().get_daily_sales(*hot, branch_id, exclude_cancelled)
+            ))
+        return sorted(_combine([days], fields, ["sale_date"]), key=lambda day: day.sale_date)
+
+    # ==================== PRODUCT ANALYTICS ====================
+
+    def _archived_products(self, period: Period, branch_id: Optional[int]) -> List[Dict[str, Any]]:
+        """Cantidad e importe archivados por producto, con el nombre actual del producto."""
+        items = self._archived_items(period, ["product_id", "product_name", "quantity", "total_price"], branch_id)
+        groups = _group(items, ["product_id"], [
+            ("quantity", "sum"), ("total_price", "sum"), ("product_name", "max")
+        ])
+        current = self._current_products(group["product_id"] for group in groups)
+        return [
+            {
+                "product_id": group["product_id"],
+                "name": current[group["product_id"]].name if group["product_id"] in current
+                else group["product_name_max"],
+                "total_quantity": group["quantity_sum"],
+                "total_revenue": group["total_price_sum"],
+            }
+            for group in groups
+        ]
+
+    def get_top_products(
+        self,
+        start: datetime,
+        end: datetime,
+        branch_id: Optional[int] = None,
+        limit: int = 10,
+        order_by: str = "quantity"
+    ) -> List[Any]:
+        archived, hot = self._split(start, end)
+        if archived is None:
+            return super().get_top_products(start, end, branch_id, limit, order_by)
+
+        fields = ("name", "total_quantity", "total_revenue")
+        groups = [_rows(fields, self._archived_products(archived, branch_id))]
+        if hot is not None:
+            # Sin límite: el ranking se arma sobre ambos tramos completos
+            groups.append(super().get_top_products(*hot, branch_id, None, order_by))
+        metric = "total_revenue" if order_by == "revenue" else "total_quantity"
+        return _combine(groups, fields, ["name"], order_by=metric, limit=limit)
+
+    def get_products_chart_data(
+        self,
+        start: datetime,
+        end: datetime,
+        branch_id: Optional[int] = None,
+        limit: int = 10
+    ) -> List[Any]:
+        archived, hot = self._split(start, end)
+        if archived is None:
+            return super().get_products_chart_data(start, end, branch_id, limit)
+
+        fields = ("name", "total_quantity")
+        groups = [_rows(fields, self._archived_products(archived, branch_id))]
+        if hot is not None:
+            groups.append(super().get_products_chart_data(*hot, branch_id, None))
+        return _combine(groups, fields, ["name"], order_by="total_quantity", limit=limit)
+
+    # ==================== BRAND ANALYTICS ====================
+
+    def get_top_brands(
+        self,
+        start: datetime,
+        end: datetime,
+        branch_id: Optional[int] = None,
+        limit: int = 10,
+        order_by: str = "revenue"
+    ) -> List[Any]:
+        archived, hot = self._split(start, end)
+        if archived is None:
+            return super().get_top_brands(start, end, branch_id, limit, order_by)
+
+        fields = ("brand_id", "brand_name", "products_count", "total_quantity", "total_revenue")
+        products = self._archived_products(archived, branch_id)
+        current = self._current_products(product["product_id"] for product in products)
+
+        # products_count es un conteo distinto: se une el conjunto de productos de cada tramo
+        brand_products: Dict[int, Set[int]] = {}
+        rows = []
+        for product in products:
+            info = current.get(product["product_id"])
+            if info is None or info.brand_id is None:
+                continue
+            brand_products.setdefault(info.brand_id, set()).add(product["product_id"])
+            rows.append({
+                "brand_id": info.brand_id, "brand_name": info.brand_name, "products_count": 0,
+                "total_quantity": product["total_quantity"], "total_revenue": product["total_revenue"],
+            })
+        groups = [_rows(fields, rows)]
+        if hot is not None:
+            groups.append(super().get_top_brands(*hot, branch_id, None, order_by))
+            for brand_id, product_id in self._hot_brand_products(*hot, branch_id):
+                brand_products.setdefault(brand_id, set()).add(product_id)
+
+        merged = _combine(groups, fields, ["brand_id", "brand_name"])
+        merged = [brand._replace(products_count=len(brand_products.get(brand.brand_id, ()))) for brand in merged]
+        metric = "total_quantity" if order_by == "quantity" else "total_revenue"
+        merged.sort(key=lambda brand: getattr(brand, metric) or 0, reverse=True)
+        return merged[:limit]
+
+    def _hot_brand_products(self, start: datetime, end: datetime, branch_id: Optional[int]) -> List[Tuple[int, int]]:
+        """(brand_id, product_id) vendidos en el tramo vivo, con los filtros de get_top_brands."""
+        query = self.db.query(Product.brand_id, Product.id).distinct().join(
+            SaleItem, SaleItem.product_id == Product.id
+        ).join(
+            Sale, Sale.id == SaleItem.sale_id
+        ).filter(
+            Sale.created_at >= start,
+            Sale.created_at <= end,
+            *_items_in_period(start, end),
+            Sale.order_status != OrderStatus.CANCELLED,
+            Sale.order_status != OrderStatus.PENDING,
+            Product.brand_id.isnot(None)
+        )
+        if branch_id is not None:
+            query = query.filter(Sale.branch_id == branch_id)
+        return query.all()
+
+    # ==================== BRANCH ANALYTICS ====================
+
+    def _archived_branches(self, period: Period, exclude_cancelled: bool) -> List[Dict[str, Any]]:
+        """Ventas archivadas por sucursal, con el nombre actual de la sucursal."""
+        sales = self._archived_sales(period, ["id", "branch_id", "branch_name", "total_amount"],
+                                     exclude_cancelled=exclude_cancelled)
+        groups = _group(sales, ["branch_id"], [("total_amount", "sum"), ("id", "count"), ("branch_name", "max")])
+        names = self._current_branches(group["branch_id"] for group in groups)
+        return [
+            {
+                "id": group["branch_id"],
+                "name": names.get(group["branch_id"], group["branch_name_max"]),
+                "total_sales": group["total_amount_sum"],
+                "count": group["id_count"],
+            }
+            for group in groups
+        ]
+
+    def get_branch_sales(
+        self,
+        start: datetime,
+        end: datetime,
+        exclude_cancelled: bool = True
+    ) -> List[Any]:
+        archived, hot = self._split(start, end)
+        if archived is None:
+            return super().get_branch_sales(start, end, exclude_cancelled)
+
+        fields = ("name", "total_sales", "total_transactions")
+        groups = [_rows(fields, (
+            dict(branch, total_transactions=branch["count"])
+            for branch in self._archived_branches(archived, exclude_cancelled)
+        ))]
+        if hot is not None:
+            groups.append(super().get_branch_sales(*hot, exclude_cancelled))
+        return _combine(groups, fields, ["name"], order_by="total_sales")
+
+    def get_branch_sales_chart_data(
+        self,
+        start: datetime,
+        end: datetime,
+        exclude_cancelled: bool = True
+    ) -> List[Any]:
+        archived, hot = self._split(start, end)
+        if archived is None:
+            return super().get_branch_sales_chart_data(start, end, exclude_cancelled)
+
+        fields = ("id", "name", "total_sales", "orders_count")
+        groups = [_rows(fields, (
+            dict(branch, orders_count=branch["count"])
+            for branch in self._archived_branches(archived, exclude_cancelled)
+        ))]
+        if hot is not None:
+            groups.append(super().get_branch_sales_chart_data(*hot, exclude_cancelled))
+        return _combine(groups, fields, ["id", "name"], order_by="total_sales")
+
+    # ==================== HELPER QUERIES ====================
+
+    def get_sales_by_payment_method(
+        self,
+        start: datetime,
+        end: datetime,
+        branch_id: Optional[int] = None
+    ) -> List[Any]:
+        archived, hot = self._split(start, end)
+        if archived is None:
+            return super().get_sales_by_payment_method(start, end, branch_id)
+
+        fields = ("payment_method", "total_sales", "transaction_count")
+        sales = self._archived_sales(archived, ["id", "payment_method", "total_amount"], branch_id)
+        groups = [_rows(fields, (
+            {"payment_method": group["payment_method"], "total_sales": group["total_amount_sum"],
+             "transaction_count": group["id_count"]}
+            for group in _group(sales, ["payment_method"], [("total_amount", "sum"), ("id", "count")])
+        ))]
+        if hot is not None:
+            groups.append(super().get_sales_by_payment_method(*hot, branch_id))
+        return _combine(groups, fields, ["payment_method"])
+
+    def get_sales_by_type(
+        self,
+        start: datetime,
+        end: datetime,
+        branch_id: Optional[int] = None
+    ) -> List[Any]:
+        archived, hot = self._split(start, end)
+        if archived is None:
+            return super().get_sales_by_type(start, end, branch_id)
+
+        fields = ("sale_type", "total_sales", "transaction_count")
+        sales = self._archived_sales(archived, ["id", "sale_type", "total_amount"], branch_id)
+        groups = [_rows(fields, (
+            {"sale_type": SaleType[group["sale_type"]], "total_sales": group["total_amount_sum"],
+             "transaction_count": group["id_count"]}
+            for group in _group(sales, ["sale_type"], [("total_amount", "sum"), ("id", "count")])
+        ))]
+        if hot is not None:
+            groups.append(super().get_sales_by_type(*hot, branch_id))
+        return _combine(groups, fields, ["sale_type"])
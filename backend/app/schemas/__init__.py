@@ -98,7 +98,11 @@ from app.schemas.sale import (
     SaleBase,
     SaleCreate,
     SaleStatusUpdate,
-    Sale
+    Sale,
+    OfflineSaleCreate,
+    OfflineSaleBatch,
+    OfflineSaleResult,
+    OfflineSaleBatchResult
 )
 
 # Import ecommerce schemas
@@ -205,6 +209,12 @@ from app.schemas.notification import (
     NotificationFilter
 )
 
+# Import background job schemas
+from app.schemas.job import (
+    JobResponse,
+    JobEnqueuedResponse
+)
+
 __all__ = [
     # Enums
     "UserRole",
@@ -291,6 +301,10 @@ __all__ = [
     "SaleCreate",
     "SaleStatusUpdate",
     "Sale",
+    "OfflineSaleCreate",
+    "OfflineSaleBatch",
+    "OfflineSaleResult",
+    "OfflineSaleBatchResult",
     
     # Ecommerce
     "EcommerceConfigBase",
@@ -373,4 +387,8 @@ __all__ = [
     "NotificationBulkMarkRead",
     "NotificationBulkDelete",
     "NotificationFilter",
+
+    # Background jobs
+    "JobResponse",
+    "JobEnqueuedResponse",
 ]
@@ -15,6 +15,8 @@ class BranchBase(BaseModel):
     phone: Optional[str] = None
     email: Optional[EmailStr] = None
     is_active: bool = True
+    latitude: Optional[float] = None  # Para fulfillment por cercanía
+    longitude: Optional[float] = None
 
 
 class BranchCreate(BranchBase):
@@ -27,6 +29,8 @@ class BranchUpdate(BaseModel):
     phone: Optional[str] = None
     email: Optional[EmailStr] = None
     is_active: Optional[bool] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 
 class Branch(BranchBase):
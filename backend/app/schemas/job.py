@@ -0,0 +1,42 @@
+"""
+Schemas Pydantic para la cola de trabajos en segundo plano.
+
+Define la representación pública de BackgroundJob expuesta por /jobs
+y la respuesta de los endpoints que encolan trabajos.
+"""
+
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+
+class JobResponse(BaseModel):
+    """Estado de un trabajo en segundo plano"""
+    id: int
+    job_type: str
+    status: str
+    priority: int
+    progress: int
+    progress_message: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    payload: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error_details: Optional[str] = None
+    user_id: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobEnqueuedResponse(BaseModel):
+    """Respuesta al encolar un trabajo (HTTP 202)"""
+    job_id: int
+    job_type: str
+    status: str
+    status_url: str
+    import_log_id: Optional[int] = None
@@ -4,7 +4,7 @@ Sale schemas for POS Cesariel.
 This module contains Pydantic schemas for sales and order management.
 """
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import Optional, List
 from decimal import Decimal
@@ -26,6 +26,7 @@ class SaleItemCreate(SaleItemBase):
 class SaleItem(SaleItemBase):
     id: int
     total_price: Decimal
+    fulfillment_branch_id: Optional[int] = None
     product: Optional["Product"] = None
     
     class Config:
@@ -47,6 +48,38 @@ class SaleBase(BaseModel):
 class SaleCreate(SaleBase):
     items: List[SaleItemCreate]
     is_confirmed: Optional[bool] = False  # True si la venta ya está coordinada (desde admin e-commerce)
+    # Ubicación del cliente para la política de fulfillment "nearest" (e-commerce)
+    shipping_latitude: Optional[float] = None
+    shipping_longitude: Optional[float] = None
+
+
+# Offline Register Sync Schemas
+class OfflineSaleCreate(SaleCreate):
+    """Venta registrada por una caja sin conexión."""
+    client_uuid: str = Field(..., min_length=1, max_length=36)
+    client_created_at: datetime  # Hora del ticket en la caja
+
+
+class OfflineSaleBatch(BaseModel):
+    """Lote ordenado de ventas offline; se aplican en el orden recibido."""
+    branch_id: Optional[int] = None
+    sales: List[OfflineSaleCreate] = Field(..., min_length=1)
+
+
+class OfflineSaleResult(BaseModel):
+    client_uuid: str
+    status: str  # created | duplicate | stock_conflict | error
+    sale_id: Optional[int] = None
+    sale_number: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class OfflineSaleBatchResult(BaseModel):
+    created: int
+    duplicates: int
+    conflicts: int
+    errors: int
+    results: List[OfflineSaleResult]
 
 
 class SaleStatusUpdate(BaseModel):
@@ -67,6 +100,9 @@ class Sale(SaleBase):
     tax_rate_id: Optional[int] = None
     tax_rate_name: Optional[str] = None
     tax_rate_percentage: Optional[Decimal] = None
+    # Fulfillment multi-sucursal (e-commerce)
+    fulfillment_policy: Optional[str] = None
+    shipment_count: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     branch: Optional["Branch"] = None
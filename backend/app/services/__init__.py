@@ -16,6 +16,16 @@ Services Disponibles:
     - NotificationService: Sistema de notificaciones en tiempo real
     - ConfigService: Configuraciones por sucursal con auditoría
     - ReportsService: Reportes empresariales con validación de permisos
+    - JobService: Cola durable de trabajos en segundo plano
+    - StockConsistencyService: Verificación y reparación del stock total de productos
+    - ReservationService: Reservas de stock con TTL para checkouts e-commerce
+    - FulfillmentService: Asignación de pedidos e-commerce a sucursales
+    - StorefrontService: Lecturas cacheadas del e-commerce público
+    - CatalogSearchService: Búsqueda facetada del catálogo con índice en memoria
+    - EcommerceDashboardService: Métricas del dashboard e-commerce con agregación condicional
+    - IdempotencyService: Claves Idempotency-Key para reintentos seguros
+    - CatalogSyncService: Cambios incrementales del catálogo para las cajas
+    - AppConfigService: Configuraciones globales (sistema, tienda, WhatsApp) cacheadas
 
 Responsabilidades de los Services:
     - Validaciones de negocio (unicidad, rangos, permisos)
@@ -41,6 +51,16 @@ from app.services.sale_service import SaleService
 from app.services.user_service import UserService
 from app.services.config_service import ConfigService
 from app.services.reports_service import ReportsService
+from app.services.job_service import JobService
+from app.services.stock_consistency_service import StockConsistencyService
+from app.services.reservation_service import ReservationService
+from app.services.fulfillment_service import FulfillmentService
+from app.services.storefront_service import StorefrontService
+from app.services.catalog_search_service import CatalogSearchService
+from app.services.dashboard_service import EcommerceDashboardService
+from app.services.idempotency_service import IdempotencyService
+from app.services.catalog_sync_service import CatalogSyncService
+from app.services.app_config_service import AppConfigService
 
 __all__ = [
     "InventoryService",
@@ -49,4 +69,14 @@ __all__ = [
     "UserService",
     "ConfigService",
     "ReportsService",
+    "JobService",
+    "StockConsistencyService",
+    "ReservationService",
+    "FulfillmentService",
+    "StorefrontService",
+    "CatalogSearchService",
+    "EcommerceDashboardService",
+    "IdempotencyService",
+    "CatalogSyncService",
+    "AppConfigService",
 ]
@@ -0,0 +1,169 @@
+"""
+Servicio de configuración global - Singletons de configuración cacheados.
+
+SystemConfig (moneda, formato), EcommerceConfig (tienda activa) y
+WhatsAppConfig (configuración activa) se leen en casi todas las pantallas
+y cambian muy rara vez. Se mantienen en un cache por proceso:
+
+    - Carga al iniciar la API (warm(), llamado desde main.py)
+    - Los PUT de configuración escriben en la BD y, confirmada la
+      transacción, reemplazan el valor cacheado (write-through con remember())
+    - Otros cambios ORM sobre los tres modelos invalidan el valor al confirmar
+      (listeners de mapper registrados en este módulo)
+    - Entre workers: un sello de versión (cantidad de filas y mayor
+      updated_at de cada tabla, en una sola consulta) se compara como mucho
+      cada APP_CONFIG_CHECK_SECONDS; si cambió, se recarga todo
+
+Entre chequeos, las lecturas no tocan la BD. Los valores se entregan como
+copias (SimpleNamespace) para que el llamador no modifique el cache.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache, invalidate_on_commit
+from app.models import EcommerceConfig, SystemConfig, WhatsAppConfig
+from config.settings import settings
+
+app_config_cache = TTLCache(
+    "app_config",
+    ttl_seconds=settings.app_config_cache_ttl,
+    max_entries=8
+)
+
+# Configuración de moneda si todavía no existe SystemConfig
+DEFAULT_CURRENCY_CONFIG = {
+    "default_currency": "ARS",
+    "currency_symbol": "$",
+    "currency_position": "before",
+    "decimal_places": 2,
+}
+
+_MODELS = {
+    "system": SystemConfig,
+    "ecommerce": EcommerceConfig,
+    "whatsapp": WhatsAppConfig,
+}
+
+_LOADERS: Dict[str, Callable[[Session], Any]] = {
+    "system": lambda db: db.query(SystemConfig).order_by(SystemConfig.id).first(),
+    "ecommerce": lambda db: db.query(EcommerceConfig).filter(
+        EcommerceConfig.is_active == True
+    ).order_by(EcommerceConfig.id).first(),
+    "whatsapp": lambda db: db.query(WhatsAppConfig).filter(
+        WhatsAppConfig.is_active == True
+    ).order_by(WhatsAppConfig.id).first(),
+}
+
+# Último sello de versión visto por este proceso
+_version = {"stamp": None, "checked_at": float("-inf")}
+_version_lock = threading.Lock()
+
+
+def _snapshot(row: Any) -> Optional[Dict]:
+    """Columnas de la fila como dict (None si no hay fila)."""
+    if row is None:
+        return None
+    return {attr.key: getattr(row, attr.key) for attr in inspect(row).mapper.column_attrs}
+
+
+class AppConfigService:
+    """Lecturas cacheadas de las configuraciones globales."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, kind: str) -> Optional[SimpleNamespace]:
+        """
+        Configuración cacheada.
+
+        Args:
+            kind: "system", "ecommerce" (activa) o "whatsapp" (activa)
+
+        Returns:
+            Copia de la fila, o None si no existe
+        """
+        self._check_version()
+        values = app_config_cache.get_or_load(kind, lambda: _snapshot(_LOADERS[kind](self.db)))
+        return SimpleNamespace(**values) if values is not None else None
+
+    def get_system(self) -> Optional[Dict]:
+        """SystemConfig en el formato de SystemConfig.to_dict() (None si no existe)."""
+        config = self.get("system")
+        return SystemConfig(**vars(config)).to_dict() if config is not None else None
+
+    def get_currency(self) -> Dict:
+        """Configuración de moneda (valores por defecto si no hay SystemConfig)."""
+        config = self.get("system")
+        if config is None:
+            return dict(DEFAULT_CURRENCY_CONFIG)
+        return {
+            "default_currency": getattr(config.default_currency, "value", config.default_currency),
+            "currency_symbol": config.currency_symbol,
+            "currency_position": getattr(config.currency_position, "value", config.currency_position),
+            "decimal_places": config.decimal_places,
+        }
+
+    def remember(self, kind: str, row: Any) -> None:
+        """
+        Write-through: reemplaza el valor cacheado por la fila recién confirmada.
+
+        Llamar después de db.commit() en los endpoints de escritura. Una
+        configuración de tienda/WhatsApp inactiva solo invalida (la vigente
+        es la activa).
+        """
+        if kind != "system" and not row.is_active:
+            app_config_cache.invalidate(kind)
+            return
+        app_config_cache.set(kind, _snapshot(row))
+
+    def warm(self) -> None:
+        """Carga las tres configuraciones (inicio de la API)."""
+        self._check_version(force=True)
+        for kind, loader in _LOADERS.items():
+            app_config_cache.set(kind, _snapshot(loader(self.db)))
+
+    def _check_version(self, force: bool = False) -> None:
+        """
+        Compara el sello de versión de la BD con el último visto.
+
+        El sello se lee antes de cargar valores, así un cambio de otro
+        worker posterior a la carga siempre cambia el sello siguiente.
+        """
+        now = time.monotonic()
+        if not force and now - _version["checked_at"] < settings.app_config_check_seconds:
+            return
+
+        columns = []
+        for model in _MODELS.values():
+            columns.append(select(func.count(model.id)).scalar_subquery())
+            columns.append(select(func.max(model.updated_at)).scalar_subquery())
+        stamp = tuple(self.db.execute(select(*columns)).one())
+
+        with _version_lock:
+            if _version["stamp"] is not None and stamp != _version["stamp"]:
+                app_config_cache.clear()
+            _version["stamp"] = stamp
+            _version["checked_at"] = now
+
+
+# ===== INVALIDACIÓN =====
+
+def _listen(kind: str) -> Callable:
+    def _invalidate(mapper, connection, target) -> None:
+        """Cambio en la configuración: se recarga tras el commit."""
+        session = Session.object_session(target)
+        if session is not None:
+            invalidate_on_commit(session, app_config_cache, [kind])
+    return _invalidate
+
+
+for _kind, _model in _MODELS.items():
+    _listener = _listen(_kind)
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _listener)
@@ -0,0 +1,329 @@
+"""
+Servicio de Operaciones Masivas - Lógica de Negocio.
+
+Importación masiva de productos y actualización masiva de precios.
+Compartido por los endpoints síncronos de routers/products.py y por los
+handlers de la cola de trabajos (app/services/job_handlers.py).
+
+Responsabilidades:
+    - Lectura de archivos CSV/Excel de importación
+    - Alta de productos importados con BranchStock inicial por sucursal
+    - Actualización de ImportLog con el resultado
+    - Ajuste porcentual de precios por marca y/o IDs
+    - Reporte de progreso opcional (para trabajos en segundo plano)
+"""
+
+from typing import Callable, Optional, List
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, func
+import io
+
+from app.models import Product, Category, Branch, BranchStock, Brand, ImportLog
+from app.schemas.product import BulkPriceUpdateRequest, BulkPriceUpdateResponse
+
+# Firma: callback(porcentaje 0-100, mensaje opcional)
+ProgressCallback = Callable[[int, Optional[str]], None]
+
+# Columnas requeridas del formato legacy de importación
+LEGACY_IMPORT_COLUMNS = ['codigo_barra', 'modelo', 'efectivo']
+
+# Cada cuántas filas se reporta progreso
+PROGRESS_EVERY_ROWS = 50
+
+
+def read_import_file(filename: str, content: bytes):
+    """
+    Leer archivo CSV/Excel de importación como DataFrame.
+
+    Args:
+        filename: Nombre original (define el formato por extensión)
+        content: Contenido binario del archivo
+
+    Returns:
+        pandas.DataFrame con las filas del archivo
+    """
+    import pandas as pd
+
+    if filename.endswith('.csv'):
+        return pd.read_csv(io.StringIO(content.decode('utf-8')))
+    return pd.read_excel(io.BytesIO(content))
+
+
+class BulkOperationsService:
+    """
+    Servicio de importaciones y actualizaciones masivas de catálogo.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.db = db
+
+    def import_legacy_products(
+        self,
+        df,
+        import_log: ImportLog,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> dict:
+        """
+        Importar productos desde DataFrame con columnas codigo_barra, modelo, efectivo.
+
+        Crea cada producto sin talles en la categoría "Importados" con
+        BranchStock en 0 para todas las sucursales activas. Actualiza
+        import_log con el resultado y confirma la transacción.
+
+        Args:
+            df: DataFrame leído con read_import_file()
+            import_log: Log de importación en estado PROCESSING
+            progress_callback: Callback opcional de progreso
+
+        Returns:
+            dict con total_rows, successful_rows, failed_rows y errors
+
+        Raises:
+            ValueError: Si faltan columnas requeridas (import_log queda FAILED)
+        """
+        import pandas as pd
+
+        missing_columns = [col for col in LEGACY_IMPORT_COLUMNS if col not in df.columns]
+        if missing_columns:
+            import_log.status = "FAILED"
+            import_log.error_details = f"Columnas faltantes: {', '.join(missing_columns)}"
+            import_log.completed_at = datetime.now()
+            self.db.commit()
+            raise ValueError(f"Columnas requeridas faltantes: {', '.join(missing_columns)}")
+
+        total_rows = len(df)
+        successful_rows = 0
+        failed_rows = 0
+        errors = []
+
+        # Obtener o crear categoría "Importados"
+        category = self.db.query(Category).filter(Category.name == "Importados").first()
+        if not category:
+            category = Category(name="Importados", description="Productos importados masivamente")
+            self.db.add(category)
+            self.db.commit()
+            self.db.refresh(category)
+
+        # Sucursales activas se cargan una sola vez para todo el archivo
+        active_branch_ids = [
+            branch_id for (branch_id,) in
+            self.db.query(Branch.id).filter(Branch.is_active == True).all()
+        ]
+
+        for position, (index, row) in enumerate(df.iterrows(), start=1):
+            if progress_callback and position % PROGRESS_EVERY_ROWS == 0:
+                progress_callback(
+                    int(position * 100 / total_rows),
+                    f"Procesando fila {position} de {total_rows}"
+                )
+
+            try:
+                # Validar datos
+                if pd.isna(row['codigo_barra']) or pd.isna(row['modelo']) or pd.isna(row['efectivo']):
+                    failed_rows += 1
+                    errors.append({
+                        "row": index + 1,
+                        "error": "Datos requeridos faltantes"
+                    })
+                    continue
+
+                codigo_barra = str(row['codigo_barra']).strip()
+                modelo = str(row['modelo']).strip()
+                precio = float(row['efectivo'])
+
+                # Verificar si el producto ya existe por código de barras
+                existing_product = self.db.query(Product).filter(Product.barcode == codigo_barra).first()
+                if existing_product:
+                    failed_rows += 1
+                    errors.append({
+                        "row": index + 1,
+                        "error": f"Producto con código de barras {codigo_barra} ya existe"
+                    })
+                    continue
+
+                # Crear SKU único basado en el modelo
+                sku_base = modelo.replace(' ', '_').upper()
+                sku_counter = 1
+                sku = sku_base
+
+                while self.db.query(Product).filter(Product.sku == sku).first():
+                    sku = f"{sku_base}_{sku_counter}"
+                    sku_counter += 1
+
+                # Crear producto con stock en 0 (se configurará por sucursal)
+                product = Product(
+                    name=modelo,
+                    sku=sku,
+                    barcode=codigo_barra,
+                    price=precio,
+                    cost=precio * 0.7,  # Costo estimado al 70% del precio
+                    stock_quantity=0,  # Stock global inicial 0
+                    min_stock=5,
+                    category_id=category.id,
+                    has_sizes=False
+                )
+
+                self.db.add(product)
+                self.db.flush()  # Para obtener el ID del producto
+
+                # Crear BranchStock en 0 para todas las sucursales activas
+                for branch_id in active_branch_ids:
+                    self.db.add(BranchStock(
+                        product_id=product.id,
+                        branch_id=branch_id,
+                        stock_quantity=0,  # Stock inicial en 0 para cada sucursal
+                        min_stock=product.min_stock
+                    ))
+
+                successful_rows += 1
+
+            except Exception as e:
+                failed_rows += 1
+                errors.append({
+                    "row": index + 1,
+                    "error": str(e)
+                })
+
+        # Actualizar log de importación
+        import_log.total_rows = total_rows
+        import_log.successful_rows = successful_rows
+        import_log.failed_rows = failed_rows
+        import_log.status = "COMPLETED"
+        import_log.completed_at = datetime.now()
+
+        if errors:
+            import_log.error_details = f"Errores en {len(errors)} filas"
+
+        self.db.commit()
+
+        return {
+            "total_rows": total_rows,
+            "successful_rows": successful_rows,
+            "failed_rows": failed_rows,
+            "errors": errors
+        }
+
+    def update_prices(
+        self,
+        update_data: BulkPriceUpdateRequest,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> BulkPriceUpdateResponse:
+        """
+        Actualización masiva de precios por porcentaje.
+
+        Permite actualizar precios por:
+        - Todas las marcas (brand=None, product_ids=None)
+        - Una marca específica (brand="Nike", product_ids=None)
+        - Productos específicos de una marca (brand="Nike", product_ids=[1,2,3])
+        - Productos específicos sin filtro de marca (brand=None, product_ids=[1,2,3])
+
+        Args:
+            update_data: Datos de actualización (marca, productos, porcentaje)
+            progress_callback: Callback opcional de progreso
+
+        Returns:
+            BulkPriceUpdateResponse con productos actualizados y errores
+        """
+        updated_products: List[dict] = []
+        errors: List[dict] = []
+
+        # Construir query base
+        query = self.db.query(Product).filter(Product.is_active == True)
+
+        # Filtrar por marca si se especifica (buscar en ambos campos)
+        if update_data.brand:
+            query = query.outerjoin(Brand, Product.brand_id == Brand.id).filter(
+                or_(
+                    func.lower(Product.brand) == func.lower(update_data.brand),
+                    func.lower(Brand.name) == func.lower(update_data.brand)
+                )
+            )
+
+        # Filtrar por IDs de productos si se especifican
+        if update_data.product_ids:
+            query = query.filter(Product.id.in_(update_data.product_ids))
+
+        # Obtener productos a actualizar
+        products_to_update = query.all()
+
+        if not products_to_update:
+            return BulkPriceUpdateResponse(
+                message="No se encontraron productos para actualizar",
+                total_products_updated=0,
+                updated_products=[],
+                errors=[]
+            )
+
+        # Calcular factor de multiplicación
+        multiplier = 1 + (update_data.percentage / 100)
+        total = len(products_to_update)
+
+        # Actualizar cada producto
+        for position, product in enumerate(products_to_update, start=1):
+            if progress_callback and position % PROGRESS_EVERY_ROWS == 0:
+                progress_callback(
+                    int(position * 100 / total),
+                    f"Actualizando producto {position} de {total}"
+                )
+
+            try:
+                old_price = float(product.price)
+                old_ecommerce_price = float(product.ecommerce_price) if product.ecommerce_price else None
+
+                # Actualizar precio principal
+                new_price = round(old_price * multiplier, 2)
+                product.price = new_price
+
+                # Actualizar precio de ecommerce si se solicita
+                new_ecommerce_price = None
+                if update_data.update_ecommerce_price and product.ecommerce_price:
+                    new_ecommerce_price = round(float(product.ecommerce_price) * multiplier, 2)
+                    product.ecommerce_price = new_ecommerce_price
+
+                product.updated_at = datetime.now()
+
+                updated_products.append({
+                    "id": product.id,
+                    "name": product.name,
+                    "sku": product.sku,
+                    "brand": product.brand_rel.name if product.brand_rel else product.brand,
+                    "old_price": old_price,
+                    "new_price": new_price,
+                    "old_ecommerce_price": old_ecommerce_price,
+                    "new_ecommerce_price": new_ecommerce_price
+                })
+
+            except Exception as e:
+                errors.append({
+                    "product_id": product.id,
+                    "product_name": product.name,
+                    "error": str(e)
+                })
+
+        # Commit los cambios
+        self.db.commit()
+
+        # Preparar mensaje de respuesta
+        if update_data.brand:
+            message = f"Precios actualizados para {len(updated_products)} productos de la marca {update_data.brand}"
+        elif update_data.product_ids:
+            message = f"Precios actualizados para {len(updated_products)} productos seleccionados"
+        else:
+            message = f"Precios actualizados para {len(updated_products)} productos"
+
+        percentage_sign = "+" if update_data.percentage > 0 else ""
+        message += f" ({percentage_sign}{update_data.percentage}%)"
+
+        return BulkPriceUpdateResponse(
+            message=message,
+            total_products_updated=len(updated_products),
+            updated_products=updated_products,
+            errors=errors
+        )
@@ -0,0 +1,483 @@
+"""
+Servicio de Búsqueda Facetada - Catálogo del e-commerce con conteos.
+
+Mantiene en memoria un índice invertido del catálogo publicado: cada valor
+de faceta (categoría, marca, talle, rango de precio, en stock, destacado)
+y cada palabra del nombre apuntan a un bitmap de productos. Los bitmaps son
+enteros de Python: el bit i corresponde al producto i en el orden por
+defecto del storefront (destacados primero, luego por nombre).
+
+    - Filtrar = AND entre bitmaps (OR dentro de una misma faceta)
+    - Contar = popcount del bitmap resultante
+    - Paginar = recorrer los bits encendidos en orden
+
+El índice se arma con tres consultas (productos + marca, talles agregados,
+nombres de categorías) y se cachea por proceso. Los cambios del catálogo
+(productos, marcas, categorías) lo invalidan al confirmar y la próxima
+búsqueda lo reconstruye. Los cambios que sólo tocan stock (ventas,
+reservas, ajustes) no lo descartan: marcan los productos afectados y la
+próxima búsqueda relee su stock y talles disponibles y actualiza sólo sus
+bits. Las actualizaciones SQL directas de stock llaman a
+refresh_catalog_stock() explícitamente; en los demás workers el cambio
+se ve al vencer el TTL.
+
+Conteos disjuntivos: los conteos de cada faceta se calculan con todos los
+filtros salvo el de la propia faceta, para que el storefront pueda ofrecer
+las alternativas de una selección múltiple.
+"""
+
+import bisect
+import re
+import threading
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.cache import TTLCache, invalidate_on_commit
+from app.models import Brand, BranchStock, Category, Product, ProductSize
+from app.services.storefront_service import serialize_product, size_sort_key
+from config.settings import settings
+
+catalog_index_cache = TTLCache("catalog_index", ttl_seconds=settings.catalog_index_ttl, max_entries=1)
+
+_INDEX_KEY = "catalog"
+
+# Órdenes soportados además del por defecto (destacados, nombre)
+SORT_OPTIONS = ("default", "price_asc", "price_desc", "newest")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Clave en Session.info con los productos cuyo stock cambió en la transacción
+_STOCK_PENDING_KEY = "catalog_stock_changes"
+
+# Productos con stock confirmado que el índice todavía no releyó
+_stale_stock: Set[int] = set()
+_stale_stock_lock = threading.Lock()
+
+# Columnas de Product que cambian con el stock sin ser edición del catálogo
+_STOCK_COLUMNS = {"stock_quantity", "reserved_stock", "updated_at"}
+
+
+def invalidate_catalog_index(db: Session) -> None:
+    """Descarta el índice facetado al confirmar db."""
+    invalidate_on_commit(db, catalog_index_cache)
+
+
+def refresh_catalog_stock(db: Session, product_ids: Iterable[int]) -> None:
+    """
+    Agenda la relectura del stock de product_ids en el índice al confirmar db.
+
+    Args:
+        db: Sesión cuya transacción contiene el cambio de stock
+        product_ids: Productos afectados
+    """
+    db.info.setdefault(_STOCK_PENDING_KEY, set()).update(product_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_stale_stock(session: Session) -> None:
+    """Publica los productos con stock cambiado una vez confirmada la transacción."""
+    product_ids = session.info.pop(_STOCK_PENDING_KEY, None)
+    if product_ids:
+        with _stale_stock_lock:
+            _stale_stock.update(product_ids)
+
+
+def _price_bounds() -> List[float]:
+    """Límites de los rangos de precio configurados (ordenados)."""
+    return sorted(
+        float(value) for value in settings.catalog_price_buckets.split(",") if value.strip()
+    )
+
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+def _iter_bits(bits: int) -> Iterable[int]:
+    """Posiciones de los bits encendidos, de menor a mayor."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class CatalogIndex:
+    """
+    Índice invertido del catálogo publicado.
+
+    Sólo el stock cambia después de armado (update_stock); el resto se
+    reconstruye.
+
+    Attributes:
+        docs: Productos serializados en el orden por defecto
+        all_bits: Bitmap con todos los productos
+        facets: {faceta: {valor: bitmap}} para category, brand, size, price
+        in_stock_bits / featured_bits: Bitmaps de los filtros booleanos
+        tokens: {palabra del nombre: bitmap}
+    """
+
+    def __init__(self, docs: List[Dict], sizes_by_product: Dict[int, List[str]]):
+        self.docs = docs
+        self.positions = {doc["id"]: position for position, doc in enumerate(docs)}
+        self.all_bits = (1 << len(docs)) - 1
+        self.facets: Dict[str, Dict] = {"category": {}, "brand": {}, "size": {}, "price": {}}
+        self.category_names: Dict[int, str] = {}
+        self.brand_ids: Dict[str, Optional[int]] = {}
+        self.in_stock_bits = 0
+        self.featured_bits = 0
+        self.tokens: Dict[str, int] = {}
+        self.bounds = _price_bounds()
+
+        for position, doc in enumerate(docs):
+            bit = 1 << position
+            if doc["category_id"] is not None:
+                self._add("category", doc["category_id"], bit)
+            if doc["brand"]:
+                self._add("brand", doc["brand"]["name"], bit)
+                self.brand_ids.setdefault(doc["brand"]["name"], doc["brand"]["id"])
+            for size in sizes_by_product.get(doc["id"], []):
+                self._add("size", size, bit)
+            self._add("price", bisect.bisect_right(self.bounds, doc["price"]), bit)
+            if doc["stock"] > 0:
+                self.in_stock_bits |= bit
+            if doc["featured"]:
+                self.featured_bits |= bit
+            for token in _tokens(doc["name"]):
+                self.tokens[token] = self.tokens.get(token, 0) | bit
+
+        # Posiciones ordenadas por precio: rangos min/max por bisección
+        self._by_price = sorted(range(len(docs)), key=lambda i: docs[i]["price"])
+        self._prices = [docs[i]["price"] for i in self._by_price]
+        self._orders = {
+            "price_asc": self._by_price,
+            "price_desc": sorted(range(len(docs)), key=lambda i: -docs[i]["price"]),
+            "newest": sorted(range(len(docs)), key=lambda i: docs[i]["created_at"] or "", reverse=True),
+        }
+
+    def _add(self, facet: str, value, bit: int) -> None:
+        values = self.facets[facet]
+        values[value] = values.get(value, 0) | bit
+
+    def update_stock(self, stock: Dict[int, int], sizes_by_product: Dict[int, List[str]]) -> None:
+        """
+        Actualiza stock disponible, bit en stock y talles de los productos de stock.
+
+        Los documentos y bitmaps se reemplazan en lugar de modificarse, así
+        una búsqueda concurrente ve el valor anterior o el nuevo.
+
+        Args:
+            stock: {product_id: stock disponible} de productos del índice
+            sizes_by_product: Talles con stock disponible de esos productos
+        """
+        bits = 0
+        for product_id, available in stock.items():
+            position = self.positions[product_id]
+            bits |= 1 << position
+            self.docs[position] = {**self.docs[position], "stock": available}
+
+        in_stock_bits = self.in_stock_bits & ~bits
+        sizes = {value: value_bits & ~bits for value, value_bits in self.facets["size"].items()}
+        for product_id, available in stock.items():
+            bit = 1 << self.positions[product_id]
+            if available > 0:
+                in_stock_bits |= bit
+            for size in sizes_by_product.get(product_id, []):
+                sizes[size] = sizes.get(size, 0) | bit
+
+        self.facets["size"] = {value: value_bits for value, value_bits in sizes.items() if value_bits}
+        self.in_stock_bits = in_stock_bits
+
+    # ===== FILTROS =====
+
+    def any_of(self, facet: str, values: Optional[Iterable]) -> int:
+        """OR de los bitmaps de values (todos los productos si no hay valores)."""
+        if not values:
+            return self.all_bits
+        index = self.facets[facet]
+        bits = 0
+        for value in values:
+            bits |= index.get(value, 0)
+        return bits
+
+    def price_range(self, min_price: Optional[float], max_price: Optional[float]) -> int:
+        """Bitmap de productos con precio en [min_price, max_price]."""
+        if min_price is None and max_price is None:
+            return self.all_bits
+        start = 0 if min_price is None else bisect.bisect_left(self._prices, min_price)
+        end = len(self._prices) if max_price is None else bisect.bisect_right(self._prices, max_price)
+        bits = 0
+        for position in self._by_price[start:end]:
+            bits |= 1 << position
+        return bits
+
+    def text(self, search: Optional[str]) -> int:
+        """
+        Productos cuyo nombre contiene cada palabra buscada.
+
+        Cada palabra se compara por subcadena contra el vocabulario (mucho
+        más chico que el catálogo), igual que el ILIKE '%x%' anterior.
+        """
+        words = _tokens(search)
+        if not words:
+            return self.all_bits
+        bits = self.all_bits
+        for word in words:
+            matches = 0
+            for token, token_bits in self.tokens.items():
+                if word in token:
+                    matches |= token_bits
+            bits &= matches
+        return bits
+
+    # ===== RESULTADOS =====
+
+    def page(self, bits: int, offset: int, limit: int, sort: str) -> List[Dict]:
+        """Productos del bitmap en el orden pedido, paginados."""
+        if sort == "default":
+            positions = _iter_bits(bits)
+        else:
+            positions = (position for position in self._orders[sort] if bits >> position & 1)
+        result = []
+        for index, position in enumerate(positions):
+            if index >= offset + limit:
+                break
+            if index >= offset:
+                result.append(self.docs[position])
+        return result
+
+    def counts(self, facet: str, bits: int) -> List[Tuple[object, int]]:
+        """(valor, conteo) de la faceta dentro de bits, omitiendo los vacíos."""
+        result = []
+        for value, value_bits in self.facets[facet].items():
+            count = _popcount(bits & value_bits)
+            if count:
+                result.append((value, count))
+        return result
+
+    def price_bucket(self, bucket: int) -> Dict:
+        """Límites del rango de precio número bucket."""
+        return {
+            "min": self.bounds[bucket - 1] if bucket > 0 else None,
+            "max": self.bounds[bucket] if bucket < len(self.bounds) else None
+        }
+
+
+class CatalogSearchService:
+    """
+    Búsqueda facetada sobre el catálogo del e-commerce.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.db = db
+
+    def get_index(self) -> CatalogIndex:
+        """
+        Índice vigente (se reconstruye si fue invalidado o venció).
+
+        Antes de devolverlo relee el stock de los productos marcados por
+        refresh_catalog_stock() desde la última búsqueda.
+        """
+        index = catalog_index_cache.get_or_load(_INDEX_KEY, self._build_index)
+        with _stale_stock_lock:
+            product_ids = set(_stale_stock)
+            _stale_stock.clear()
+        if product_ids:
+            self._refresh_stock(index, product_ids)
+        return index
+
+    def search(
+        self,
+        category_ids: Optional[List[int]] = None,
+        brands: Optional[List[str]] = None,
+        sizes: Optional[List[str]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        search: Optional[str] = None,
+        in_stock: Optional[bool] = None,
+        featured: Optional[bool] = None,
+        sort: str = "default",
+        offset: int = 0,
+        limit: int = 24
+    ) -> Dict:
+        """
+        Productos filtrados y paginados, con conteos por faceta.
+
+        Dentro de una faceta los valores se combinan con OR (ej: dos
+        marcas) y entre facetas con AND.
+
+        Returns:
+            {
+                "data": [producto serializado, ...],
+                "total": productos que cumplen todos los filtros,
+                "facets": {
+                    "categories": [{"id", "name", "count"}],
+                    "brands": [{"id", "name", "count"}],
+                    "sizes": [{"size", "count"}],
+                    "price_ranges": [{"min", "max", "count"}],
+                    "in_stock": int, "featured": int
+                }
+            }
+
+        Raises:
+            ValueError: Si sort no es un orden soportado
+        """
+        if sort not in SORT_OPTIONS:
+            raise ValueError(f"Orden inválido: {sort}. Opciones: {', '.join(SORT_OPTIONS)}")
+
+        index = self.get_index()
+
+        filters = {
+            "category": index.any_of("category", category_ids),
+            "brand": index.any_of("brand", brands),
+            "size": index.any_of("size", sizes),
+            "price": index.price_range(min_price, max_price),
+        }
+        base = index.text(search)
+        if in_stock is not None:
+            base &= index.in_stock_bits if in_stock else ~index.in_stock_bits
+        if featured is not None:
+            base &= index.featured_bits if featured else ~index.featured_bits
+        base &= index.all_bits
+
+        def excluding(facet: Optional[str]) -> int:
+            bits = base
+            for name, facet_bits in filters.items():
+                if name != facet:
+                    bits &= facet_bits
+            return bits
+
+        matched = excluding(None)
+
+        categories = [
+            {"id": category_id, "name": index.category_names.get(category_id), "count": count}
+            for category_id, count in index.counts("category", excluding("category"))
+        ]
+        brand_counts = [
+            {"id": index.brand_ids.get(name), "name": name, "count": count}
+            for name, count in index.counts("brand", excluding("brand"))
+        ]
+        size_counts = [
+            {"size": size, "count": count}
+            for size, count in index.counts("size", excluding("size"))
+        ]
+        price_ranges = [
+            {**index.price_bucket(bucket), "count": count}
+            for bucket, count in sorted(index.counts("price", excluding("price")))
+        ]
+
+        return {
+            "data": index.page(matched, offset, limit, sort),
+            "total": _popcount(matched),
+            "facets": {
+                "categories": sorted(categories, key=lambda item: (item["name"] or "").lower()),
+                "brands": sorted(brand_counts, key=lambda item: item["name"].lower()),
+                "sizes": sorted(size_counts, key=lambda item: size_sort_key(item["size"])),
+                "price_ranges": price_ranges,
+                "in_stock": _popcount(matched & index.in_stock_bits),
+                "featured": _popcount(matched & index.featured_bits)
+            }
+        }
+
+    def _build_index(self) -> CatalogIndex:
+        """Arma el índice: productos publicados + marca, talles con stock disponible, categorías."""
+        products = self.db.query(Product).options(joinedload(Product.brand_rel)).filter(
+            Product.show_in_ecommerce == True,
+            Product.is_active == True
+        ).all()
+
+        # Orden por defecto del storefront: destacados (mayor precio e-commerce) y nombre
+        products.sort(key=lambda product: (
+            product.ecommerce_price is None,
+            -(product.ecommerce_price or Decimal(0)),
+            product.name
+        ))
+        docs = [serialize_product(product) for product in products]
+
+        index = CatalogIndex(docs, self._available_sizes())
+        index.category_names = dict(self.db.query(Category.id, Category.name).all())
+        return index
+
+    def _refresh_stock(self, index: CatalogIndex, product_ids: Set[int]) -> None:
+        """Relee stock disponible y talles de product_ids y actualiza sus bits."""
+        product_ids = [product_id for product_id in product_ids if product_id in index.positions]
+        if not product_ids:
+            return
+        rows = self.db.query(Product.id, Product.stock_quantity, Product.reserved_stock).filter(
+            Product.id.in_(product_ids)
+        ).all()
+        # Misma cuenta que Product.calculate_total_available_stock()
+        stock = {
+            product_id: max(0, (stock_quantity or 0) - (reserved_stock or 0))
+            for product_id, stock_quantity, reserved_stock in rows
+        }
+        index.update_stock(stock, self._available_sizes(stock.keys()))
+
+    def _available_sizes(self, product_ids: Optional[Iterable[int]] = None) -> Dict[int, List[str]]:
+        """Talles con stock disponible por producto publicado (de product_ids si se indican)."""
+        available = ProductSize.stock_quantity - ProductSize.reserved_stock
+        query = self.db.query(ProductSize.product_id, ProductSize.size).join(
+            Product, Product.id == ProductSize.product_id
+        ).filter(
+            Product.show_in_ecommerce == True,
+            Product.is_active == True
+        )
+        if product_ids is not None:
+            query = query.filter(ProductSize.product_id.in_(list(product_ids)))
+        rows = query.group_by(ProductSize.product_id, ProductSize.size).having(
+            func.sum(available) > 0
+        ).all()
+        sizes_by_product: Dict[int, List[str]] = {}
+        for product_id, size in rows:
+            sizes_by_product.setdefault(product_id, []).append(size)
+        return sizes_by_product
+
+
+# ===== INVALIDACIÓN POR CAMBIOS ORM =====
+
+def _invalidate_index(mapper, connection, target) -> None:
+    """Cualquier cambio del catálogo descarta el índice."""
+    session = Session.object_session(target)
+    if session is not None:
+        invalidate_catalog_index(session)
+
+
+def _refresh_product_stock(mapper, connection, target) -> None:
+    """Un cambio de stock o talles sólo relee el stock del producto."""
+    session = Session.object_session(target)
+    if session is not None:
+        refresh_catalog_stock(session, [target.product_id])
+
+
+def _product_updated(mapper, connection, target) -> None:
+    """Producto editado: si sólo cambió su stock no se descarta el índice."""
+    session = Session.object_session(target)
+    if session is None:
+        return
+    changed = {attr.key for attr in inspect(target).attrs if attr.history.has_changes()}
+    if changed <= _STOCK_COLUMNS:
+        refresh_catalog_stock(session, [target.id])
+    else:
+        invalidate_catalog_index(session)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    for _model in (BranchStock, ProductSize):
+        event.listen(_model, _event, _refresh_product_stock)
+    for _model in (Brand, Category):
+        event.listen(_model, _event, _invalidate_index)
+event.listen(Product, "after_insert", _invalidate_index)
+event.listen(Product, "after_update", _product_updated)
+event.listen(Product, "after_delete", _invalidate_index)
@@ -0,0 +1,263 @@
+"""
+Servicio de sincronización incremental del catálogo para las cajas (POS).
+
+Las cajas mantienen una copia local del catálogo de su sucursal y solo
+piden los cambios desde el último cursor (GET /products/sync):
+
+    - Un producto cambió si cambió su fila, su stock en la sucursal
+      (branch_stock) o alguno de sus talles en la sucursal (product_sizes);
+      su marca de cambio es el mayor updated_at de las tres tablas
+    - Los cambios se recorren en orden (marca, id) con paginación por
+      keyset; el cursor es opaco y codifica la última posición entregada
+    - Cada producto cambiado se envía compacto (precio, stock de la
+      sucursal y talles) como upsert; los desactivados (baja lógica) van
+      en deleted
+    - Sin cursor, con un cursor inválido o más viejo que
+      CATALOG_SYNC_MAX_CURSOR_AGE_DAYS se responde el snapshot completo
+      (full=true): la caja descarta su copia y la rearma con las páginas
+
+Al terminar una sincronización (has_more=false) el cursor queda en la
+última marca entregada, y la siguiente sincronización retrocede
+CATALOG_SYNC_OVERLAP_SECONDS: updated_at es la hora de inicio de la
+transacción, así que una transacción larga puede confirmarse con una
+marca anterior al cursor. Reenviar esa ventana es inocuo (upserts).
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models import BranchStock, Product, ProductSize
+from config.settings import settings
+
+# Marca para filas sin updated_at (datos legacy)
+_EPOCH = datetime(2000, 1, 1)
+
+
+class InvalidSyncCursorError(ValueError):
+    """El cursor no fue emitido por este servicio."""
+
+
+def encode_cursor(changed_at: Optional[datetime], product_id: Optional[int], full: bool = False) -> str:
+    """
+    Cursor opaco de sincronización.
+
+    Args:
+        changed_at: Marca del último producto entregado
+        product_id: Último producto entregado dentro de la sincronización en
+            curso; None al terminarla (la siguiente aplica la ventana de solapamiento)
+        full: La sincronización en curso es un snapshot completo
+    """
+    payload = {
+        "t": changed_at.isoformat() if changed_at else None,
+        "p": product_id,
+        "f": 1 if full else 0
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], Optional[int], bool]:
+    """
+    Decodifica un cursor de encode_cursor().
+
+    Raises:
+        InvalidSyncCursorError: Si el cursor está mal formado
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+        changed_at = datetime.fromisoformat(payload["t"]) if payload["t"] else None
+        product_id = int(payload["p"]) if payload["p"] is not None else None
+        return changed_at, product_id, bool(payload.get("f"))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as e:
+        raise InvalidSyncCursorError(f"Cursor de sincronización inválido: {e}")
+
+
+class CatalogSyncService:
+    """
+    Cambios del catálogo de una sucursal desde un cursor.
+
+    Cada página usa cuatro consultas: productos cambiados (UNION de las
+    tres tablas agrupado por producto) y los datos de productos, stock y
+    talles de esa página.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def changes(self, branch_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict:
+        """
+        Página de cambios del catálogo.
+
+        Args:
+            branch_id: Sucursal de la caja (stock y talles)
+            cursor: Cursor de la respuesta anterior (None = snapshot completo)
+            limit: Productos por página (default CATALOG_SYNC_PAGE_SIZE)
+
+        Returns:
+            {"cursor", "has_more", "full", "branch_id", "upserts", "deleted"}
+        """
+        limit = limit or settings.catalog_sync_page_size
+        since, after_id, full = self._resolve_cursor(cursor)
+
+        rows = self._changed_products(branch_id, since, after_id, limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        product_ids = [product_id for product_id, _ in rows]
+        upserts, deleted = self._load(branch_id, product_ids)
+        if full:
+            deleted = []
+
+        if rows:
+            last_id, last_changed_at = rows[-1]
+        else:
+            last_changed_at, last_id = since, after_id
+        next_cursor = encode_cursor(
+            last_changed_at,
+            last_id if has_more else None,
+            full=full and has_more
+        )
+
+        return {
+            "cursor": next_cursor,
+            "has_more": has_more,
+            "full": full,
+            "branch_id": branch_id,
+            "upserts": upserts,
+            "deleted": deleted
+        }
+
+    def _resolve_cursor(self, cursor: Optional[str]) -> Tuple[Optional[datetime], Optional[int], bool]:
+        """
+        Punto de partida (marca, último id, snapshot completo) del cursor.
+
+        Un cursor ausente, inválido o vencido vuelve al snapshot completo.
+        """
+        if not cursor:
+            return None, None, True
+        try:
+            changed_at, product_id, full = decode_cursor(cursor)
+        except InvalidSyncCursorError:
+            return None, None, True
+
+        if changed_at is None:
+            return None, None, False
+        max_age = timedelta(days=settings.catalog_sync_max_cursor_age_days)
+        if changed_at < datetime.now() - max_age:
+            return None, None, True
+        if product_id is None:
+            # Nueva sincronización: reenviar la ventana de solapamiento
+            return changed_at - timedelta(seconds=settings.catalog_sync_overlap_seconds), None, False
+        return changed_at, product_id, full
+
+    def _changed_products(
+        self,
+        branch_id: int,
+        since: Optional[datetime],
+        after_id: Optional[int],
+        limit: int
+    ) -> List[Tuple[int, datetime]]:
+        """
+        Productos cambiados después de (since, after_id), en orden de marca e id.
+
+        Con after_id la comparación es por keyset (marca == since y id mayor
+        también cuenta); sin after_id, estrictamente posteriores a since.
+        """
+        sources = [
+            (Product.id, Product.updated_at, None),
+            (BranchStock.product_id, BranchStock.updated_at, BranchStock.branch_id == branch_id),
+            (ProductSize.product_id, ProductSize.updated_at, ProductSize.branch_id == branch_id),
+        ]
+        selects = []
+        for product_column, updated_column, condition in sources:
+            query = select(product_column.label("product_id"), updated_column.label("changed_at"))
+            if condition is not None:
+                query = query.where(condition)
+            if since is not None and since > _EPOCH:
+                query = query.where(updated_column >= since if after_id is not None else updated_column > since)
+            selects.append(query)
+        changes = union_all(*selects).subquery()
+
+        changed_at = func.coalesce(func.max(changes.c.changed_at), _EPOCH)
+        query = select(changes.c.product_id, changed_at.label("changed_at")).group_by(changes.c.product_id)
+        if since is not None and after_id is not None:
+            query = query.having(or_(
+                changed_at > since,
+                and_(changed_at == since, changes.c.product_id > after_id)
+            ))
+
+        rows = self.db.execute(
+            query.order_by(changed_at, changes.c.product_id).limit(limit)
+        ).all()
+        return [(product_id, changed) for product_id, changed in rows]
+
+    def _load(self, branch_id: int, product_ids: List[int]) -> Tuple[List[Dict], List[int]]:
+        """Upserts compactos y bajas de los productos de la página."""
+        if not product_ids:
+            return [], []
+
+        products = self.db.execute(
+            select(
+                Product.id, Product.sku, Product.barcode, Product.name, Product.category_id,
+                Product.brand_id, Product.brand, Product.price, Product.has_sizes,
+                Product.min_stock, Product.image_url, Product.is_active
+            ).where(Product.id.in_(product_ids))
+        ).all()
+
+        stock = {
+            product_id: (quantity or 0, reserved or 0)
+            for product_id, quantity, reserved in self.db.execute(
+                select(BranchStock.product_id, BranchStock.stock_quantity, BranchStock.reserved_stock)
+                .where(BranchStock.branch_id == branch_id, BranchStock.product_id.in_(product_ids))
+            )
+        }
+        sizes: Dict[int, Dict[str, Tuple[int, int]]] = {}
+        for product_id, size, quantity, reserved in self.db.execute(
+            select(ProductSize.product_id, ProductSize.size, ProductSize.stock_quantity,
+                   ProductSize.reserved_stock)
+            .where(ProductSize.branch_id == branch_id, ProductSize.product_id.in_(product_ids))
+        ):
+            sizes.setdefault(product_id, {})[size] = (quantity or 0, reserved or 0)
+
+        order = {product_id: index for index, product_id in enumerate(product_ids)}
+        upserts = []
+        deleted = []
+        for row in sorted(products, key=lambda r: order[r.id]):
+            if not row.is_active:
+                deleted.append(row.id)
+                continue
+
+            record = {
+                "id": row.id,
+                "sku": row.sku,
+                "barcode": row.barcode,
+                "name": row.name,
+                "category_id": row.category_id,
+                "brand_id": row.brand_id,
+                "brand": row.brand,
+                "price": float(row.price) if row.price is not None else None,
+                "has_sizes": bool(row.has_sizes),
+                "min_stock": row.min_stock or 0,
+                "image_url": row.image_url
+            }
+            if row.has_sizes:
+                product_sizes = sizes.get(row.id, {})
+                record["stock"] = sum(quantity for quantity, _ in product_sizes.values())
+                record["available"] = sum(max(quantity - reserved, 0) for quantity, reserved in product_sizes.values())
+                record["sizes"] = {
+                    size: max(quantity - reserved, 0) for size, (quantity, reserved) in product_sizes.items()
+                }
+            else:
+                quantity, reserved = stock.get(row.id, (0, 0))
+                record["stock"] = quantity
+                record["available"] = max(quantity - reserved, 0)
+            upserts.append(record)
+
+        return upserts, deleted
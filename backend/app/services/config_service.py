@@ -23,12 +23,37 @@ Trazabilidad:
     - ConfigChangeLog: tracking de TODOS los cambios en configuraciones
     - SecurityAuditLog: tracking de eventos de autenticación
     - Snapshots inmutables en ventas (payment_method_id, tax_rate_id)
+
+Snapshot de configuración por sucursal:
+    get_tax_rate_for_branch() y validate_payment_method() se resuelven
+    desde un BranchConfigSnapshot inmutable (tasa de la sucursal, tasa del
+    sistema y reglas de medios de pago) cargado una vez por sucursal con un
+    conjunto fijo de consultas y cacheado en branch_config_cache. El checkout
+    no consulta la BD para resolver impuestos ni medios de pago.
+
+    - Cambios ORM sobre PaymentMethod, TaxRate, BranchTaxRate o
+      BranchPaymentMethod invalidan todos los snapshots al confirmar
+      (listeners de mapper registrados en este módulo)
+    - Los endpoints de escritura de /config llaman a
+      invalidate_branch_config() (cubre los UPDATE masivos sin eventos ORM)
+    - Entre workers: un sello de versión (cantidad de filas y mayor
+      updated_at de las cuatro tablas, en una sola consulta) se compara como
+      mucho cada BRANCH_CONFIG_CHECK_SECONDS; si cambió, se descartan todos
+      los snapshots
+    - Cada invalidación avanza la generación del cache: una carga que
+      empezó antes del cambio no se guarda
 """
 
-from typing import List, Optional, Dict, Any, Tuple
+import threading
+import time
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
 from decimal import Decimal
+from sqlalchemy import event, func, select
 from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache, invalidate_on_commit
+
 from app.repositories.config import (
     BranchTaxRateRepository,
     BranchPaymentMethodRepository,
@@ -42,6 +67,92 @@ from app.models import (
     PaymentMethod,
     ChangeAction
 )
+from config.settings import settings
+
+branch_config_cache = TTLCache(
+    "branch_config",
+    ttl_seconds=settings.branch_config_cache_ttl,
+    max_entries=256
+)
+
+TaxRateInfo = Tuple[int, str, Decimal]
+
+# Tablas que forman el snapshot (sello de versión entre workers)
+_SNAPSHOT_MODELS = (PaymentMethod, TaxRate, BranchTaxRate, BranchPaymentMethod)
+
+# Último sello de versión visto por este proceso
+_version = {"stamp": None, "checked_at": float("-inf")}
+_version_lock = threading.Lock()
+
+
+class PaymentMethodRule(NamedTuple):
+    """Medio de pago resuelto para una sucursal (inmutable)."""
+    id: int
+    code: str
+    name: str
+    is_active: bool
+    available: bool
+
+
+class BranchConfigSnapshot:
+    """
+    Configuración de checkout de una sucursal, inmutable.
+
+    Attributes:
+        branch_id: Sucursal (None = sin configuración por sucursal)
+        tax_rate: (id, nombre, porcentaje) de la tasa por defecto de la sucursal
+        system_tax_rate: (id, nombre, porcentaje) de la tasa por defecto del sistema
+        payment_methods: {código: PaymentMethodRule}
+        payment_codes_by_name: {nombre en minúsculas: código} (frontends legacy)
+    """
+
+    __slots__ = ("branch_id", "tax_rate", "system_tax_rate", "payment_methods", "payment_codes_by_name")
+
+    def __init__(
+        self,
+        branch_id: Optional[int],
+        tax_rate: Optional[TaxRateInfo],
+        system_tax_rate: Optional[TaxRateInfo],
+        payment_methods: Dict[str, PaymentMethodRule],
+        payment_codes_by_name: Dict[str, str]
+    ):
+        object.__setattr__(self, "branch_id", branch_id)
+        object.__setattr__(self, "tax_rate", tax_rate)
+        object.__setattr__(self, "system_tax_rate", system_tax_rate)
+        object.__setattr__(self, "payment_methods", MappingProxyType(payment_methods))
+        object.__setattr__(self, "payment_codes_by_name", MappingProxyType(payment_codes_by_name))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("BranchConfigSnapshot es inmutable")
+
+    def find_payment_method(self, code: str) -> Optional[PaymentMethodRule]:
+        """Medio de pago por código exacto o, si no existe, por nombre sin mayúsculas."""
+        rule = self.payment_methods.get(code)
+        if rule is None:
+            legacy_code = self.payment_codes_by_name.get(code.lower())
+            rule = self.payment_methods.get(legacy_code) if legacy_code else None
+        return rule
+
+
+# Métodos de pago creados al inicializar una base vacía
+DEFAULT_PAYMENT_METHODS = [
+    {"name": "Efectivo", "code": "CASH", "icon": "💵", "requires_change": True,
+     "description": "Pago en efectivo"},
+    {"name": "Tarjetas", "code": "CARD", "icon": "💳", "requires_change": False,
+     "description": "Pago con tarjetas (bancarizadas, no bancarizadas, etc.)"},
+    {"name": "Transferencia", "code": "TRANSFER", "icon": "🏦", "requires_change": False,
+     "description": "Transferencia bancaria"},
+]
+
+
+def invalidate_branch_config(db: Session) -> None:
+    """
+    Invalida los snapshots de configuración de todas las sucursales al confirmar db.
+
+    Llamar desde todo endpoint que modifique medios de pago o tasas de
+    impuesto (globales o por sucursal).
+    """
+    invalidate_on_commit(db, branch_config_cache)
 
 
 class ConfigService:
@@ -64,6 +175,84 @@ class ConfigService:
         self.change_log_repo = ConfigChangeLogRepository(db)
         self.security_log_repo = SecurityAuditLogRepository(db)
 
+    # ==================== Branch Snapshot ====================
+
+    def get_branch_snapshot(self, branch_id: Optional[int]) -> BranchConfigSnapshot:
+        """Snapshot de configuración de la sucursal (cacheado)."""
+        self._check_version()
+        return branch_config_cache.get_or_load(branch_id, lambda: self._load_branch_snapshot(branch_id))
+
+    def _check_version(self) -> None:
+        """
+        Compara el sello de versión de la BD con el último visto.
+
+        El sello se lee antes de cargar snapshots, así un cambio de otro
+        worker posterior a la carga siempre cambia el sello siguiente.
+        """
+        now = time.monotonic()
+        if now - _version["checked_at"] < settings.branch_config_check_seconds:
+            return
+
+        columns = []
+        for model in _SNAPSHOT_MODELS:
+            columns.append(select(func.count(model.id)).scalar_subquery())
+            columns.append(select(func.max(model.updated_at)).scalar_subquery())
+        stamp = tuple(self.db.execute(select(*columns)).one())
+
+        with _version_lock:
+            if _version["stamp"] is not None and stamp != _version["stamp"]:
+                branch_config_cache.clear()
+            _version["stamp"] = stamp
+            _version["checked_at"] = now
+
+    def _load_branch_snapshot(self, branch_id: Optional[int]) -> BranchConfigSnapshot:
+        """Arma el snapshot con cuatro consultas (medios, overrides, tasa sucursal, tasa sistema)."""
+        overrides: Dict[int, bool] = {}
+        tax_rate = None
+        if branch_id is not None:
+            overrides = {
+                payment_method_id: bool(is_active)
+                for payment_method_id, is_active in self.db.query(
+                    BranchPaymentMethod.payment_method_id, BranchPaymentMethod.is_active
+                ).filter(BranchPaymentMethod.branch_id == branch_id)
+            }
+            branch_tax = self.db.query(TaxRate.id, TaxRate.name, TaxRate.rate).join(
+                BranchTaxRate, BranchTaxRate.tax_rate_id == TaxRate.id
+            ).filter(
+                BranchTaxRate.branch_id == branch_id,
+                BranchTaxRate.is_default == True,
+                TaxRate.is_active == True
+            ).order_by(BranchTaxRate.id).first()
+            tax_rate = tuple(branch_tax) if branch_tax else None
+
+        system_tax = self.db.query(TaxRate.id, TaxRate.name, TaxRate.rate).filter(
+            TaxRate.is_default == True,
+            TaxRate.is_active == True
+        ).order_by(TaxRate.id).first()
+
+        payment_methods: Dict[str, PaymentMethodRule] = {}
+        codes_by_name: Dict[str, str] = {}
+        for method in self.db.query(
+            PaymentMethod.id, PaymentMethod.code, PaymentMethod.name, PaymentMethod.is_active
+        ).order_by(PaymentMethod.id):
+            is_active = bool(method.is_active)
+            payment_methods[method.code] = PaymentMethodRule(
+                id=method.id,
+                code=method.code,
+                name=method.name,
+                is_active=is_active,
+                available=is_active and overrides.get(method.id, True)
+            )
+            codes_by_name.setdefault(method.name.lower(), method.code)
+
+        return BranchConfigSnapshot(
+            branch_id=branch_id,
+            tax_rate=tax_rate,
+            system_tax_rate=tuple(system_tax) if system_tax else None,
+            payment_methods=payment_methods,
+            payment_codes_by_name=codes_by_name
+        )
+
     # ==================== Tax Rate Configuration ====================
 
     def get_tax_rate_for_branch(
@@ -74,30 +263,17 @@ class ConfigService:
         """
         Get the effective tax rate for a branch.
 
+        Resolved from the cached branch snapshot (no queries once loaded).
+
         Returns:
             Tuple of (tax_rate_id, tax_rate_name, tax_rate_percentage)
             None if no rate is configured and fallback_to_system is False
         """
-        # Try to get branch-specific tax rate
-        branch_tax = self.branch_tax_repo.get_default_for_branch(branch_id)
-
-        if branch_tax and branch_tax.tax_rate:
-            return (
-                branch_tax.tax_rate_id,
-                branch_tax.tax_rate.name,
-                branch_tax.tax_rate.rate
-            )
-
-        # Fallback to system default
+        snapshot = self.get_branch_snapshot(branch_id)
+        if snapshot.tax_rate:
+            return snapshot.tax_rate
         if fallback_to_system:
-            default_tax = self.db.query(TaxRate).filter(
-                TaxRate.is_default == True,
-                TaxRate.is_active == True
-            ).first()
-
-            if default_tax:
-                return (default_tax.id, default_tax.name, default_tax.rate)
-
+            return snapshot.system_tax_rate
         return None
 
     def set_branch_tax_rate(
@@ -168,6 +344,22 @@ class ConfigService:
             for pm in global_methods
         ]
 
+    def ensure_default_payment_methods(self) -> int:
+        """
+        Crea los métodos de pago por defecto si la tabla está vacía.
+
+        Se ejecuta al inicializar datos, no en las lecturas de /config.
+
+        Returns:
+            Cantidad de métodos creados
+        """
+        if self.db.query(PaymentMethod.id).first() is not None:
+            return 0
+        for method in DEFAULT_PAYMENT_METHODS:
+            self.db.add(PaymentMethod(is_active=True, **method))
+        self.db.commit()
+        return len(DEFAULT_PAYMENT_METHODS)
+
     def is_payment_method_available(
         self,
         branch_id: int,
@@ -180,31 +372,24 @@ class ConfigService:
         self,
         payment_method_code: str,
         branch_id: Optional[int] = None
-    ) -> Optional[PaymentMethod]:
+    ) -> PaymentMethodRule:
         """
         Validate if a payment method exists and is active.
 
+        Resolved from the cached branch snapshot (no queries once loaded).
+
         Args:
             payment_method_code: The code of the payment method (e.g., "CASH", "CARD")
             branch_id: Optional branch ID to check branch-specific availability
 
         Returns:
-            PaymentMethod if valid, None otherwise
+            PaymentMethodRule (id, code, name, is_active, available)
 
         Raises:
             ValueError: If payment method is invalid or not available
         """
-        # Find payment method by code (exact match)
-        payment_method = self.db.query(PaymentMethod).filter(
-            PaymentMethod.code == payment_method_code
-        ).first()
-
-        # Fallback: try case-insensitive name match (for legacy frontend compatibility)
-        if not payment_method:
-            from sqlalchemy import func
-            payment_method = self.db.query(PaymentMethod).filter(
-                func.lower(PaymentMethod.name) == payment_method_code.lower()
-            ).first()
+        # Exact code match, then case-insensitive name (legacy frontend compatibility)
+        payment_method = self.get_branch_snapshot(branch_id).find_payment_method(payment_method_code)
 
         if not payment_method:
             raise ValueError(f"Payment method '{payment_method_code}' not found")
@@ -213,11 +398,10 @@ class ConfigService:
             raise ValueError(f"Payment method '{payment_method_code}' is not active")
 
         # If branch_id provided, check branch-specific availability
-        if branch_id is not None:
-            if not self.is_payment_method_available(branch_id, payment_method.id):
-                raise ValueError(
-                    f"Payment method '{payment_method_code}' is not available at this branch"
-                )
+        if branch_id is not None and not payment_method.available:
+            raise ValueError(
+                f"Payment method '{payment_method_code}' is not available at this branch"
+            )
 
         return payment_method
 
@@ -351,3 +535,17 @@ class ConfigService:
         attempt_count = self.get_failed_login_attempts(username, lockout_hours)
         should_lockout = attempt_count >= max_attempts
         return (should_lockout, attempt_count)
+
+
+# ===== INVALIDACIÓN =====
+
+def _invalidate_config(mapper, connection, target) -> None:
+    """Cambio en medios de pago o tasas: se recargan los snapshots tras el commit."""
+    session = Session.object_session(target)
+    if session is not None:
+        invalidate_branch_config(session)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    for _model in (PaymentMethod, TaxRate, BranchTaxRate, BranchPaymentMethod):
+        event.listen(_model, _event, _invalidate_config)
@@ -0,0 +1,240 @@
+"""
+Servicio de Dashboard E-commerce - Métricas agregadas con cache breve.
+
+Calcula las métricas del dashboard e-commerce con agregación condicional
+(COUNT(*) FILTER (WHERE ...), SUM(...) FILTER (WHERE ...)) en lugar de una
+consulta por métrica:
+
+    1. Métricas principales + conteo por estado: una sola sentencia sobre
+       sales (la cantidad de productos online va como subconsulta escalar)
+    2. Ventas por día (últimos 7 días): GROUP BY fecha
+    3. Últimas ventas con su WhatsAppSale en un outer join (sin N+1)
+    4. Top productos y alertas de stock bajo
+
+/dashboard/stats usa solo la sentencia 1; /dashboard/detailed reutiliza el
+mismo resultado. Ambos se cachean por proceso durante
+DASHBOARD_CACHE_TTL segundos y se invalidan al confirmar cambios de ventas.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import desc, event, func, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache, invalidate_on_commit
+from app.models import BranchStock, Product, Sale, SaleItem, WhatsAppSale
+from app.models.enums import OrderStatus, SaleType
+from config.settings import settings
+
+dashboard_cache = TTLCache("ecommerce_dashboard", ttl_seconds=settings.dashboard_cache_ttl, max_entries=4)
+
+
+def _as_iso_date(value) -> str:
+    """func.date() devuelve date en PostgreSQL y texto en SQLite."""
+    return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
+
+
+class EcommerceDashboardService:
+    """
+    Métricas del dashboard e-commerce (compartidas por /stats y /detailed).
+    """
+
+    def __init__(self, db: Session):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.db = db
+
+    def get_stats(self) -> Dict:
+        """
+        Métricas principales (cacheadas).
+
+        Returns:
+            {total_online_products, total_online_sales, total_online_orders,
+             pending_orders, delivered_orders, conversion_rate}
+        """
+        return self._summary()["stats"]
+
+    def get_detailed(self) -> Dict:
+        """
+        Dashboard completo (cacheado).
+
+        Returns:
+            {stats, recent_sales, sales_by_day, orders_by_status,
+             top_products, low_stock_alerts}
+        """
+        return dashboard_cache.get_or_load("detailed", self._build_detailed)
+
+    # ===== CONSTRUCCIÓN =====
+
+    def _summary(self) -> Dict:
+        return dashboard_cache.get_or_load("summary", self._build_summary)
+
+    def _build_summary(self) -> Dict:
+        """Métricas y conteo por estado en una sola sentencia con FILTER."""
+        online_products = select(func.count(Product.id)).where(
+            Product.show_in_ecommerce == True,
+            Product.is_active == True
+        ).scalar_subquery()
+
+        status_columns = [
+            func.count(Sale.id).filter(Sale.order_status == order_status).label(order_status.name)
+            for order_status in OrderStatus
+        ]
+        row = self.db.query(
+            online_products.label("total_online_products"),
+            func.sum(Sale.total_amount).filter(
+                Sale.order_status != OrderStatus.CANCELLED
+            ).label("total_online_sales"),
+            func.count(Sale.id).label("total_online_orders"),
+            func.count(Sale.id).filter(Sale.order_status.is_(None)).label("UNKNOWN"),
+            *status_columns
+        ).select_from(Sale).filter(
+            Sale.sale_type == SaleType.ECOMMERCE
+        ).one()
+
+        mapping = row._mapping
+        total_orders = mapping["total_online_orders"] or 0
+        delivered = mapping[OrderStatus.DELIVERED.name] or 0
+
+        orders_by_status = [
+            {"status": order_status.value, "count": mapping[order_status.name]}
+            for order_status in OrderStatus
+            if mapping[order_status.name]
+        ]
+        if mapping["UNKNOWN"]:
+            orders_by_status.append({"status": "UNKNOWN", "count": mapping["UNKNOWN"]})
+
+        return {
+            "stats": {
+                "total_online_products": mapping["total_online_products"] or 0,
+                "total_online_sales": float(mapping["total_online_sales"] or 0),
+                "total_online_orders": total_orders,
+                "pending_orders": mapping[OrderStatus.PENDING.name] or 0,
+                "delivered_orders": delivered,
+                "conversion_rate": round((delivered / total_orders) * 100, 2) if total_orders else 0.0
+            },
+            "orders_by_status": orders_by_status
+        }
+
+    def _build_detailed(self) -> Dict:
+        summary = self._summary()
+        return {
+            "stats": summary["stats"],
+            "recent_sales": self._recent_sales(),
+            "sales_by_day": self._sales_by_day(),
+            "orders_by_status": summary["orders_by_status"],
+            "top_products": self._top_products(),
+            "low_stock_alerts": self._low_stock_alerts()
+        }
+
+    def _recent_sales(self, limit: int = 10) -> List[Dict]:
+        """Últimas ventas e-commerce con los datos de WhatsApp en la misma consulta."""
+        rows = self.db.query(
+            Sale, WhatsAppSale.id.label("whatsapp_sale_id"), WhatsAppSale.customer_name.label("whatsapp_customer")
+        ).outerjoin(
+            WhatsAppSale, WhatsAppSale.sale_id == Sale.id
+        ).filter(
+            Sale.sale_type == SaleType.ECOMMERCE
+        ).order_by(desc(Sale.created_at)).limit(limit).all()
+
+        return [
+            {
+                "id": sale.id,
+                "sale_number": sale.sale_number,
+                "customer_name": sale.customer_name or whatsapp_customer or "Cliente Web",
+                "total_amount": float(sale.total_amount),
+                "order_status": sale.order_status.value if sale.order_status else None,
+                "created_at": sale.created_at.isoformat() if sale.created_at else None,
+                "is_whatsapp": whatsapp_sale_id is not None
+            }
+            for sale, whatsapp_sale_id, whatsapp_customer in rows
+        ]
+
+    def _sales_by_day(self, days: int = 7) -> List[Dict]:
+        day = func.date(Sale.created_at)
+        rows = self.db.query(
+            day.label("date"),
+            func.count(Sale.id).label("count"),
+            func.sum(Sale.total_amount).label("total")
+        ).filter(
+            Sale.sale_type == SaleType.ECOMMERCE,
+            Sale.created_at >= datetime.now() - timedelta(days=days),
+            Sale.order_status != OrderStatus.CANCELLED
+        ).group_by(day).order_by(day).all()
+
+        return [
+            {"date": _as_iso_date(row.date), "count": row.count, "total": float(row.total or 0)}
+            for row in rows
+        ]
+
+    def _top_products(self, days: int = 30, limit: int = 5) -> List[Dict]:
+        rows = self.db.query(
+            SaleItem.product_id,
+            Product.name,
+            func.sum(SaleItem.quantity).label("total_sold"),
+            func.sum(SaleItem.total_price).label("revenue")
+        ).join(
+            Sale, SaleItem.sale_id == Sale.id
+        ).join(
+            Product, SaleItem.product_id == Product.id
+        ).filter(
+            Sale.sale_type == SaleType.ECOMMERCE,
+            Sale.created_at >= datetime.now() - timedelta(days=days),
+            Sale.order_status != OrderStatus.CANCELLED,
+            Product.show_in_ecommerce == True
+        ).group_by(
+            SaleItem.product_id, Product.name
+        ).order_by(desc("total_sold")).limit(limit).all()
+
+        return [
+            {
+                "product_id": row.product_id,
+                "product_name": row.name,
+                "total_sold": row.total_sold,
+                "revenue": float(row.revenue or 0)
+            }
+            for row in rows
+        ]
+
+    def _low_stock_alerts(self, limit: int = 10) -> List[Dict]:
+        rows = self.db.query(
+            Product.id,
+            Product.name,
+            BranchStock.stock_quantity,
+            BranchStock.min_stock
+        ).join(
+            BranchStock, Product.id == BranchStock.product_id
+        ).filter(
+            Product.show_in_ecommerce == True,
+            Product.is_active == True,
+            BranchStock.stock_quantity <= BranchStock.min_stock,
+            BranchStock.min_stock > 0
+        ).order_by(BranchStock.stock_quantity).limit(limit).all()
+
+        return [
+            {
+                "product_id": row.id,
+                "product_name": row.name,
+                "current_stock": row.stock_quantity,
+                "min_stock": row.min_stock
+            }
+            for row in rows
+        ]
+
+
+# ===== INVALIDACIÓN =====
+
+def _invalidate_dashboard(mapper, connection, target) -> None:
+    """Alta o cambio de venta: el dashboard se recalcula tras el commit."""
+    session = Session.object_session(target)
+    if session is not None:
+        invalidate_on_commit(session, dashboard_cache)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Sale, _event, _invalidate_dashboard)
@@ -0,0 +1,348 @@
+"""
+Servicio de Fulfillment - Asignación de pedidos e-commerce a sucursales.
+
+Un pedido e-commerce puede salir de una o varias sucursales. Este servicio
+decide de dónde sale cada línea según una política intercambiable:
+
+    single_branch_first  Una sola sucursal si alguna cubre todo el pedido;
+                         si no, igual que fewest_shipments
+    fewest_shipments     Minimiza la cantidad de envíos (cobertura voraz)
+    nearest              Prioriza las sucursales más cercanas al cliente
+
+El stock disponible (stock_quantity - reserved_stock) de todas las sucursales
+activas se precarga con una consulta por tabla y la política resuelve el
+pedido completo en memoria, sin consultas por línea ni por sucursal.
+
+La decisión se registra en la venta (branch_id principal, fulfillment_policy,
+shipment_count) y en cada SaleItem (fulfillment_branch_id). Una línea que no
+entra en una sola sucursal se divide en varios SaleItems.
+
+Las políticas se registran con el decorador allocation_policy; la activa se
+elige con settings.fulfillment_policy (FULFILLMENT_POLICY).
+"""
+
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Type
+
+from sqlalchemy.orm import Session
+
+from app.models import Branch, BranchStock, ProductSize
+from app.services.stock_service import InsufficientStockError
+from config.settings import settings
+
+# (product_id, size) → {branch_id: disponible}
+StockKey = Tuple[int, Optional[str]]
+Availability = Dict[StockKey, Dict[int, int]]
+
+
+# Registro global nombre de política → clase
+_ALLOCATION_POLICIES: Dict[str, Type["AllocationPolicy"]] = {}
+
+
+def allocation_policy(name: str):
+    """
+    Decorador para registrar una política de asignación.
+
+    Args:
+        name: Nombre de la política (valor de FULFILLMENT_POLICY)
+    """
+    def decorator(cls):
+        cls.name = name
+        _ALLOCATION_POLICIES[name] = cls
+        return cls
+    return decorator
+
+
+def get_allocation_policies() -> List[str]:
+    """Políticas de asignación registradas."""
+    return sorted(_ALLOCATION_POLICIES.keys())
+
+
+class AllocationPolicy(ABC):
+    """
+    Política base de asignación de líneas a sucursales.
+
+    Las subclases implementan allocate(). Reciben las sucursales candidatas
+    ya ordenadas por preferencia (cercanía si se conoce la ubicación del
+    cliente, id en caso contrario) y el stock disponible precargado, que
+    pueden consumir libremente (es una copia).
+    """
+
+    name = ""
+
+    @abstractmethod
+    def allocate(
+        self,
+        lines: List[Dict],
+        availability: Availability,
+        branch_ids: List[int]
+    ) -> List[Dict]:
+        """
+        Asigna las líneas del pedido.
+
+        Args:
+            lines: [{"product_id", "quantity", "size"}]
+            availability: Stock disponible por (producto, talle) y sucursal
+            branch_ids: Sucursales candidatas en orden de preferencia
+
+        Returns:
+            [{"line_index", "product_id", "size", "branch_id", "quantity"}]
+        """
+
+    @staticmethod
+    def _take(
+        allocations: List[Dict],
+        remaining: List[int],
+        lines: List[Dict],
+        index: int,
+        branch_id: int,
+        availability: Availability
+    ) -> None:
+        """Toma de branch_id todo lo posible para la línea index."""
+        key = (lines[index]["product_id"], lines[index].get("size"))
+        stock = availability.get(key, {})
+        quantity = min(remaining[index], stock.get(branch_id, 0))
+        if quantity <= 0:
+            return
+        stock[branch_id] -= quantity
+        remaining[index] -= quantity
+        allocations.append({
+            "line_index": index,
+            "product_id": key[0],
+            "size": key[1],
+            "branch_id": branch_id,
+            "quantity": quantity
+        })
+
+
+@allocation_policy("nearest")
+class NearestPolicy(AllocationPolicy):
+    """Cada línea sale de la sucursal más cercana que tenga stock."""
+
+    def allocate(self, lines, availability, branch_ids):
+        allocations: List[Dict] = []
+        remaining = [line["quantity"] for line in lines]
+        for index in range(len(lines)):
+            for branch_id in branch_ids:
+                if not remaining[index]:
+                    break
+                self._take(allocations, remaining, lines, index, branch_id, availability)
+        return allocations
+
+
+@allocation_policy("fewest_shipments")
+class FewestShipmentsPolicy(AllocationPolicy):
+    """
+    Minimiza la cantidad de sucursales que envían.
+
+    Cobertura voraz: en cada ronda elige la sucursal que cubre más unidades
+    pendientes (empate → orden de preferencia) y le asigna todo lo que puede.
+    """
+
+    def allocate(self, lines, availability, branch_ids):
+        allocations: List[Dict] = []
+        remaining = [line["quantity"] for line in lines]
+        candidates = list(branch_ids)
+
+        while any(remaining) and candidates:
+            pending: Dict[StockKey, int] = {}
+            for index, line in enumerate(lines):
+                key = (line["product_id"], line.get("size"))
+                pending[key] = pending.get(key, 0) + remaining[index]
+
+            coverage = {
+                branch_id: sum(
+                    min(quantity, availability.get(key, {}).get(branch_id, 0))
+                    for key, quantity in pending.items()
+                )
+                for branch_id in candidates
+            }
+            # max() devuelve el primero en caso de empate: respeta la preferencia
+            best = max(candidates, key=coverage.get)
+            if not coverage[best]:
+                break
+            candidates.remove(best)
+            for index in range(len(lines)):
+                self._take(allocations, remaining, lines, index, best, availability)
+
+        return allocations
+
+
+@allocation_policy("single_branch_first")
+class SingleBranchFirstPolicy(AllocationPolicy):
+    """
+    Todo el pedido desde una sola sucursal si alguna lo cubre.
+
+    Si ninguna sucursal tiene todo, divide el pedido con fewest_shipments.
+    """
+
+    def allocate(self, lines, availability, branch_ids):
+        demand: Dict[StockKey, int] = {}
+        for line in lines:
+            key = (line["product_id"], line.get("size"))
+            demand[key] = demand.get(key, 0) + line["quantity"]
+
+        for branch_id in branch_ids:
+            if all(availability.get(key, {}).get(branch_id, 0) >= quantity for key, quantity in demand.items()):
+                return [
+                    {
+                        "line_index": index,
+                        "product_id": line["product_id"],
+                        "size": line.get("size"),
+                        "branch_id": branch_id,
+                        "quantity": line["quantity"]
+                    }
+                    for index, line in enumerate(lines)
+                ]
+
+        return FewestShipmentsPolicy().allocate(lines, availability, branch_ids)
+
+
+class FulfillmentService:
+    """
+    Planificación del fulfillment de pedidos e-commerce.
+
+    El plan no bloquea stock: la reserva posterior (ReservationService.reserve)
+    es condicional y falla si otro pedido consumió el stock en el medio.
+    """
+
+    def __init__(self, db: Session, policy: Optional[str] = None):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+            policy: Política de asignación (default: settings.fulfillment_policy)
+
+        Raises:
+            ValueError: Política no registrada
+        """
+        self.db = db
+        policy = policy or settings.fulfillment_policy
+        if policy not in _ALLOCATION_POLICIES:
+            raise ValueError(
+                f"Política de fulfillment desconocida: {policy}. "
+                f"Disponibles: {', '.join(get_allocation_policies())}"
+            )
+        self.policy = _ALLOCATION_POLICIES[policy]()
+
+    def plan(
+        self,
+        lines: List[Dict],
+        origin: Optional[Tuple[float, float]] = None
+    ) -> Dict:
+        """
+        Decide desde qué sucursales sale cada línea del pedido.
+
+        Args:
+            lines: [{"product_id", "quantity", "size", "name" (opcional)}]
+            origin: (latitud, longitud) del cliente para ordenar por cercanía
+
+        Returns:
+            {
+                "policy": nombre de la política,
+                "branch_id": sucursal principal (la que envía más unidades),
+                "shipment_count": cantidad de sucursales que envían,
+                "allocations": [{"line_index", "product_id", "size", "branch_id", "quantity"}]
+            }
+
+        Raises:
+            InsufficientStockError: El stock de todas las sucursales no alcanza
+        """
+        branches = self.db.query(Branch).filter(Branch.is_active == True).order_by(Branch.id).all()
+        branch_ids = [branch.id for branch in self._by_distance(branches, origin)]
+        availability = self._load_availability(lines, branch_ids)
+
+        self._check_totals(lines, availability)
+
+        allocations = self.policy.allocate(lines, availability, branch_ids)
+
+        allocated = [0] * len(lines)
+        for allocation in allocations:
+            allocated[allocation["line_index"]] += allocation["quantity"]
+        if allocated != [line["quantity"] for line in lines]:
+            raise InsufficientStockError(
+                f"La política {self.policy.name} no pudo asignar el pedido completo"
+            )
+
+        units: Dict[int, int] = {}
+        for allocation in allocations:
+            units[allocation["branch_id"]] = units.get(allocation["branch_id"], 0) + allocation["quantity"]
+
+        return {
+            "policy": self.policy.name,
+            "branch_id": max(branch_ids, key=lambda branch_id: units.get(branch_id, 0)),
+            "shipment_count": len(units),
+            "allocations": allocations
+        }
+
+    def _load_availability(self, lines: List[Dict], branch_ids: List[int]) -> Availability:
+        """Stock disponible de los productos del pedido (una consulta por tabla)."""
+        product_ids = {line["product_id"] for line in lines}
+        availability: Availability = {}
+        if not product_ids or not branch_ids:
+            return availability
+
+        for row in self.db.query(
+            BranchStock.product_id, BranchStock.branch_id,
+            BranchStock.stock_quantity - BranchStock.reserved_stock
+        ).filter(
+            BranchStock.product_id.in_(product_ids),
+            BranchStock.branch_id.in_(branch_ids)
+        ):
+            availability.setdefault((row[0], None), {})[row[1]] = max(0, row[2] or 0)
+
+        for row in self.db.query(
+            ProductSize.product_id, ProductSize.branch_id, ProductSize.size,
+            ProductSize.stock_quantity - ProductSize.reserved_stock
+        ).filter(
+            ProductSize.product_id.in_(product_ids),
+            ProductSize.branch_id.in_(branch_ids)
+        ):
+            availability.setdefault((row[0], row[2]), {})[row[1]] = max(0, row[3] or 0)
+
+        return availability
+
+    @staticmethod
+    def _check_totals(lines: List[Dict], availability: Availability) -> None:
+        """Rechaza el pedido si ni sumando todas las sucursales alcanza."""
+        demand: Dict[StockKey, int] = {}
+        names: Dict[StockKey, str] = {}
+        for line in lines:
+            key = (line["product_id"], line.get("size"))
+            demand[key] = demand.get(key, 0) + line["quantity"]
+            names[key] = line.get("name") or f"producto {line['product_id']}"
+
+        shortages = []
+        for key, quantity in demand.items():
+            available = sum(availability.get(key, {}).values())
+            if available < quantity:
+                label = f"{names[key]} (talle {key[1]})" if key[1] else names[key]
+                shortages.append(f"{label}: disponible {available}, solicitado {quantity}")
+
+        if shortages:
+            raise InsufficientStockError("Stock insuficiente para " + "; ".join(shortages))
+
+    @staticmethod
+    def _by_distance(branches: List[Branch], origin: Optional[Tuple[float, float]]) -> List[Branch]:
+        """Ordena sucursales por distancia al cliente (sin coordenadas → al final)."""
+        if origin is None:
+            return branches
+
+        def distance(branch: Branch) -> float:
+            if branch.latitude is None or branch.longitude is None:
+                return math.inf
+            return _haversine_km(origin, (float(branch.latitude), float(branch.longitude)))
+
+        return sorted(branches, key=distance)
+
+
+def _haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Distancia en km entre dos coordenadas (latitud, longitud)."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * 6371 * math.asin(math.sqrt(h))
@@ -0,0 +1,208 @@
+"""
+Servicio de Idempotencia - Registro de claves Idempotency-Key.
+
+Persiste por (scope, key) el hash del request y la respuesta de la primera
+ejecución. La restricción única de la tabla es la que decide qué request
+ejecuta la operación cuando llegan duplicados concurrentes (incluso en
+distintos workers): el resto ve la clave IN_PROGRESS y espera la respuesta.
+
+    begin()             reclama la clave o devuelve el registro existente
+    complete_on_commit() marca la clave COMPLETED en la transacción que
+                        confirma el recurso creado
+    complete()          guarda la respuesta de la ejecución
+    release()           libera la clave si la ejecución falló
+    purge_expired()     sweeper periódico de claves vencidas
+
+El manejo HTTP (header, espera, reproducción de la respuesta) está en
+app/core/idempotency.py.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import IdempotencyKey, IdempotencyStatus
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Una ejecución IN_PROGRESS más vieja que esto se considera abandonada
+# (worker caído a mitad del request) y la clave puede reclamarse de nuevo
+IN_PROGRESS_LEASE = timedelta(minutes=5)
+
+
+class IdempotencyKeyReusedError(Exception):
+    """La clave ya se usó con un request distinto."""
+    pass
+
+
+class IdempotencyService:
+    """
+    Servicio de claves de idempotencia.
+
+    Cada operación confirma su propia transacción: la clave tiene que ser
+    visible para los duplicados antes de que termine la operación protegida.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.db = db
+
+    def get(self, scope: str, key: str) -> Optional[IdempotencyKey]:
+        """Registro vigente de la clave (sin cache de la sesión)."""
+        return self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key
+        ).populate_existing().first()
+
+    def begin(self, scope: str, key: str, request_hash: str) -> Tuple[bool, IdempotencyKey]:
+        """
+        Reclama la clave para ejecutar la operación.
+
+        Args:
+            scope: Endpoint protegido
+            key: Valor del header Idempotency-Key
+            request_hash: Hash del request actual
+
+        Returns:
+            (claimed, record): claimed=True si este request debe ejecutar la
+            operación; si no, record es la ejecución previa (IN_PROGRESS o
+            COMPLETED)
+
+        Raises:
+            IdempotencyKeyReusedError: La clave existe con otro request_hash
+        """
+        now = datetime.utcnow()
+        existing = self.get(scope, key)
+        if existing is not None and self._is_stale(existing, now):
+            logger.warning(f"Idempotency key {scope}/{key} reclaimed ({existing.status})")
+            self.db.delete(existing)
+            self.db.commit()
+            existing = None
+
+        if existing is None:
+            record = IdempotencyKey(
+                scope=scope,
+                key=key,
+                request_hash=request_hash,
+                status=IdempotencyStatus.IN_PROGRESS.value,
+                expires_at=now + timedelta(hours=settings.idempotency_key_ttl_hours)
+            )
+            self.db.add(record)
+            try:
+                self.db.commit()
+                return True, record
+            except IntegrityError:
+                # Otro request reclamó la misma clave en paralelo
+                self.db.rollback()
+                existing = self.get(scope, key)
+                if existing is None:
+                    return self.begin(scope, key, request_hash)
+
+        if existing.request_hash != request_hash:
+            raise IdempotencyKeyReusedError(
+                "La clave Idempotency-Key ya se usó con un request distinto"
+            )
+        return False, existing
+
+    def _is_stale(self, record: IdempotencyKey, now: datetime) -> bool:
+        """Clave vencida o ejecución abandonada."""
+        if record.expires_at <= now:
+            return True
+        return (
+            record.status == IdempotencyStatus.IN_PROGRESS.value
+            and record.created_at is not None
+            and record.created_at <= now - IN_PROGRESS_LEASE
+        )
+
+    def complete_on_commit(self, record: IdempotencyKey, resource: type) -> Callable[[], None]:
+        """
+        Marca la clave COMPLETED dentro de la transacción que crea el recurso.
+
+        La operación protegida confirma su propia transacción y la respuesta
+        se guarda después con complete(). Si el proceso cae entre ambos
+        commits la clave no puede quedar IN_PROGRESS (se reclamaría al vencer
+        IN_PROGRESS_LEASE y se crearía un duplicado): el primer commit que
+        incluye una instancia nueva de resource guarda también el estado y
+        el id del recurso, a partir del cual se rearma la respuesta.
+
+        Args:
+            record: Clave reclamada por este request
+            resource: Modelo que crea la operación (ej: Sale)
+
+        Returns:
+            Función que deja de observar la sesión (llamar al terminar)
+        """
+        created = {}
+
+        def capture(session, flush_context):
+            if "id" in created:
+                return
+            for instance in session.new:
+                if isinstance(instance, resource):
+                    created["id"] = instance.id
+                    return
+
+        def mark(session):
+            session.flush()
+            if "id" not in created or created.get("marked"):
+                return
+            session.query(IdempotencyKey).filter(IdempotencyKey.id == record.id).update(
+                {
+                    IdempotencyKey.status: IdempotencyStatus.COMPLETED.value,
+                    IdempotencyKey.resource_id: created["id"]
+                },
+                synchronize_session=False
+            )
+            created["marked"] = True
+
+        event.listen(self.db, "after_flush", capture)
+        event.listen(self.db, "before_commit", mark)
+
+        def stop():
+            event.remove(self.db, "after_flush", capture)
+            event.remove(self.db, "before_commit", mark)
+        return stop
+
+    def complete(self, record: IdempotencyKey, status_code: int, body: str) -> None:
+        """Guarda la respuesta de la ejecución para los reintentos."""
+        self.db.query(IdempotencyKey).filter(IdempotencyKey.id == record.id).update(
+            {
+                IdempotencyKey.status: IdempotencyStatus.COMPLETED.value,
+                IdempotencyKey.response_status: status_code,
+                IdempotencyKey.response_body: body
+            },
+            synchronize_session=False
+        )
+        self.db.commit()
+
+    def release(self, record: IdempotencyKey) -> None:
+        """Libera la clave: la ejecución falló y el cliente puede reintentar."""
+        self.db.rollback()
+        self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.id == record.id,
+            IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS.value
+        ).delete(synchronize_session=False)
+        self.db.commit()
+
+    def purge_expired(self) -> int:
+        """
+        Elimina las claves vencidas.
+
+        Returns:
+            Cantidad de claves eliminadas
+        """
+        count = self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return count
@@ -211,15 +211,14 @@ class InventoryService:
         notes: Optional[str] = None
     ) -> bool:
         """
-        Disminuye stock con tracking de movimiento y optimistic locking.
+        Disminuye stock con tracking de movimiento.
         
-        ACTUALIZADO: Ahora usa StockService para prevenir race conditions.
+        Usa StockService (UPDATE condicional atómico) para prevenir
+        race conditions sin reintentos.
         
         Operación crítica que:
-        1. Valida stock suficiente
-        2. Actualiza BranchStock o ProductSize con optimistic locking
-        3. Crea InventoryMovement para auditoría
-        4. Reintenta automáticamente en caso de conflicto (max 3 veces)
+        1. Actualiza BranchStock o ProductSize solo si stock >= cantidad
+        2. Crea InventoryMovement para auditoría
         
         Args:
             product_id: ID del producto
@@ -234,7 +233,7 @@ class InventoryService:
             True si exitoso, False si stock insuficiente o producto no existe
         
         Raises:
-            StockConflictError: Si después de 3 reintentos aún hay conflictos
+            StockConflictError: Si la BD aborta la transacción por deadlock
         
         Efectos Secundarios:
             - Modifica BranchStock.stock_quantity o ProductSize.stock_quantity
@@ -256,7 +255,7 @@ class InventoryService:
             # No hay stock suficiente
             return False
         except StockConflictError:
-            # Race condition después de 3 reintentos
+            # Deadlock detectado por la BD
             # El llamador debe manejar esto (ej: mostrar error al usuario)
             raise
         except ValueError:
@@ -279,7 +278,8 @@ def adjust_stock_for_sale(
         db: Sesión de base de datos
         sale: Venta con sale_items cargados (eager loading recomendado)
         operation: 
-            - "deduct": Descuenta stock (PENDING → PROCESSING)
+            - "deduct": Descuenta stock (PENDING → PROCESSING), convirtiendo
+              las reservas activas del checkout si las hay
             - "revert": Revierte stock (cancelación)
     
     Returns:
@@ -311,52 +311,74 @@ def adjust_stock_for_sale(
     """
     from app.models import Sale, BranchStock, ProductSize, InventoryMovement
     
-    multiplier = -1 if operation == "deduct" else +1
-    stock_changes = []
-    
-    # 1. Validar stock disponible (solo si es deduct)
+    # 1. Descontar: convertir las reservas del checkout si siguen activas;
+    #    si no (venta sin reserva o reserva vencida), UPDATE condicional
+    #    atómico de todos los ítems
     if operation == "deduct":
+        from app.services.reservation_service import ReservationService
+
+        names = {item.product_id: item.product.name for item in sale.sale_items}
+        try:
+            changes = ReservationService(db).convert(sale.id, sale.sale_number)
+        except InsufficientStockError as e:
+            raise ValueError(str(e))
+        if changes:
+            return [
+                {
+                    "product_id": change["product_id"],
+                    "product_name": names.get(change["product_id"]),
+                    "size": change["size"],
+                    "quantity_adjusted": -change["quantity"],
+                    "new_stock": change["new_stock"]
+                }
+                for change in changes
+            ]
+
+        # Un lote por sucursal de envío (pedidos e-commerce repartidos)
+        items_by_branch: Dict[int, List[Dict]] = {}
         for item in sale.sale_items:
-            product = item.product
-            
-            if product.has_sizes and item.size:
-                # Producto con talle
-                product_size = db.query(ProductSize).filter(
-                    ProductSize.product_id == item.product_id,
-                    ProductSize.branch_id == sale.branch_id,
-                    ProductSize.size == item.size
-                ).first()
-                
-                if not product_size or product_size.stock_quantity < item.quantity:
-                    raise ValueError(
-                        f"Stock insuficiente para {product.name} talle {item.size}: "
-                        f"disponible {product_size.stock_quantity if product_size else 0}, "
-                        f"requerido {item.quantity}"
-                    )
-            else:
-                # Producto sin talle
-                branch_stock = db.query(BranchStock).filter(
-                    BranchStock.product_id == item.product_id,
-                    BranchStock.branch_id == sale.branch_id
-                ).first()
-                
-                if not branch_stock or branch_stock.stock_quantity < item.quantity:
-                    raise ValueError(
-                        f"Stock insuficiente para {product.name}: "
-                        f"disponible {branch_stock.stock_quantity if branch_stock else 0}, "
-                        f"requerido {item.quantity}"
-                    )
-    
-    # 2. Ajustar stock
+            items_by_branch.setdefault(item.fulfillment_branch_id or sale.branch_id, []).append(
+                {"product_id": item.product_id, "quantity": item.quantity, "size": item.size}
+            )
+
+        changes = []
+        try:
+            for branch_id, items in items_by_branch.items():
+                changes.extend(StockService.decrement_stock_batch(
+                    db,
+                    branch_id=branch_id,
+                    items=items,
+                    reference_type="SALE",
+                    reference_id=sale.id,
+                    notes=f"Venta WhatsApp #{sale.sale_number} confirmada",
+                    commit=False
+                ))
+        except InsufficientStockError as e:
+            raise ValueError(str(e))
+
+        return [
+            {
+                "product_id": change["product_id"],
+                "product_name": names.get(change["product_id"]),
+                "size": change["size"],
+                "quantity_adjusted": -change["quantity"],
+                "new_stock": change["new_stock"]
+            }
+            for change in changes
+        ]
+
+    # 2. Revertir stock
+    stock_changes = []
     for item in sale.sale_items:
         product = item.product
-        quantity_change = item.quantity * multiplier
+        quantity_change = item.quantity
+        branch_id = item.fulfillment_branch_id or sale.branch_id
         
         if product.has_sizes and item.size:
             # Producto con talle
             product_size = db.query(ProductSize).filter(
                 ProductSize.product_id == item.product_id,
-                ProductSize.branch_id == sale.branch_id,
+                ProductSize.branch_id == branch_id,
                 ProductSize.size == item.size
             ).first()
             
@@ -367,7 +389,7 @@ def adjust_stock_for_sale(
             # Producto sin talle
             branch_stock = db.query(BranchStock).filter(
                 BranchStock.product_id == item.product_id,
-                BranchStock.branch_id == sale.branch_id
+                BranchStock.branch_id == branch_id
             ).first()
             
             previous_stock = branch_stock.stock_quantity
@@ -375,22 +397,16 @@ def adjust_stock_for_sale(
             new_stock = branch_stock.stock_quantity
         
         # 3. Crear InventoryMovement para auditoría
-        notes_text = (
-            f"Venta WhatsApp #{sale.sale_number} confirmada"
-            if operation == "deduct"
-            else f"Cancelación venta WhatsApp #{sale.sale_number}"
-        )
-        
         movement = InventoryMovement(
             product_id=item.product_id,
-            branch_id=sale.branch_id,
-            movement_type="OUT" if operation == "deduct" else "ADJUSTMENT",
-            quantity=quantity_change,  # Negativo si deduct, positivo si revert
+            branch_id=branch_id,
+            movement_type="ADJUSTMENT",
+            quantity=quantity_change,
             previous_stock=previous_stock,
             new_stock=new_stock,
             reference_type="SALE",
             reference_id=sale.id,
-            notes=notes_text
+            notes=f"Cancelación venta #{sale.sale_number}"
         )
         db.add(movement)
         
@@ -0,0 +1,113 @@
+"""
+Handlers de Trabajos en Segundo Plano.
+
+Cada handler recibe una sesión propia (db) y el JobContext del trabajo,
+y retorna un dict JSON-serializable que se guarda en BackgroundJob.result.
+
+Tipos registrados:
+    - product_import: Importación masiva CSV/Excel (actualiza ImportLog)
+    - bulk_price_update: Actualización masiva de precios
+    - notification_cleanup: Limpieza de notificaciones antiguas
+    - job_cleanup: Purga de trabajos finalizados antiguos
+"""
+
+from sqlalchemy.orm import Session
+from datetime import datetime
+
+from app.models import ImportLog
+from app.schemas.product import BulkPriceUpdateRequest
+from app.services.job_service import job_handler, JobContext, JobService, PermanentJobError
+from app.services.bulk_operations_service import BulkOperationsService, read_import_file
+from app.services.notification_service import NotificationService
+
+
+@job_handler("product_import")
+def run_product_import(db: Session, ctx: JobContext) -> dict:
+    """
+    Importación masiva de productos (formato legacy codigo_barra/modelo/efectivo).
+
+    Payload:
+        filename: Nombre original del archivo
+        import_log_id: ImportLog creado al encolar
+    """
+    filename = ctx.payload["filename"]
+    import_log = db.query(ImportLog).filter(
+        ImportLog.id == ctx.payload["import_log_id"]
+    ).first()
+    if import_log is None:
+        raise ValueError(f"ImportLog {ctx.payload['import_log_id']} no existe")
+
+    ctx.report_progress(0, "Leyendo archivo", force=True)
+    try:
+        df = read_import_file(filename, ctx.input_data or b"")
+        result = BulkOperationsService(db).import_legacy_products(
+            df, import_log, progress_callback=ctx.report_progress
+        )
+    except ValueError as e:
+        # Archivo ilegible o columnas faltantes (UnicodeDecodeError y
+        # ParserError de pandas son ValueError): reintentar no cambia nada
+        _fail_import(db, import_log, e)
+        raise PermanentJobError(str(e)) from e
+    except Exception as e:
+        # Falla transitoria: el ImportLog queda PROCESSING mientras queden reintentos
+        if ctx.is_last_attempt:
+            _fail_import(db, import_log, e)
+        raise
+
+    return {
+        "import_log_id": import_log.id,
+        "total_rows": result["total_rows"],
+        "successful_rows": result["successful_rows"],
+        "failed_rows": result["failed_rows"],
+        "errors": result["errors"][:10],  # Solo los primeros 10 errores
+    }
+
+
+def _fail_import(db: Session, import_log: ImportLog, error: Exception) -> None:
+    """Marca el ImportLog FAILED (descarta lo que el handler dejó sin confirmar)."""
+    db.rollback()
+    import_log.status = "FAILED"
+    import_log.error_details = str(error)
+    import_log.completed_at = datetime.now()
+    db.commit()
+
+
+@job_handler("bulk_price_update")
+def run_bulk_price_update(db: Session, ctx: JobContext) -> dict:
+    """
+    Actualización masiva de precios.
+
+    Payload: campos de BulkPriceUpdateRequest
+    """
+    update_data = BulkPriceUpdateRequest(**ctx.payload)
+    response = BulkOperationsService(db).update_prices(
+        update_data, progress_callback=ctx.report_progress
+    )
+    return response.model_dump()
+
+
+@job_handler("notification_cleanup")
+def run_notification_cleanup(db: Session, ctx: JobContext) -> dict:
+    """
+    Limpieza de notificaciones leídas antiguas.
+
+    Payload:
+        days: Antigüedad mínima en días (default: 30)
+    """
+    days = int(ctx.payload.get("days", 30))
+    service = NotificationService(db)
+    removed = service.cleanup_old_notifications(days=days)
+    deactivated = service.deactivate_expired_notifications()
+    return {"removed": removed, "deactivated": deactivated}
+
+
+@job_handler("job_cleanup")
+def run_job_cleanup(db: Session, ctx: JobContext) -> dict:
+    """
+    Purga de trabajos finalizados antiguos.
+
+    Payload:
+        days: Antigüedad mínima en días (default: 30)
+    """
+    days = int(ctx.payload.get("days", 30))
+    return {"purged": JobService(db).purge_finished_jobs(days=days)}
@@ -0,0 +1,462 @@
+"""
+Servicio de Trabajos en Segundo Plano - Lógica de Negocio.
+
+Cola durable para operaciones pesadas que no deben ejecutarse dentro de una
+request HTTP. La API solo encola (INSERT) y responde 202; job_worker.py
+reclama y ejecuta los trabajos en un proceso separado, con su propio pool
+de conexiones.
+
+Responsabilidades:
+    - Registro de handlers por tipo de trabajo (@job_handler)
+    - Encolado con prioridad, reintentos y archivo adjunto opcional
+    - Ejecución de un trabajo reclamado y transición de estados
+    - Reintentos con backoff exponencial
+    - Progreso y cancelación cooperativa vía JobContext
+    - Heartbeat del lease independiente del handler (JobHeartbeat)
+
+Estados:
+    PENDING → RUNNING → COMPLETED
+                      → PENDING (reintento con backoff) → ... → FAILED
+                      → FAILED (PermanentJobError: sin reintentos)
+                      → CANCELLED (cancel_requested chequeado en el progreso)
+
+Uso:
+    # Encolar desde un endpoint
+    job = JobService(db).enqueue("bulk_price_update", payload=data.model_dump(),
+                                 user_id=current_user.id)
+
+    # Definir un handler (app/services/job_handlers.py)
+    @job_handler("bulk_price_update")
+    def run_bulk_price_update(db: Session, ctx: JobContext) -> dict:
+        ctx.report_progress(50, "Mitad")
+        return {"updated": 10}
+"""
+
+from contextlib import nullcontext
+from typing import Callable, Dict, Optional, List, Any, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+import logging
+import threading
+import time
+
+from app.models.job import BackgroundJob, JobStatus
+from app.repositories.job import BackgroundJobRepository
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelledError(Exception):
+    """Excepción lanzada dentro de un handler cuando se solicitó cancelar el trabajo."""
+    pass
+
+
+class PermanentJobError(Exception):
+    """
+    Falla determinística de un handler (ej: archivo con columnas faltantes).
+
+    Reintentarla daría el mismo resultado: el trabajo pasa a FAILED sin
+    consumir los intentos restantes.
+    """
+    pass
+
+
+# Registro global tipo de trabajo → handler(db, ctx) -> dict
+_JOB_HANDLERS: Dict[str, Callable[[Session, "JobContext"], Optional[dict]]] = {}
+
+
+def job_handler(job_type: str):
+    """
+    Decorador para registrar el handler de un tipo de trabajo.
+
+    Args:
+        job_type: Nombre del tipo de trabajo (ej: "product_import")
+    """
+    def decorator(func):
+        _JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def get_registered_job_types() -> List[str]:
+    """Tipos de trabajo con handler registrado."""
+    _load_default_handlers()
+    return sorted(_JOB_HANDLERS.keys())
+
+
+def _load_default_handlers():
+    """Importa los handlers estándar (registro perezoso para evitar imports circulares)."""
+    import app.services.job_handlers  # noqa: F401
+
+
+class JobContext:
+    """
+    Contexto de ejecución pasado a cada handler.
+
+    Expone el payload y el archivo adjunto del trabajo, y permite reportar
+    progreso. Cada reporte usa una sesión corta e independiente (no confirma
+    el trabajo en curso del handler), renueva el lease del worker y verifica
+    si se solicitó cancelación.
+
+    Attributes:
+        job_id: ID del trabajo
+        job_type: Tipo de trabajo
+        payload: Parámetros del trabajo
+        input_data: Archivo adjunto (bytes) o None
+        user_id: Usuario que encoló el trabajo
+    """
+
+    def __init__(
+        self,
+        job: BackgroundJob,
+        session_factory: Callable[[], Session],
+        min_report_interval: float = 2.0
+    ):
+        self.job_id = job.id
+        self.job_type = job.job_type
+        self.payload: Dict[str, Any] = job.payload or {}
+        self.input_data: Optional[bytes] = job.input_data
+        self.user_id = job.user_id
+        self.attempt = job.attempts
+        self.max_attempts = job.max_attempts
+        self._session_factory = session_factory
+        self._min_report_interval = min_report_interval
+        self._last_report = 0.0
+        self._last_progress = -1
+
+    @property
+    def is_last_attempt(self) -> bool:
+        """True si una falla en este intento deja el trabajo FAILED (sin reintento)."""
+        return (self.attempt or 0) >= (self.max_attempts or 1)
+
+    def report_progress(self, progress: int, message: Optional[str] = None, force: bool = False) -> None:
+        """
+        Reporta avance del trabajo (0-100).
+
+        Los reportes se limitan a uno cada min_report_interval segundos
+        (salvo force=True) para no convertir el progreso en carga de escritura.
+
+        Raises:
+            JobCancelledError: Si el usuario solicitó cancelar el trabajo
+        """
+        now = time.monotonic()
+        if not force and now - self._last_report < self._min_report_interval:
+            return
+        self._last_report = now
+
+        progress = max(0, min(100, int(progress)))
+        db = self._session_factory()
+        try:
+            job = db.query(BackgroundJob).filter(BackgroundJob.id == self.job_id).first()
+            if job is None:
+                return
+            if job.cancel_requested:
+                raise JobCancelledError(f"Trabajo {self.job_id} cancelado por el usuario")
+            job.progress = max(progress, self._last_progress)
+            if message is not None:
+                job.progress_message = message[:255]
+            job.locked_at = datetime.utcnow()
+            db.commit()
+            self._last_progress = job.progress
+        finally:
+            db.close()
+
+    def check_cancelled(self) -> None:
+        """Verifica cancelación sin esperar el intervalo de reporte."""
+        db = self._session_factory()
+        try:
+            cancel_requested = db.query(BackgroundJob.cancel_requested).filter(
+                BackgroundJob.id == self.job_id
+            ).scalar()
+        finally:
+            db.close()
+        if cancel_requested:
+            raise JobCancelledError(f"Trabajo {self.job_id} cancelado por el usuario")
+
+
+class JobHeartbeat:
+    """
+    Renueva el lease de un trabajo en un thread propio mientras corre el handler.
+
+    El handler puede pasar más de JOB_LEASE_SECONDS sin reportar progreso
+    (una consulta larga, un archivo grande): sin heartbeat requeue_stale lo
+    reencolaría y otro worker lo ejecutaría en paralelo. Cada latido usa una
+    sesión corta propia; si el trabajo dejó de pertenecer al worker se deja
+    de latir.
+
+    Uso:
+        with JobHeartbeat(job.id, worker_id, SessionLocal, interval=150):
+            handler(db, ctx)
+    """
+
+    def __init__(self, job_id: int, worker_id: str, session_factory: Callable[[], Session], interval: float):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self._session_factory = session_factory
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "JobHeartbeat":
+        self._thread = threading.Thread(target=self._run, name=f"job-heartbeat-{self.job_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            db = self._session_factory()
+            try:
+                if not BackgroundJobRepository(db).heartbeat(self.job_id, self.worker_id):
+                    logger.warning(f"Job {self.job_id} no longer owned by {self.worker_id}, heartbeat stopped")
+                    return
+            except Exception as e:
+                logger.error(f"Job {self.job_id} heartbeat failed: {e}")
+            finally:
+                db.close()
+
+
+class JobService:
+    """
+    Servicio de la cola de trabajos en segundo plano.
+    """
+
+    # Prioridades sugeridas (mayor valor = se ejecuta antes)
+    PRIORITY_HIGH = 10
+    PRIORITY_NORMAL = 0
+    PRIORITY_LOW = -10
+
+    # Espera base entre reintentos: 30s, 60s, 120s, ...
+    RETRY_BACKOFF_SECONDS = 30
+
+    def __init__(self, db: Session):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.db = db
+        self.job_repo = BackgroundJobRepository(db)
+
+    # ========================================================================
+    # Encolado y consulta
+    # ========================================================================
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Optional[dict] = None,
+        user_id: Optional[int] = None,
+        priority: int = PRIORITY_NORMAL,
+        max_attempts: int = 3,
+        input_data: Optional[bytes] = None,
+        run_after: Optional[datetime] = None
+    ) -> BackgroundJob:
+        """
+        Encola un trabajo nuevo en estado PENDING.
+
+        Raises:
+            ValueError: Si job_type no tiene handler registrado
+        """
+        if job_type not in get_registered_job_types():
+            raise ValueError(f"Tipo de trabajo desconocido: {job_type}")
+
+        return self.job_repo.create({
+            "job_type": job_type,
+            "payload": payload or {},
+            "user_id": user_id,
+            "priority": priority,
+            "max_attempts": max(1, max_attempts),
+            "input_data": input_data,
+            "run_after": run_after or datetime.utcnow(),
+            "status": JobStatus.PENDING.value,
+        })
+
+    def get_job(self, job_id: int) -> Optional[BackgroundJob]:
+        """Obtener trabajo por ID."""
+        return self.job_repo.get(job_id)
+
+    def list_jobs(
+        self,
+        user_id: Optional[int] = None,
+        job_type: Optional[str] = None,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50
+    ) -> List[BackgroundJob]:
+        """Listar trabajos más recientes primero."""
+        return self.job_repo.get_by_user(user_id, job_type, status, skip, limit)
+
+    def queue_depths(self) -> List[Tuple[str, str, int]]:
+        """Trabajos pendientes y en ejecución por tipo: [(job_type, status, cantidad)] (/metrics)."""
+        return self.job_repo.count_active_by_type()
+
+    def cancel(self, job_id: int) -> Optional[BackgroundJob]:
+        """
+        Cancela un trabajo.
+
+        - PENDING: pasa a CANCELLED inmediatamente
+        - RUNNING: se marca cancel_requested; el handler lo detecta en su
+          próximo report_progress() y el worker lo finaliza como CANCELLED
+        - Estados terminales: sin cambios
+
+        Returns:
+            Trabajo actualizado o None si no existe
+        """
+        job = self.job_repo.get(job_id)
+        if job is None or job.is_finished():
+            return job
+
+        if job.status == JobStatus.PENDING.value:
+            job.status = JobStatus.CANCELLED.value
+            job.completed_at = datetime.utcnow()
+            job.input_data = None
+        job.cancel_requested = True
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    # ========================================================================
+    # Ejecución (usado por job_worker.py)
+    # ========================================================================
+
+    def claim_next(self, worker_id: str, job_types: Optional[List[str]] = None) -> Optional[BackgroundJob]:
+        """Reclama el próximo trabajo pendiente para este worker."""
+        return self.job_repo.claim_next(worker_id, job_types)
+
+    def execute(
+        self,
+        job: BackgroundJob,
+        session_factory: Callable[[], Session],
+        heartbeat_interval: Optional[float] = None
+    ) -> BackgroundJob:
+        """
+        Ejecuta un trabajo ya reclamado (RUNNING) y registra su resultado.
+
+        El handler trabaja con una sesión propia creada con session_factory,
+        de modo que sus commits/rollbacks no afectan la sesión de control
+        de la cola. El resultado sólo se registra si el trabajo sigue
+        perteneciendo a este worker (locked_by); si fue reencolado, el
+        estado lo decide el worker que lo tiene ahora.
+
+        Args:
+            job: Trabajo en estado RUNNING (de claim_next)
+            session_factory: Factory de sesiones (SessionLocal)
+            heartbeat_interval: Segundos entre renovaciones del lease
+                (None = sin heartbeat, el lease sólo se renueva con el progreso)
+
+        Returns:
+            Trabajo con su estado final o reprogramado
+        """
+        _load_default_handlers()
+        handler = _JOB_HANDLERS.get(job.job_type)
+        worker_id = job.locked_by
+        if handler is None:
+            return self._finish(job, JobStatus.FAILED, error=f"Sin handler para tipo {job.job_type}",
+                                worker_id=worker_id)
+
+        ctx = JobContext(job, session_factory)
+        work_db = session_factory()
+        heartbeat = (
+            JobHeartbeat(job.id, worker_id, session_factory, heartbeat_interval)
+            if heartbeat_interval and worker_id else nullcontext()
+        )
+        try:
+            with heartbeat:
+                result = handler(work_db, ctx)
+        except JobCancelledError as e:
+            work_db.rollback()
+            logger.info(f"Job {job.id} cancelled: {e}")
+            return self._finish(job, JobStatus.CANCELLED, error=str(e), worker_id=worker_id)
+        except PermanentJobError as e:
+            work_db.rollback()
+            logger.error(f"Job {job.id} ({job.job_type}) failed permanently: {e}")
+            return self._finish(job, JobStatus.FAILED, error=str(e), worker_id=worker_id)
+        except Exception as e:
+            work_db.rollback()
+            logger.error(f"Job {job.id} ({job.job_type}) failed on attempt {job.attempts}: {e}")
+            return self._retry_or_fail(job, str(e), worker_id=worker_id)
+        finally:
+            work_db.close()
+
+        return self._finish(job, JobStatus.COMPLETED, result=result, worker_id=worker_id)
+
+    def _owned_by(self, job: BackgroundJob, worker_id: Optional[str]) -> bool:
+        """
+        Relee el trabajo con lock de fila y verifica que siga siendo de worker_id.
+
+        Si requeue_stale lo reencoló (y quizás otro worker ya lo reclamó),
+        este worker no debe pisar su estado.
+        """
+        self.db.refresh(job, with_for_update=True)
+        if worker_id is None or job.locked_by == worker_id:
+            return True
+        logger.warning(f"Job {job.id} is now owned by {job.locked_by}, discarding result of {worker_id}")
+        self.db.commit()
+        return False
+
+    def _finish(
+        self,
+        job: BackgroundJob,
+        status: JobStatus,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+        worker_id: Optional[str] = None
+    ) -> BackgroundJob:
+        """Lleva el trabajo a un estado terminal y libera el archivo adjunto."""
+        if not self._owned_by(job, worker_id):
+            return job
+        job.status = status.value
+        job.completed_at = datetime.utcnow()
+        job.locked_by = None
+        job.locked_at = None
+        job.input_data = None
+        if status == JobStatus.COMPLETED:
+            job.progress = 100
+            job.result = result or {}
+        if error is not None:
+            job.error_details = error
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def _retry_or_fail(self, job: BackgroundJob, error: str, worker_id: Optional[str] = None) -> BackgroundJob:
+        """
+        Reprograma el trabajo con backoff exponencial o lo marca FAILED.
+
+        Si se pidió cancelarlo mientras corría termina CANCELLED: el usuario
+        ya no espera el resultado y no se reintenta.
+        """
+        if not self._owned_by(job, worker_id):
+            return job
+        if job.cancel_requested:
+            return self._finish(job, JobStatus.CANCELLED, error=error, worker_id=worker_id)
+        if job.attempts >= job.max_attempts:
+            return self._finish(job, JobStatus.FAILED, error=error, worker_id=worker_id)
+
+        delay = self.RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+        job.status = JobStatus.PENDING.value
+        job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+        job.locked_by = None
+        job.locked_at = None
+        job.error_details = error
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    # ========================================================================
+    # Mantenimiento
+    # ========================================================================
+
+    def requeue_stale_jobs(self, lease_seconds: int) -> int:
+        """Reencolar trabajos de workers que dejaron de reportar."""
+        return self.job_repo.requeue_stale(lease_seconds)
+
+    def purge_finished_jobs(self, days: int = 30) -> int:
+        """Eliminar trabajos finalizados antiguos."""
+        return self.job_repo.purge_finished(days)
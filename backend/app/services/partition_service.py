@@ -0,0 +1,305 @@
+"""
+Servicio de Particiones - Particiones mensuales de ventas e inventario.
+
+En PostgreSQL, sales, sale_items e inventory_movements están particionadas
+por RANGE (created_at), una partición por mes (migración 20261019_170000):
+
+    sales_p2026_10       [2026-10-01, 2026-11-01)
+    sales_default        filas fuera de las particiones existentes
+
+sale_items lleva el created_at de su venta (SaleItem._copy_sale_created_at),
+así una venta y sus líneas quedan en el mismo mes y ReportsRepository filtra
+ambas tablas por el mismo rango: el planner sólo lee las particiones del
+período.
+
+Mantenimiento (notification_scheduler.py, diario):
+    - ensure_partitions(): crea las particiones del mes actual y de los
+      PARTITION_MONTHS_AHEAD siguientes. Si la partición por defecto ya tiene
+      filas de ese mes, se mueven a la partición nueva antes de adjuntarla
+    - archive_partitions(): desacopla los meses anteriores a
+      PARTITION_RETENTION_MONTHS (de las tres tablas a la vez) y los mueve al
+      esquema PARTITION_ARCHIVE_SCHEMA; siguen consultables y se pueden
+      exportar o eliminar sin tocar las tablas vivas
+
+verify_report_pruning() ejecuta los reportes del mes actual bajo EXPLAIN y
+devuelve qué particiones lee cada consulta (GET /diagnostics/partitions).
+
+Fuera de PostgreSQL (SQLite en tests) las tablas no están particionadas y
+todas las operaciones son no-op.
+"""
+
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.repositories.reports import ReportsRepository
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("sales", "sale_items", "inventory_movements")
+
+_PARTITION_NAME = re.compile(r"^(?P<table>\w+?)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+# Consultas de ReportsRepository verificadas por verify_report_pruning()
+REPORT_QUERIES: Tuple[Tuple[str, Callable[[ReportsRepository, datetime, datetime], Any]], ...] = (
+    ("sales_total", lambda repo, start, end: repo.get_sales_total_for_period(start, end)),
+    ("sales_count", lambda repo, start, end: repo.get_sales_count_for_period(start, end)),
+    ("daily_sales", lambda repo, start, end: repo.get_daily_sales(start, end)),
+    ("top_products", lambda repo, start, end: repo.get_top_products(start, end)),
+    ("products_chart", lambda repo, start, end: repo.get_products_chart_data(start, end)),
+    ("top_brands", lambda repo, start, end: repo.get_top_brands(start, end)),
+    ("branch_sales", lambda repo, start, end: repo.get_branch_sales(start, end)),
+    ("payment_methods", lambda repo, start, end: repo.get_sales_by_payment_method(start, end)),
+    ("sales_by_type", lambda repo, start, end: repo.get_sales_by_type(start, end)),
+    ("sales_list", lambda repo, start, end: repo.get_sales_list(start, end)),
+)
+
+
+def month_start(value: date) -> date:
+    """Primer día del mes de la fecha."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Primer día del mes desplazado `months` meses (negativo hacia atrás)."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Nombre de la partición mensual: sales_p2026_10."""
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_month(name: str) -> Optional[Tuple[str, date]]:
+    """(tabla, mes) de un nombre de partición mensual; None para la partición por defecto u otras."""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return match.group("table"), date(int(match.group("year")), int(match.group("month")), 1)
+
+
+def create_partition_statements(table: str, month: date) -> List[str]:
+    """
+    SQL para crear y adjuntar la partición del mes.
+
+    La tabla se crea suelta (LIKE) y se adjunta al final: así las filas de
+    ese mes que ya hubieran caído en la partición por defecto se mueven
+    antes del ATTACH, que fallaría si la partición por defecto las tuviera.
+
+    En sales el DELETE de sales_default dispara trigger_sales_keys, que
+    borra las claves de las ventas movidas, y el INSERT en la tabla todavía
+    suelta no dispara nada: las claves se vuelven a insertar en la misma
+    transacción para no perder la unicidad de sale_number y client_uuid.
+    """
+    name = partition_name(table, month)
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    in_month = f"created_at >= '{start}' AND created_at < '{end}'"
+    statements = [
+        f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        f"INSERT INTO {name} SELECT * FROM {table}_default WHERE {in_month}",
+        f"DELETE FROM {table}_default WHERE {in_month}",
+    ]
+    if table == "sales":
+        statements.append(
+            f"INSERT INTO sale_keys (sale_id, sale_number, client_uuid) "
+            f"SELECT id, sale_number, client_uuid FROM {name}"
+        )
+    statements.append(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')")
+    return statements
+
+
+def archive_partition_statements(table: str, month: date, schema: str) -> List[str]:
+    """SQL para desacoplar la partición del mes y moverla al esquema de archivo."""
+    name = partition_name(table, month)
+    return [
+        f"ALTER TABLE {table} DETACH PARTITION {name}",
+        f"ALTER TABLE {name} SET SCHEMA {schema}",
+    ]
+
+
+def scanned_relations(plan: Any) -> List[str]:
+    """Tablas leídas por un plan de EXPLAIN (FORMAT JSON), en orden de aparición."""
+    relations: List[str] = []
+    nodes = [plan[0]["Plan"]] if isinstance(plan, list) else [plan]
+    while nodes:
+        node = nodes.pop(0)
+        if "Relation Name" in node and node["Relation Name"] not in relations:
+            relations.append(node["Relation Name"])
+        nodes[:0] = node.get("Plans", [])
+    return relations
+
+
+class PartitionService:
+    """
+    Creación, archivo y diagnóstico de particiones mensuales.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.db = db
+
+    def is_partitioned(self) -> bool:
+        """True si sales es una tabla particionada (PostgreSQL migrado)."""
+        if self.db.get_bind().dialect.name != "postgresql":
+            return False
+        return bool(self.db.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('sales'))"
+        )).scalar())
+
+    def list_partitions(self, table: str) -> List[Dict]:
+        """Particiones de la tabla con su mes, filas estimadas y tamaño, la más antigua primero."""
+        rows = self.db.execute(text("""
+            SELECT child.relname, child.reltuples, pg_total_relation_size(child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(:table)
+        """), {"table": table}).all()
+
+        partitions = []
+        for name, estimated_rows, size in rows:
+            parsed = partition_month(name)
+            partitions.append({
+                "name": name,
+                "month": parsed[1].isoformat() if parsed else None,
+                "estimated_rows": max(int(estimated_rows), 0),
+                "bytes": size,
+            })
+        return sorted(partitions, key=lambda partition: partition["month"] or "")
+
+    def ensure_partitions(self, today: Optional[date] = None, months_ahead: Optional[int] = None) -> List[str]:
+        """
+        Crea las particiones faltantes del mes actual y los siguientes.
+
+        Returns:
+            Nombres de las particiones creadas
+        """
+        if not self.is_partitioned():
+            return []
+        current = month_start(today or date.today())
+        ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+
+        created = []
+        for offset in range(ahead + 1):
+            month = add_months(current, offset)
+            for table in PARTITIONED_TABLES:
+                if self._exists(partition_name(table, month)):
+                    continue
+                for statement in create_partition_statements(table, month):
+                    self.db.execute(text(statement))
+                created.append(partition_name(table, month))
+            self.db.commit()
+
+        if created:
+            logger.info("Particiones creadas: %s", ", ".join(created))
+        return created
+
+    def archive_partitions(self, today: Optional[date] = None, retention_months: Optional[int] = None) -> List[str]:
+        """
+        Desacopla las particiones anteriores a la retención y las mueve al esquema de archivo.
+
+        Cada mes se archiva en una transacción, en las tres tablas a la vez:
+        una venta nunca queda archivada con sus líneas todavía vivas.
+
+        Returns:
+            Nombres calificados (esquema.tabla) de las particiones archivadas
+        """
+        retention = settings.partition_retention_months if retention_months is None else retention_months
+        if retention <= 0 or not self.is_partitioned():
+            return []
+        cutoff = add_months(month_start(today or date.today()), -retention)
+        schema = settings.partition_archive_schema
+
+        months = sorted({
+            date.fromisoformat(partition["month"])
+            for table in PARTITIONED_TABLES
+            for partition in self.list_partitions(table)
+            if partition["month"] and date.fromisoformat(partition["month"]) < cutoff
+        })
+        archived = []
+        for month in months:
+            self.db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+            for table in PARTITIONED_TABLES:
+                if not self._exists(partition_name(table, month)):
+                    continue
+                for statement in archive_partition_statements(table, month, schema):
+                    self.db.execute(text(statement))
+                archived.append(f"{schema}.{partition_name(table, month)}")
+            self.db.commit()
+
+        if archived:
+            logger.info("Particiones archivadas: %s", ", ".join(archived))
+        return archived
+
+    def maintain(self, today: Optional[date] = None) -> Dict[str, List[str]]:
+        """Mantenimiento periódico: particiones futuras y archivo de las vencidas."""
+        return {
+            "created": self.ensure_partitions(today),
+            "archived": self.archive_partitions(today),
+        }
+
+    def verify_report_pruning(self, today: Optional[date] = None) -> List[Dict]:
+        """
+        Particiones que lee cada consulta de ReportsRepository para el mes actual.
+
+        Ejecuta los reportes capturando sus SELECT y corre EXPLAIN sobre cada
+        uno (no ANALYZE). Una consulta poda bien si sólo lee particiones del
+        mes consultado.
+
+        Returns:
+            Lista de {"query", "partitions", "pruned"} por consulta de reporte
+        """
+        if not self.is_partitioned():
+            return []
+        month = month_start(today or date.today())
+        start = datetime.combine(month, datetime.min.time())
+        end = datetime.combine(add_months(month, 1), datetime.min.time()) - timedelta(microseconds=1)
+        expected = {partition_name(table, month) for table in PARTITIONED_TABLES}
+        prefixes = tuple(f"{table}_" for table in PARTITIONED_TABLES)
+
+        repository = ReportsRepository(self.db)
+        results = []
+        for name, run in REPORT_QUERIES:
+            partitions: List[str] = []
+            for statement, parameters in self._captured_selects(lambda: run(repository, start, end)):
+                plan = self.db.connection().exec_driver_sql(
+                    "EXPLAIN (FORMAT JSON) " + statement, parameters
+                ).scalar()
+                for relation in scanned_relations(plan):
+                    if relation.startswith(prefixes) and relation not in partitions:
+                        partitions.append(relation)
+            results.append({
+                "query": name,
+                "partitions": partitions,
+                "pruned": bool(partitions) and set(partitions) <= expected,
+            })
+        return results
+
+    def _captured_selects(self, run: Callable[[], Any]) -> List[Tuple[str, Any]]:
+        """SELECT (sentencia y parámetros) que ejecuta `run` en la conexión de la sesión."""
+        connection = self.db.connection()
+        captured: List[Tuple[str, Any]] = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                captured.append((statement, parameters))
+
+        event.listen(connection, "before_cursor_execute", capture)
+        try:
+            run()
+        finally:
+            event.remove(connection, "before_cursor_execute", capture)
+        return captured
+
+    def _exists(self, name: str) -> bool:
+        return self.db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
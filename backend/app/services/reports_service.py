@@ -26,6 +26,8 @@ Características:
 
 Integración:
     - ReportsRepository: queries optimizadas
+    - ArchiveAwareReportsRepository: suma los meses archivados en Parquet
+      (app/repositories/sales_archive.py) a los reportes de largo plazo
     - ProductRepository: enriquecimiento de datos de productos
     - Schemas: validación y serialización de responses
 """
@@ -35,7 +37,7 @@ from datetime import datetime, date, time
 from typing import Optional, List
 from decimal import Decimal
 
-from app.repositories.reports import ReportsRepository
+from app.repositories.sales_archive import ArchiveAwareReportsRepository
 from app.repositories.product import ProductRepository
 from app.models import User, UserRole, Branch, Product
 from app.schemas.reports import (
@@ -68,7 +70,7 @@ class ReportsService:
             db: Sesión de SQLAlchemy
         """
         self.db = db
-        self.reports_repo = ReportsRepository(db)
+        self.reports_repo = ArchiveAwareReportsRepository(db)
         self.product_repo = ProductRepository(Product, db)
     
     # ==================== PERMISSIONS & VALIDATION ====================
@@ -0,0 +1,413 @@
+"""
+Servicio de Reservas de Stock - Holds con TTL para checkouts e-commerce.
+
+Un pedido e-commerce PENDING no descuenta stock físico (el pago se
+coordina por WhatsApp), pero sí debe impedir que otros pedidos vendan las
+mismas unidades. Este servicio retiene stock por (producto, talle, sucursal)
+con vencimiento:
+
+    reserve()    checkout          → reserved_stock += cantidad (condicional)
+    convert()    pago confirmado   → stock_quantity -= cantidad, reserved_stock -= cantidad
+    release()    pedido cancelado  → reserved_stock -= cantidad
+    expire_due() sweeper periódico → libera reservas vencidas
+
+Todas las operaciones son UPDATE condicionales por lote (mismo patrón que
+StockService.decrement_stock_batch): sin lecturas previas ni reintentos.
+Los contadores reserved_stock de BranchStock/ProductSize y de Product se
+actualizan en la misma transacción que las reservas, por lo que el stock
+disponible se lee en O(1): stock_quantity - reserved_stock.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import (
+    BranchStock, InventoryMovement, Product, ProductSize,
+    StockReservation, ReservationStatus
+)
+from app.services.stock_service import InsufficientStockError
+from app.services.catalog_search_service import refresh_catalog_stock
+from app.services.storefront_service import invalidate_product_detail
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# (product_id, branch_id, size)
+ReservationKey = Tuple[int, int, Optional[str]]
+
+
+class ReservationService:
+    """
+    Servicio de reservas de stock para ventas e-commerce pendientes.
+
+    Ninguna operación confirma la transacción salvo expire_due(): el
+    llamador confirma junto con la venta.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.db = db
+
+    # ===== CICLO DE VIDA =====
+
+    def reserve(
+        self,
+        sale_id: int,
+        lines: List[Dict],
+        ttl_minutes: Optional[int] = None
+    ) -> List[StockReservation]:
+        """
+        Retiene stock para una venta pendiente (todo o nada).
+
+        Args:
+            sale_id: Venta e-commerce que origina la reserva
+            lines: [{"product_id", "branch_id", "quantity", "size"}]
+            ttl_minutes: Duración del hold (default: settings.stock_reservation_ttl_minutes)
+
+        Returns:
+            Reservas creadas (una por producto/talle/sucursal)
+
+        Raises:
+            ValueError: Producto inexistente o talle faltante
+            InsufficientStockError: Algún ítem sin stock disponible
+                (la transacción completa queda revertida)
+        """
+        # Un talle en un producto sin talles se ignora: su stock está en
+        # branch_stock y la reserva se registra sin talle
+        has_sizes = self._has_sizes({line["product_id"] for line in lines})
+        requested: Dict[ReservationKey, int] = {}
+        for line in lines:
+            size = line.get("size") if has_sizes.get(line["product_id"]) else None
+            key = (line["product_id"], line["branch_id"], size)
+            requested[key] = requested.get(key, 0) + line["quantity"]
+
+        branch_lines, size_lines = self._split_by_table(requested)
+
+        applied = self._update_rows(
+            "branch_stock", branch_lines,
+            "reserved_stock = t.reserved_stock + v.column3",
+            "t.stock_quantity - t.reserved_stock >= v.column3"
+        ) | self._update_rows(
+            "product_sizes", size_lines,
+            "reserved_stock = t.reserved_stock + v.column3",
+            "t.stock_quantity - t.reserved_stock >= v.column3"
+        )
+
+        missing = [key for key in requested if key not in applied]
+        if missing:
+            self.db.rollback()
+            raise InsufficientStockError(self._describe_shortage(missing, requested))
+
+        self._bump_product_counters(requested, sign=+1)
+
+        expires_at = datetime.utcnow() + timedelta(
+            minutes=ttl_minutes or settings.stock_reservation_ttl_minutes
+        )
+        reservations = [
+            StockReservation(
+                sale_id=sale_id,
+                product_id=product_id,
+                branch_id=branch_id,
+                size=size,
+                quantity=quantity,
+                status=ReservationStatus.ACTIVE.value,
+                expires_at=expires_at
+            )
+            for (product_id, branch_id, size), quantity in requested.items()
+        ]
+        self.db.add_all(reservations)
+        self.db.flush()
+        return reservations
+
+    def get_active(self, sale_id: int, lock: bool = False) -> List[StockReservation]:
+        """Reservas activas de una venta (lock=True las bloquea contra el sweeper)."""
+        query = self.db.query(StockReservation).filter(
+            StockReservation.sale_id == sale_id,
+            StockReservation.status == ReservationStatus.ACTIVE.value
+        ).order_by(StockReservation.id)
+        if lock:
+            query = query.with_for_update()
+        return query.all()
+
+    def convert(self, sale_id: int, sale_number: Optional[str] = None) -> List[Dict]:
+        """
+        Convierte las reservas activas de una venta en descuento de stock.
+
+        Descuenta stock_quantity y reserved_stock a la vez y registra
+        InventoryMovement por ítem.
+
+        Returns:
+            Cambios aplicados: [{"product_id", "branch_id", "size",
+            "quantity", "new_stock"}] (vacío si la venta no tenía reservas activas)
+
+        Raises:
+            InsufficientStockError: Si el stock físico bajó por debajo de lo
+                reservado (ajuste manual); la transacción queda revertida
+        """
+        reservations = self.get_active(sale_id, lock=True)
+        if not reservations:
+            return []
+
+        requested = self._aggregate(reservations)
+        branch_lines, size_lines = self._split_by_table(requested)
+        new_stock: Dict[ReservationKey, int] = {}
+        for table, table_lines in (("branch_stock", branch_lines), ("product_sizes", size_lines)):
+            new_stock.update(self._update_rows(
+                table, table_lines,
+                "stock_quantity = t.stock_quantity - v.column3, "
+                "reserved_stock = t.reserved_stock - v.column3",
+                "t.stock_quantity >= v.column3 AND t.reserved_stock >= v.column3",
+                return_stock=True
+            ))
+
+        missing = [key for key in requested if key not in new_stock]
+        if missing:
+            self.db.rollback()
+            raise InsufficientStockError(self._describe_shortage(missing, requested))
+
+        self._bump_product_counters(requested, sign=-1)
+
+        changes = []
+        for (product_id, branch_id, size), quantity in requested.items():
+            current = new_stock[(product_id, branch_id, size)]
+            self.db.add(InventoryMovement(
+                product_id=product_id,
+                branch_id=branch_id,
+                movement_type="OUT",
+                quantity=-quantity,
+                previous_stock=current + quantity,
+                new_stock=current,
+                reference_type="SALE",
+                reference_id=sale_id,
+                notes=(
+                    f"Reserva convertida venta #{sale_number or sale_id}"
+                    + (f" - Talle {size}" if size else "")
+                )
+            ))
+            changes.append({
+                "product_id": product_id,
+                "branch_id": branch_id,
+                "size": size,
+                "quantity": quantity,
+                "new_stock": current
+            })
+
+        self._resolve(reservations, ReservationStatus.CONVERTED)
+        return changes
+
+    def release(self, sale_id: int) -> int:
+        """
+        Libera las reservas activas de una venta cancelada.
+
+        Returns:
+            Cantidad de reservas liberadas
+        """
+        reservations = self.get_active(sale_id, lock=True)
+        self._release(reservations, ReservationStatus.RELEASED)
+        return len(reservations)
+
+    def expire_due(self, now: Optional[datetime] = None, limit: int = 500) -> int:
+        """
+        Libera reservas activas vencidas (sweeper periódico).
+
+        Usa FOR UPDATE SKIP LOCKED para no bloquearse con una confirmación
+        o cancelación en curso sobre la misma venta. Confirma la transacción.
+
+        Returns:
+            Cantidad de reservas expiradas
+        """
+        now = now or datetime.utcnow()
+        reservations = self.db.query(StockReservation).filter(
+            StockReservation.status == ReservationStatus.ACTIVE.value,
+            StockReservation.expires_at < now
+        ).order_by(StockReservation.id).limit(limit).with_for_update(skip_locked=True).all()
+
+        self._release(reservations, ReservationStatus.EXPIRED)
+        self.db.commit()
+        if reservations:
+            logger.info(f"Expired {len(reservations)} stock reservations")
+        return len(reservations)
+
+    # ===== HELPERS =====
+
+    def _release(self, reservations: List[StockReservation], status: ReservationStatus) -> None:
+        """Descontar reserved_stock de las reservas y marcarlas resueltas."""
+        if not reservations:
+            return
+
+        requested = self._aggregate(reservations)
+        branch_lines, size_lines = self._split_by_table(requested)
+        for table, table_lines in (("branch_stock", branch_lines), ("product_sizes", size_lines)):
+            self._update_rows(
+                table, table_lines,
+                "reserved_stock = CASE WHEN t.reserved_stock >= v.column3 "
+                "THEN t.reserved_stock - v.column3 ELSE 0 END",
+                "1 = 1"
+            )
+        self._bump_product_counters(requested, sign=-1)
+        self._resolve(reservations, status)
+
+    def _resolve(self, reservations: List[StockReservation], status: ReservationStatus) -> None:
+        """Marcar reservas como resueltas."""
+        now = datetime.utcnow()
+        for reservation in reservations:
+            reservation.status = status.value
+            reservation.resolved_at = now
+        self.db.flush()
+
+    @staticmethod
+    def _aggregate(reservations: List[StockReservation]) -> Dict[ReservationKey, int]:
+        """Sumar cantidades por (producto, sucursal, talle)."""
+        totals: Dict[ReservationKey, int] = {}
+        for reservation in reservations:
+            key = (reservation.product_id, reservation.branch_id, reservation.size)
+            totals[key] = totals.get(key, 0) + reservation.quantity
+        return totals
+
+    def _has_sizes(self, product_ids: Set[int]) -> Dict[int, bool]:
+        """has_sizes de cada producto existente."""
+        if not product_ids:
+            return {}
+        return dict(
+            self.db.query(Product.id, Product.has_sizes).filter(Product.id.in_(product_ids)).all()
+        )
+
+    def _split_by_table(
+        self,
+        requested: Dict[ReservationKey, int]
+    ) -> Tuple[List[Tuple], List[Tuple]]:
+        """Separar líneas en branch_stock (sin talles) y product_sizes (con talles)."""
+        has_sizes = self._has_sizes({product_id for product_id, _, _ in requested})
+
+        branch_lines, size_lines = [], []
+        for (product_id, branch_id, size), quantity in sorted(
+            requested.items(), key=lambda kv: (kv[0][0], kv[0][1], kv[0][2] or "")
+        ):
+            if product_id not in has_sizes:
+                raise ValueError(f"Producto {product_id} no existe")
+            if has_sizes[product_id]:
+                if not size:
+                    raise ValueError("Talle obligatorio para productos con has_sizes=True")
+                size_lines.append((product_id, branch_id, quantity, size))
+            else:
+                branch_lines.append((product_id, branch_id, quantity, None))
+        return branch_lines, size_lines
+
+    def _update_rows(
+        self,
+        table: str,
+        lines: List[Tuple],
+        set_sql: str,
+        where_sql: str,
+        return_stock: bool = False
+    ):
+        """
+        UPDATE condicional por lote sobre branch_stock o product_sizes.
+
+        Siempre actualiza updated_at: el disponible cambia y la sincronización
+        de catálogo de las cajas (CatalogSyncService) lo usa como cursor.
+
+        Args:
+            lines: [(product_id, branch_id, quantity, size)]; en VALUES
+                column1=producto, column2=sucursal, column3=cantidad, column4=talle
+            set_sql / where_sql: Fragmentos SQL sobre t (tabla) y v (lote)
+            return_stock: Retornar stock_quantity resultante por clave
+
+        Returns:
+            Claves (producto, sucursal, talle) actualizadas; dict clave → stock
+            si return_stock
+        """
+        if not lines:
+            return {} if return_stock else set()
+
+        is_size_table = table == "product_sizes"
+        params = {}
+        values = []
+        for index, (product_id, branch_id, quantity, size) in enumerate(lines):
+            params.update({f"p{index}": product_id, f"b{index}": branch_id, f"q{index}": quantity})
+            if is_size_table:
+                params[f"s{index}"] = size
+                values.append(f"(:p{index}, :b{index}, :q{index}, :s{index})")
+            else:
+                values.append(f"(:p{index}, :b{index}, :q{index})")
+
+        size_match = " AND t.size = v.column4" if is_size_table else ""
+        size_column = "size" if is_size_table else "NULL"
+        rows = self.db.execute(
+            text(f"""
+            UPDATE {table} AS t
+            SET {set_sql},
+                updated_at = CURRENT_TIMESTAMP
+            FROM (VALUES {", ".join(values)}) AS v
+            WHERE t.product_id = v.column1
+              AND t.branch_id = v.column2{size_match}
+              AND {where_sql}
+            RETURNING product_id, branch_id, {size_column}, stock_quantity
+            """),
+            params
+        ).all()
+
+        if return_stock:
+            return {(product_id, branch_id, size): stock for product_id, branch_id, size, stock in rows}
+        return {(product_id, branch_id, size) for product_id, branch_id, size, _ in rows}
+
+    def _bump_product_counters(self, requested: Dict[ReservationKey, int], sign: int) -> None:
+        """Ajustar Product.reserved_stock (un UPDATE para todos los productos)."""
+        deltas: Dict[int, int] = {}
+        for (product_id, _, _), quantity in requested.items():
+            deltas[product_id] = deltas.get(product_id, 0) + sign * quantity
+
+        params = {}
+        values = []
+        for index, (product_id, delta) in enumerate(sorted(deltas.items())):
+            params.update({f"p{index}": product_id, f"d{index}": delta})
+            values.append(f"(:p{index}, :d{index})")
+
+        self.db.execute(
+            text(f"""
+            UPDATE products AS t
+            SET reserved_stock = CASE WHEN t.reserved_stock + v.column2 < 0
+                                      THEN 0 ELSE t.reserved_stock + v.column2 END
+            FROM (VALUES {", ".join(values)}) AS v
+            WHERE t.id = v.column1
+            """),
+            params
+        )
+        invalidate_product_detail(self.db, deltas.keys())
+        refresh_catalog_stock(self.db, deltas.keys())
+
+    def _describe_shortage(
+        self,
+        missing: List[ReservationKey],
+        requested: Dict[ReservationKey, int]
+    ) -> str:
+        """Arma el mensaje de stock insuficiente con el disponible de cada línea."""
+        details = []
+        for product_id, branch_id, size in missing:
+            if size is None:
+                stock = self.db.query(BranchStock).filter(
+                    BranchStock.product_id == product_id,
+                    BranchStock.branch_id == branch_id
+                ).first()
+            else:
+                stock = self.db.query(ProductSize).filter(
+                    ProductSize.product_id == product_id,
+                    ProductSize.branch_id == branch_id,
+                    ProductSize.size == size
+                ).first()
+            name = self.db.query(Product.name).filter(Product.id == product_id).scalar() or product_id
+            label = f"{name} talle {size}" if size else f"{name}"
+            details.append(
+                f"{label}: Disponible: {stock.available_stock if stock else 0}, "
+                f"Solicitado: {requested[(product_id, branch_id, size)]}"
+            )
+        return "Stock insuficiente para " + "; ".join(details)
@@ -13,28 +13,37 @@ Responsabilidades:
     - Trazabilidad de configuraciones usadas
 
 Flujo de Creación de Venta:
-    1. Validar stock de todos los ítems
+    1. Validar existencia de los productos
     2. Validar método de pago contra config de sucursal
     3. Obtener tax rate configurado para sucursal
     4. Calcular totales (subtotal + tax - discount)
     5. Crear registro de venta con snapshots de config
     6. Crear ítems de venta
-    7. Disminuir stock con tracking (InventoryMovement)
+    7. Disminuir stock de todos los ítems con UPDATE condicional atómico
+       (InventoryMovement incluido) y confirmar todo en una transacción
+
+Sincronización offline (create_offline_batch):
+    Lote ordenado de ventas de una caja sin conexión en una transacción,
+    un SAVEPOINT por venta, deduplicado por client_uuid.
 
 Evita circular dependency con import interno de ConfigService.
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
 from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.core.metrics import sales_created
 from app.repositories.sale import SaleRepository, SaleItemRepository
+from app.repositories.sales_archive import SalesArchive
 from app.services.inventory_service import InventoryService
 from app.services.product_service import ProductService
-from app.services.stock_service import StockConflictError
-from app.models import Sale, SaleItem
+from app.services.stock_service import StockService, InsufficientStockError, StockConflictError
+from app.models import Sale, SaleItem, Product
 from app.schemas.common import SaleType, OrderStatus
-from app.schemas.sale import SaleCreate
+from app.schemas.sale import SaleCreate, OfflineSaleCreate
 import uuid
 
 
@@ -89,13 +98,14 @@ class SaleService:
         Crea venta completa con validaciones y actualización de stock.
         
         Transacción atómica que realiza:
-        1. Validación de stock de TODOS los ítems (falla si uno no tiene)
+        1. Validación de existencia de TODOS los productos
         2. Validación de payment method contra config de sucursal
         3. Snapshot de tax rate configurado
         4. Cálculo de totales (subtotal + tax - discount)
         5. Creación de Sale con referencias a config
         6. Creación de SaleItems
-        7. Disminución de stock con InventoryMovement
+        7. Disminución de stock con InventoryMovement (falla si un ítem
+           no tiene stock; nada queda confirmado)
         
         Args:
             sale_data: Datos de la venta con ítems
@@ -107,50 +117,228 @@ class SaleService:
         
         Raises:
             ValueError: Si producto no existe o stock insuficiente
+            StockConflictError: Si la BD aborta por deadlock (reintentar)
         
         Trazabilidad:
             - payment_method_id: FK a PaymentMethod usado
             - tax_rate_id: FK a TaxRate usado
             - Snapshots de nombres y % para historial inmutable
         """
-        # Validate stock availability for all items
-        for item in sale_data.items:
-            product = self.product_service.product_repo.get(item.product_id)
-            if not product:
-                raise ValueError(f"Product {item.product_id} not found")
+        # Validate products exist (one query for all items).
+        # Stock is not pre-checked here: the atomic decrement below is the
+        # authoritative check, a separate read would only race with it.
+        products = self._load_products(sale_data.items)
+        self._check_products(sale_data.items, products)
 
-            has_stock = self.inventory_service.has_sufficient_stock(
-                product_id=item.product_id,
-                branch_id=branch_id,
-                quantity=item.quantity,
-                size=getattr(item, 'size', None)
-            )
+        try:
+            sale = self._add_sale(sale_data, user_id, branch_id, products, {})
+        except InsufficientStockError as e:
+            # decrement_stock_batch already rolled back the whole transaction
+            raise ValueError(f"Insufficient stock: {str(e)}")
+        except ValueError:
+            self.db.rollback()
+            raise
+
+        self.db.commit()
+        self.db.refresh(sale)
+        sales_created.inc(sale.sale_type.value.lower())
+        return sale
+
+    def create_offline_batch(
+        self,
+        sales: List[OfflineSaleCreate],
+        user_id: int,
+        branch_id: int
+    ) -> List[Dict]:
+        """
+        Aplica un lote de ventas registradas sin conexión en una transacción.
+
+        Las ventas se aplican en el orden recibido, cada una dentro de un
+        SAVEPOINT: una venta sin stock o inválida se informa y no afecta al
+        resto del lote. Productos, método de pago y tax rate se resuelven una
+        sola vez por lote.
+
+        Idempotente por client_uuid: las ventas ya sincronizadas (en un lote
+        anterior o repetidas en el mismo) se informan como "duplicate". Las
+        ventas de un mes ya archivado (SalesArchive.cutoff) se rechazan con
+        "error".
+
+        Args:
+            sales: Ventas en orden, con client_uuid y hora del ticket
+            user_id: ID del vendedor que sincroniza
+            branch_id: ID de la sucursal de la caja
 
-            if not has_stock:
-                raise ValueError(
-                    f"Insufficient stock for product {product.name}. "
-                    f"Required: {item.quantity}"
+        Returns:
+            Un resultado por venta: {"client_uuid", "status" (created |
+            duplicate | stock_conflict | error), "sale_id", "sale_number",
+            "detail"}
+
+        Raises:
+            StockConflictError: Deadlock detectado por la BD; no se aplicó
+                ninguna venta del lote (reintentar el lote completo)
+        """
+        uuids = [sale_data.client_uuid for sale_data in sales]
+        synced = {
+            client_uuid: (sale_id, sale_number)
+            for client_uuid, sale_id, sale_number in self.db.query(
+                Sale.client_uuid, Sale.id, Sale.sale_number
+            ).filter(Sale.client_uuid.in_(uuids)).all()
+        }
+        products = self._load_products([item for sale_data in sales for item in sale_data.items])
+        context: Dict = {}
+        now = datetime.now()
+        archived_until = SalesArchive().cutoff()
+
+        results = []
+        for sale_data in sales:
+            result = {"client_uuid": sale_data.client_uuid, "sale_id": None, "sale_number": None, "detail": None}
+            results.append(result)
+            if sale_data.client_uuid in synced:
+                result["status"] = "duplicate"
+                result["sale_id"], result["sale_number"] = synced[sale_data.client_uuid]
+                continue
+
+            created_at = min(self._as_local(sale_data.client_created_at), now)
+            if archived_until is not None and created_at < archived_until:
+                # El mes ya está en el archivo frío: la venta no aparecería en
+                # los reportes y bloquearía el archivo de los meses siguientes
+                result.update(
+                    status="error",
+                    detail=f"La venta es de un mes ya archivado ({created_at:%Y-%m}); registrarla con fecha actual"
                 )
+                continue
 
-        # Get and validate payment method (if provided)
-        payment_method_id = None
-        payment_method_name = None
-        if sale_data.payment_method:
+            savepoint = self.db.begin_nested()
+            try:
+                self._check_products(sale_data.items, products)
+                sale = self._add_sale(
+                    sale_data, user_id, branch_id, products, context,
+                    client_uuid=sale_data.client_uuid,
+                    created_at=created_at
+                )
+                savepoint.commit()
+            except InsufficientStockError as e:
+                result.update(status="stock_conflict", detail=str(e))
+                continue
+            except ValueError as e:
+                if savepoint.is_active:
+                    savepoint.rollback()
+                result.update(status="error", detail=str(e))
+                continue
+            except IntegrityError:
+                # Otra sincronización concurrente del mismo lote ya la creó
+                # (o la venta ya se archivó y sólo queda su clave)
+                if savepoint.is_active:
+                    savepoint.rollback()
+                existing = self.db.query(Sale.id, Sale.sale_number).filter(
+                    Sale.client_uuid == sale_data.client_uuid
+                ).first() or self._archived_sale(sale_data.client_uuid)
+                if existing is None:
+                    raise
+                result.update(status="duplicate", sale_id=existing.id, sale_number=existing.sale_number)
+                continue
+            except StockConflictError:
+                self.db.rollback()
+                raise
+
+            synced[sale_data.client_uuid] = (sale.id, sale.sale_number)
+            result.update(status="created", sale_id=sale.id, sale_number=sale.sale_number)
+
+        self.db.commit()
+        created = sum(1 for result in results if result["status"] == "created")
+        if created:
+            sales_created.inc("pos", amount=created)
+        return results
+
+    def _archived_sale(self, client_uuid: str):
+        """
+        Fila (id, sale_number) de una venta ya archivada con ese client_uuid.
+
+        El archivo frío borra la venta pero conserva su fila en sale_keys
+        (tablas particionadas), que sigue rechazando el client_uuid.
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            return None
+        if not self.db.execute(text("SELECT to_regclass('sale_keys') IS NOT NULL")).scalar():
+            return None
+        return self.db.execute(text(
+            "SELECT sale_id AS id, sale_number FROM sale_keys WHERE client_uuid = :client_uuid"
+        ), {"client_uuid": client_uuid}).first()
+
+    def _load_products(self, items) -> Dict[int, Product]:
+        """Productos de los ítems en una sola consulta."""
+        product_ids = {item.product_id for item in items}
+        return {
+            p.id: p for p in self.db.query(Product).filter(Product.id.in_(product_ids)).all()
+        }
+
+    def _check_products(self, items, products: Dict[int, Product]) -> None:
+        for item in items:
+            if item.product_id not in products:
+                raise ValueError(f"Product {item.product_id} not found")
+
+    @staticmethod
+    def _as_local(value: datetime) -> datetime:
+        """Hora del ticket como datetime naive local (igual que created_at)."""
+        if value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
+    def _resolve_payment_method(
+        self,
+        code: Optional[str],
+        branch_id: int,
+        context: Dict
+    ) -> Tuple[Optional[int], Optional[str]]:
+        """(payment_method_id, payment_method_name), cacheado en context por código."""
+        if not code:
+            return None, None
+        cache = context.setdefault("payment_methods", {})
+        if code not in cache:
             try:
                 payment_method = self.config_service.validate_payment_method(
-                    payment_method_code=sale_data.payment_method,
+                    payment_method_code=code,
                     branch_id=branch_id
                 )
-                payment_method_id = payment_method.id
-                payment_method_name = payment_method.name
+                cache[code] = (payment_method.id, payment_method.name)
             except ValueError as e:
                 # Log validation error but allow sale to proceed
                 # (backward compatibility - some systems may have legacy payment methods)
                 print(f"Warning: {e}")
-                payment_method_name = sale_data.payment_method
+                cache[code] = (None, code)
+        return cache[code]
+
+    def _add_sale(
+        self,
+        sale_data: SaleCreate,
+        user_id: int,
+        branch_id: int,
+        products: Dict[int, Product],
+        context: Dict,
+        client_uuid: Optional[str] = None,
+        created_at: Optional[datetime] = None
+    ) -> Sale:
+        """
+        Agrega Sale + SaleItems y descuenta stock sin confirmar la transacción.
+
+        Args:
+            context: Cache de configuración de la sucursal compartido entre
+                ventas del mismo lote (payment methods, tax rate)
+
+        Raises:
+            InsufficientStockError: Algún ítem sin stock (ya revertido)
+            ValueError: Talle faltante u otro dato inválido
+            StockConflictError: Deadlock detectado por la BD
+        """
+        # Get and validate payment method (if provided)
+        payment_method_id, payment_method_name = self._resolve_payment_method(
+            sale_data.payment_method, branch_id, context
+        )
 
         # Get tax rate configuration for the branch
-        tax_rate_info = self.config_service.get_tax_rate_for_branch(branch_id)
+        if "tax_rate" not in context:
+            context["tax_rate"] = self.config_service.get_tax_rate_for_branch(branch_id)
+        tax_rate_info = context["tax_rate"]
         tax_rate_id = None
         tax_rate_name = None
         tax_rate_percentage = None
@@ -180,8 +368,13 @@ class SaleService:
             order_status = OrderStatus.DELIVERED if is_confirmed else OrderStatus.PENDING
 
         # Create sale with configuration references
-        # Exclude 'items', 'is_confirmed', and 'order_status' (set automatically above)
-        sale_dict = sale_data.dict(exclude={'items', 'is_confirmed', 'order_status'})
+        # Exclude 'items', 'is_confirmed', and 'order_status' (set automatically above),
+        # the shipping coordinates (only used for e-commerce fulfillment)
+        # and the offline sync fields (passed explicitly)
+        sale_dict = sale_data.dict(exclude={
+            'items', 'is_confirmed', 'order_status', 'shipping_latitude', 'shipping_longitude',
+            'client_uuid', 'client_created_at'
+        })
         sale_dict.update({
             'sale_number': self._generate_sale_number(sale_data.sale_type.value),
             'user_id': user_id,
@@ -196,52 +389,47 @@ class SaleService:
             'payment_method_name': payment_method_name,
             'tax_rate_id': tax_rate_id,
             'tax_rate_name': tax_rate_name,
-            'tax_rate_percentage': tax_rate_percentage
+            'tax_rate_percentage': tax_rate_percentage,
+            'client_uuid': client_uuid
         })
-        sale = self.sale_repo.create(sale_dict)
+        if created_at is not None:
+            sale_dict['created_at'] = created_at
+        # Sale, items, stock and movements share one transaction:
+        # nothing is committed until the stock decrement succeeds
+        sale = Sale(**sale_dict)
+        self.db.add(sale)
+        self.db.flush()
 
-        # Create sale items and update inventory
-        try:
-            for item_data in sale_data.items:
-                product = self.product_service.product_repo.get(item_data.product_id)
-                
-                # Create sale item
-                item_dict = {
-                    'sale_id': sale.id,
-                    'product_id': item_data.product_id,
-                    'quantity': item_data.quantity,
-                    'unit_price': item_data.unit_price,
-                    'total_price': item_data.unit_price * item_data.quantity,
-                    'size': getattr(item_data, 'size', None)
-                }
-                self.sale_item_repo.create(item_dict)
-
-                # Decrease inventory with optimistic locking
-                success = self.inventory_service.decrease_stock(
-                    product_id=item_data.product_id,
-                    branch_id=branch_id,
-                    quantity=item_data.quantity,
-                    size=getattr(item_data, 'size', None),
-                    reference_type="SALE",
-                    reference_id=sale.id
-                )
-                
-                if not success:
-                    # Stock was depleted between validation and processing
-                    raise ValueError(
-                        f"Stock for product {product.name} was depleted by another sale. "
-                        f"Please retry the operation."
-                    )
-
-            return sale
-        except StockConflictError as e:
-            # Race condition: otro vendedor modificó el stock simultáneamente
-            # Rollback de la transacción
-            self.db.rollback()
-            raise ValueError(
-                f"Stock conflict detected: {str(e)}. "
-                f"Another user modified the stock simultaneously. Please retry."
+        self.db.add_all([
+            SaleItem(
+                sale_id=sale.id,
+                product_id=item_data.product_id,
+                quantity=item_data.quantity,
+                unit_price=item_data.unit_price,
+                total_price=item_data.unit_price * item_data.quantity,
+                size=getattr(item_data, 'size', None)
             )
+            for item_data in sale_data.items
+        ])
+
+        # Decrease inventory for all items with one conditional UPDATE per
+        # stock table (all or nothing)
+        StockService.decrement_stock_batch(
+            self.db,
+            branch_id=branch_id,
+            items=[
+                {
+                    "product_id": item_data.product_id,
+                    "quantity": item_data.quantity,
+                    "size": getattr(item_data, 'size', None)
+                }
+                for item_data in sale_data.items
+            ],
+            reference_type="SALE",
+            reference_id=sale.id,
+            commit=False
+        )
+        return sale
 
     def _calculate_subtotal(self, items) -> Decimal:
         """
@@ -0,0 +1,351 @@
+"""
+Servicio de Archivo Frío de Ventas - Exporta meses cerrados a Parquet.
+
+Un mes se archiva cuando queda fuera de los SALES_ARCHIVE_AFTER_MONTHS
+meses (además del actual) que se mantienen en la BD. archive_month():
+
+    1. Exporta las ventas del mes, sus líneas y sus pedidos de WhatsApp a
+       Parquet comprimido (SALES_ARCHIVE_COMPRESSION) en un directorio
+       temporal, por lotes. Cada fila lleva además los nombres vigentes al
+       archivar (sucursal, producto, marca) por si después se borran
+    2. Verifica el archivo contra la BD: filas por tabla y suma de
+       total_amount
+    3. Borra las filas de la BD (reservas de stock ya resueltas incluidas).
+       Con las tablas particionadas por mes (partition_service.py) se
+       desacopla y elimina la partición completa en vez de borrar filas.
+       Las claves únicas de sale_keys se conservan: un sale_number o
+       client_uuid archivado no vuelve a quedar libre
+    4. Publica el directorio del mes (rename atómico) y hace commit. Si el
+       commit falla se retira el directorio: un mes nunca queda a la vez
+       en el archivo y en la BD, ni en ninguno
+
+Los meses se archivan del más antiguo al más nuevo, de a uno: así el
+archivo es siempre un prefijo de la historia y los reportes sólo necesitan
+el corte (SalesArchive.cutoff()). Lo corre notification_scheduler.py si
+SALES_ARCHIVE_ENABLED; también se puede correr a mano con
+scripts/archive_sales.py.
+"""
+
+import enum
+import logging
+import shutil
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Boolean, Date, DateTime, Enum, Float, Integer, MetaData, Numeric, Table,
+    func, select, text
+)
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Sale, SaleItem, Product, Brand, Branch, StockReservation, ReservationStatus, WhatsAppSale
+)
+from app.repositories.sales_archive import SalesArchive, next_month
+from app.services.partition_service import PartitionService, add_months, month_start, partition_name
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Filas por lote al exportar (un row group de Parquet por lote)
+EXPORT_BATCH_SIZE = 50_000
+
+
+class SalesArchiveError(Exception):
+    """El mes no se puede archivar (todavía vigente, fuera de orden o con reservas activas)."""
+
+
+def arrow_type(column_type: Any):
+    """Tipo de Arrow equivalente al tipo de columna de SQLAlchemy."""
+    import pyarrow as pa
+
+    if isinstance(column_type, Enum):
+        return pa.string()  # nombre del miembro, como se guarda en la BD
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, Numeric):
+        return pa.decimal128(column_type.precision or 18, column_type.scale or 2)
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def _arrow_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.name
+    return value
+
+
+class SalesArchiveService:
+    """
+    Exportación de meses cerrados de ventas al archivo Parquet.
+    """
+
+    def __init__(self, db: Session, archive: Optional[SalesArchive] = None):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+            archive: Archivo de ventas (default: SALES_ARCHIVE_DIR)
+        """
+        self.db = db
+        self.archive = archive or SalesArchive()
+
+    def archive_before(self, today: Optional[date] = None) -> date:
+        """Primer mes que se mantiene en la BD."""
+        return add_months(month_start(today or date.today()), -settings.sales_archive_after_months)
+
+    def due_months(self, today: Optional[date] = None) -> List[date]:
+        """
+        Meses con ventas en la BD anteriores a archive_before(), el más antiguo primero.
+
+        Las ventas que quedaron en la BD con fecha de un mes ya archivado no
+        se pueden archivar (el mes ya está publicado): se informan en el log
+        y se omiten, para no frenar el archivo de los meses siguientes.
+        """
+        limit = datetime.combine(self.archive_before(today), datetime.min.time())
+        cutoff = self.archive.cutoff()
+        if cutoff is not None:
+            stray = self.db.query(func.count(Sale.id)).filter(Sale.created_at < min(cutoff, limit)).scalar()
+            if stray:
+                logger.warning(
+                    "%s ventas en la BD son de meses ya archivados (antes de %s); se omiten",
+                    stray, f"{cutoff:%Y-%m}"
+                )
+        months = []
+        since = cutoff
+        while True:
+            oldest = self._oldest_hot_sale(limit, since=since)
+            if oldest is None:
+                return months
+            months.append(month_start(oldest))
+            since = datetime.combine(next_month(months[-1]), datetime.min.time())
+
+    def archive_month(self, month: date, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Exporta el mes a Parquet y lo borra de la BD.
+
+        Returns:
+            dict con month, filas por tabla y total_amount archivado
+
+        Raises:
+            SalesArchiveError: Mes vigente, ya archivado, con meses anteriores
+                sin archivar o con reservas de stock activas
+        """
+        month = month_start(month)
+        start = datetime.combine(month, datetime.min.time())
+        end = datetime.combine(next_month(month), datetime.min.time())
+        self._check_archivable(month, start, end, today)
+
+        sources = self._sources(month)
+        sales_src, items_src = sources["sales"][1], sources["sale_items"][1]
+        sale_ids = select(sales_src.c.id).where(sales_src.c.created_at >= start, sales_src.c.created_at < end)
+        whatsapp = WhatsAppSale.__table__
+
+        exports = {
+            "sales": self._export_statement(
+                sales_src, [Branch.name.label("branch_name")],
+                lambda query: query.outerjoin(Branch, Branch.id == sales_src.c.branch_id),
+                (sales_src.c.created_at >= start, sales_src.c.created_at < end),
+            ),
+            "sale_items": self._export_statement(
+                items_src,
+                [Product.name.label("product_name"), Product.brand_id.label("brand_id"),
+                 Brand.name.label("brand_name")],
+                lambda query: query.outerjoin(Product, Product.id == items_src.c.product_id)
+                .outerjoin(Brand, Brand.id == Product.brand_id),
+                (items_src.c.created_at >= start, items_src.c.created_at < end,
+                 items_src.c.sale_id.in_(sale_ids)),
+            ),
+            "whatsapp_sales": self._export_statement(
+                whatsapp, [], None, (whatsapp.c.sale_id.in_(sale_ids),)
+            ),
+        }
+
+        staging = self.archive.staging_dir(month)
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        try:
+            counts = {
+                name: self._write(statement, columns, staging / f"{name}.parquet")
+                for name, (statement, columns) in exports.items()
+            }
+            total_amount = self._verify(staging, exports, sales_src, start, end)
+            self._delete(sources, sale_ids)
+            self.archive.publish(month, staging)
+        except Exception:
+            self.db.rollback()
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            self.archive.remove(month)
+            raise
+
+        logger.info("Mes %s archivado: %s", month.isoformat(), counts)
+        return {"month": month.isoformat(), **counts, "total_amount": str(total_amount)}
+
+    def archive_due(self, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Archiva todos los meses vencidos, del más antiguo al más nuevo."""
+        return [self.archive_month(month, today) for month in self.due_months(today)]
+
+    # ==================== CHECKS ====================
+
+    def _oldest_hot_sale(self, before: datetime, since: Optional[datetime] = None) -> Optional[datetime]:
+        query = self.db.query(func.min(Sale.created_at)).filter(Sale.created_at < before)
+        if since is not None:
+            query = query.filter(Sale.created_at >= since)
+        return query.scalar()
+
+    def _check_archivable(self, month: date, start: datetime, end: datetime, today: Optional[date]) -> None:
+        if month >= self.archive_before(today):
+            raise SalesArchiveError(f"El mes {month:%Y-%m} todavía se mantiene en la base de datos")
+        cutoff = self.archive.cutoff()
+        if cutoff is not None and start < cutoff:
+            raise SalesArchiveError(f"El mes {month:%Y-%m} ya está archivado")
+        oldest = self._oldest_hot_sale(start, since=cutoff)
+        if oldest is not None:
+            raise SalesArchiveError(
+                f"Hay ventas anteriores sin archivar ({month_start(oldest):%Y-%m}); archivar primero ese mes"
+            )
+        active = self.db.query(func.count(StockReservation.id)).join(
+            Sale, Sale.id == StockReservation.sale_id
+        ).filter(
+            Sale.created_at >= start,
+            Sale.created_at < end,
+            StockReservation.status == ReservationStatus.ACTIVE.value
+        ).scalar()
+        if active:
+            raise SalesArchiveError(f"El mes {month:%Y-%m} tiene {active} reservas de stock activas")
+
+    # ==================== EXPORT ====================
+
+    def _sources(self, month: date) -> Dict[str, Tuple[str, Table]]:
+        """
+        De dónde se leen y borran sales y sale_items del mes: ("table", tabla),
+        ("partition", partición adjunta) o ("detached", partición en el
+        esquema de archivo de partition_service).
+        """
+        partitioned = PartitionService(self.db).is_partitioned()
+        schema = settings.partition_archive_schema
+        sources = {}
+        for table in (Sale.__table__, SaleItem.__table__):
+            source: Tuple[str, Table] = ("table", table)
+            if partitioned:
+                name = partition_name(table.name, month)
+                if self._exists(name):
+                    source = ("partition", table.to_metadata(MetaData(), name=name))
+                elif self._exists(f"{schema}.{name}"):
+                    source = ("detached", table.to_metadata(MetaData(), schema=schema, name=name))
+            sources[table.name] = source
+        return sources
+
+    def _export_statement(self, table: Table, extra: Sequence[Any], joins: Any, conditions: Sequence[Any]):
+        """SELECT de exportación y sus columnas (nombre, tipo Arrow)."""
+        statement = select(*table.c, *extra).select_from(table)
+        if joins is not None:
+            statement = joins(statement)
+        statement = statement.where(*conditions).order_by(table.c.id)
+        columns = [(column.name, arrow_type(column.type)) for column in table.c]
+        columns += [(column.name, arrow_type(column.type)) for column in extra]
+        return statement, columns
+
+    def _write(self, statement: Any, columns: Sequence[Tuple[str, Any]], path: Path) -> int:
+        """Escribe el resultado en Parquet por lotes; devuelve las filas escritas."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema(list(columns))
+        names = [name for name, _ in columns]
+        rows = 0
+        with pq.ParquetWriter(str(path), schema, compression=settings.sales_archive_compression) as writer:
+            result = self.db.execute(statement, execution_options={"stream_results": True})
+            for batch in result.partitions(EXPORT_BATCH_SIZE):
+                records = [{name: _arrow_value(value) for name, value in zip(names, row)} for row in batch]
+                writer.write_table(pa.Table.from_pylist(records, schema=schema))
+                rows += len(batch)
+        return rows
+
+    def _verify(self, staging: Path, exports: Dict[str, Any], sales_src: Table,
+                start: datetime, end: datetime) -> Decimal:
+        """Compara filas y total_amount del archivo con la BD; devuelve el total archivado."""
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        for name, (statement, _) in exports.items():
+            expected = self.db.execute(select(func.count()).select_from(statement.subquery())).scalar()
+            written = pq.ParquetFile(str(staging / f"{name}.parquet")).metadata.num_rows
+            if written != expected:
+                raise SalesArchiveError(f"{name}: {written} filas archivadas, {expected} en la base de datos")
+
+        archived = pc.sum(pq.read_table(str(staging / "sales.parquet"), columns=["total_amount"])["total_amount"])
+        archived_total = archived.as_py() or Decimal("0")
+        expected_total = self.db.execute(
+            select(func.coalesce(func.sum(sales_src.c.total_amount), 0))
+            .where(sales_src.c.created_at >= start, sales_src.c.created_at < end)
+        ).scalar()
+        if Decimal(archived_total) != Decimal(expected_total):
+            raise SalesArchiveError(f"total_amount archivado {archived_total} != {expected_total} en la base de datos")
+        return Decimal(archived_total)
+
+    # ==================== DELETE ====================
+
+    def _delete(self, sources: Dict[str, Tuple[str, Table]], sale_ids: Any) -> None:
+        """
+        Borra el mes de la BD (sin commit): dependientes, líneas y ventas.
+
+        Las filas de sale_keys quedan: DROP de la partición no dispara
+        trigger_sales_keys, y si las ventas se borran fila a fila (mes en la
+        partición por defecto) el trigger borra sus claves y se reinsertan.
+        """
+        for table in (StockReservation.__table__, WhatsAppSale.__table__):
+            self.db.execute(table.delete().where(table.c.sale_id.in_(sale_ids)))
+
+        kind, sales_src = sources["sales"]
+        keys = []
+        if kind == "table" and PartitionService(self.db).is_partitioned():
+            keys = [
+                {"sale_id": sale_id, "sale_number": sale_number, "client_uuid": client_uuid}
+                for sale_id, sale_number, client_uuid in self.db.execute(
+                    select(sales_src.c.id, sales_src.c.sale_number, sales_src.c.client_uuid).where(
+                        sales_src.c.id.in_(sale_ids)
+                    )
+                )
+            ]
+
+        for name in ("sale_items", "sales"):
+            kind, source = sources[name]
+            if kind == "partition":
+                self.db.execute(text(f"ALTER TABLE {name} DETACH PARTITION {source.name}"))
+            if kind != "table":
+                self.db.execute(text(f"DROP TABLE {_qualified(source)}"))
+            elif name == "sale_items":
+                self.db.execute(source.delete().where(source.c.sale_id.in_(sale_ids)))
+            else:
+                self.db.execute(source.delete().where(source.c.id.in_(sale_ids)))
+
+        if keys:
+            self.db.execute(text(
+                "INSERT INTO sale_keys (sale_id, sale_number, client_uuid) "
+                "VALUES (:sale_id, :sale_number, :client_uuid)"
+            ), keys)
+
+    def _exists(self, name: str) -> bool:
+        return self.db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def _qualified(table: Table) -> str:
+    return f"{table.schema}.{table.name}" if table.schema else table.name
+
@@ -0,0 +1,188 @@
+"""
+Servicio de Consistencia de Stock - Product.stock_quantity vs stock por sucursal.
+
+Product.stock_quantity es un total denormalizado que los triggers de
+PostgreSQL mantienen por deltas (ver migración 20261019_100000). Este
+servicio:
+
+    - Activa el modo masivo de los triggers (bulk_stock_mode) para que
+      cargas grandes apliquen un único delta agregado por sentencia
+    - Lee el total de un producto tras cambiar su stock (sync_stock_total)
+      sin escribirlo desde Python: los triggers ya aplicaron el delta
+    - Detecta desvíos entre el total del producto y la suma real de
+      BranchStock (sin talles) o ProductSize (con talles)
+    - Repara los desvíos bloqueando primero los productos afectados
+
+La verificación se ejecuta periódicamente desde notification_scheduler.py.
+"""
+
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import case, func, select, text
+from sqlalchemy.orm import Session
+
+from app.models import BranchStock, Product, ProductSize
+from app.services.catalog_search_service import refresh_catalog_stock
+from app.services.storefront_service import invalidate_product_detail
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def bulk_stock_mode(db: Session) -> Iterator[None]:
+    """
+    Activa los triggers de stock por sentencia dentro de la transacción.
+
+    Mientras está activo, cada INSERT/UPDATE/DELETE sobre branch_stock o
+    product_sizes actualiza products con un único UPDATE agregado (transition
+    tables) en lugar de uno por fila. El modo es SET LOCAL: termina al salir
+    del bloque o con el próximo commit/rollback. Sin efecto fuera de PostgreSQL.
+
+    Las filas pendientes deben enviarse (flush) dentro del bloque para que
+    sus sentencias se beneficien del modo masivo.
+
+    Example:
+        with bulk_stock_mode(db):
+            db.add_all(stocks)
+            db.flush()
+        db.commit()
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        yield
+        return
+
+    db.execute(text("SELECT set_config('app.stock_bulk_mode', 'on', true)"))
+    try:
+        yield
+    finally:
+        if db.is_active:
+            db.execute(text("SELECT set_config('app.stock_bulk_mode', 'off', true)"))
+
+
+def sync_stock_total(db: Session, product: Product) -> int:
+    """
+    Deja product.stock_quantity al día tras cambiar su BranchStock/ProductSize.
+
+    En PostgreSQL los triggers de delta actualizan products al enviar las
+    filas de stock (flush): sólo se relee el total. Asignarlo además desde
+    Python lo contaría dos veces, porque el UPDATE de products sale antes
+    que el de branch_stock y el trigger suma el delta encima. Sin triggers
+    (SQLite en tests) se calcula la suma en la misma transacción.
+
+    Returns:
+        Stock total del producto
+    """
+    db.flush()
+    if db.get_bind().dialect.name == "postgresql":
+        db.refresh(product, attribute_names=["stock_quantity"])
+        return product.stock_quantity
+
+    stock_model = ProductSize if product.has_sizes else BranchStock
+    product.stock_quantity = db.query(
+        func.coalesce(func.sum(stock_model.stock_quantity), 0)
+    ).filter(stock_model.product_id == product.id).scalar()
+    return product.stock_quantity
+
+
+class StockConsistencyService:
+    """
+    Verificación y reparación de Product.stock_quantity.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.db = db
+
+    def _drift_query(self):
+        """Productos cuyo stock_quantity no coincide con la suma de su stock."""
+        branch_totals = select(
+            BranchStock.product_id,
+            func.sum(BranchStock.stock_quantity).label("total")
+        ).group_by(BranchStock.product_id).subquery()
+
+        size_totals = select(
+            ProductSize.product_id,
+            func.sum(ProductSize.stock_quantity).label("total")
+        ).group_by(ProductSize.product_id).subquery()
+
+        expected = case(
+            (Product.has_sizes == True, func.coalesce(size_totals.c.total, 0)),
+            else_=func.coalesce(branch_totals.c.total, 0)
+        )
+
+        return self.db.query(
+            Product.id.label("product_id"),
+            Product.stock_quantity.label("recorded"),
+            expected.label("expected")
+        ).outerjoin(
+            branch_totals, branch_totals.c.product_id == Product.id
+        ).outerjoin(
+            size_totals, size_totals.c.product_id == Product.id
+        ).filter(
+            func.coalesce(Product.stock_quantity, 0) != expected
+        )
+
+    def find_drift(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Detecta productos con stock total desviado.
+
+        Args:
+            limit: Máximo de productos a retornar (None = todos)
+
+        Returns:
+            Lista de {"product_id", "recorded", "expected"}
+        """
+        query = self._drift_query().order_by(Product.id)
+        if limit:
+            query = query.limit(limit)
+        return [
+            {"product_id": row.product_id, "recorded": row.recorded, "expected": int(row.expected)}
+            for row in query.all()
+        ]
+
+    def repair_drift(self) -> List[Dict]:
+        """
+        Corrige Product.stock_quantity de los productos desviados.
+
+        Bloquea primero las filas de products afectadas y recién entonces
+        vuelve a calcular las sumas: una venta concurrente o ya terminó
+        (y su cambio se ve en la suma) o espera el lock y aplica su delta
+        sobre el valor reparado.
+
+        Returns:
+            Desvíos corregidos: [{"product_id", "recorded", "expected"}]
+        """
+        product_ids = [row["product_id"] for row in self.find_drift()]
+        if not product_ids:
+            return []
+
+        self.db.query(Product.id).filter(
+            Product.id.in_(product_ids)
+        ).order_by(Product.id).with_for_update().all()
+
+        repaired = [
+            {"product_id": row.product_id, "recorded": row.recorded, "expected": int(row.expected)}
+            for row in self._drift_query().filter(Product.id.in_(product_ids)).all()
+        ]
+        for row in repaired:
+            self.db.query(Product).filter(Product.id == row["product_id"]).update(
+                {Product.stock_quantity: row["expected"]},
+                synchronize_session=False
+            )
+        invalidate_product_detail(self.db, [row["product_id"] for row in repaired])
+        refresh_catalog_stock(self.db, [row["product_id"] for row in repaired])
+        self.db.commit()
+
+        if repaired:
+            logger.warning(
+                f"Stock drift repaired on {len(repaired)} products: "
+                + ", ".join(f"{r['product_id']} ({r['recorded']} -> {r['expected']})" for r in repaired[:20])
+            )
+        return repaired
@@ -1,15 +1,23 @@
 """
-Servicio de gestión de stock con optimistic locking.
+Servicio de gestión de stock con decremento condicional atómico.
 
 Este servicio maneja las operaciones de stock garantizando
 consistencia en escenarios de concurrencia (múltiples vendedores).
+
+Los descuentos se resuelven en la base de datos con
+UPDATE ... WHERE stock_quantity >= :cantidad RETURNING, agrupando todos
+los ítems de una venta en un UPDATE por tabla de stock.
 """
 
+from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.exc import OperationalError
 from sqlalchemy import text
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from app.models import BranchStock, ProductSize, Product, InventoryMovement
+from app.core.metrics import stock_conflicts
+from app.services.catalog_search_service import refresh_catalog_stock
+from app.services.storefront_service import invalidate_product_detail
 
 
 class StockConflictError(Exception):
@@ -24,7 +32,246 @@ class InsufficientStockError(Exception):
 
 class StockService:
     """Servicio para operaciones de stock thread-safe."""
-    
+
+    @staticmethod
+    def decrement_stock_batch(
+        db: Session,
+        branch_id: int,
+        items: List[Dict],
+        reference_type: str = "SALE",
+        reference_id: Optional[int] = None,
+        notes: Optional[str] = None,
+        commit: bool = True
+    ) -> List[Dict]:
+        """
+        Decrementa stock de varios ítems con UPDATE condicional atómico.
+
+        En lugar de leer el registro, verificar en Python y escribir (con
+        reintentos ante conflicto), cada tabla de stock se actualiza con un
+        único UPDATE ... FROM (VALUES ...) WHERE stock_quantity >= cantidad
+        RETURNING. La condición se evalúa sobre la fila bloqueada, por lo que
+        dos vendedores concurrentes nunca pueden sobrevender: el segundo
+        espera el lock de fila y re-evalúa la condición con el valor nuevo.
+
+        Todo o nada: si alguna línea no alcanza, se hace rollback de la
+        transacción completa (incluida la venta no confirmada del llamador)
+        y se lanza InsufficientStockError. Si el llamador abrió un SAVEPOINT
+        (db.begin_nested()), solo se revierte el SAVEPOINT.
+
+        Args:
+            db: Sesión de base de datos
+            branch_id: ID de la sucursal
+            items: Líneas [{"product_id", "quantity", "size"}]; líneas
+                repetidas del mismo producto/talle se acumulan
+            reference_type: Tipo de operación (SALE, ADJUSTMENT, etc)
+            reference_id: ID de la operación origen
+            notes: Notas adicionales
+            commit: Confirmar la transacción al terminar (False si el
+                llamador confirma junto con otros cambios)
+
+        Returns:
+            Cambios aplicados: [{"product_id", "size", "quantity",
+            "previous_stock", "new_stock"}]
+
+        Raises:
+            ValueError: Producto inexistente o talle faltante
+            InsufficientStockError: Alguna línea sin stock suficiente
+            StockConflictError: Deadlock/serialización detectado por la BD
+        """
+        # Acumular cantidades por (producto, talle)
+        requested: Dict[Tuple[int, Optional[str]], int] = {}
+        for item in items:
+            key = (item["product_id"], item.get("size"))
+            requested[key] = requested.get(key, 0) + item["quantity"]
+
+        product_ids = {product_id for product_id, _ in requested}
+        products = {
+            p.id: p for p in db.query(Product).filter(Product.id.in_(product_ids)).all()
+        }
+
+        branch_lines: Dict[int, int] = {}
+        size_lines: Dict[Tuple[int, str], int] = {}
+        for (product_id, size), quantity in sorted(requested.items(), key=lambda kv: (kv[0][0], kv[0][1] or "")):
+            product = products.get(product_id)
+            if not product:
+                raise ValueError(f"Producto {product_id} no existe")
+            if product.has_sizes:
+                if not size:
+                    raise ValueError("Talle obligatorio para productos con has_sizes=True")
+                size_lines[(product_id, size)] = quantity
+            else:
+                branch_lines[product_id] = branch_lines.get(product_id, 0) + quantity
+
+        now = datetime.now()
+        changes: List[Dict] = []
+        try:
+            if branch_lines:
+                changes.extend(StockService._decrement_rows(
+                    db, "branch_stock", branch_id,
+                    [(product_id, None, qty) for product_id, qty in branch_lines.items()],
+                    now
+                ))
+            if size_lines:
+                changes.extend(StockService._decrement_rows(
+                    db, "product_sizes", branch_id,
+                    [(product_id, size, qty) for (product_id, size), qty in size_lines.items()],
+                    now
+                ))
+        except OperationalError as e:
+            # Deadlock o falla de serialización: el cliente debe reintentar
+            StockService._rollback(db)
+            stock_conflicts.inc()
+            raise StockConflictError(f"Conflicto de concurrencia al actualizar stock: {e.orig}")
+
+        expected = len(branch_lines) + len(size_lines)
+        if len(changes) < expected:
+            applied = {(c["product_id"], c["size"]) for c in changes}
+            missing = [
+                (product_id, None, qty) for product_id, qty in branch_lines.items()
+                if (product_id, None) not in applied
+            ] + [
+                (product_id, size, qty) for (product_id, size), qty in size_lines.items()
+                if (product_id, size) not in applied
+            ]
+            StockService._rollback(db)
+            raise InsufficientStockError(
+                StockService._describe_shortage(db, branch_id, missing)
+            )
+
+        db.add_all([
+            InventoryMovement(
+                product_id=change["product_id"],
+                branch_id=branch_id,
+                movement_type="OUT",
+                quantity=-change["quantity"],
+                previous_stock=change["previous_stock"],
+                new_stock=change["new_stock"],
+                reference_type=reference_type,
+                reference_id=reference_id,
+                notes=f"Talle: {change['size']}. {notes or ''}" if change["size"] else notes
+            )
+            for change in changes
+        ])
+        invalidate_product_detail(db, {change["product_id"] for change in changes})
+        refresh_catalog_stock(db, {change["product_id"] for change in changes})
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return changes
+
+    @staticmethod
+    def _rollback(db: Session) -> None:
+        """Revierte el SAVEPOINT abierto por el llamador o la transacción completa."""
+        nested = db.get_nested_transaction()
+        if nested is not None:
+            nested.rollback()
+        else:
+            db.rollback()
+
+    @staticmethod
+    def _decrement_rows(
+        db: Session,
+        table: str,
+        branch_id: int,
+        lines: List[Tuple[int, Optional[str], int]],
+        updated_at: datetime
+    ) -> List[Dict]:
+        """
+        Ejecuta el UPDATE condicional de un lote sobre branch_stock o product_sizes.
+
+        Las filas sin stock suficiente simplemente no se actualizan (no
+        aparecen en RETURNING); el llamador compara contra lo pedido.
+        Las unidades reservadas por checkouts e-commerce no se pueden vender.
+        En PostgreSQL las filas se bloquean antes con SELECT ... ORDER BY
+        ... FOR UPDATE: el orden de las líneas de VALUES no fija el orden en
+        que el UPDATE toma los locks, y así dos lotes concurrentes los toman
+        en el mismo orden (producto, talle).
+        """
+        params = {"branch_id": branch_id, "updated_at": updated_at}
+        values = []
+        for index, (product_id, size, quantity) in enumerate(lines):
+            params[f"p{index}"] = product_id
+            params[f"q{index}"] = quantity
+            if table == "product_sizes":
+                params[f"s{index}"] = size
+                values.append(f"(:p{index}, :q{index}, :s{index})")
+            else:
+                values.append(f"(:p{index}, :q{index})")
+
+        # Las columnas de VALUES se llaman column1, column2, ... en
+        # PostgreSQL y SQLite, lo que evita alias específicos de cada motor.
+        # RETURNING solo usa columnas de la tabla sin calificar (SQLite no
+        # admite columnas del FROM); la cantidad se toma de las líneas.
+        is_size_table = table == "product_sizes"
+        size_match = " AND t.size = v.column3" if is_size_table else ""
+        size_column = "size" if is_size_table else "NULL"
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(
+                text(f"""
+                SELECT 1 FROM {table} AS t
+                JOIN (VALUES {", ".join(values)}) AS v
+                  ON t.product_id = v.column1{size_match}
+                WHERE t.branch_id = :branch_id
+                ORDER BY t.product_id{", t.size" if is_size_table else ""}
+                FOR UPDATE OF t
+                """),
+                params
+            )
+        rows = db.execute(
+            text(f"""
+            UPDATE {table} AS t
+            SET stock_quantity = t.stock_quantity - v.column2,
+                updated_at = :updated_at
+            FROM (VALUES {", ".join(values)}) AS v
+            WHERE t.product_id = v.column1
+              AND t.branch_id = :branch_id{size_match}
+              AND t.stock_quantity - t.reserved_stock >= v.column2
+            RETURNING product_id, {size_column}, stock_quantity
+            """),
+            params
+        ).all()
+
+        quantities = {(product_id, size): quantity for product_id, size, quantity in lines}
+        changes = []
+        for product_id, size, new_stock in rows:
+            quantity = quantities[(product_id, size)]
+            changes.append({
+                "product_id": product_id,
+                "size": size,
+                "quantity": quantity,
+                "previous_stock": new_stock + quantity,
+                "new_stock": new_stock,
+            })
+        return changes
+
+    @staticmethod
+    def _describe_shortage(
+        db: Session,
+        branch_id: int,
+        missing: List[Tuple[int, Optional[str], int]]
+    ) -> str:
+        """Arma el mensaje de stock insuficiente consultando lo disponible."""
+        details = []
+        for product_id, size, quantity in missing:
+            if size is None:
+                available = db.query(BranchStock.stock_quantity - BranchStock.reserved_stock).filter(
+                    BranchStock.product_id == product_id,
+                    BranchStock.branch_id == branch_id
+                ).scalar()
+                label = f"producto {product_id}"
+            else:
+                available = db.query(ProductSize.stock_quantity - ProductSize.reserved_stock).filter(
+                    ProductSize.product_id == product_id,
+                    ProductSize.branch_id == branch_id,
+                    ProductSize.size == size
+                ).scalar()
+                label = f"producto {product_id} talle {size}"
+            details.append(
+                f"{label}: Disponible: {available or 0}, Requerido: {quantity}"
+            )
+        return "Stock insuficiente. " + "; ".join(details)
+
     @staticmethod
     def decrement_stock_with_locking(
         db: Session,
@@ -38,8 +285,12 @@ class StockService:
         max_retries: int = 3
     ) -> None:
         """
-        Decrementa stock con optimistic locking (previene race conditions).
-        
+        Decrementa stock de un único ítem (previene race conditions).
+
+        Wrapper de decrement_stock_batch para un solo producto. El UPDATE
+        condicional es atómico, por lo que ya no hay reintentos:
+        max_retries se conserva solo por compatibilidad de firma.
+
         Args:
             db: Sesión de base de datos
             product_id: ID del producto
@@ -49,12 +300,12 @@ class StockService:
             reference_type: Tipo de operación (SALE, ADJUSTMENT, etc)
             reference_id: ID de la operación origen
             notes: Notas adicionales
-            max_retries: Máximo de reintentos en caso de conflicto
-        
+            max_retries: Sin uso (compatibilidad)
+
         Raises:
             InsufficientStockError: Si no hay stock suficiente
-            StockConflictError: Si después de max_retries sigue habiendo conflictos
-        
+            StockConflictError: Si la BD aborta la transacción por deadlock
+
         Example:
             try:
                 StockService.decrement_stock_with_locking(
@@ -70,196 +321,18 @@ class StockService:
                 # Mostrar error al usuario
                 raise HTTPException(status_code=400, detail="Stock insuficiente")
             except StockConflictError:
-                # Otro vendedor modificó el stock, reintentar
+                # Deadlock detectado por la BD, reintentar
                 raise HTTPException(status_code=409, detail="Conflicto de stock, reintentar")
         """
-        
-        # Obtener producto para saber si tiene talles
-        product = db.query(Product).filter(Product.id == product_id).first()
-        if not product:
-            raise ValueError(f"Producto {product_id} no existe")
-        
-        retries = 0
-        while retries < max_retries:
-            try:
-                if product.has_sizes:
-                    # Producto con talles → usar ProductSize
-                    return StockService._decrement_product_size(
-                        db, product_id, branch_id, quantity, size,
-                        reference_type, reference_id, notes
-                    )
-                else:
-                    # Producto sin talles → usar BranchStock
-                    return StockService._decrement_branch_stock(
-                        db, product_id, branch_id, quantity,
-                        reference_type, reference_id, notes
-                    )
-            except StaleDataError:
-                # Conflicto de concurrencia, reintentar
-                db.rollback()
-                retries += 1
-                if retries >= max_retries:
-                    raise StockConflictError(
-                        f"No se pudo actualizar stock después de {max_retries} intentos. "
-                        "Otro usuario modificó el stock simultáneamente."
-                    )
-    
-    @staticmethod
-    def _decrement_branch_stock(
-        db: Session,
-        product_id: int,
-        branch_id: int,
-        quantity: int,
-        reference_type: str,
-        reference_id: Optional[int],
-        notes: Optional[str]
-    ) -> None:
-        """Decrementa BranchStock con locking optimista."""
-        
-        # Buscar stock
-        stock = db.query(BranchStock).filter(
-            BranchStock.product_id == product_id,
-            BranchStock.branch_id == branch_id
-        ).first()
-        
-        if not stock:
-            raise InsufficientStockError(
-                f"No existe stock para producto {product_id} en sucursal {branch_id}"
-            )
-        
-        # Verificar disponibilidad
-        if stock.stock_quantity < quantity:
-            raise InsufficientStockError(
-                f"Stock insuficiente. Disponible: {stock.stock_quantity}, "
-                f"Requerido: {quantity}"
-            )
-        
-        # Guardar valores para auditoría
-        previous_stock = stock.stock_quantity
-        # TODO: Re-enable optimistic locking when version column exists in production
-        # current_version = stock.version
-        
-        # UPDATE stock (without optimistic locking for now)
-        from datetime import datetime
-        rows_updated = db.execute(
-            text("""
-            UPDATE branch_stock
-            SET stock_quantity = stock_quantity - :quantity,
-                updated_at = :updated_at
-            WHERE id = :stock_id
-              AND stock_quantity >= :quantity
-            """),
-            {
-                "stock_id": stock.id,
-                "quantity": quantity,
-                "updated_at": datetime.now()
-            }
-        ).rowcount
-        
-        if rows_updated == 0:
-            # Stock insuficiente
-            db.rollback()
-            raise InsufficientStockError(
-                f"Stock insuficiente. Disponible: {stock.stock_quantity}, "
-                f"Requerido: {quantity}"
-            )
-        
-        # Crear InventoryMovement para auditoría
-        movement = InventoryMovement(
-            product_id=product_id,
+        StockService.decrement_stock_batch(
+            db,
             branch_id=branch_id,
-            movement_type="OUT",
-            quantity=-quantity,
-            previous_stock=previous_stock,
-            new_stock=previous_stock - quantity,
+            items=[{"product_id": product_id, "quantity": quantity, "size": size}],
             reference_type=reference_type,
             reference_id=reference_id,
             notes=notes
         )
-        db.add(movement)
-        db.commit()
-    
-    @staticmethod
-    def _decrement_product_size(
-        db: Session,
-        product_id: int,
-        branch_id: int,
-        quantity: int,
-        size: Optional[str],
-        reference_type: str,
-        reference_id: Optional[int],
-        notes: Optional[str]
-    ) -> None:
-        """Decrementa ProductSize con locking optimista."""
-        
-        if not size:
-            raise ValueError("Talle obligatorio para productos con has_sizes=True")
-        
-        # Buscar stock de talle
-        stock = db.query(ProductSize).filter(
-            ProductSize.product_id == product_id,
-            ProductSize.branch_id == branch_id,
-            ProductSize.size == size
-        ).first()
-        
-        if not stock:
-            raise InsufficientStockError(
-                f"No existe stock de talle {size} para producto {product_id} "
-                f"en sucursal {branch_id}"
-            )
-        
-        # Verificar disponibilidad
-        if stock.stock_quantity < quantity:
-            raise InsufficientStockError(
-                f"Stock insuficiente de talle {size}. "
-                f"Disponible: {stock.stock_quantity}, Requerido: {quantity}"
-            )
-        
-        # Guardar valores para auditoría
-        previous_stock = stock.stock_quantity
-        # TODO: Re-enable optimistic locking when version column exists in production
-        # current_version = stock.version
-        
-        # UPDATE stock (without optimistic locking for now)
-        from datetime import datetime
-        rows_updated = db.execute(
-            text("""
-            UPDATE product_sizes
-            SET stock_quantity = stock_quantity - :quantity,
-                updated_at = :updated_at
-            WHERE id = :stock_id
-              AND stock_quantity >= :quantity
-            """),
-            {
-                "stock_id": stock.id,
-                "quantity": quantity,
-                "updated_at": datetime.now()
-            }
-        ).rowcount
-        
-        if rows_updated == 0:
-            # Stock insuficiente
-            db.rollback()
-            raise InsufficientStockError(
-                f"Stock insuficiente de talle {size}. "
-                f"Disponible: {stock.stock_quantity}, Requerido: {quantity}"
-            )
-        
-        # Crear InventoryMovement para auditoría
-        movement = InventoryMovement(
-            product_id=product_id,
-            branch_id=branch_id,
-            movement_type="OUT",
-            quantity=-quantity,
-            previous_stock=previous_stock,
-            new_stock=previous_stock - quantity,
-            reference_type=reference_type,
-            reference_id=reference_id,
-            notes=f"Talle: {size}. {notes or ''}"
-        )
-        db.add(movement)
-        db.commit()
-    
+
     @staticmethod
     def increment_stock(
         db: Session,
@@ -0,0 +1,411 @@
+"""
+Servicio de Storefront - Lecturas del e-commerce público con cache.
+
+Ficha de producto (PDP):
+    Producto, marca, stock por talle e imágenes en un único bundle armado
+    con un conjunto fijo de consultas (producto + marca, imágenes, talles
+    agregados en SQL) y cacheado por producto.
+
+    - Cambios ORM sobre Product, BranchStock, ProductSize o ProductImage
+      invalidan el producto afectado al confirmar la transacción
+      (listeners de mapper registrados en este módulo)
+    - Cambios de Brand vacían el cache completo
+    - Las actualizaciones SQL directas de stock (StockService,
+      ReservationService) llaman a invalidate_product_detail() explícitamente
+
+Bootstrap del storefront:
+    Banners, redes sociales, config de tienda, config de WhatsApp,
+    categorías y marcas en un único payload versionado: la versión es un
+    hash del contenido (ETag), igual en todos los workers. Los endpoints de
+    administración de contenido llaman a bump_storefront_version(); las
+    categorías, marcas y cambios de visibilidad de productos (afectan la
+    lista de marcas) lo invalidan vía listener.
+
+Los caches son por proceso (ver app/core/cache.py); el TTL acota el
+desfase entre workers.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, event, exists, func, inspect
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.core.cache import TTLCache, invalidate_on_commit
+from app.services.app_config_service import AppConfigService
+from app.models import (
+    Brand, BranchStock, Category, Product, ProductImage, ProductSize, SocialMediaConfig, StoreBanner
+)
+from config.settings import settings
+from utils.size_validators import size_sort_rank
+
+product_detail_cache = TTLCache(
+    "product_detail",
+    ttl_seconds=settings.product_detail_cache_ttl,
+    max_entries=settings.product_detail_cache_max_entries
+)
+
+
+storefront_bootstrap_cache = TTLCache(
+    "storefront_bootstrap",
+    ttl_seconds=settings.storefront_bootstrap_cache_ttl,
+    max_entries=1
+)
+
+_BOOTSTRAP_KEY = "bootstrap"
+
+# Valores por defecto cuando la tienda todavía no fue configurada
+DEFAULT_STORE_CONFIG = {
+    "store_name": "POS Cesariel",
+    "store_description": "Tu tienda online",
+    "store_logo": None,
+    "contact_email": "info@poscesariel.com",
+    "contact_phone": "+54 9 11 1234-5678",
+    "address": "Buenos Aires, Argentina",
+    "currency": "ARS",
+    "tax_percentage": 0,
+    "is_active": True
+}
+
+DEFAULT_WHATSAPP_CONFIG = {
+    "business_phone": "+54 9 11 1234-5678",
+    "business_name": "POS Cesariel",
+    "welcome_message": "¡Hola! Gracias por tu compra. Te contactaremos pronto para coordinar la entrega.",
+    "business_hours": "Lunes a Viernes: 9:00 - 18:00",
+    "auto_response_enabled": False,
+    "is_active": True
+}
+
+
+def bump_storefront_version(db: Session) -> None:
+    """
+    Invalida el bootstrap del storefront al confirmar db.
+
+    Llamar desde todo endpoint que modifique banners, redes sociales,
+    configuración de tienda/WhatsApp, categorías o marcas.
+    """
+    invalidate_on_commit(db, storefront_bootstrap_cache)
+
+
+def invalidate_product_detail(db: Session, product_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Invalida el bundle de los productos indicados al confirmar db.
+
+    Args:
+        db: Sesión que contiene el cambio
+        product_ids: Productos afectados (None = todos)
+    """
+    invalidate_on_commit(db, product_detail_cache, product_ids)
+
+
+def size_sort_key(size: str):
+    """Orden de talles: numéricos primero (35, 36, ...), luego XS..XXL, luego otros."""
+    return (size_sort_rank(size), size.upper())
+
+
+def serialize_product(product: Product) -> Dict:
+    """Producto en el formato del storefront (precio e-commerce, stock disponible, marca)."""
+    brand_info = None
+    if product.brand_rel:
+        brand_info = {
+            "id": product.brand_rel.id,
+            "name": product.brand_rel.name,
+            "description": product.brand_rel.description,
+            "logo_url": product.brand_rel.logo_url
+        }
+    elif product.brand:  # Fallback para productos con marca legacy
+        brand_info = {
+            "id": None,
+            "name": product.brand,
+            "description": None,
+            "logo_url": None
+        }
+
+    return {
+        "id": product.id,
+        "name": product.name,
+        "description": product.description,
+        "brand": brand_info,
+        "price": float(product.ecommerce_price) if product.ecommerce_price else float(product.price),
+        "stock": product.calculate_total_available_stock(),
+        "featured": product.ecommerce_price is not None,
+        "is_active": product.is_active,
+        "show_in_ecommerce": product.show_in_ecommerce,
+        "category_id": product.category_id,
+        "image_url": product.image_url,
+        "has_sizes": product.has_sizes,
+        "created_at": product.created_at.isoformat() if product.created_at else None
+    }
+
+
+class StorefrontService:
+    """
+    Lecturas cacheadas del storefront público.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Inicializa servicio con sesión de BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.db = db
+
+    def get_product_detail(self, product_id: int) -> Optional[Dict]:
+        """
+        Bundle de la ficha de producto (cacheado por producto).
+
+        Returns:
+            {"product", "sizes", "images"} o None si el producto no existe
+            o no está publicado en el e-commerce
+        """
+        return product_detail_cache.get_or_load(
+            product_id, lambda: self._build_product_detail(product_id)
+        )
+
+    def _build_product_detail(self, product_id: int) -> Optional[Dict]:
+        """Arma el bundle: producto + marca, imágenes y talles agregados."""
+        product = self.db.query(Product).options(
+            joinedload(Product.brand_rel),
+            selectinload(Product.product_images)
+        ).filter(
+            Product.id == product_id,
+            Product.show_in_ecommerce == True,
+            Product.is_active == True
+        ).first()
+
+        if not product:
+            return None
+
+        sizes: List[Dict] = []
+        if product.has_sizes:
+            # Stock disponible (sin reservas) sumado entre sucursales
+            available = ProductSize.stock_quantity - ProductSize.reserved_stock
+            rows = self.db.query(
+                ProductSize.size, func.sum(available)
+            ).filter(
+                ProductSize.product_id == product_id,
+                available > 0
+            ).group_by(ProductSize.size).all()
+            sizes = sorted(
+                ({"size": size, "stock": int(stock)} for size, stock in rows),
+                key=lambda item: size_sort_key(item["size"])
+            )
+
+        images = sorted(
+            product.product_images,
+            key=lambda image: (image.image_order or 0, image.id)
+        )
+
+        return {
+            "product": serialize_product(product),
+            "sizes": sizes,
+            "images": [
+                {
+                    "id": image.id,
+                    "product_id": image.product_id,
+                    "image_url": image.image_url,
+                    "alt_text": image.alt_text,
+                    "is_main": image.is_main,
+                    "order": image.image_order,
+                    "created_at": image.created_at.isoformat() if image.created_at else None
+                }
+                for image in images
+            ]
+        }
+
+
+    # ===== BOOTSTRAP =====
+
+    def get_bootstrap(self) -> Dict:
+        """
+        Contenido global del storefront (cacheado y versionado).
+
+        Returns:
+            {
+                "payload": {"version", "banners", "social_media", "store_config",
+                            "whatsapp_config", "categories", "brands"},
+                "etag": ETag fuerte derivado del contenido,
+                "last_modified": datetime UTC (segundos) de la versión
+            }
+        """
+        return storefront_bootstrap_cache.get_or_load(_BOOTSTRAP_KEY, self._build_bootstrap)
+
+    def _build_bootstrap(self) -> Dict:
+        """Arma el payload del bootstrap (una consulta por sección)."""
+        content = {
+            "banners": self._banners(),
+            "social_media": self._social_media(),
+            "store_config": self._store_config(),
+            "whatsapp_config": self._whatsapp_config(),
+            "categories": self._categories(),
+            "brands": self._brands(),
+        }
+        version = hashlib.sha256(
+            json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        return {
+            "payload": {"version": version, **content},
+            "etag": f'"{version}"',
+            "last_modified": datetime.now(timezone.utc).replace(microsecond=0)
+        }
+
+    def _banners(self) -> List[Dict]:
+        banners = self.db.query(StoreBanner).filter(
+            StoreBanner.is_active == True
+        ).order_by(StoreBanner.banner_order, StoreBanner.id).all()
+        return [
+            {
+                "id": str(banner.id),
+                "title": banner.title,
+                "subtitle": banner.subtitle,
+                "image": banner.image_url,
+                "link": banner.link_url,
+                "button_text": banner.button_text,
+                "active": banner.is_active,
+                "order": banner.banner_order
+            }
+            for banner in banners
+        ]
+
+    def _social_media(self) -> List[Dict]:
+        social_media = self.db.query(SocialMediaConfig).filter(
+            SocialMediaConfig.is_active == True
+        ).order_by(SocialMediaConfig.display_order, SocialMediaConfig.id).all()
+        return [
+            {
+                "id": social.id,
+                "platform": social.platform,
+                "username": social.username,
+                "url": social.url,
+                "display_order": social.display_order
+            }
+            for social in social_media
+        ]
+
+    def _store_config(self) -> Dict:
+        config = AppConfigService(self.db).get("ecommerce")
+        if not config:
+            return dict(DEFAULT_STORE_CONFIG)
+        return {
+            "store_name": config.store_name,
+            "store_description": config.store_description,
+            "store_logo": config.store_logo,
+            "contact_email": config.contact_email,
+            "contact_phone": config.contact_phone,
+            "address": config.address,
+            "currency": config.currency,
+            "tax_percentage": float(config.tax_percentage),
+            "is_active": config.is_active
+        }
+
+    def _whatsapp_config(self) -> Dict:
+        config = AppConfigService(self.db).get("whatsapp")
+        if not config:
+            return dict(DEFAULT_WHATSAPP_CONFIG)
+        return {
+            "business_phone": config.business_phone,
+            "business_name": config.business_name,
+            "welcome_message": config.welcome_message,
+            "business_hours": config.business_hours,
+            "auto_response_enabled": config.auto_response_enabled,
+            "is_active": config.is_active
+        }
+
+    def _categories(self) -> List[Dict]:
+        categories = self.db.query(Category).filter(Category.is_active == True).all()
+        return [
+            {"id": category.id, "name": category.name, "is_active": category.is_active}
+            for category in categories
+        ]
+
+    def _brands(self) -> List[Dict]:
+        """Marcas activas con al menos un producto visible en e-commerce."""
+        brands = self.db.query(Brand).filter(
+            Brand.is_active == True,
+            exists().where(
+                and_(
+                    Product.brand_id == Brand.id,
+                    Product.show_in_ecommerce == True,
+                    Product.is_active == True
+                )
+            )
+        ).order_by(Brand.name).all()
+        return [
+            {
+                "id": brand.id,
+                "name": brand.name,
+                "description": brand.description,
+                "logo_url": brand.logo_url
+            }
+            for brand in brands
+        ]
+
+
+# ===== INVALIDACIÓN POR CAMBIOS ORM =====
+
+def _invalidate_product_row(mapper, connection, target) -> None:
+    """Cambio en Product: invalida su bundle."""
+    session = Session.object_session(target)
+    if session is not None and target.id is not None:
+        invalidate_product_detail(session, [target.id])
+
+
+def _bump_on_product_added(mapper, connection, target) -> None:
+    """Alta o baja de producto: puede cambiar la lista de marcas del bootstrap."""
+    session = Session.object_session(target)
+    if session is not None:
+        bump_storefront_version(session)
+
+
+def _bump_on_product_visibility(mapper, connection, target) -> None:
+    """Producto publicado/despublicado o con otra marca: cambia la lista de marcas."""
+    session = Session.object_session(target)
+    state = inspect(target)
+    if session is not None and any(
+        state.attrs[field].history.has_changes()
+        for field in ("show_in_ecommerce", "is_active", "brand_id")
+    ):
+        bump_storefront_version(session)
+
+
+def _invalidate_child_row(mapper, connection, target) -> None:
+    """Cambio en stock o imágenes: invalida el bundle del producto dueño."""
+    session = Session.object_session(target)
+    if session is not None and target.product_id is not None:
+        invalidate_product_detail(session, [target.product_id])
+
+
+def _invalidate_all(mapper, connection, target) -> None:
+    """Cambio en una marca: puede afectar a muchos productos."""
+    session = Session.object_session(target)
+    if session is not None:
+        invalidate_product_detail(session)
+        bump_storefront_version(session)
+
+
+def _bump_on_catalog_change(mapper, connection, target) -> None:
+    """
+    Alta/cambio de marca o categoría (se escriben vía repositories, que
+    confirman internamente): invalida el bootstrap.
+    """
+    session = Session.object_session(target)
+    if session is not None:
+        bump_storefront_version(session)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Product, _event, _invalidate_product_row)
+    for _model in (BranchStock, ProductSize, ProductImage):
+        event.listen(_model, _event, _invalidate_child_row)
+event.listen(Product, "after_insert", _bump_on_product_added)
+event.listen(Product, "after_delete", _bump_on_product_added)
+event.listen(Product, "after_update", _bump_on_product_visibility)
+event.listen(Brand, "after_update", _invalidate_all)
+event.listen(Brand, "after_delete", _invalidate_all)
+event.listen(Brand, "after_insert", _bump_on_catalog_change)
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Category, _event, _bump_on_catalog_change)
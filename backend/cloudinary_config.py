@@ -1,21 +1,33 @@
 import os
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
 from typing import Optional
 from fastapi import HTTPException
 
-# Configuración de Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET")
-)
-
 # Validar que las variables de entorno estén configuradas
 if not all([os.getenv("CLOUDINARY_CLOUD_NAME"), os.getenv("CLOUDINARY_API_KEY"), os.getenv("CLOUDINARY_API_SECRET")]):
     raise ValueError("Las variables de entorno de Cloudinary no están configuradas correctamente")
 
+_sdk = None
+
+
+def _cloudinary():
+    """
+    SDK de Cloudinary configurado, importado en el primer uso: arrastra
+    urllib3 y certifi, que el arranque de la API no necesita.
+    """
+    global _sdk
+    if _sdk is None:
+        import cloudinary
+        import cloudinary.uploader
+
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET")
+        )
+        _sdk = cloudinary
+    return _sdk
+
+
 def upload_image_to_cloudinary(
     file_content: bytes, 
     filename: str,
@@ -42,7 +54,7 @@ def upload_image_to_cloudinary(
         public_id = f"{folder}/{uuid.uuid4().hex}"
         
         # Upload to Cloudinary
-        result = cloudinary.uploader.upload(
+        result = _cloudinary().uploader.upload(
             file_content,
             public_id=public_id,
             resource_type=resource_type
@@ -75,7 +87,7 @@ def delete_image_from_cloudinary(public_id: str) -> bool:
         bool: True if deletion was successful
     """
     try:
-        result = cloudinary.uploader.destroy(public_id)
+        result = _cloudinary().uploader.destroy(public_id)
         return result.get("result") == "ok"
     except Exception as e:
         print(f"Error deleting from Cloudinary: {str(e)}")
@@ -109,7 +121,7 @@ def get_optimized_url(
             crop_params["height"] = height
         transformations.append(crop_params)
     
-    return cloudinary.CloudinaryImage(public_id).build_url(transformation=transformations)
+    return _cloudinary().CloudinaryImage(public_id).build_url(transformation=transformations)
 
 def extract_public_id_from_url(url: str) -> Optional[str]:
     """
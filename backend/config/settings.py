@@ -44,7 +44,7 @@ Note:
 """
 
 import os
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Cargar variables de entorno desde archivo .env
@@ -183,7 +183,90 @@ class Settings:
     
     # SECURITY: Nunca loggear db_password en producción
     db_password: str = os.getenv("DB_PASSWORD", "password")
-    
+
+    # Pool de conexiones (app/core/db_pool.py)
+    # - DB_POOL_ROLE: api | jobs | scheduler; job_worker.py y
+    #   notification_scheduler.py fijan su rol antes de importar database
+    # - WEB_CONCURRENCY: Workers de la API (uvicorn lo usa como --workers)
+    # - DB_CONNECTION_BUDGET: Conexiones para todos los workers de la API
+    #   (0 = 10 permanentes + 20 overflow por worker)
+    # - DB_POOL_SIZE / DB_MAX_OVERFLOW: Tamaño explícito (pisa el cálculo)
+    # - DB_POOL_TIMEOUT: Segundos de espera por una conexión antes de fallar
+    # - DB_POOL_RECYCLE: Renovar conexiones con más de N segundos
+    # - DB_POOL_PRE_PING: SELECT 1 en cada checkout; con pool_recycle menor
+    #   al idle timeout del servidor se puede apagar y ahorrar un round-trip
+    # - DB_POOL_MODE: session | pgbouncer (transaction pooling: NullPool,
+    #   sin pre-ping ni prepared statements)
+    db_pool_role: str = os.getenv("DB_POOL_ROLE", "api").lower()
+    web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", 1))
+    db_connection_budget: int = int(os.getenv("DB_CONNECTION_BUDGET", 0))
+    db_pool_size: Optional[int] = int(os.getenv("DB_POOL_SIZE")) if os.getenv("DB_POOL_SIZE") else None
+    db_max_overflow: Optional[int] = int(os.getenv("DB_MAX_OVERFLOW")) if os.getenv("DB_MAX_OVERFLOW") else None
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", 3600))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    db_pool_mode: str = os.getenv("DB_POOL_MODE", "session").lower()
+
+    # Réplica de lectura para reportes y dashboards (database.get_read_db)
+    # - READ_DATABASE_URL: URL de la réplica; vacía = todo va al primario. Su
+    #   usuario necesita pg_monitor para leer el estado del WAL receiver
+    # - READ_REPLICA_MAX_LAG_SECONDS: Atraso máximo tolerado; con más atraso
+    #   (o si la réplica no responde) las lecturas vuelven al primario
+    # - READ_REPLICA_CHECK_INTERVAL_SECONDS: Cada cuánto se re-mide el atraso
+    # - READ_REPLICA_POOL_SIZE / READ_REPLICA_MAX_OVERFLOW: Pool propio de la réplica
+    read_database_url: str = os.getenv("READ_DATABASE_URL", "")
+    read_replica_max_lag_seconds: float = float(os.getenv("READ_REPLICA_MAX_LAG_SECONDS", 30))
+    read_replica_check_interval_seconds: float = float(os.getenv("READ_REPLICA_CHECK_INTERVAL_SECONDS", 5))
+    read_replica_pool_size: int = int(os.getenv("READ_REPLICA_POOL_SIZE", 5))
+    read_replica_max_overflow: int = int(os.getenv("READ_REPLICA_MAX_OVERFLOW", 10))
+
+    # Instrumentación de consultas por request (database.track_queries)
+    # - QUERY_TIMING_ENABLED: Header Server-Timing (db y app) y log estructurado
+    #   con cantidad de consultas, tiempo total en BD y la consulta más lenta
+    # - QUERY_TIMING_LOG_MIN_MS: Solo se loggean requests de al menos esta
+    #   duración (0 = todas); el header se envía siempre
+    query_timing_enabled: bool = os.getenv("QUERY_TIMING_ENABLED", "true").lower() == "true"
+    query_timing_log_min_ms: float = float(os.getenv("QUERY_TIMING_LOG_MIN_MS", 0))
+    
+    # Registro de consultas lentas (app/core/slow_query.py, GET /diagnostics/slow-queries)
+    # - SLOW_QUERY_LOG_ENABLED: Activar el registro (opt-in)
+    # - SLOW_QUERY_THRESHOLD_MS: Duración mínima de una consulta para registrarla
+    # - SLOW_QUERY_BUFFER_SIZE: Consultas lentas retenidas en memoria por proceso
+    # - SLOW_QUERY_EXPLAIN: Capturar el plan (EXPLAIN sin ANALYZE) en segundo plano
+    slow_query_log_enabled: bool = os.getenv("SLOW_QUERY_LOG_ENABLED", "false").lower() == "true"
+    slow_query_threshold_ms: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 500))
+    slow_query_buffer_size: int = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", 200))
+    slow_query_explain: bool = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    
+    # Métricas Prometheus (GET /metrics)
+    # - METRICS_ENABLED: Registrar latencias/contadores HTTP y exponer /metrics
+    # - METRICS_TOKEN: Si se define, /metrics exige "Authorization: Bearer <token>".
+    #   Fuera de development es obligatorio: sin token /metrics responde 403
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    metrics_token: str = os.getenv("METRICS_TOKEN", "")
+
+    # Particiones mensuales de sales, sale_items e inventory_movements
+    # (PostgreSQL; app/services/partition_service.py, notification_scheduler.py)
+    # - PARTITION_MONTHS_AHEAD: Meses futuros con partición ya creada
+    # - PARTITION_RETENTION_MONTHS: Meses (además del actual) que quedan en
+    #   las tablas vivas; los anteriores se desacoplan y pasan al esquema de
+    #   archivo. 0 = no archivar nunca
+    # - PARTITION_ARCHIVE_SCHEMA: Esquema de las particiones desacopladas
+    partition_months_ahead: int = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+    partition_retention_months: int = int(os.getenv("PARTITION_RETENTION_MONTHS", 0))
+    partition_archive_schema: str = os.getenv("PARTITION_ARCHIVE_SCHEMA", "archive")
+
+    # Archivo frío de ventas en Parquet (app/services/sales_archive_service.py,
+    # app/repositories/sales_archive.py, notification_scheduler.py)
+    # - SALES_ARCHIVE_ENABLED: Exportar y borrar de la BD los meses cerrados (opt-in)
+    # - SALES_ARCHIVE_DIR: Directorio de los archivos (relativo al backend si no es absoluto)
+    # - SALES_ARCHIVE_AFTER_MONTHS: Meses (además del actual) que quedan en la BD
+    # - SALES_ARCHIVE_COMPRESSION: Códec Parquet (zstd, snappy, gzip)
+    sales_archive_enabled: bool = os.getenv("SALES_ARCHIVE_ENABLED", "false").lower() == "true"
+    sales_archive_dir: str = os.getenv("SALES_ARCHIVE_DIR", "data/sales_archive")
+    sales_archive_after_months: int = int(os.getenv("SALES_ARCHIVE_AFTER_MONTHS", 12))
+    sales_archive_compression: str = os.getenv("SALES_ARCHIVE_COMPRESSION", "zstd")
+
     
     # ===== CONFIGURACIÓN DE CORS =====
     
@@ -280,6 +363,106 @@ class Settings:
     cloudinary_api_secret: str = os.getenv("CLOUDINARY_API_SECRET", "")
     
     
+    # ===== CONFIGURACIÓN DE TRABAJOS EN SEGUNDO PLANO =====
+    
+    # Worker de la cola durable (job_worker.py), proceso separado de la API
+    # para que importaciones y actualizaciones masivas no compitan con el
+    # checkout por workers HTTP ni por conexiones del pool.
+    #
+    # - JOB_WORKER_THREADS: Threads por proceso worker (cada uno usa 1-2 conexiones)
+    # - JOB_POLL_INTERVAL: Segundos entre consultas cuando la cola está vacía
+    # - JOB_LEASE_SECONDS: Sin heartbeat del worker por este tiempo → trabajo reencolado
+    job_worker_threads: int = int(os.getenv("JOB_WORKER_THREADS", 2))
+    job_poll_interval: float = float(os.getenv("JOB_POLL_INTERVAL", 2))
+    job_lease_seconds: int = int(os.getenv("JOB_LEASE_SECONDS", 600))
+    
+    # ===== CONFIGURACIÓN DE RESERVAS DE STOCK =====
+    
+    # Un pedido e-commerce PENDING retiene su stock mientras se coordina el
+    # pago por WhatsApp. Vencido el TTL sin confirmación, el sweeper
+    # (notification_scheduler.py) libera la reserva.
+    #
+    # - STOCK_RESERVATION_TTL_MINUTES: Duración del hold desde el checkout
+    stock_reservation_ttl_minutes: int = int(os.getenv("STOCK_RESERVATION_TTL_MINUTES", 120))
+    
+    # Política de asignación de pedidos e-commerce a sucursales (FulfillmentService)
+    # Valores válidos:
+    # - "single_branch_first": Una sola sucursal si alguna cubre todo el pedido
+    # - "fewest_shipments": Dividir el pedido en la menor cantidad de envíos
+    # - "nearest": Sucursales más cercanas al cliente (requiere coordenadas)
+    fulfillment_policy: str = os.getenv("FULFILLMENT_POLICY", "single_branch_first")
+
+    # ===== CONFIGURACIÓN DE IDEMPOTENCIA =====
+
+    # POST /sales/ y POST /ecommerce/sales aceptan el header Idempotency-Key:
+    # los reintentos con la misma clave reciben la respuesta original sin
+    # volver a crear la venta ni descontar stock.
+    #
+    # - IDEMPOTENCY_KEY_TTL_HOURS: Tiempo que se conserva la respuesta guardada
+    # - IDEMPOTENCY_WAIT_SECONDS: Espera de un duplicado concurrente a que termine
+    #   la primera ejecución; vencida, responde 409 con Retry-After
+    idempotency_key_ttl_hours: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+    idempotency_wait_seconds: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 10))
+
+    # Sincronización de cajas sin conexión (POST /sales/offline-batch)
+    # - OFFLINE_SYNC_MAX_BATCH: Ventas por lote (una transacción por lote)
+    offline_sync_max_batch: int = int(os.getenv("OFFLINE_SYNC_MAX_BATCH", 500))
+
+    # Sincronización incremental del catálogo de las cajas (GET /products/sync)
+    # - CATALOG_SYNC_PAGE_SIZE: Productos por página de cambios
+    # - CATALOG_SYNC_OVERLAP_SECONDS: Ventana que se vuelve a enviar al empezar
+    #   una sincronización, para no perder transacciones confirmadas con un
+    #   updated_at anterior al cursor (los upserts repetidos son inocuos)
+    # - CATALOG_SYNC_MAX_CURSOR_AGE_DAYS: Cursores más viejos reciben el snapshot completo
+    catalog_sync_page_size: int = int(os.getenv("CATALOG_SYNC_PAGE_SIZE", 500))
+    catalog_sync_overlap_seconds: int = int(os.getenv("CATALOG_SYNC_OVERLAP_SECONDS", 60))
+    catalog_sync_max_cursor_age_days: int = int(os.getenv("CATALOG_SYNC_MAX_CURSOR_AGE_DAYS", 7))
+
+    
+    # ===== CONFIGURACIÓN DE CACHE =====
+    
+    # Cache en memoria por proceso (app/core/cache.py) para lecturas calientes
+    # del storefront. Se invalida al confirmar cambios en el mismo proceso; el
+    # TTL acota el desfase entre workers.
+    #
+    # - PRODUCT_DETAIL_CACHE_TTL: Segundos de vida del bundle de ficha de producto
+    # - PRODUCT_DETAIL_CACHE_MAX_ENTRIES: Productos cacheados como máximo (LRU)
+    product_detail_cache_ttl: int = int(os.getenv("PRODUCT_DETAIL_CACHE_TTL", 300))
+    product_detail_cache_max_entries: int = int(os.getenv("PRODUCT_DETAIL_CACHE_MAX_ENTRIES", 2000))
+    
+    # Bootstrap del storefront (GET /ecommerce/bootstrap)
+    # - STOREFRONT_BOOTSTRAP_CACHE_TTL: Segundos de vida del payload en el servidor
+    # - STOREFRONT_CACHE_MAX_AGE: max-age del header Cache-Control para navegadores/CDN;
+    #   vencido, el cliente revalida con If-None-Match y recibe 304 si no hubo cambios
+    storefront_bootstrap_cache_ttl: int = int(os.getenv("STOREFRONT_BOOTSTRAP_CACHE_TTL", 600))
+    storefront_cache_max_age: int = int(os.getenv("STOREFRONT_CACHE_MAX_AGE", 60))
+
+    # Índice facetado del catálogo (GET /ecommerce/products/search)
+    # - CATALOG_INDEX_TTL: Segundos de vida del índice invertido en memoria
+    # - CATALOG_PRICE_BUCKETS: Límites de los rangos de precio del facet, separados por coma
+    catalog_index_ttl: int = int(os.getenv("CATALOG_INDEX_TTL", 300))
+    catalog_price_buckets: str = os.getenv("CATALOG_PRICE_BUCKETS", "5000,10000,25000,50000,100000")
+
+    # Configuración de checkout por sucursal (tasa de impuesto y medios de pago)
+    # - BRANCH_CONFIG_CACHE_TTL: Segundos de vida del snapshot; los cambios vía
+    #   /config lo invalidan al instante en el worker que los recibe
+    # - BRANCH_CONFIG_CHECK_SECONDS: Cada cuánto se compara el sello de versión en la BD
+    #   (cambios hechos por otros workers)
+    branch_config_cache_ttl: int = int(os.getenv("BRANCH_CONFIG_CACHE_TTL", 300))
+    branch_config_check_seconds: float = float(os.getenv("BRANCH_CONFIG_CHECK_SECONDS", 5))
+
+    # Configuraciones globales (SystemConfig, EcommerceConfig, WhatsAppConfig)
+    # - APP_CONFIG_CACHE_TTL: Vida máxima de cada configuración cacheada
+    # - APP_CONFIG_CHECK_SECONDS: Cada cuánto se compara el sello de versión en la BD
+    #   (cambios hechos por otros workers)
+    app_config_cache_ttl: int = int(os.getenv("APP_CONFIG_CACHE_TTL", 3600))
+    app_config_check_seconds: float = float(os.getenv("APP_CONFIG_CHECK_SECONDS", 5))
+
+    # Dashboard e-commerce (/ecommerce-advanced/dashboard/*)
+    # - DASHBOARD_CACHE_TTL: Segundos que se reutilizan las métricas calculadas
+    dashboard_cache_ttl: int = int(os.getenv("DASHBOARD_CACHE_TTL", 30))
+
+    
     # ===== CONFIGURACIÓN DE ENTORNO =====
     
     # Entorno de ejecución actual
@@ -9,12 +9,16 @@ Componentes principales:
     - SessionLocal: Factory para crear sesiones transaccionales
     - Base: Clase base declarativa para todos los modelos ORM
     - get_db(): Dependency injection para FastAPI endpoints
+    - get_read_db(): Sesión de solo lectura en la réplica (READ_DATABASE_URL)
+      con fallback al primario, ver "RÉPLICA DE LECTURA"
+    - track_queries()/capture_queries(): Conteo y tiempo de consultas SQL
+      por request (eventos del engine), ver "INSTRUMENTACIÓN DE CONSULTAS"
 
-Configuración del pool de conexiones:
-    - pool_size: 10 conexiones simultáneas base
-    - max_overflow: 20 conexiones adicionales bajo demanda
+Configuración del pool de conexiones (settings, app/core/db_pool.py):
+    - pool_size/max_overflow: por rol (api/jobs/scheduler) y workers
     - pool_recycle: Renovación automática cada hora (previene timeouts)
-    - pool_pre_ping: Verificación de conexiones antes de usar
+    - pool_pre_ping: Verificación de conexiones antes de usar (opcional)
+    - Modo pgbouncer: NullPool para transaction pooling
 
 Arquitectura:
     Database URL (env) → Engine → SessionLocal → get_db() → FastAPI Endpoints
@@ -34,10 +38,24 @@ Note:
     Ver: backend/alembic/ y MIGRATIONS.md
 """
 
-from sqlalchemy import create_engine, text
+from fastapi import Depends
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
 import os
+import threading
+import time
+
+from app.core.db_pool import PoolHolders, engine_options, resolve_pool_config
+from app.core.metrics import db_pool_checkout_wait, db_pool_timeouts, gauge_family, register_collector
+from app.core.slow_query import slow_query_log
+from config.settings import settings
 
 
 # ===== CONFIGURACIÓN DE CONEXIÓN A BASE DE DATOS =====
@@ -70,44 +88,91 @@ DATABASE_URL = os.getenv(
 #   - False: No mostrar queries SQL en logs (recomendado para producción)
 #   - True: Mostrar todas las queries (útil para debugging)
 #
-# pool_pre_ping (bool):
+# pool_pre_ping (bool, DB_POOL_PRE_PING):
 #   - True: Verificar que la conexión esté viva antes de usarla
-#   - Previene errores por conexiones cerradas o timeouts
-#   - Overhead mínimo: solo un "SELECT 1" antes de cada operación
-#   - CRÍTICO en producción con conexiones persistentes
+#   - Costo: un "SELECT 1" (round-trip) en cada checkout
+#   - Con pool_recycle menor al idle timeout del servidor/PgBouncer se
+#     puede apagar; en modo pgbouncer siempre está apagado
 #
-# pool_recycle (int):
+# pool_recycle (int, DB_POOL_RECYCLE):
 #   - 3600 segundos = 1 hora
 #   - Fuerza renovación de conexiones antes de que el servidor las cierre
-#   - Previene "MySQL has gone away" / "connection already closed"
 #   - PostgreSQL cierra conexiones idle después de cierto tiempo
 #
-# pool_size (int):
-#   - 10: Número de conexiones permanentes en el pool
-#   - Estas conexiones se mantienen abiertas y listas para usar
-#   - Ajustar según carga esperada y recursos del servidor
+# pool_size / max_overflow (DB_POOL_SIZE, DB_MAX_OVERFLOW o calculados):
+#   - API: DB_CONNECTION_BUDGET repartido entre WEB_CONCURRENCY workers
+#     (sin presupuesto: 10 + 20 por worker)
+#   - job_worker.py: un hilo por conexión + 1; notification_scheduler.py: 2 + 2
+#   - Total del servidor = Σ procesos × (pool_size + max_overflow): debe
+#     quedar por debajo de max_connections de PostgreSQL (o del pool de
+#     PgBouncer)
 #
-# max_overflow (int):
-#   - 20: Conexiones adicionales que se pueden crear bajo demanda
-#   - Total máximo de conexiones: pool_size + max_overflow = 30
-#   - Estas conexiones se cierran cuando ya no se necesitan
-#   - Previene saturación bajo picos de tráfico
+# pool_timeout (DB_POOL_TIMEOUT):
+#   - Segundos de espera por una conexión libre; al agotarse se loggea
+#     qué rutas retienen las conexiones (GET /diagnostics/pool)
 #
-# Recomendaciones de tuning:
-#   - Desarrollo: pool_size=5, max_overflow=10 (recursos limitados)
-#   - Producción baja carga: pool_size=10, max_overflow=20 (actual)
-#   - Producción alta carga: pool_size=20, max_overflow=40
-#   - Monitorear: Si se alcanza max_overflow frecuentemente, aumentar pool_size
+# Monitorear en /metrics: db_pool_checkout_wait_seconds y db_pool_timeouts_total
+class MeteredQueuePool(QueuePool):
+    """
+    QueuePool que mide la espera para obtener una conexión.
+
+    La espera (incluida la apertura de una conexión nueva cuando hay lugar
+    en el overflow) se registra en el histograma db_pool_checkout_wait_seconds
+    de /metrics. Esperas altas indican pool_size/max_overflow chicos para la
+    concurrencia de la API. Si se agota DB_POOL_TIMEOUT se loggea qué rutas
+    retienen las conexiones (pool_holders) antes de propagar el error.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_timeouts.inc()
+            pool_holders.report_exhaustion(pool_config, time.perf_counter() - started)
+            raise
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started)
+
+
+# Tamaño, timeout, pre-ping y modo (session/pgbouncer) salen de settings
+# según el rol del proceso: ver app/core/db_pool.py (resolve_pool_config)
+pool_config = resolve_pool_config()
+
 engine = create_engine(
     DATABASE_URL,
     echo=False,              # Queries SQL en logs: False=producción, True=debug
-    pool_pre_ping=True,      # Verificar conexión antes de usar (recomendado)
-    pool_recycle=3600,       # Renovar conexiones cada hora (previene timeouts)
-    pool_size=10,            # Conexiones permanentes en el pool
-    max_overflow=20          # Conexiones adicionales bajo demanda
+    **engine_options(pool_config, DATABASE_URL, MeteredQueuePool)
 )
 
 
+def _current_route() -> Optional[str]:
+    stats = _request_query_stats.get()
+    return stats.route if stats is not None else None
+
+
+# Quién retiene cada conexión prestada (diagnóstico de pool agotado)
+pool_holders = PoolHolders(_current_route)
+pool_holders.attach(engine)
+
+
+def _pool_metrics():
+    """Estado del pool del engine principal para /metrics."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        # NullPool (modo pgbouncer): solo las conexiones abiertas
+        yield gauge_family("db_pool_checked_out", "Conexiones en uso", [({}, len(pool_holders.snapshot()))])
+        return
+    yield gauge_family("db_pool_size", "Conexiones permanentes del pool", [({}, pool.size())])
+    yield gauge_family("db_pool_checked_out", "Conexiones en uso", [({}, pool.checkedout())])
+    yield gauge_family("db_pool_checked_in", "Conexiones libres en el pool", [({}, pool.checkedin())])
+    yield gauge_family("db_pool_overflow", "Conexiones de overflow abiertas (negativo = lugar libre en pool_size)",
+                       [({}, pool.overflow())])
+
+
+register_collector(_pool_metrics)
+
+
 # ===== FACTORY DE SESIONES =====
 
 # Configurar factory de sesiones SQLAlchemy para manejo transaccional
@@ -244,6 +309,299 @@ def get_db():
         db.close()
 
 
+# ===== RÉPLICA DE LECTURA =====
+
+# Reportes y dashboards leen de una réplica (READ_DATABASE_URL) con su
+# propio engine y pool, para no competir con el checkout por conexiones e
+# I/O del primario. get_read_db() entrega una sesión de la réplica si está
+# disponible y dentro del atraso tolerado; si no, la misma sesión del
+# primario que get_db() (fallback automático, sin conexión extra).
+#
+# El atraso se mide como mucho cada READ_REPLICA_CHECK_INTERVAL_SECONDS:
+#   - PostgreSQL en recovery: now() - pg_last_xact_replay_timestamp(), o 0
+#     si ya reprodujo todo lo recibido (un primario sin escrituras no atrasa)
+#   - Otros motores (dos SQLite en desarrollo/tests): 0
+#
+# Las sesiones de la réplica son de solo lectura: los endpoints que usan
+# get_read_db no deben escribir (en fallback escribirían en el primario).
+
+class ReadReplica:
+    """Engine de la réplica de lectura con control de atraso y disponibilidad."""
+
+    def __init__(self, read_engine: Optional[Engine]):
+        self.engine = read_engine
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=read_engine) \
+            if read_engine is not None else None
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._checked_at = 0.0
+        self._available = False
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return self.engine is not None
+
+    def available(self) -> bool:
+        """True si la réplica responde y su atraso está dentro de la tolerancia."""
+        if self.engine is None:
+            return False
+        now = time.monotonic()
+        if now - self._checked_at < settings.read_replica_check_interval_seconds:
+            return self._available
+        with self._lock:
+            if now - self._checked_at >= settings.read_replica_check_interval_seconds:
+                self._available = self._check()
+                self._checked_at = time.monotonic()
+        return self._available
+
+    def mark_unavailable(self, error: Exception) -> None:
+        """Saca la réplica de uso hasta el próximo chequeo (falla a mitad de request)."""
+        self._available = False
+        self.last_error = str(error)
+        self._checked_at = time.monotonic()
+
+    def _check(self) -> bool:
+        try:
+            with self.engine.connect() as connection:
+                self.lag_seconds = self._measure_lag(connection)
+        except Exception as e:
+            self.lag_seconds = None
+            self.last_error = str(e)
+            print(f"⚠️  Réplica de lectura no disponible, usando el primario: {e}")
+            return False
+        self.last_error = None
+        return self.lag_seconds <= settings.read_replica_max_lag_seconds
+
+    @staticmethod
+    def _measure_lag(connection) -> float:
+        """
+        Atraso de la réplica en segundos.
+
+        receive_lsn = replay_lsn sólo significa que no hay WAL recibido sin
+        aplicar: con el WAL receiver desconectado la réplica deja de recibir
+        y se vería al día indefinidamente. Si el receiver no está en
+        streaming el atraso es desconocido y la réplica se saca de uso (el
+        usuario necesita pg_monitor o pg_read_all_stats para ver su estado).
+        """
+        if connection.dialect.name != "postgresql":
+            return 0.0
+        in_recovery, receiver_status, lag = connection.exec_driver_sql(
+            "SELECT pg_is_in_recovery(), "
+            "(SELECT status FROM pg_stat_wal_receiver LIMIT 1), "
+            "CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        ).one()
+        if not in_recovery:
+            return 0.0
+        if receiver_status != "streaming":
+            raise RuntimeError(f"WAL receiver de la réplica sin streaming (estado: {receiver_status})")
+        return float(lag or 0)
+
+
+def _create_read_engine() -> Optional[Engine]:
+    if not settings.read_database_url:
+        return None
+    return create_engine(
+        settings.read_database_url,
+        poolclass=QueuePool,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        pool_size=settings.read_replica_pool_size,
+        max_overflow=settings.read_replica_max_overflow
+    )
+
+
+read_replica = ReadReplica(_create_read_engine())
+
+
+def _read_replica_metrics():
+    """Estado de la réplica de lectura para /metrics."""
+    if not read_replica.configured:
+        return
+    yield gauge_family("db_read_replica_available", "Réplica de lectura en uso (1) o fallback al primario (0)",
+                       [({}, 1 if read_replica._available else 0)])
+    if read_replica.lag_seconds is not None:
+        yield gauge_family("db_read_replica_lag_seconds", "Atraso medido de la réplica de lectura",
+                           [({}, read_replica.lag_seconds)])
+    pool = read_replica.engine.pool
+    yield gauge_family("db_read_pool_checked_out", "Conexiones de la réplica en uso", [({}, pool.checkedout())])
+
+
+register_collector(_read_replica_metrics)
+
+
+def get_read_db(db: Session = Depends(get_db)):
+    """
+    Sesión para consultas de solo lectura (reportes, dashboards).
+
+    Usa la réplica si está configurada, responde y su atraso es menor a
+    READ_REPLICA_MAX_LAG_SECONDS; si no, entrega la sesión del primario del
+    request (la misma de get_db, así los overrides de tests aplican).
+
+    Usage:
+        @router.get("/reports/sales")
+        def sales_report(db: Session = Depends(get_read_db)):
+            ...
+    """
+    if not read_replica.available():
+        yield db
+        return
+
+    read_db = read_replica.session_factory()
+    try:
+        yield read_db
+    except OperationalError as e:
+        # La réplica se cayó durante el request: los siguientes van al primario
+        read_replica.mark_unavailable(e)
+        raise
+    finally:
+        read_db.close()
+
+
+# ===== INSTRUMENTACIÓN DE CONSULTAS =====
+
+# Listeners de before/after_cursor_execute sobre la clase Engine: miden
+# todas las consultas de cualquier engine (el de la app, réplicas, tests).
+#
+# Atribución:
+#   - Por request: track_queries() deja un QueryStats en un ContextVar; las
+#     consultas ejecutadas en ese contexto (incluido el threadpool de los
+#     endpoints sync, que copia el contexto) se suman ahí. Lo usa el
+#     middleware QueryTimingMiddleware de main.py (header Server-Timing y log)
+#   - Global: capture_queries() registra todas las consultas del proceso
+#     mientras está abierto (tests: fixture assert_max_queries)
+#   - Consultas lentas: con SLOW_QUERY_LOG_ENABLED, las que superan
+#     SLOW_QUERY_THRESHOLD_MS van a app.core.slow_query (log, buffer y EXPLAIN)
+#
+# Overhead: dos time.perf_counter() y una suma por consulta.
+
+# Largo máximo de la consulta más lenta guardada para logs
+_SLOWEST_STATEMENT_MAX_LENGTH = 500
+
+
+class QueryStats:
+    """Consultas ejecutadas en un request o bloque: cantidad, tiempo total y la más lenta."""
+
+    __slots__ = ("count", "total_ms", "slowest_ms", "slowest_statement", "statements", "route")
+
+    def __init__(self, keep_statements: bool = False, route: Optional[str] = None):
+        self.route = route
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        # Solo capture_queries guarda todas las sentencias (mensajes de tests)
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        """Suma una consulta ejecutada."""
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms >= self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement[:_SLOWEST_STATEMENT_MAX_LENGTH]
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+_request_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+_global_query_stats: List[QueryStats] = []
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    """Marca de inicio de la consulta (pila por conexión)."""
+    conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    """Atribuye la consulta al request en curso y a las capturas abiertas."""
+    start_times = conn.info.get("query_start_times")
+    if not start_times:
+        return
+    elapsed_ms = (time.perf_counter() - start_times.pop()) * 1000
+
+    stats = _request_query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    for captured in _global_query_stats:
+        captured.record(statement, elapsed_ms)
+
+    if (settings.slow_query_log_enabled
+            and elapsed_ms >= settings.slow_query_threshold_ms
+            and not statement.lstrip().upper().startswith("EXPLAIN")):
+        slow_query_log.record(
+            conn.engine, statement, parameters, executemany, elapsed_ms,
+            stats.route if stats is not None else None
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _query_failed(exception_context):
+    """
+    Descarta la marca de inicio de una consulta que falló.
+
+    after_cursor_execute no se dispara si la sentencia lanza una excepción:
+    sin esto la marca queda en la pila de la conexión (que vuelve al pool)
+    y la próxima consulta mide su tiempo desde el inicio de la fallida.
+    La consulta fallida cuenta para el request igual que una exitosa.
+    """
+    conn = exception_context.connection
+    if conn is None or exception_context.execution_context is None:
+        return
+    start_times = conn.info.get("query_start_times")
+    if not start_times:
+        return
+    elapsed_ms = (time.perf_counter() - start_times.pop()) * 1000
+    statement = exception_context.statement or ""
+
+    stats = _request_query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    for captured in _global_query_stats:
+        captured.record(statement, elapsed_ms)
+
+
+@contextmanager
+def track_queries(route: Optional[str] = None) -> Iterator[QueryStats]:
+    """
+    Atribuye las consultas del contexto actual (request) a un QueryStats.
+
+    Args:
+        route: Request que ejecuta las consultas ("GET /reports/sales"),
+            informado en el log de consultas lentas
+
+    Example:
+        with track_queries(f"{request.method} {request.url.path}") as stats:
+            response = await call_next(request)
+        print(stats.count, stats.total_ms)
+    """
+    stats = QueryStats(route=route)
+    token = _request_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_query_stats.reset(token)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """
+    Registra todas las consultas del proceso mientras el bloque está abierto.
+
+    Pensado para tests (las requests del TestClient corren en otro hilo, fuera
+    del contexto del test); guarda las sentencias para los mensajes de error.
+    """
+    stats = QueryStats(keep_statements=True)
+    _global_query_stats.append(stats)
+    try:
+        yield stats
+    finally:
+        _global_query_stats.remove(stats)
+
+
 # ===== FUNCIONES DE UTILIDAD =====
 
 def init_db():
@@ -1,5 +1,6 @@
 from database import SessionLocal, engine, Base
 from app.models import Branch, User, Category, Product, EcommerceConfig, SystemConfig, UserRole
+from app.services.config_service import ConfigService
 from auth import get_password_hash
 from decimal import Decimal
 
@@ -250,6 +251,9 @@ def create_initial_data():
         db.add(system_config)
         db.commit()
 
+        # Métodos de pago por defecto (Efectivo, Tarjetas, Transferencia)
+        ConfigService(db).ensure_default_payment_methods()
+
         print("✅ Initial data created successfully!")
         print("\n🔑 Default users created:")
         print("- Admin: admin / admin123")
@@ -261,6 +265,7 @@ def create_initial_data():
         print("- 10 products (4 with sizes for testing)")
         print("- E-commerce configuration")
         print("- System configuration (Currency: ARS)")
+        print("- Payment methods (Efectivo, Tarjetas, Transferencia)")
         print("\n👕 Products with sizes for testing:")
         print("- Remera Básica (Indumentaria)")
         print("- Buzo con Capucha (Indumentaria)")
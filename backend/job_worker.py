@@ -0,0 +1,174 @@
+"""
+Worker de la cola de trabajos en segundo plano.
+
+Proceso separado de la API que reclama trabajos de background_jobs y los
+ejecuta con un pool de threads. Cada thread reclama con
+FOR UPDATE SKIP LOCKED, por lo que se pueden correr varios procesos
+worker en paralelo (en el mismo host o en otros) sin coordinación extra.
+
+Uso:
+    python job_worker.py
+
+    # Solo ciertos tipos de trabajo, 4 threads
+    JOB_WORKER_THREADS=4 python job_worker.py product_import bulk_price_update
+
+Variables de entorno:
+    - JOB_WORKER_THREADS: Threads de ejecución (default: 2)
+    - JOB_POLL_INTERVAL: Segundos de espera con la cola vacía (default: 2)
+    - JOB_LEASE_SECONDS: Timeout para reencolar trabajos huérfanos (default: 600).
+      Cada trabajo en curso renueva su lease cada JOB_LEASE_SECONDS/4 con un
+      heartbeat propio, reporte progreso o no
+"""
+
+import logging
+import os
+import socket
+import sys
+import threading
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+# Pool dimensionado para los threads del worker (app/core/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "jobs")
+
+from database import SessionLocal
+from config.settings import settings
+from app.services.job_service import JobService
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class JobWorkerPool:
+    """
+    Pool de threads que consume la cola durable de trabajos.
+
+    Attributes:
+        num_workers: Cantidad de threads de ejecución
+        poll_interval: Espera entre consultas con la cola vacía (segundos)
+        lease_seconds: Lease tras el cual un trabajo RUNNING sin heartbeat se considera huérfano
+        job_types: Tipos de trabajo a consumir (None = todos)
+    """
+
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        lease_seconds: Optional[int] = None,
+        job_types: Optional[List[str]] = None,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.num_workers = num_workers or settings.job_worker_threads
+        self.poll_interval = poll_interval if poll_interval is not None else settings.job_poll_interval
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self.job_types = job_types or None
+        self.session_factory = session_factory
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def run_once(self, worker_id: str) -> bool:
+        """
+        Reclama y ejecuta un único trabajo.
+
+        Returns:
+            True si ejecutó un trabajo, False si la cola estaba vacía
+        """
+        db = self.session_factory()
+        try:
+            service = JobService(db)
+            job = service.claim_next(worker_id, self.job_types)
+            if job is None:
+                return False
+            logger.info(f"[{worker_id}] Running job {job.id} ({job.job_type}, attempt {job.attempts})")
+            job = service.execute(job, self.session_factory, heartbeat_interval=self.lease_seconds / 4)
+            logger.info(f"[{worker_id}] Job {job.id} finished with status {job.status}")
+            return True
+        finally:
+            db.close()
+
+    def requeue_stale(self) -> int:
+        """Reencolar trabajos cuyo worker dejó de enviar heartbeat."""
+        db = self.session_factory()
+        try:
+            count = JobService(db).requeue_stale_jobs(self.lease_seconds)
+            if count:
+                logger.warning(f"Requeued {count} stale jobs")
+            return count
+        finally:
+            db.close()
+
+    def _worker_loop(self, worker_id: str) -> None:
+        """Loop de un thread: ejecutar mientras haya trabajo, esperar si no."""
+        while not self._stop_event.is_set():
+            try:
+                if not self.run_once(worker_id):
+                    self._stop_event.wait(self.poll_interval)
+            except Exception as e:
+                logger.error(f"[{worker_id}] Worker error: {str(e)}")
+                self._stop_event.wait(self.poll_interval)
+
+    def _maintenance_loop(self) -> None:
+        """Loop de mantenimiento: reencolar huérfanos cada lease/4."""
+        interval = max(self.lease_seconds / 4, self.poll_interval)
+        while not self._stop_event.wait(interval):
+            try:
+                self.requeue_stale()
+            except Exception as e:
+                logger.error(f"Maintenance error: {str(e)}")
+
+    def start(self) -> None:
+        """Iniciar threads de ejecución y de mantenimiento."""
+        self._stop_event.clear()
+        for index in range(self.num_workers):
+            worker_id = f"{self._worker_prefix}:{index}"
+            thread = threading.Thread(
+                target=self._worker_loop, args=(worker_id,), name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        maintenance = threading.Thread(
+            target=self._maintenance_loop, name="job-worker-maintenance", daemon=True
+        )
+        maintenance.start()
+        self._threads.append(maintenance)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detener el pool esperando que terminen los trabajos en curso."""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+def main():
+    """Configurar y ejecutar el pool de workers"""
+    job_types = sys.argv[1:] or None
+    pool = JobWorkerPool(job_types=job_types)
+
+    logger.info("Starting job worker...")
+    logger.info(f"  - Threads: {pool.num_workers}")
+    logger.info(f"  - Poll interval: {pool.poll_interval}s")
+    logger.info(f"  - Lease: {pool.lease_seconds}s")
+    logger.info(f"  - Job types: {', '.join(job_types) if job_types else 'all'}")
+
+    pool.requeue_stale()
+    pool.start()
+
+    try:
+        while True:
+            threading.Event().wait(60)
+    except KeyboardInterrupt:
+        logger.info("Job worker stopping, waiting for running jobs...")
+        pool.stop()
+        logger.info("Job worker stopped.")
+
+
+if __name__ == "__main__":
+    main()
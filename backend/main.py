@@ -63,19 +63,28 @@ Note:
     La lógica de negocio va en services/, los endpoints en routers/.
 """
 
-from fastapi import FastAPI, Request, Response
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 import os
 import json
+from contextlib import asynccontextmanager
+import logging
 import re
+import time
 
 # Configuración de base de datos y aplicación
-from database import engine, Base
+from database import engine, Base, SessionLocal, get_db, track_queries
 from config.settings import settings
 from config.rate_limit import limiter, rate_limit_exceeded_handler, RateLimits
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
+from app.services.app_config_service import AppConfigService
+from app.services.job_service import JobService
+from app.core.metrics import (
+    gauge_family, http_request_duration, http_requests, http_requests_in_flight, render_metrics
+)
 
 # Routers modulares del sistema organizados por dominio
 from routers import (
@@ -93,7 +102,9 @@ from routers import (
     ecommerce_public,      # /ecommerce/* - API pública tienda online (sin auth)
     content_management,    # /content/* - Gestión de banners y contenido CMS
     notifications,         # /notifications/* - Sistema de notificaciones
-    init_db_endpoint       # /api/init/* - Inicialización de base de datos
+    init_db_endpoint,      # /api/init/* - Inicialización de base de datos
+    jobs,                  # /jobs/* - Trabajos en segundo plano (importaciones, precios)
+    diagnostics            # /diagnostics/* - Consultas lentas (ADMIN)
 )
 
 
@@ -111,17 +122,20 @@ from routers import (
 #       docker compose exec backend alembic upgrade head
 #
 # Ver: backend/alembic/ y MIGRATIONS.md para más información
+#
+# create_all corre en el lifespan (ver ARRANQUE), no al importar main:
+# importar la app (tests, scripts, profiling del arranque) no toca la BD.
 
-if os.getenv("ENVIRONMENT", "development") == "development":
-    # Modo desarrollo: Auto-crear tablas si no existen
-    Base.metadata.create_all(bind=engine)
-else:
+if os.getenv("ENVIRONMENT", "development") != "development":
     # Modo producción: Advertir que se debe usar Alembic
     print("⚠️  PRODUCCIÓN: Ejecutar 'alembic upgrade head' para aplicar migraciones")
 
 
 # ===== MIDDLEWARE PERSONALIZADO =====
 
+request_logger = logging.getLogger("pos.requests")
+
+
 class DateTimeMiddleware(BaseHTTPMiddleware):
     """
     Middleware que agrega 'Z' a todos los datetime en las respuestas JSON.
@@ -222,6 +236,118 @@ class OptionsMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class QueryTimingMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware que mide las consultas SQL de cada request.
+    
+    Usa database.track_queries() (eventos del engine) y agrega:
+        - Header Server-Timing: db (tiempo total en BD y cantidad de
+          consultas) y app (duración total del request). Visible en la
+          pestaña Network de las devtools del navegador
+        - Log estructurado (logger "pos.requests") con los campos
+          db_queries, db_time_ms, db_slowest_ms, db_slowest_statement
+    
+    Ejemplo de header:
+        Server-Timing: db;dur=12.4;desc="7 queries", app;dur=38.0
+    """
+    async def dispatch(self, request: Request, call_next):
+        started = time.perf_counter()
+        with track_queries(f"{request.method} {request.url.path}") as stats:
+            response = await call_next(request)
+        duration_ms = (time.perf_counter() - started) * 1000
+        
+        response.headers["Server-Timing"] = (
+            f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", app;dur={duration_ms:.1f}'
+        )
+        
+        if duration_ms >= settings.query_timing_log_min_ms:
+            request_logger.info(
+                "%s %s %s: %d queries, %.1f ms en BD, %.1f ms total",
+                request.method, request.url.path, response.status_code,
+                stats.count, stats.total_ms, duration_ms,
+                extra={
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status_code": response.status_code,
+                    "duration_ms": round(duration_ms, 1),
+                    "db_queries": stats.count,
+                    "db_time_ms": round(stats.total_ms, 1),
+                    "db_slowest_ms": round(stats.slowest_ms, 1),
+                    "db_slowest_statement": stats.slowest_statement,
+                }
+            )
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI de métricas HTTP (latencia, contador e in-flight).
+    
+    Middleware ASGI puro (no BaseHTTPMiddleware): no crea tareas ni streams
+    extra por request, el costo es medir el tiempo y actualizar dos series.
+    
+    El label route es el template de la ruta ("/products/{product_id}"),
+    no la URL, para acotar la cantidad de series; las URLs sin ruta van
+    como "unmatched".
+    """
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - started, method, route_path)
+            http_requests.inc(method, route_path, str(status_code))
+
+
+# ===== ARRANQUE =====
+
+def warm_config_cache():
+    """
+    Precarga SystemConfig, EcommerceConfig y WhatsAppConfig en el cache del
+    proceso: las primeras lecturas de moneda/tienda no consultan la BD.
+    """
+    db = SessionLocal()
+    try:
+        AppConfigService(db).warm()
+    except Exception as e:
+        # La API arranca igual; el cache se carga en la primera lectura
+        print(f"⚠️  No se pudo precargar la configuración: {e}")
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque del proceso: en desarrollo crea las tablas que falten
+    (producción usa Alembic) y precarga el cache de configuración.
+    """
+    if os.getenv("ENVIRONMENT", "development") == "development":
+        Base.metadata.create_all(bind=engine)
+    warm_config_cache()
+    yield
+
+
 # ===== APLICACIÓN FASTAPI =====
 
 # Crear instancia principal de FastAPI con configuración centralizada
@@ -236,7 +362,9 @@ app = FastAPI(
     redoc_url="/redoc" if settings.debug_mode else None,
     
     # Modo debug: Habilita logs detallados y auto-reload
-    debug=settings.debug_mode
+    debug=settings.debug_mode,
+
+    lifespan=lifespan
 )
 
 
@@ -270,6 +398,9 @@ app.add_middleware(SlowAPIMiddleware)
 #   2. DateTimeMiddleware (timezone fix) - Agregar 'Z' a datetime en JSON
 #   3. OptionsMiddleware (CORS preflight) - Antes de CORS principal
 #   4. CORSMiddleware (CORS completo) - Headers para todos los requests
+#   5. QueryTimingMiddleware (Server-Timing) - Mide consultas del request
+#   6. MetricsMiddleware (/metrics) - Último agregado = más externo,
+#      mide el request completo
 
 # 1. Middleware de timezone para datetime
 app.add_middleware(DateTimeMiddleware)
@@ -308,6 +439,14 @@ app.add_middleware(
     expose_headers=["*"],     # Exponer todos los headers en la respuesta
 )
 
+# 4. Middleware de instrumentación de consultas (Server-Timing + log)
+if settings.query_timing_enabled:
+    app.add_middleware(QueryTimingMiddleware)
+
+# 5. Middleware de métricas HTTP (GET /metrics)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 
 # ===== REGISTRO DE ROUTERS =====
 
@@ -336,6 +475,8 @@ app.include_router(websockets.router)     # /ws/{branch_id}
 app.include_router(config.router)         # /config/*
 app.include_router(notifications.router)  # /notifications/*
 app.include_router(init_db_endpoint.router)  # /api/init/*
+app.include_router(jobs.router)           # /jobs/*
+app.include_router(diagnostics.router)    # /diagnostics/*
 
 # === E-COMMERCE: API Pública y Admin ===
 app.include_router(ecommerce_advanced.router)  # /ecommerce-advanced/* (protegido)
@@ -425,6 +566,47 @@ async def health_check():
     }
 
 
+@app.get("/metrics", tags=["Sistema"], include_in_schema=False)
+def metrics(request: Request, db: Session = Depends(get_db)):
+    """
+    Métricas en formato de exposición de Prometheus.
+    
+    Incluye latencias y contadores HTTP por ruta, requests en curso, estado
+    y espera del pool de conexiones, conexiones WebSocket por sucursal,
+    profundidad de la cola de trabajos y contadores de negocio (ventas,
+    conflictos de stock). Ver app/core/metrics.py.
+    
+    Con METRICS_TOKEN definido exige "Authorization: Bearer <token>". Fuera
+    de development el token es obligatorio: sin METRICS_TOKEN responde 403
+    (las rutas, la cola de trabajos y los contadores de negocio no se
+    publican sin autenticación).
+    
+    Example (prometheus.yml):
+        scrape_configs:
+          - job_name: pos-backend
+            metrics_path: /metrics
+            static_configs:
+              - targets: ["backend:8000"]
+    """
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not settings.metrics_token and not settings.is_development:
+        raise HTTPException(status_code=403, detail="Definir METRICS_TOKEN para exponer /metrics")
+    if settings.metrics_token and request.headers.get("authorization") != f"Bearer {settings.metrics_token}":
+        raise HTTPException(status_code=401, detail="Token de métricas inválido")
+    
+    jobs = gauge_family(
+        "background_jobs",
+        "Trabajos en segundo plano pendientes y en ejecución",
+        [({"job_type": job_type, "status": status}, count)
+         for job_type, status, count in JobService(db).queue_depths()]
+    )
+    return Response(
+        content=render_metrics(extra=[jobs]),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/db-test", tags=["Sistema"])
 async def test_database():
     """
@@ -12,14 +12,32 @@ El scheduler ejecuta las siguientes tareas:
 - Reporte diario de ventas a las 18:00
 - Recordatorios de respaldo según configuración
 - Limpieza de notificaciones antiguas (semanalmente)
+- Verificación de consistencia de stock total de productos cada 6 horas
+- Liberación de reservas de stock e-commerce vencidas cada minuto
+- Limpieza de claves de idempotencia vencidas cada hora
+- Particiones mensuales de ventas/inventario: crear las futuras y archivar
+  las vencidas (diario a las 02:00 y al iniciar)
+- Archivo frío de ventas en Parquet de los meses cerrados (diario a las
+  03:30, sólo si SALES_ARCHIVE_ENABLED)
 """
 
+import os
 import schedule
 import time
 import logging
 from datetime import datetime
+
+# Pool chico: las tareas corren de a una (app/core/db_pool.py)
+os.environ.setdefault("DB_POOL_ROLE", "scheduler")
+
 from database import get_db
 from app.services.notification_service import NotificationService
+from app.services.stock_consistency_service import StockConsistencyService
+from app.services.reservation_service import ReservationService
+from app.services.idempotency_service import IdempotencyService
+from app.services.partition_service import PartitionService
+from app.services.sales_archive_service import SalesArchiveService
+from config.settings import settings
 
 # Configurar logging
 logging.basicConfig(
@@ -120,6 +138,66 @@ def deactivate_expired():
         logger.error(f"Error deactivating expired notifications: {str(e)}")
 
 
+def check_stock_consistency():
+    """Reparar desvíos de Product.stock_quantity respecto del stock por sucursal"""
+    logger.info("Running stock consistency check...")
+    try:
+        db = next(get_db())
+        repaired = StockConsistencyService(db).repair_drift()
+        logger.info(f"Stock consistency check completed. {len(repaired)} products repaired.")
+        db.close()
+    except Exception as e:
+        logger.error(f"Error in stock consistency check: {str(e)}")
+
+
+def expire_stock_reservations():
+    """Liberar reservas de stock de pedidos e-commerce vencidos"""
+    try:
+        db = next(get_db())
+        count = ReservationService(db).expire_due()
+        if count:
+            logger.info(f"Stock reservations expired. {count} holds released.")
+        db.close()
+    except Exception as e:
+        logger.error(f"Error expiring stock reservations: {str(e)}")
+
+
+def purge_idempotency_keys():
+    """Eliminar claves Idempotency-Key vencidas"""
+    try:
+        db = next(get_db())
+        count = IdempotencyService(db).purge_expired()
+        if count:
+            logger.info(f"Idempotency keys purged. {count} expired keys removed.")
+        db.close()
+    except Exception as e:
+        logger.error(f"Error purging idempotency keys: {str(e)}")
+
+
+def maintain_partitions():
+    """Crear particiones de los próximos meses y archivar las vencidas"""
+    try:
+        db = next(get_db())
+        result = PartitionService(db).maintain()
+        if result["created"] or result["archived"]:
+            logger.info(f"Partitions maintained. Created: {result['created']}. Archived: {result['archived']}.")
+        db.close()
+    except Exception as e:
+        logger.error(f"Error maintaining partitions: {str(e)}")
+
+
+def archive_sales():
+    """Exportar a Parquet los meses de ventas vencidos y borrarlos de la BD"""
+    try:
+        db = next(get_db())
+        results = SalesArchiveService(db).archive_due()
+        if results:
+            logger.info(f"Sales archived. Months: {[result['month'] for result in results]}.")
+        db.close()
+    except Exception as e:
+        logger.error(f"Error archiving sales: {str(e)}")
+
+
 def main():
     """Configurar y ejecutar el scheduler"""
     logger.info("Starting notification scheduler...")
@@ -149,6 +227,22 @@ def main():
     # Limpieza de notificaciones antiguas - todos los domingos a las 03:00
     schedule.every().sunday.at("03:00").do(cleanup_old_notifications)
 
+    # Consistencia de stock total de productos - cada 6 horas
+    schedule.every(6).hours.do(check_stock_consistency)
+
+    # Reservas de stock vencidas - cada minuto
+    schedule.every(1).minutes.do(expire_stock_reservations)
+
+    # Claves de idempotencia vencidas - cada hora
+    schedule.every().hour.do(purge_idempotency_keys)
+
+    # Particiones mensuales - todos los días a las 02:00
+    schedule.every().day.at("02:00").do(maintain_partitions)
+
+    # Archivo frío de ventas - todos los días a las 03:30 (opt-in)
+    if settings.sales_archive_enabled:
+        schedule.every().day.at("03:30").do(archive_sales)
+
     # ========================================================================
     # Ejecutar tareas iniciales al inicio
     # ========================================================================
@@ -156,6 +250,8 @@ def main():
     logger.info("Running initial checks...")
     check_low_stock()
     deactivate_expired()
+    check_stock_consistency()
+    maintain_partitions()
 
     # ========================================================================
     # Loop principal
@@ -169,6 +265,12 @@ def main():
     logger.info("  - Weekly backup reminders: Every Monday at 09:00")
     logger.info("  - Deactivate expired: Every 6 hours")
     logger.info("  - Cleanup old notifications: Every Sunday at 03:00")
+    logger.info("  - Stock consistency check: Every 6 hours")
+    logger.info("  - Expire stock reservations: Every minute")
+    logger.info("  - Purge idempotency keys: Every hour")
+    logger.info("  - Maintain partitions: Every day at 02:00")
+    if settings.sales_archive_enabled:
+        logger.info("  - Archive sales: Every day at 03:30")
 
     try:
         while True:
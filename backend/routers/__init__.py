@@ -7,7 +7,7 @@ Capa más externa que expone la API REST al mundo.
 Arquitectura:
     HTTP Request → Routers → Services → Repositories → Database
 
-Routers Disponibles (15):
+Routers Disponibles (16):
     - auth.py: Autenticación (login, logout, /me)
     - users.py: Gestión de usuarios
     - branches.py: Gestión de sucursales (multi-tenant)
@@ -23,6 +23,8 @@ Routers Disponibles (15):
     - ecommerce_advanced.py: Backoffice ecommerce (CON auth)
     - websockets.py: WebSocket para tiempo real
     - init_db_endpoint.py: Inicialización de BD
+    - jobs.py: Estado y cancelación de trabajos en segundo plano
+    - diagnostics.py: Consultas lentas registradas (ADMIN)
 
 Responsabilidades de los Routers:
     - Validación de entrada (Pydantic schemas)
@@ -101,10 +101,14 @@ from app.schemas.payment import (
     ALLOWED_CURRENCIES
 )
 from app.services.payment_service import PaymentService
+from app.services.storefront_service import bump_storefront_version
+from app.services.config_service import invalidate_branch_config
+from app.services.app_config_service import AppConfigService, DEFAULT_CURRENCY_CONFIG
 from cloudinary_config import upload_image_to_cloudinary, delete_image_from_cloudinary, extract_public_id_from_url
 import logging
 import os
 from decimal import Decimal
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -236,7 +240,8 @@ async def get_ecommerce_config(
 ):
     """Obtener configuración de e-commerce"""
     try:
-        config = db.query(EcommerceConfig).first()
+        # Configuración activa desde el cache; si no hay, la primera fila (o se crea)
+        config = AppConfigService(db).get("ecommerce") or db.query(EcommerceConfig).first()
         if not config:
             # Crear configuración por defecto si no existe
             config = EcommerceConfig(
@@ -247,6 +252,7 @@ async def get_ecommerce_config(
                 currency="USD"
             )
             db.add(config)
+            bump_storefront_version(db)
             db.commit()
             db.refresh(config)
         
@@ -277,8 +283,10 @@ async def create_ecommerce_config(
         
         db_config = EcommerceConfig(**config_data.dict())
         db.add(db_config)
+        bump_storefront_version(db)
         db.commit()
         db.refresh(db_config)
+        AppConfigService(db).remember("ecommerce", db_config)
         
         logger.info(f"Usuario {current_user.username} creó configuración de e-commerce")
         return db_config
@@ -312,8 +320,10 @@ async def update_ecommerce_config(
         for field, value in update_data.items():
             setattr(config, field, value)
         
+        bump_storefront_version(db)
         db.commit()
         db.refresh(config)
+        AppConfigService(db).remember("ecommerce", config)
         
         logger.info(f"Usuario {current_user.username} actualizó configuración de e-commerce")
         return config
@@ -334,26 +344,26 @@ async def get_system_config(
     db: Session = Depends(get_db),
     current_user: User = Depends(admin_or_manager_required)
 ):
-    """Obtener configuración general del sistema"""
+    """
+    Obtener configuración general del sistema.
+
+    Se lee del cache de configuración (sin consultas a la BD). Si todavía no
+    existe la fila se devuelven los valores por defecto sin crearla (la
+    crea el primer PUT).
+    """
     try:
-        # Get or create system config
-        config = db.query(SystemConfig).first()
-        if not config:
-            # Create default configuration
-            config = SystemConfig(
-                default_currency="ARS",
-                currency_symbol="$",
-                currency_position="before",
-                decimal_places=2,
-                default_tax_rate=0,
-                session_timeout=30
-            )
-            db.add(config)
-            db.commit()
-            db.refresh(config)
+        response_data = AppConfigService(db).get_system()
+        if response_data is None:
+            response_data = {
+                **DEFAULT_CURRENCY_CONFIG,
+                "id": 0,
+                "default_tax_rate": 0,
+                "session_timeout": 30,
+                "created_at": datetime.now(),
+                "updated_at": None,
+            }
 
         # Build response with system info
-        response_data = config.to_dict()
         response_data.update({
             "app_name": "POS Cesariel",
             "version": "1.0.0",
@@ -399,6 +409,7 @@ async def update_system_config(
 
         db.commit()
         db.refresh(config)
+        AppConfigService(db).remember("system", config)
 
         # Build response with system info
         response_data = config.to_dict()
@@ -426,31 +437,18 @@ async def get_currency_config(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)  # ✅ Permitir a todos los usuarios leer
 ):
-    """Obtener configuración de moneda solamente (lectura permitida para todos los roles)"""
+    """
+    Obtener configuración de moneda solamente (lectura permitida para todos los roles).
+
+    Se lee del cache de configuración: cada pantalla del POS la pide para
+    formatear precios y no genera consultas. Sin SystemConfig se devuelven
+    los valores por defecto (no se crea la fila en una lectura).
+    """
     try:
-        # Get or create system config
-        config = db.query(SystemConfig).first()
-        if not config:
-            # Create default configuration
-            config = SystemConfig(
-                default_currency="ARS",
-                currency_symbol="$",
-                currency_position="before",
-                decimal_places=2,
-                default_tax_rate=0,
-                session_timeout=30
-            )
-            db.add(config)
-            db.commit()
-            db.refresh(config)
+        currency = AppConfigService(db).get_currency()
 
         logger.info(f"Usuario {current_user.username} obtuvo configuración de moneda")
-        return {
-            "default_currency": config.default_currency,
-            "currency_symbol": config.currency_symbol,
-            "currency_position": config.currency_position,
-            "decimal_places": config.decimal_places,
-        }
+        return currency
     except Exception as e:
         logger.error(f"Error obteniendo configuración de moneda: {e}")
         db.rollback()
@@ -511,6 +509,7 @@ async def update_currency_config(
 
         db.commit()
         db.refresh(config)
+        AppConfigService(db).remember("system", config)
 
         logger.info(f"Usuario {current_user.username} actualizó configuración de moneda")
         return {
@@ -531,63 +530,21 @@ async def update_currency_config(
         )
 
 
-def get_or_create_default_payment_methods(db: Session):
-    """Obtener o crear métodos de pago por defecto en la base de datos"""
-    # Verificar si ya existen métodos de pago
-    existing_count = db.query(PaymentMethod).count()
-
-    if existing_count > 0:
-        # Ya existen, retornarlos
-        return db.query(PaymentMethod).all()
-
-    # No existen, crear métodos por defecto
-    logger.info("Creando métodos de pago por defecto...")
-
-    default_methods = [
-        PaymentMethod(
-            name="Efectivo",
-            code="CASH",
-            icon="💵",
-            is_active=True,
-            requires_change=True,
-            description="Pago en efectivo"
-        ),
-        PaymentMethod(
-            name="Tarjetas",
-            code="CARD",
-            icon="💳",
-            is_active=True,
-            requires_change=False,
-            description="Pago con tarjetas (bancarizadas, no bancarizadas, etc.)"
-        ),
-        PaymentMethod(
-            name="Transferencia",
-            code="TRANSFER",
-            icon="🏦",
-            is_active=True,
-            requires_change=False,
-            description="Transferencia bancaria"
-        )
-    ]
-
-    for method in default_methods:
-        db.add(method)
-
-    db.commit()
-    logger.info(f"✓ {len(default_methods)} métodos de pago creados")
-
-    return default_methods
-
-
 @router.get("/payment-methods")
 async def get_payment_methods(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)  # ✅ Permitir lectura a todos los usuarios
 ):
-    """Obtener métodos de pago desde la base de datos (lectura permitida para todos los roles)"""
+    """
+    Obtener métodos de pago desde la base de datos (lectura permitida para todos los roles).
+
+    Solo lectura: los métodos por defecto se crean al inicializar la base
+    (ConfigService.ensure_default_payment_methods, ver init_data.py).
+    """
     try:
-        # Obtener o crear métodos por defecto en la BD
-        methods = get_or_create_default_payment_methods(db)
+        methods = db.query(PaymentMethod).order_by(PaymentMethod.id).all()
+        if not methods:
+            logger.warning("No hay métodos de pago configurados; ejecutar la inicialización de datos")
 
         logger.info(f"Usuario {current_user.username} obtuvo métodos de pago ({len(methods)} métodos)")
         return methods
@@ -625,6 +582,7 @@ async def update_payment_method(
             if field in method_data:
                 setattr(method, field, method_data[field])
 
+        invalidate_branch_config(db)
         db.commit()
         db.refresh(method)
 
@@ -709,6 +667,7 @@ async def create_tax_rate(
         )
 
         db.add(new_rate)
+        invalidate_branch_config(db)
         db.commit()
         db.refresh(new_rate)
 
@@ -766,6 +725,7 @@ async def update_tax_rate(
         if "description" in tax_rate_data:
             tax_rate.description = tax_rate_data["description"]
 
+        invalidate_branch_config(db)
         db.commit()
         db.refresh(tax_rate)
 
@@ -816,6 +776,7 @@ async def delete_tax_rate(
             )
 
         db.delete(tax_rate)
+        invalidate_branch_config(db)
         db.commit()
 
         logger.info(f"Usuario {current_user.username} eliminó tasa de impuesto: {tax_rate.name}")
@@ -1168,6 +1129,7 @@ async def upload_store_logo(
             )
             db.add(config)
         
+        bump_storefront_version(db)
         db.commit()
         
         logger.info(f"Usuario {current_user.username} subió nuevo logo de tienda")
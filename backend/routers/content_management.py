@@ -46,6 +46,8 @@ from datetime import datetime
 from database import get_db
 from auth_compat import get_current_user
 from app.models import User, StoreBanner, SocialMediaConfig, EcommerceConfig
+from app.services.storefront_service import bump_storefront_version
+from app.services.app_config_service import AppConfigService
 from app.schemas import (
     StoreBannerCreate, StoreBannerUpdate, StoreBanner as StoreBannerSchema,
     SocialMediaConfigCreate, SocialMediaConfigUpdate, SocialMediaConfig as SocialMediaConfigSchema,
@@ -87,6 +89,7 @@ def create_banner(
     
     db_banner = StoreBanner(**banner_data.dict())
     db.add(db_banner)
+    bump_storefront_version(db)
     db.commit()
     db.refresh(db_banner)
     
@@ -114,6 +117,7 @@ def update_banner(
         setattr(db_banner, field, value)
     
     db_banner.updated_at = datetime.now()
+    bump_storefront_version(db)
     db.commit()
     db.refresh(db_banner)
     
@@ -136,6 +140,7 @@ def delete_banner(
         raise HTTPException(status_code=404, detail="Banner no encontrado")
     
     db.delete(db_banner)
+    bump_storefront_version(db)
     db.commit()
     
     return {"message": "Banner eliminado exitosamente"}
@@ -173,6 +178,7 @@ def create_social_media(
     
     db_social = SocialMediaConfig(**social_data.dict())
     db.add(db_social)
+    bump_storefront_version(db)
     db.commit()
     db.refresh(db_social)
     
@@ -200,6 +206,7 @@ def update_social_media(
         setattr(db_social, field, value)
     
     db_social.updated_at = datetime.now()
+    bump_storefront_version(db)
     db.commit()
     db.refresh(db_social)
     
@@ -222,6 +229,7 @@ def delete_social_media(
         raise HTTPException(status_code=404, detail="Configuración de red social no encontrada")
     
     db.delete(db_social)
+    bump_storefront_version(db)
     db.commit()
     
     return {"message": "Configuración de red social eliminada exitosamente"}
@@ -236,7 +244,7 @@ def get_store_config(
     """
     Obtener configuración de la tienda
     """
-    config = db.query(EcommerceConfig).filter(EcommerceConfig.is_active == True).first()
+    config = AppConfigService(db).get("ecommerce")
     if not config:
         raise HTTPException(status_code=404, detail="Configuración de tienda no encontrada")
     
@@ -266,6 +274,7 @@ def update_store_config(
             setattr(config, field, value)
         config.updated_at = datetime.now()
     
+    bump_storefront_version(db)
     db.commit()
     db.refresh(config)
     
@@ -290,6 +299,7 @@ def create_store_config(
     
     db_config = EcommerceConfig(**config_data.dict())
     db.add(db_config)
+    bump_storefront_version(db)
     db.commit()
     db.refresh(db_config)
     
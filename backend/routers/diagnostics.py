@@ -0,0 +1,110 @@
+"""
+Router de Diagnóstico - Consultas lentas, pool de conexiones y particiones.
+
+Expone el registro de consultas lentas del proceso (app/core/slow_query.py)
+para detectar qué consultas necesitan índices sin acceso a los logs, y el
+estado del pool de conexiones con las rutas que retienen conexiones.
+
+Endpoints:
+    GET /diagnostics/slow-queries: Resumen por SQL normalizado y últimas entradas
+    DELETE /diagnostics/slow-queries: Vaciar el registro
+    GET /diagnostics/pool: Configuración, uso y conexiones prestadas por ruta
+    GET /diagnostics/partitions: Particiones mensuales y poda de los reportes
+
+Permisos:
+    - Solo ADMIN
+
+Note:
+    El registro es por proceso: con varios workers, cada request ve el
+    buffer del worker que la atiende. Activar con SLOW_QUERY_LOG_ENABLED.
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from auth_compat import require_admin
+from app.core.slow_query import slow_query_log
+from app.models import User
+from app.services.partition_service import PARTITIONED_TABLES, PartitionService
+from config.settings import settings
+from database import engine, get_db, pool_config, pool_holders
+
+router = APIRouter(
+    prefix="/diagnostics",
+    tags=["diagnostics"],
+)
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Consultas lentas registradas en este worker.
+
+    Returns:
+        - summary: Por SQL normalizado (cantidad, total/máximo/promedio en ms,
+          rutas y plan), ordenado por tiempo total
+        - entries: Últimas consultas lentas (más recientes primero)
+    """
+    return {
+        "enabled": settings.slow_query_log_enabled,
+        "threshold_ms": settings.slow_query_threshold_ms,
+        "summary": slow_query_log.summary(),
+        "entries": slow_query_log.entries(limit)
+    }
+
+
+@router.delete("/slow-queries")
+async def clear_slow_queries(current_user: User = Depends(require_admin)):
+    """Vaciar el registro de consultas lentas de este worker."""
+    slow_query_log.clear()
+    return {"message": "Registro de consultas lentas vaciado"}
+
+
+@router.get("/pool")
+async def get_pool_status(current_user: User = Depends(require_admin)):
+    """
+    Pool de conexiones de este worker.
+
+    Returns:
+        - config: Rol, modo, workers, tamaño, timeout y pre-ping resueltos
+        - status: Descripción del pool de SQLAlchemy (en uso, libres, overflow)
+        - holders: Conexiones prestadas agrupadas por ruta/hilo (más retenidas primero)
+        - connections: Cada conexión prestada con su antigüedad
+    """
+    return {
+        "config": pool_config._asdict(),
+        "status": engine.pool.status(),
+        "holders": pool_holders.by_owner(),
+        "connections": pool_holders.snapshot()
+    }
+
+
+@router.get("/partitions")
+def get_partitions(
+    verify: bool = Query(False, description="Correr EXPLAIN de los reportes del mes actual"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Particiones mensuales de sales, sale_items e inventory_movements.
+
+    Returns:
+        - partitioned: False si la base no está particionada (no PostgreSQL
+          o sin la migración 20261019_170000)
+        - tables: Particiones por tabla (mes, filas estimadas, bytes); la
+          partición por defecto tiene month = null y debería estar vacía
+        - pruning (verify=true): Particiones que lee cada consulta de
+          ReportsRepository para el mes actual; pruned = sólo las del mes
+    """
+    service = PartitionService(db)
+    partitioned = service.is_partitioned()
+    return {
+        "partitioned": partitioned,
+        "months_ahead": settings.partition_months_ahead,
+        "retention_months": settings.partition_retention_months,
+        "tables": {table: service.list_partitions(table) for table in PARTITIONED_TABLES} if partitioned else {},
+        "pruning": service.verify_report_pruning() if verify else None
+    }
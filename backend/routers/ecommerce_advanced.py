@@ -82,9 +82,14 @@ Schemas Especiales:
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from database import get_db
+from database import get_db, get_read_db
 from app.models.enums import can_transition_order_status
 from app.services.inventory_service import adjust_stock_for_sale
+from app.services.stock_service import StockConflictError
+from app.services.reservation_service import ReservationService
+from app.services.storefront_service import bump_storefront_version
+from app.services.dashboard_service import EcommerceDashboardService
+from app.services.app_config_service import AppConfigService
 from websocket_manager import notify_new_sale
 import asyncio
 from app.models import (
@@ -111,7 +116,6 @@ from auth_compat import get_current_user
 import os
 from datetime import datetime
 import uuid
-import httpx
 from cloudinary_config import (
     upload_image_to_cloudinary,
     delete_image_from_cloudinary,
@@ -128,6 +132,8 @@ async def revalidate_ecommerce_cache(tag: str = "banners"):
     Revalidate Next.js cache in e-commerce frontend
     This ensures banner changes are immediately visible
     """
+    import httpx
+
     try:
         async with httpx.AsyncClient(timeout=5.0) as client:
             response = await client.post(f"{ECOMMERCE_URL}/api/revalidate?tag={tag}")
@@ -364,6 +370,7 @@ async def create_store_banner(
         )
         
         db.add(db_banner)
+        bump_storefront_version(db)
         db.commit()
         db.refresh(db_banner)
 
@@ -391,6 +398,7 @@ async def update_store_banner(
     for field, value in banner_update.model_dump(exclude_unset=True).items():
         setattr(db_banner, field, value)
 
+    bump_storefront_version(db)
     db.commit()
     db.refresh(db_banner)
 
@@ -442,6 +450,7 @@ async def update_store_banner_with_image(
         db_banner.button_text = button_text
         db_banner.image_url = image_url
 
+        bump_storefront_version(db)
         db.commit()
         db.refresh(db_banner)
 
@@ -478,6 +487,7 @@ async def delete_store_banner(
 
     # Delete from database
     db.delete(db_banner)
+    bump_storefront_version(db)
     db.commit()
 
     # Revalidate e-commerce cache
@@ -493,7 +503,7 @@ def get_whatsapp_sales(
     current_user: User = Depends(get_current_user)
 ):
     """Get all WhatsApp sales with details"""
-    whatsapp_sales = db.query(WhatsAppSale).join(Sale).order_by(
+    whatsapp_sales = db.query(WhatsAppSale).join(WhatsAppSale.sale).order_by(
         WhatsAppSale.created_at.desc()
     ).all()
     
@@ -505,7 +515,7 @@ def fix_whatsapp_sales_shipping(
     current_user: User = Depends(get_current_user)
 ):
     """Fix shipping method detection for existing WhatsApp sales"""
-    whatsapp_sales = db.query(WhatsAppSale).join(Sale).all()
+    whatsapp_sales = db.query(WhatsAppSale).join(WhatsAppSale.sale).all()
     fixed_count = 0
     
     for whatsapp_sale in whatsapp_sales:
@@ -650,6 +660,7 @@ def create_social_media_config(
     
     db_config = SocialMediaConfig(**social_config.model_dump())
     db.add(db_config)
+    bump_storefront_version(db)
     db.commit()
     db.refresh(db_config)
     
@@ -674,6 +685,7 @@ def update_social_media_config(
     for field, value in config_update.model_dump(exclude_unset=True).items():
         setattr(db_config, field, value)
     
+    bump_storefront_version(db)
     db.commit()
     db.refresh(db_config)
     
@@ -694,6 +706,7 @@ def delete_social_media_config(
         raise HTTPException(status_code=404, detail="Social media config not found")
     
     db.delete(db_config)
+    bump_storefront_version(db)
     db.commit()
     
     return {"message": "Social media configuration deleted successfully"}
@@ -741,22 +754,22 @@ def get_ecommerce_sales_report(
 ):
     """Get e-commerce sales report with WhatsApp sales data"""
     # Get WhatsApp sales statistics
-    whatsapp_sales = db.query(WhatsAppSale).join(Sale).all()
+    whatsapp_sales = db.query(WhatsAppSale).join(WhatsAppSale.sale).all()
     
     total_whatsapp_sales = len(whatsapp_sales)
     total_whatsapp_revenue = sum(sale.sale.total_amount for sale in whatsapp_sales)
     
     # Get recent sales
-    recent_sales = db.query(WhatsAppSale).join(Sale).order_by(
+    recent_sales = db.query(WhatsAppSale).join(WhatsAppSale.sale).order_by(
         WhatsAppSale.created_at.desc()
     ).limit(10).all()
     
     # Count pending and completed orders
-    pending_orders = db.query(WhatsAppSale).join(Sale).filter(
+    pending_orders = db.query(WhatsAppSale).join(WhatsAppSale.sale).filter(
         Sale.order_status.in_(["PENDING", "PROCESSING"])
     ).count()
     
-    completed_orders = db.query(WhatsAppSale).join(Sale).filter(
+    completed_orders = db.query(WhatsAppSale).join(WhatsAppSale.sale).filter(
         Sale.order_status.in_(["DELIVERED"])
     ).count()
     
@@ -776,7 +789,7 @@ def get_whatsapp_config(
     current_user: User = Depends(get_current_user)
 ):
     """Get WhatsApp business configuration"""
-    config = db.query(WhatsAppConfig).filter(WhatsAppConfig.is_active == True).first()
+    config = AppConfigService(db).get("whatsapp")
     
     if not config:
         # Return default config if none exists
@@ -809,6 +822,7 @@ def create_or_update_whatsapp_config(
         for field, value in config_data.model_dump(exclude_unset=True).items():
             setattr(existing_config, field, value)
         
+        bump_storefront_version(db)
         db.commit()
         db.refresh(existing_config)
         return existing_config
@@ -816,6 +830,7 @@ def create_or_update_whatsapp_config(
         # Create new config
         db_config = WhatsAppConfig(**config_data.model_dump())
         db.add(db_config)
+        bump_storefront_version(db)
         db.commit()
         db.refresh(db_config)
         return db_config
@@ -836,6 +851,7 @@ def update_whatsapp_config(
     for field, value in config_update.model_dump(exclude_unset=True).items():
         setattr(db_config, field, value)
     
+    bump_storefront_version(db)
     db.commit()
     db.refresh(db_config)
     return db_config
@@ -852,6 +868,7 @@ def delete_whatsapp_config(
         raise HTTPException(status_code=404, detail="WhatsApp configuration not found")
     
     db.delete(db_config)
+    bump_storefront_version(db)
     db.commit()
     
     return {"message": "WhatsApp configuration deleted successfully"}
@@ -894,7 +911,7 @@ async def update_ecommerce_sale_status(
 
 @router.get("/dashboard/stats")
 def get_ecommerce_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -905,56 +922,12 @@ def get_ecommerce_dashboard_stats(
     - total_online_orders: Number of e-commerce orders
     - pending_orders: Number of orders with pending status
     - conversion_rate: Percentage based on completed vs total orders
+
+    Calculado en una sola sentencia (EcommerceDashboardService) y cacheado
+    unos segundos; compartido con /dashboard/detailed.
     """
     try:
-        from sqlalchemy import func
-        from decimal import Decimal
-        from app.models import SaleType, OrderStatus
-
-        # Count products visible in e-commerce
-        total_online_products = db.query(Product).filter(
-            Product.show_in_ecommerce == True,
-            Product.is_active == True
-        ).count()
-
-        # Get e-commerce sales statistics
-        ecommerce_sales_query = db.query(Sale).filter(
-            Sale.sale_type == SaleType.ECOMMERCE
-        )
-
-        # Total e-commerce revenue (excluding cancelled orders)
-        total_online_sales = ecommerce_sales_query.filter(
-            Sale.order_status != OrderStatus.CANCELLED
-        ).with_entities(func.sum(Sale.total_amount)).scalar() or Decimal("0.00")
-
-        # Total e-commerce orders
-        total_online_orders = ecommerce_sales_query.count()
-
-        # Pending orders count
-        pending_orders = ecommerce_sales_query.filter(
-            Sale.order_status == OrderStatus.PENDING
-        ).count()
-
-        # Delivered orders count (completed)
-        delivered_orders = ecommerce_sales_query.filter(
-            Sale.order_status == OrderStatus.DELIVERED
-        ).count()
-
-        # Calculate conversion rate (delivered orders / total orders * 100)
-        conversion_rate = 0.0
-        if total_online_orders > 0:
-            conversion_rate = round((delivered_orders / total_online_orders) * 100, 2)
-
-        return {
-            "data": {
-                "total_online_products": total_online_products,
-                "total_online_sales": float(total_online_sales),
-                "total_online_orders": total_online_orders,
-                "pending_orders": pending_orders,
-                "delivered_orders": delivered_orders,
-                "conversion_rate": conversion_rate
-            }
-        }
+        return {"data": EcommerceDashboardService(db).get_stats()}
 
     except Exception as e:
         print(f"Error getting e-commerce dashboard stats: {str(e)}")
@@ -968,7 +941,7 @@ def get_ecommerce_dashboard_stats(
 
 @router.get("/dashboard/detailed")
 def get_ecommerce_dashboard_detailed(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -981,185 +954,12 @@ def get_ecommerce_dashboard_detailed(
         - orders_by_status: Count de órdenes por estado (PENDING, PROCESSING, etc.)
         - top_products: Top 5 productos más vendidos (online)
         - low_stock_alerts: Productos online con stock bajo
+
+    Las métricas y el conteo por estado salen de una sola sentencia con
+    agregación condicional; ver EcommerceDashboardService.
     """
     try:
-        from sqlalchemy import func, desc
-        from decimal import Decimal
-        from app.models import SaleType, OrderStatus, SaleItem, BranchStock
-        from datetime import datetime, timedelta
-        
-        # ===== 1. MÉTRICAS PRINCIPALES =====
-        total_online_products = db.query(Product).filter(
-            Product.show_in_ecommerce == True,
-            Product.is_active == True
-        ).count()
-        
-        ecommerce_sales_query = db.query(Sale).filter(
-            Sale.sale_type == SaleType.ECOMMERCE
-        )
-        
-        total_online_sales = ecommerce_sales_query.filter(
-            Sale.order_status != OrderStatus.CANCELLED
-        ).with_entities(func.sum(Sale.total_amount)).scalar() or Decimal("0.00")
-        
-        total_online_orders = ecommerce_sales_query.count()
-        
-        pending_orders = ecommerce_sales_query.filter(
-            Sale.order_status == OrderStatus.PENDING
-        ).count()
-        
-        delivered_orders = ecommerce_sales_query.filter(
-            Sale.order_status == OrderStatus.DELIVERED
-        ).count()
-        
-        conversion_rate = 0.0
-        if total_online_orders > 0:
-            conversion_rate = round((delivered_orders / total_online_orders) * 100, 2)
-        
-        # ===== 2. ÚLTIMAS VENTAS (últimas 10) =====
-        recent_sales_raw = db.query(Sale).filter(
-            Sale.sale_type == SaleType.ECOMMERCE
-        ).order_by(desc(Sale.created_at)).limit(10).all()
-        
-        recent_sales = []
-        for sale in recent_sales_raw:
-            # Verificar si tiene WhatsAppSale asociado
-            whatsapp_sale = db.query(WhatsAppSale).filter(
-                WhatsAppSale.sale_id == sale.id
-            ).first()
-            
-            recent_sales.append({
-                "id": sale.id,
-                "sale_number": sale.sale_number,
-                "customer_name": sale.customer_name or (whatsapp_sale.customer_name if whatsapp_sale else "Cliente Web"),
-                "total_amount": float(sale.total_amount),
-                "order_status": sale.order_status.value if sale.order_status else None,
-                "created_at": sale.created_at.isoformat() if sale.created_at else None,
-                "is_whatsapp": whatsapp_sale is not None
-            })
-        
-        # ===== 3. VENTAS POR DÍA (últimos 7 días) =====
-        seven_days_ago = datetime.now() - timedelta(days=7)
-        
-        sales_by_day_raw = db.query(
-            func.date(Sale.created_at).label('date'),
-            func.count(Sale.id).label('count'),
-            func.sum(Sale.total_amount).label('total')
-        ).filter(
-            Sale.sale_type == SaleType.ECOMMERCE,
-            Sale.created_at >= seven_days_ago,
-            Sale.order_status != OrderStatus.CANCELLED
-        ).group_by(
-            func.date(Sale.created_at)
-        ).order_by(
-            func.date(Sale.created_at)
-        ).all()
-        
-        sales_by_day = [
-            {
-                "date": row.date.isoformat(),
-                "count": row.count,
-                "total": float(row.total or 0)
-            }
-            for row in sales_by_day_raw
-        ]
-        
-        # ===== 4. ÓRDENES POR ESTADO =====
-        orders_by_status_raw = db.query(
-            Sale.order_status,
-            func.count(Sale.id).label('count')
-        ).filter(
-            Sale.sale_type == SaleType.ECOMMERCE
-        ).group_by(
-            Sale.order_status
-        ).all()
-        
-        orders_by_status = [
-            {
-                "status": row.order_status.value if row.order_status else "UNKNOWN",
-                "count": row.count
-            }
-            for row in orders_by_status_raw
-        ]
-        
-        # ===== 5. TOP PRODUCTOS MÁS VENDIDOS (últimos 30 días) =====
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        
-        top_products_raw = db.query(
-            SaleItem.product_id,
-            Product.name,
-            func.sum(SaleItem.quantity).label('total_sold'),
-            func.sum(SaleItem.total_price).label('revenue')
-        ).join(
-            Sale, SaleItem.sale_id == Sale.id
-        ).join(
-            Product, SaleItem.product_id == Product.id
-        ).filter(
-            Sale.sale_type == SaleType.ECOMMERCE,
-            Sale.created_at >= thirty_days_ago,
-            Sale.order_status != OrderStatus.CANCELLED,
-            Product.show_in_ecommerce == True
-        ).group_by(
-            SaleItem.product_id,
-            Product.name
-        ).order_by(
-            desc('total_sold')
-        ).limit(5).all()
-        
-        top_products = [
-            {
-                "product_id": row.product_id,
-                "product_name": row.name,
-                "total_sold": row.total_sold,
-                "revenue": float(row.revenue or 0)
-            }
-            for row in top_products_raw
-        ]
-        
-        # ===== 6. ALERTAS DE STOCK BAJO =====
-        low_stock_products_raw = db.query(
-            Product.id,
-            Product.name,
-            BranchStock.stock_quantity,
-            BranchStock.min_stock
-        ).join(
-            BranchStock, Product.id == BranchStock.product_id
-        ).filter(
-            Product.show_in_ecommerce == True,
-            Product.is_active == True,
-            BranchStock.stock_quantity <= BranchStock.min_stock,
-            BranchStock.min_stock > 0
-        ).order_by(
-            BranchStock.stock_quantity
-        ).limit(10).all()
-        
-        low_stock_alerts = [
-            {
-                "product_id": row.id,
-                "product_name": row.name,
-                "current_stock": row.stock_quantity,
-                "min_stock": row.min_stock
-            }
-            for row in low_stock_products_raw
-        ]
-        
-        return {
-            "data": {
-                "stats": {
-                    "total_online_products": total_online_products,
-                    "total_online_sales": float(total_online_sales),
-                    "total_online_orders": total_online_orders,
-                    "pending_orders": pending_orders,
-                    "delivered_orders": delivered_orders,
-                    "conversion_rate": conversion_rate
-                },
-                "recent_sales": recent_sales,
-                "sales_by_day": sales_by_day,
-                "orders_by_status": orders_by_status,
-                "top_products": top_products,
-                "low_stock_alerts": low_stock_alerts
-            }
-        }
+        return {"data": EcommerceDashboardService(db).get_detailed()}
     
     except Exception as e:
         print(f"Error getting detailed e-commerce dashboard: {str(e)}")
@@ -1182,9 +982,10 @@ async def update_whatsapp_sale_status(
     Actualiza el estado de una orden de WhatsApp y ejecuta lógica automática.
     
     Transiciones y efectos:
-        PENDING → PROCESSING: Descuenta stock, crea InventoryMovement, notifica venta
+        PENDING → PROCESSING: Convierte la reserva en descuento de stock, crea InventoryMovement, notifica venta
         PROCESSING → SHIPPED: Marca como enviado
         SHIPPED → DELIVERED: Completa orden (estado final)
+        PENDING → CANCELLED: Libera el stock reservado
         * → CANCELLED: Revierte stock si estaba en PROCESSING+
     
     Args:
@@ -1255,6 +1056,10 @@ async def update_whatsapp_sale_status(
                 # Log pero no fallar por error de WebSocket
                 print(f"Warning: WebSocket notification failed: {ws_error}")
         
+        elif new_status == OrderStatus.CANCELLED and current_status == OrderStatus.PENDING:
+            # CANCELAR pedido sin confirmar → Liberar stock reservado
+            ReservationService(db).release(sale.id)
+        
         elif new_status == OrderStatus.CANCELLED and current_status in [OrderStatus.PROCESSING, OrderStatus.SHIPPED]:
             # CANCELAR → Revertir stock (solo si ya se había descontado)
             stock_changes = adjust_stock_for_sale(
@@ -1269,6 +1074,12 @@ async def update_whatsapp_sale_status(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except StockConflictError as e:
+        # Deadlock con otra venta simultánea, el cliente debe reintentar
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     
     # 4. Actualizar estado
     sale.order_status = new_status
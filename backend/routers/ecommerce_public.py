@@ -8,19 +8,21 @@ Endpoints:
     === CATÁLOGO ===
     GET /ecommerce/products: Productos activos (show_in_ecommerce=True)
     GET /ecommerce/products/{id}: Detalle de producto con stock
+    GET /ecommerce/products/{id}/detail: Ficha completa (producto, talles, imágenes) cacheada
     GET /ecommerce/products/category/{id}: Productos por categoría
-    GET /ecommerce/products/search: Búsqueda full-text
+    GET /ecommerce/products/search: Búsqueda facetada (filtros + conteos por faceta)
     GET /ecommerce/categories: Categorías activas
     GET /ecommerce/brands: Marcas activas
     
     === CONTENIDO ===
+    GET /ecommerce/bootstrap: Todo el contenido global en una llamada (cacheable, ETag)
     GET /ecommerce/config: Configuración de tienda (colores, textos)
     GET /ecommerce/banners: Banners del carrusel home
     GET /ecommerce/social-media: Links a redes sociales
     GET /ecommerce/whatsapp-config: Config de WhatsApp Business
     
     === ÓRDENES ===
-    POST /ecommerce/orders: Crear orden (rate limited 10/min)
+    POST /ecommerce/orders: Crear orden (rate limited 10/min, acepta Idempotency-Key)
     
     === WHATSAPP ===
     GET /ecommerce/whatsapp-link: Generar link de WhatsApp
@@ -37,10 +39,10 @@ Flujo de Orden:
     1. Cliente navega catálogo (productos visibles)
     2. Agrega al carrito (validación client-side)
     3. POST /orders con ítems y datos de contacto
-    4. Backend valida stock disponible
-    5. Crea Sale con status PENDING
-    6. Disminuye stock (BranchStock)
-    7. Crea InventoryMovement
+    4. Asigna las líneas a sucursales (FulfillmentService, política configurable)
+    5. Crea Sale con status PENDING y la decisión de fulfillment
+    6. Reserva stock con TTL (ReservationService): falla si no hay disponible
+    7. Al confirmar el pago la reserva se convierte en descuento + InventoryMovement
     8. Notifica backoffice vía WebSocket
     9. Retorna orden creada
 
@@ -67,7 +69,7 @@ Formatos de Respuesta:
     - Config serializada para frontend
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, exists, or_
 from typing import List, Optional
 from datetime import datetime
@@ -75,6 +77,16 @@ import uuid
 from database import get_db
 from app.models import Product, Category, Sale, SaleItem, InventoryMovement, User, Branch, SaleType, StoreBanner, SocialMediaConfig, EcommerceConfig, WhatsAppSale, ProductSize, WhatsAppConfig, ProductImage, BranchStock, Brand
 from app.schemas import SaleCreate
+from app.services.reservation_service import ReservationService
+from app.services.fulfillment_service import FulfillmentService
+from app.services.storefront_service import StorefrontService, serialize_product
+from app.services.app_config_service import AppConfigService
+from app.services.catalog_search_service import CatalogSearchService, SORT_OPTIONS
+from app.core.http_cache import cached_json_response
+from app.core.metrics import sales_created
+from app.core.idempotency import idempotent
+from config.settings import settings
+from app.services.stock_service import InsufficientStockError
 from websocket_manager import notify_new_sale
 from config.rate_limit import limiter, RateLimits
 
@@ -84,12 +96,9 @@ def generate_sale_number(sale_type: SaleType) -> str:
     return f"{prefix}-{timestamp}-{str(uuid.uuid4())[:8].upper()}"
 
 def get_whatsapp_config(db: Session):
-    """Get active WhatsApp configuration from database"""
+    """Get active WhatsApp configuration (process-wide config cache)"""
     try:
-        config = db.query(WhatsAppConfig).filter(
-            WhatsAppConfig.is_active == True
-        ).first()
-        return config
+        return AppConfigService(db).get("whatsapp")
     except Exception as e:
         print(f"Error getting WhatsApp config: {str(e)}")
         return None
@@ -124,6 +133,29 @@ def generate_whatsapp_message(customer_name: str, sale_number: str, config: What
         # Default message
         return f"Hola {customer_name}, gracias por tu compra en nuestro e-commerce. Tu pedido #{sale_number} está siendo procesado."
 
+def ecommerce_sale_response(db_sale: Sale, whatsapp_sale_id: Optional[int]) -> dict:
+    """Respuesta de POST /ecommerce/sales para una venta creada"""
+    return {
+        "id": db_sale.id,
+        "sale_id": db_sale.id,
+        "sale_number": db_sale.sale_number,
+        "total_amount": float(db_sale.total_amount),
+        "customer_name": db_sale.customer_name,
+        "order_status": db_sale.order_status,
+        "created_at": db_sale.created_at.isoformat(),
+        "branch_id": db_sale.branch_id,
+        "shipment_count": db_sale.shipment_count,
+        "whatsapp_sale_id": whatsapp_sale_id  # Incluir ID del registro de WhatsApp si se creó
+    }
+
+def rebuild_ecommerce_sale_response(db: Session, sale_id: int) -> Optional[dict]:
+    """Rearma la respuesta de una venta ya confirmada (reintento con Idempotency-Key)"""
+    db_sale = db.query(Sale).filter(Sale.id == sale_id).first()
+    if db_sale is None:
+        return None
+    whatsapp_sale_id = db.query(WhatsAppSale.id).filter(WhatsAppSale.sale_id == sale_id).scalar()
+    return ecommerce_sale_response(db_sale, whatsapp_sale_id)
+
 router = APIRouter(prefix="/ecommerce", tags=["E-commerce Public"])
 
 @router.get("/health")
@@ -137,8 +169,11 @@ def ecommerce_health():
         "endpoints": [
             "/ecommerce/products",
             "/ecommerce/products/{id}",
+            "/ecommerce/products/{id}/detail",
             "/ecommerce/products/{id}/sizes",
             "/ecommerce/products/{id}/images",
+            "/ecommerce/products/search",
+            "/ecommerce/bootstrap",
             "/ecommerce/categories", 
             "/ecommerce/banners",
             "/ecommerce/social-media",
@@ -165,7 +200,7 @@ def get_ecommerce_products(
     Obtener productos habilitados para e-commerce (sin autenticación requerida)
     """
     try:
-        query = db.query(Product).filter(
+        query = db.query(Product).options(joinedload(Product.brand_rel)).filter(
             Product.show_in_ecommerce == True,
             Product.is_active == True
         )
@@ -199,7 +234,7 @@ def get_ecommerce_products(
             has_branch_stock = exists().where(
                 and_(
                     BranchStock.product_id == Product.id,
-                    BranchStock.stock_quantity > 0
+                    BranchStock.stock_quantity - BranchStock.reserved_stock > 0
                 )
             )
             # También incluir productos con stock global > 0 (compatibilidad)
@@ -216,99 +251,87 @@ def get_ecommerce_products(
         products = query.offset(offset).limit(limit).all()
         
         # Convertir a diccionario para la respuesta con stock agregado
-        result = []
-        for product in products:
-            # Calcular stock total de todas las sucursales para e-commerce
-            total_stock = product.calculate_total_available_stock()
-
-            # Obtener información de marca
-            brand_info = None
-            if product.brand_rel:
-                brand_info = {
-                    "id": product.brand_rel.id,
-                    "name": product.brand_rel.name,
-                    "description": product.brand_rel.description,
-                    "logo_url": product.brand_rel.logo_url
-                }
-            elif product.brand:  # Fallback para productos con marca legacy
-                brand_info = {
-                    "id": None,
-                    "name": product.brand,
-                    "description": None,
-                    "logo_url": None
-                }
-
-            result.append({
-                "id": product.id,
-                "name": product.name,
-                "description": product.description,
-                "price": float(product.ecommerce_price) if product.ecommerce_price else float(product.price),
-                "stock": total_stock,
-                "featured": product.ecommerce_price is not None,
-                "is_active": product.is_active,
-                "show_in_ecommerce": product.show_in_ecommerce,
-                "category_id": product.category_id,
-                "brand": brand_info,
-                "image_url": product.image_url,
-                "has_sizes": product.has_sizes,
-                "created_at": product.created_at.isoformat() if product.created_at else None
-            })
+        result = [serialize_product(product) for product in products]
         
         return {"data": result}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener productos: {str(e)}")
 
+@router.get("/products/search")
+@limiter.limit(RateLimits.ECOMMERCE_READ)
+def search_ecommerce_products(
+    request: Request,
+    db: Session = Depends(get_db),
+    category_id: Optional[List[int]] = Query(None),
+    brand: Optional[List[str]] = Query(None),
+    size: Optional[List[str]] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    search: Optional[str] = None,
+    in_stock: Optional[bool] = None,
+    featured: Optional[bool] = None,
+    sort: str = Query("default", description=f"Orden: {', '.join(SORT_OPTIONS)}"),
+    limit: int = Query(24, ge=1, le=200),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Catálogo paginado con conteos por categoría, marca, talle y rango de precio
+    
+    Filtros repetibles (?brand=Nike&brand=Adidas) se combinan con OR dentro
+    de la faceta y con AND entre facetas. Se resuelve sobre un índice
+    invertido en memoria, sin consultar la base salvo al reconstruirlo.
+    """
+    try:
+        return CatalogSearchService(db).search(
+            category_ids=category_id,
+            brands=brand,
+            sizes=size,
+            min_price=min_price,
+            max_price=max_price,
+            search=search,
+            in_stock=in_stock,
+            featured=featured,
+            sort=sort,
+            offset=offset,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al buscar productos: {str(e)}")
+
+@router.get("/products/{product_id}/detail")
+@limiter.limit(RateLimits.ECOMMERCE_READ)
+def get_ecommerce_product_detail(request: Request, product_id: int, db: Session = Depends(get_db)):
+    """
+    Ficha completa de producto en una sola llamada (sin autenticación)
+    
+    Reemplaza a /products/{id} + /sizes + /images para la PDP: producto,
+    marca, stock disponible por talle e imágenes ordenadas. La respuesta se
+    cachea por producto y se invalida con cambios de stock e imágenes.
+    """
+    try:
+        detail = StorefrontService(db).get_product_detail(product_id)
+        if not detail:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        return detail
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener producto: {str(e)}")
+
 @router.get("/products/{product_id}")
 def get_ecommerce_product(product_id: int, db: Session = Depends(get_db)):
     """
     Obtener un producto específico para e-commerce
     """
     try:
-        product = db.query(Product).filter(
-            Product.id == product_id,
-            Product.show_in_ecommerce == True,
-            Product.is_active == True
-        ).first()
-        
-        if not product:
+        detail = StorefrontService(db).get_product_detail(product_id)
+        if not detail:
             raise HTTPException(status_code=404, detail="Producto no encontrado")
-            
-        # Calcular stock agregado para e-commerce
-        total_stock = product.calculate_total_available_stock()
-
-        # Obtener información de marca
-        brand_info = None
-        if product.brand_rel:
-            brand_info = {
-                "id": product.brand_rel.id,
-                "name": product.brand_rel.name,
-                "description": product.brand_rel.description,
-                "logo_url": product.brand_rel.logo_url
-            }
-        elif product.brand:  # Fallback para productos con marca legacy
-            brand_info = {
-                "id": None,
-                "name": product.brand,
-                "description": None,
-                "logo_url": None
-            }
-
-        return {
-            "id": product.id,
-            "name": product.name,
-            "description": product.description,
-            "brand": brand_info,
-            "price": float(product.ecommerce_price) if product.ecommerce_price else float(product.price),
-            "stock": total_stock,
-            "featured": product.ecommerce_price is not None,
-            "is_active": product.is_active,
-            "show_in_ecommerce": product.show_in_ecommerce,
-            "category_id": product.category_id,
-            "image_url": product.image_url,
-            "has_sizes": product.has_sizes,
-            "created_at": product.created_at.isoformat() if product.created_at else None
-        }
+        return detail["product"]
         
     except HTTPException:
         raise
@@ -319,67 +342,20 @@ def get_ecommerce_product(product_id: int, db: Session = Depends(get_db)):
 def get_ecommerce_product_sizes(product_id: int, db: Session = Depends(get_db)):
     """
     Obtener talles disponibles para un producto específico en e-commerce (sin autenticación)
+    
+    Stock disponible (sin reservas) sumado entre sucursales, talles numéricos
+    primero y luego letras. Se sirve desde el bundle cacheado de la ficha.
     """
     try:
-        # Verificar que el producto existe y está habilitado para e-commerce
-        product = db.query(Product).filter(
-            Product.id == product_id,
-            Product.show_in_ecommerce == True,
-            Product.is_active == True
-        ).first()
-        
-        if not product:
+        detail = StorefrontService(db).get_product_detail(product_id)
+        if not detail:
             raise HTTPException(status_code=404, detail="Producto no encontrado")
         
-        # Si el producto no tiene talles, retornar respuesta vacía
-        if not product.has_sizes:
-            return {
-                "product_id": product_id,
-                "product_name": product.name,
-                "has_sizes": False,
-                "available_sizes": []
-            }
-        
-        # Obtener talles disponibles con stock > 0 de todas las sucursales
-        # Para e-commerce, mostramos talles que tengan stock en cualquier sucursal
-        available_sizes = db.query(ProductSize).filter(
-            ProductSize.product_id == product_id,
-            ProductSize.stock_quantity > 0
-        ).all()
-        
-        # Agrupar por talle y sumar stock de todas las sucursales
-        size_stock_map = {}
-        for size_item in available_sizes:
-            size = size_item.size
-            if size in size_stock_map:
-                size_stock_map[size] += size_item.stock_quantity
-            else:
-                size_stock_map[size] = size_item.stock_quantity
-        
-        # Convertir a lista de diccionarios
-        sizes_list = []
-        for size, total_stock in size_stock_map.items():
-            sizes_list.append({
-                "size": size,
-                "stock": total_stock
-            })
-        
-        # Ordenar talles (numeros primero, luego letras)
-        def sort_sizes(size_dict):
-            size = size_dict["size"]
-            # Intentar convertir a número para ordenar numéricamente
-            try:
-                return (0, int(size))  # Números van primero
-            except ValueError:
-                return (1, size.upper())  # Letras van después, ordenadas alfabéticamente
-        
-        sizes_list.sort(key=sort_sizes)
-        
         return {
             "product_id": product_id,
-            "product_name": product.name,
-            "has_sizes": True,
-            "available_sizes": sizes_list
+            "product_name": detail["product"]["name"],
+            "has_sizes": detail["product"]["has_sizes"],
+            "available_sizes": detail["sizes"]
         }
         
     except HTTPException:
@@ -391,60 +367,53 @@ def get_ecommerce_product_sizes(product_id: int, db: Session = Depends(get_db)):
 def get_ecommerce_product_images(product_id: int, db: Session = Depends(get_db)):
     """
     Obtener imágenes de un producto específico para e-commerce (sin autenticación)
+    
+    Ordenadas por image_order; se sirven desde el bundle cacheado de la ficha.
     """
     try:
-        # Verificar que el producto existe y está habilitado para e-commerce
-        product = db.query(Product).filter(
-            Product.id == product_id,
-            Product.show_in_ecommerce == True,
-            Product.is_active == True
-        ).first()
-        
-        if not product:
+        detail = StorefrontService(db).get_product_detail(product_id)
+        if not detail:
             raise HTTPException(status_code=404, detail="Producto no encontrado")
         
-        # Obtener imágenes del producto ordenadas por orden y fecha de creación
-        images = db.query(ProductImage).filter(
-            ProductImage.product_id == product_id
-        ).order_by(ProductImage.image_order.asc(), ProductImage.created_at.asc()).all()
-        
-        # Convertir a formato esperado por el frontend
-        result = []
-        for image in images:
-            result.append({
-                "id": image.id,
-                "product_id": image.product_id,
-                "image_url": image.image_url,
-                "alt_text": image.alt_text,
-                "is_main": image.is_main,
-                "order": image.image_order,
-                "created_at": image.created_at.isoformat() if image.created_at else None
-            })
-        
-        return {"data": result}
+        return {"data": detail["images"]}
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener imágenes del producto: {str(e)}")
 
+@router.get("/bootstrap")
+@limiter.limit(RateLimits.ECOMMERCE_READ)
+def get_storefront_bootstrap(request: Request, db: Session = Depends(get_db)):
+    """
+    Contenido global del storefront en una sola llamada (sin autenticación)
+    
+    Reemplaza a /banners, /social-media, /store-config, /whatsapp-config,
+    /categories y /brands. La respuesta es cacheable (Cache-Control, ETag,
+    Last-Modified): vencido el max-age el cliente revalida y recibe 304
+    mientras el contenido no cambie.
+    """
+    try:
+        bootstrap = StorefrontService(db).get_bootstrap()
+        return cached_json_response(
+            request,
+            bootstrap["payload"],
+            etag=bootstrap["etag"],
+            last_modified=bootstrap["last_modified"],
+            max_age=settings.storefront_cache_max_age,
+            stale_while_revalidate=settings.storefront_bootstrap_cache_ttl
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener contenido de la tienda: {str(e)}")
+
 @router.get("/categories")
 def get_ecommerce_categories(db: Session = Depends(get_db)):
     """
     Obtener categorías activas para e-commerce
     """
     try:
-        categories = db.query(Category).filter(Category.is_active == True).all()
-
-        result = []
-        for category in categories:
-            result.append({
-                "id": category.id,
-                "name": category.name,
-                "is_active": category.is_active
-            })
-
-        return {"data": result}
+        return {"data": StorefrontService(db).get_bootstrap()["payload"]["categories"]}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener categorías: {str(e)}")
@@ -458,33 +427,7 @@ def get_ecommerce_brands(db: Session = Depends(get_db)):
     visibles en e-commerce, ordenadas alfabéticamente.
     """
     try:
-        # Obtener marcas activas que tienen al menos un producto en e-commerce
-        from sqlalchemy import exists
-
-        brands = db.query(Brand)\
-            .filter(
-                Brand.is_active == True,
-                # Solo marcas que tienen productos visibles en e-commerce
-                exists().where(
-                    and_(
-                        Product.brand_id == Brand.id,
-                        Product.show_in_ecommerce == True,
-                        Product.is_active == True
-                    )
-                )
-            )\
-            .order_by(Brand.name)\
-            .all()
-
-        # Convertir a formato de respuesta con información completa
-        result = [{
-            "id": brand.id,
-            "name": brand.name,
-            "description": brand.description,
-            "logo_url": brand.logo_url
-        } for brand in brands]
-
-        return {"data": result}
+        return {"data": StorefrontService(db).get_bootstrap()["payload"]["brands"]}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener marcas: {str(e)}")
@@ -495,26 +438,7 @@ def get_ecommerce_banners(db: Session = Depends(get_db)):
     Obtener banners activos para e-commerce desde la base de datos
     """
     try:
-        # Obtener banners activos ordenados por posición
-        banners = db.query(StoreBanner).filter(
-            StoreBanner.is_active == True
-        ).order_by(StoreBanner.banner_order, StoreBanner.id).all()
-        
-        # Convertir a formato esperado por el frontend
-        result = []
-        for banner in banners:
-            result.append({
-                "id": str(banner.id),
-                "title": banner.title,
-                "subtitle": banner.subtitle,
-                "image": banner.image_url,
-                "link": banner.link_url,
-                "button_text": banner.button_text,
-                "active": banner.is_active,
-                "order": banner.banner_order
-            })
-        
-        return {"data": result}
+        return {"data": StorefrontService(db).get_bootstrap()["payload"]["banners"]}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener banners: {str(e)}")
@@ -525,21 +449,7 @@ def get_ecommerce_social_media(db: Session = Depends(get_db)):
     Obtener configuración de redes sociales activas para e-commerce
     """
     try:
-        social_media = db.query(SocialMediaConfig).filter(
-            SocialMediaConfig.is_active == True
-        ).order_by(SocialMediaConfig.display_order, SocialMediaConfig.id).all()
-        
-        result = []
-        for social in social_media:
-            result.append({
-                "id": social.id,
-                "platform": social.platform,
-                "username": social.username,
-                "url": social.url,
-                "display_order": social.display_order
-            })
-        
-        return {"data": result}
+        return {"data": StorefrontService(db).get_bootstrap()["payload"]["social_media"]}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener redes sociales: {str(e)}")
@@ -548,41 +458,11 @@ def get_ecommerce_social_media(db: Session = Depends(get_db)):
 def get_ecommerce_store_config(db: Session = Depends(get_db)):
     """
     Obtener configuración de la tienda para e-commerce
+    
+    Retorna valores por defecto si la tienda todavía no fue configurada.
     """
     try:
-        config = db.query(EcommerceConfig).filter(
-            EcommerceConfig.is_active == True
-        ).first()
-        
-        if not config:
-            # Retornar configuración por defecto si no existe
-            return {
-                "data": {
-                    "store_name": "POS Cesariel",
-                    "store_description": "Tu tienda online",
-                    "store_logo": None,
-                    "contact_email": "info@poscesariel.com",
-                    "contact_phone": "+54 9 11 1234-5678",
-                    "address": "Buenos Aires, Argentina",
-                    "currency": "ARS",
-                    "tax_percentage": 0,
-                    "is_active": True
-                }
-            }
-
-        return {
-            "data": {
-                "store_name": config.store_name,
-                "store_description": config.store_description,
-                "store_logo": config.store_logo,
-                "contact_email": config.contact_email,
-                "contact_phone": config.contact_phone,
-                "address": config.address,
-                "currency": config.currency,
-                "tax_percentage": float(config.tax_percentage),
-                "is_active": config.is_active
-            }
-        }
+        return {"data": StorefrontService(db).get_bootstrap()["payload"]["store_config"]}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener configuración de tienda: {str(e)}")
@@ -591,44 +471,25 @@ def get_ecommerce_store_config(db: Session = Depends(get_db)):
 def get_ecommerce_whatsapp_config(db: Session = Depends(get_db)):
     """
     Obtener configuración de WhatsApp para e-commerce (sin autenticación requerida)
+    
+    Retorna valores por defecto si no hay configuración activa.
     """
     try:
-        config = get_whatsapp_config(db)
-        
-        if not config:
-            # Retornar configuración por defecto si no existe
-            return {
-                "data": {
-                    "business_phone": "+54 9 11 1234-5678",
-                    "business_name": "POS Cesariel",
-                    "welcome_message": "¡Hola! Gracias por tu compra. Te contactaremos pronto para coordinar la entrega.",
-                    "business_hours": "Lunes a Viernes: 9:00 - 18:00",
-                    "auto_response_enabled": False,
-                    "is_active": True
-                }
-            }
-        
-        return {
-            "data": {
-                "business_phone": config.business_phone,
-                "business_name": config.business_name,
-                "welcome_message": config.welcome_message,
-                "business_hours": config.business_hours,
-                "auto_response_enabled": config.auto_response_enabled,
-                "is_active": config.is_active
-            }
-        }
+        return {"data": StorefrontService(db).get_bootstrap()["payload"]["whatsapp_config"]}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener configuración de WhatsApp: {str(e)}")
 
 @router.post("/sales")
 @limiter.limit(RateLimits.ECOMMERCE_WRITE)  # 10 requests per minute
+@idempotent("POST /ecommerce/sales", resource=Sale, rebuild=rebuild_ecommerce_sale_response)
 async def create_ecommerce_sale(request: Request, sale_data: SaleCreate, db: Session = Depends(get_db)):
     """
     Crear venta desde e-commerce (sin autenticación requerida)
     
     Rate limit: 10 purchases per minute per IP to prevent abuse.
+    Acepta Idempotency-Key: un checkout reintentado o un doble click con la
+    misma clave devuelve la orden original sin crear otra ni reservar stock.
     """
     try:
         # Obtener el primer usuario admin/manager para asignar la venta
@@ -640,60 +501,30 @@ async def create_ecommerce_sale(request: Request, sale_data: SaleCreate, db: Ses
         if not default_user:
             raise HTTPException(status_code=500, detail="No se encontró usuario para procesar la venta")
         
-        # Obtener la primera sucursal activa
-        default_branch = db.query(Branch).filter(Branch.is_active == True).first()
-        
-        if not default_branch:
-            raise HTTPException(status_code=500, detail="No se encontró sucursal para procesar la venta")
-        
-        # Validar que todos los productos existan y tengan stock
+        # Validar que todos los productos existan (una consulta para todo el carrito).
+        # El stock se valida al reservar: la reserva es condicional y atómica.
+        products = {
+            p.id: p for p in db.query(Product).filter(
+                Product.id.in_({item.product_id for item in sale_data.items})
+            ).all()
+        }
         total_amount = 0
         validated_items = []
         
         for item in sale_data.items:
-            product = db.query(Product).filter(Product.id == item.product_id).first()
+            product = products.get(item.product_id)
             if not product:
                 raise HTTPException(status_code=400, detail=f"Producto {item.product_id} no encontrado")
             
             if not product.is_active:
                 raise HTTPException(status_code=400, detail=f"Producto {product.name} no está disponible")
             
-            # Check stock based on whether product has sizes
-            if product.has_sizes:
-                # Products with sizes must have a size specified
-                if not item.size:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Producto {product.name} requiere especificar un talle"
-                    )
-
-
-                # Check size-specific stock
-                size_stock = db.query(ProductSize).filter(
-                    ProductSize.product_id == item.product_id,
-                    ProductSize.branch_id == default_branch.id,
-                    ProductSize.size == item.size
-                ).first()
-                
-                if not size_stock:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Talle {item.size} no disponible para producto {product.name}"
-                    )
-                
-                if size_stock.stock_quantity < item.quantity:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Stock insuficiente para producto {product.name} talle {item.size}. Disponible: {size_stock.stock_quantity}, Solicitado: {item.quantity}"
-                    )
-            else:
-                # Check stock agregado de todas las sucursales para productos sin talles
-                total_available_stock = product.calculate_total_available_stock()
-                if total_available_stock < item.quantity:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Stock insuficiente para {product.name}. Disponible: {total_available_stock}, Solicitado: {item.quantity}"
-                    )
+            # Products with sizes must have a size specified
+            if product.has_sizes and not item.size:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Producto {product.name} requiere especificar un talle"
+                )
             
             item_total = item.unit_price * item.quantity
             total_amount += item_total
@@ -706,6 +537,27 @@ async def create_ecommerce_sale(request: Request, sale_data: SaleCreate, db: Ses
                 "size": getattr(item, 'size', None)
             })
         
+        # Asignar las líneas a sucursales según la política de fulfillment
+        # (una pasada en memoria sobre el stock disponible precargado)
+        origin = None
+        if sale_data.shipping_latitude is not None and sale_data.shipping_longitude is not None:
+            origin = (sale_data.shipping_latitude, sale_data.shipping_longitude)
+        try:
+            plan = FulfillmentService(db).plan(
+                [
+                    {
+                        "product_id": item_data["product"].id,
+                        "quantity": item_data["quantity"],
+                        "size": item_data["size"] if item_data["product"].has_sizes else None,
+                        "name": item_data["product"].name
+                    }
+                    for item_data in validated_items
+                ],
+                origin=origin
+            )
+        except InsufficientStockError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         # Generar número de venta
         sale_number = generate_sale_number(SaleType.ECOMMERCE)
 
@@ -724,7 +576,7 @@ async def create_ecommerce_sale(request: Request, sale_data: SaleCreate, db: Ses
         db_sale = Sale(
             sale_number=sale_number,
             user_id=default_user.id,
-            branch_id=default_branch.id,
+            branch_id=plan["branch_id"],  # Sucursal principal del envío
             customer_name=sale_data.customer_name,
             customer_email=sale_data.customer_email,
             customer_phone=sale_data.customer_phone,
@@ -735,98 +587,40 @@ async def create_ecommerce_sale(request: Request, sale_data: SaleCreate, db: Ses
             payment_method_name="Transferencia",  # Todas las ventas e-commerce son por transferencia
             sale_type=actual_sale_type,
             notes=sale_data.notes,
-            order_status=order_status
+            order_status=order_status,
+            fulfillment_policy=plan["policy"],
+            shipment_count=plan["shipment_count"]
         )
         
         db.add(db_sale)
         db.flush()  # Para obtener el ID
         
-        # Crear los items de venta y actualizar stock SOLO para ventas POS confirmadas
-        for item_data in validated_items:
-            # Crear item de venta
-            sale_item = SaleItem(
+        # Crear los items de venta: uno por línea y sucursal de envío
+        # (una línea repartida entre sucursales genera varios SaleItems)
+        for allocation in plan["allocations"]:
+            item_data = validated_items[allocation["line_index"]]
+            db.add(SaleItem(
                 sale_id=db_sale.id,
                 product_id=item_data["product"].id,
-                quantity=item_data["quantity"],
+                quantity=allocation["quantity"],
                 unit_price=item_data["unit_price"],
-                total_price=item_data["total_price"],
-                size=item_data["size"]
-            )
-            db.add(sale_item)
-            
-            # Descontar stock solo para ventas confirmadas
-            # is_confirmed=True: Venta coordinada desde admin e-commerce -> descuenta stock
-            # is_confirmed=False: Venta desde sitio web público -> NO descuenta stock (pendiente de confirmación)
+                total_price=item_data["unit_price"] * allocation["quantity"],
+                size=item_data["size"],
+                fulfillment_branch_id=allocation["branch_id"]
+            ))
+        
+        # Reservar stock (hold con TTL) en las sucursales asignadas.
+        # is_confirmed=False: Venta desde sitio web público -> la reserva retiene
+        #   el stock hasta que se confirme el pago, se cancele o venza
+        # is_confirmed=True: Venta coordinada desde admin e-commerce -> la reserva
+        #   se convierte en el acto en descuento de stock
+        reservation_service = ReservationService(db)
+        try:
+            reservation_service.reserve(sale_id=db_sale.id, lines=plan["allocations"])
             if is_confirmed:
-                # Actualizar stock del producto
-                product = item_data["product"]
-                
-                # Update stock based on whether product has sizes
-                if product.has_sizes and item_data["size"]:
-                    # Update size-specific stock
-                    size_stock = db.query(ProductSize).filter(
-                        ProductSize.product_id == product.id,
-                        ProductSize.branch_id == default_branch.id,
-                        ProductSize.size == item_data["size"]
-                    ).first()
-                    
-                    if size_stock:
-                        old_size_stock = size_stock.stock_quantity
-                        new_size_stock = old_size_stock - item_data["quantity"]
-                        size_stock.stock_quantity = new_size_stock
-                        
-                        # Actualizar BranchStock correspondiente (buscar sucursal con stock)
-                        branch_stock = db.query(BranchStock).filter(
-                            BranchStock.product_id == product.id,
-                            BranchStock.stock_quantity >= item_data["quantity"]
-                        ).first()
-                        
-                        if branch_stock:
-                            branch_stock.stock_quantity -= item_data["quantity"]
-                        
-                        # Create inventory movement for size stock con branch_id específico
-                        inventory_movement = InventoryMovement(
-                            product_id=product.id,
-                            branch_id=branch_stock.branch_id if branch_stock else size_stock.branch_id,
-                            movement_type="OUT",
-                            quantity=item_data["quantity"],
-                            previous_stock=old_size_stock,
-                            new_stock=new_size_stock,
-                            reference_id=db_sale.id,
-                            reference_type="SALE",
-                            notes=f"Venta E-commerce #{db_sale.sale_number or db_sale.id} - Talle {item_data['size']}"
-                        )
-                        db.add(inventory_movement)
-                else:
-                    # Para productos sin talles, descontar de la primera sucursal con stock disponible
-                    branch_stock = db.query(BranchStock).filter(
-                        BranchStock.product_id == product.id,
-                        BranchStock.stock_quantity >= item_data["quantity"]
-                    ).first()
-                    
-                    if not branch_stock:
-                        raise HTTPException(
-                            status_code=400,
-                            detail=f"No hay stock disponible en ninguna sucursal para {product.name}"
-                        )
-                    
-                    previous_stock = branch_stock.stock_quantity
-                    branch_stock.stock_quantity -= item_data["quantity"]
-                    new_stock = branch_stock.stock_quantity
-                    
-                    # Create inventory movement con branch_id específico
-                    inventory_movement = InventoryMovement(
-                        product_id=product.id,
-                        branch_id=branch_stock.branch_id,
-                        movement_type="OUT",
-                        quantity=item_data["quantity"],
-                        previous_stock=previous_stock,
-                        new_stock=new_stock,
-                        reference_id=db_sale.id,
-                        reference_type="SALE",
-                        notes=f"Venta E-commerce #{db_sale.sale_number or db_sale.id}"
-                    )
-                    db.add(inventory_movement)
+                reservation_service.convert(db_sale.id, db_sale.sale_number)
+        except InsufficientStockError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # Solo crear registro de WhatsApp para ventas NO confirmadas (pendientes de coordinación)
         # Las ventas confirmadas (is_confirmed=True) ya fueron coordinadas y no requieren WhatsApp
@@ -907,18 +701,9 @@ async def create_ecommerce_sale(request: Request, sale_data: SaleCreate, db: Ses
                 # Si hay error creando el registro de WhatsApp, log pero no fallar la venta
                 print(f"Error creando registro de WhatsApp para venta {db_sale.id}: {str(e)}")
         
-        # Recalcular stock global de todos los productos modificados
-        processed_products = set()
-        for item_data in validated_items:
-            product_id = item_data["product"].id
-            if product_id not in processed_products:
-                product = db.query(Product).filter(Product.id == product_id).first()
-                if product:
-                    product.stock_quantity = product.calculate_total_stock()
-                    processed_products.add(product_id)
-        
         db.commit()
         db.refresh(db_sale)
+        sales_created.inc("ecommerce")
         
         # Enviar notificación WebSocket para nuevas ventas
         try:
@@ -932,16 +717,7 @@ async def create_ecommerce_sale(request: Request, sale_data: SaleCreate, db: Ses
             # No fallar la venta si hay error en WebSocket
             print(f"Error enviando notificación WebSocket: {str(e)}")
         
-        return {
-            "id": db_sale.id,
-            "sale_id": db_sale.id,
-            "sale_number": db_sale.sale_number,
-            "total_amount": float(db_sale.total_amount),
-            "customer_name": db_sale.customer_name,
-            "order_status": db_sale.order_status,
-            "created_at": db_sale.created_at.isoformat(),
-            "whatsapp_sale_id": whatsapp_sale_id  # Incluir ID del registro de WhatsApp si se creó
-        }
+        return ecommerce_sale_response(db_sale, whatsapp_sale_id)
         
     except HTTPException:
         db.rollback()
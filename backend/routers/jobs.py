@@ -0,0 +1,98 @@
+"""
+Router de Trabajos en Segundo Plano - Estado y Cancelación.
+
+Consulta de trabajos encolados por endpoints pesados (importaciones,
+actualizaciones masivas de precios) y ejecutados por job_worker.py.
+
+Endpoints:
+    GET /jobs: Lista trabajos del usuario (ADMIN ve todos)
+    GET /jobs/{id}: Estado, progreso y resultado de un trabajo
+    POST /jobs/{id}/cancel: Cancelar trabajo pendiente o en curso
+
+Permisos:
+    - Todos los endpoints requieren autenticación
+    - Usuarios ven y cancelan solo sus trabajos (salvo ADMIN)
+
+Polling recomendado:
+    Consultar GET /jobs/{id} cada 1-2 segundos hasta que status sea
+    COMPLETED, FAILED o CANCELLED.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from database import get_db
+from auth_compat import get_current_active_user
+from app.models import User, UserRole, BackgroundJob
+from app.schemas import JobResponse
+from app.services.job_service import JobService
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def _get_visible_job(db: Session, job_id: int, current_user: User) -> BackgroundJob:
+    """Obtener trabajo validando que el usuario pueda verlo."""
+    job = JobService(db).get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    if current_user.role != UserRole.ADMIN and job.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="No tiene permisos para ver este trabajo")
+    return job
+
+
+@router.get("/", response_model=List[JobResponse])
+async def get_jobs(
+    job_type: Optional[str] = None,
+    status: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Listar trabajos más recientes primero.
+
+    Parámetros:
+    - job_type: Filtrar por tipo (product_import, bulk_price_update, ...)
+    - status: Filtrar por estado (PENDING, RUNNING, COMPLETED, FAILED, CANCELLED)
+    """
+    user_id = None if current_user.role == UserRole.ADMIN else current_user.id
+    return JobService(db).list_jobs(
+        user_id=user_id, job_type=job_type, status=status, skip=skip, limit=limit
+    )
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Obtener estado de un trabajo: progreso, intentos, resultado o error.
+    """
+    return _get_visible_job(db, job_id, current_user)
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Cancelar un trabajo.
+
+    - PENDING: se cancela inmediatamente
+    - RUNNING: se solicita cancelación; el worker la aplica en el próximo
+      reporte de progreso (los cambios del trabajo se revierten)
+    - Finalizado: 409
+    """
+    job = _get_visible_job(db, job_id, current_user)
+    if job.is_finished():
+        raise HTTPException(status_code=409, detail=f"El trabajo ya finalizó ({job.status})")
+    return JobService(db).cancel(job_id)
@@ -60,6 +60,7 @@ from app.schemas import (
     NotificationBulkDelete
 )
 from app.services.notification_service import NotificationService
+from app.services.job_service import JobService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -404,12 +405,16 @@ async def trigger_backup_reminder(
 @router.post("/admin/cleanup-old")
 async def cleanup_old_notifications(
     days: int = Query(30, ge=1, le=365),
+    background: bool = Query(False, description="Encolar en job_worker en lugar de ejecutar en la request"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Limpiar notificaciones antiguas leídas.
     Solo disponible para administradores.
+
+    Con background=true se encola un trabajo notification_cleanup y se
+    retorna su ID (consultar en GET /jobs/{job_id}).
     """
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -417,6 +422,20 @@ async def cleanup_old_notifications(
             detail="Only administrators can perform this action"
         )
 
+    if background:
+        job = JobService(db).enqueue(
+            "notification_cleanup",
+            payload={"days": days},
+            user_id=current_user.id,
+            priority=JobService.PRIORITY_LOW
+        )
+        return {
+            "message": "Cleanup queued.",
+            "job_id": job.id,
+            "status_url": f"/jobs/{job.id}",
+            "days": days
+        }
+
     service = NotificationService(db)
     count = service.cleanup_old_notifications(days)
 
@@ -14,6 +14,7 @@ Endpoints:
     PATCH /products/{id}/toggle: Activar/desactivar
     GET /products/search: Búsqueda full-text (nombre, SKU, barcode)
     GET /products/brands: Marcas únicas de productos
+    GET /products/sync: Cambios del catálogo desde un cursor (cajas POS)
     
     === STOCK MANAGEMENT ===
     POST /products/{id}/adjust-stock: Ajustar stock (entrada/salida/ajuste)
@@ -29,7 +30,9 @@ Endpoints:
     POST /products/import: Importar productos desde Excel (rate limited)
     GET /products/import/template: Descargar template Excel
     GET /products/import/history: Historial de importaciones
+    POST /products/import/async: Encolar importación (ver /jobs/{id})
     POST /products/bulk-update-prices: Actualizar precios masivamente
+    POST /products/bulk-price-update/async: Encolar actualización de precios
     POST /products/bulk-update-visibility: Toggle show_in_ecommerce masivo
     
     === INVENTORY ===
@@ -96,11 +99,9 @@ Schemas Especiales:
     - StockAdjustment: Ajuste de stock con tipo y notas
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_, func, distinct
 from typing import List, Optional
-import pandas as pd
-import io
 from datetime import datetime
 from database import get_db
 from app.models import Product, User, InventoryMovement, BranchStock, ProductSize, ImportLog, Category, Branch, Brand
@@ -109,8 +110,12 @@ from app.schemas import (
     InventoryMovement as InventoryMovementSchema, StockAdjustment,
     BulkImportResponse, ProductImportData, BranchStock as BranchStockSchema,
     ProductSize as ProductSizeSchema, UpdateSizeStocks, ProductWithMultiBranchStock,
-    BulkPriceUpdateRequest, BulkPriceUpdateResponse
+    BulkPriceUpdateRequest, BulkPriceUpdateResponse, JobEnqueuedResponse
 )
+from app.services.catalog_sync_service import CatalogSyncService
+from app.services.bulk_operations_service import BulkOperationsService, read_import_file
+from app.services.job_service import JobService
+from app.services.stock_consistency_service import bulk_stock_mode, sync_stock_total
 from auth_compat import get_current_active_user, require_manager_or_admin, require_stock_management_permission
 from websocket_manager import notify_inventory_change, notify_low_stock
 from config.rate_limit import limiter, RateLimits
@@ -376,6 +381,22 @@ async def get_products_with_multi_branch_stock(
     products = db.query(Product).filter(Product.is_active == True).offset(skip).limit(limit).all()
     branches = db.query(Branch).filter(Branch.is_active == True).all()
     
+    # Stock de toda la página en dos consultas (sin una por producto)
+    product_ids = [product.id for product in products]
+    size_totals_by_product = {}
+    for product_id, branch_id, quantity in db.query(
+        ProductSize.product_id, ProductSize.branch_id, func.sum(ProductSize.stock_quantity)
+    ).filter(
+        ProductSize.product_id.in_(product_ids)
+    ).group_by(ProductSize.product_id, ProductSize.branch_id):
+        size_totals_by_product.setdefault(product_id, {})[branch_id] = int(quantity or 0)
+    
+    branch_stocks_by_product = {}
+    for branch_stock in db.query(BranchStock).options(joinedload(BranchStock.branch)).filter(
+        BranchStock.product_id.in_(product_ids)
+    ):
+        branch_stocks_by_product.setdefault(branch_stock.product_id, []).append(branch_stock)
+    
     result = []
     for product in products:
         branch_stock_data = []
@@ -383,17 +404,12 @@ async def get_products_with_multi_branch_stock(
         
         if product.has_sizes:
             # Para productos con talles, usar ProductSize
-            product_sizes = db.query(ProductSize).filter(
-                ProductSize.product_id == product.id
-            ).all()
+            size_totals = size_totals_by_product.get(product.id, {})
             
             # Agrupar por sucursal
             branch_totals = {}
             for branch in branches:
-                branch_total = sum(
-                    ps.stock_quantity for ps in product_sizes 
-                    if ps.branch_id == branch.id
-                )
+                branch_total = size_totals.get(branch.id, 0)
                 branch_totals[branch.id] = branch_total
                 total_stock += branch_total
                 
@@ -405,9 +421,7 @@ async def get_products_with_multi_branch_stock(
                 })
         else:
             # Para productos sin talles, usar BranchStock
-            branch_stocks = db.query(BranchStock).filter(
-                BranchStock.product_id == product.id
-            ).all()
+            branch_stocks = branch_stocks_by_product.get(product.id, [])
             
             if branch_stocks:
                 total_stock = sum(bs.stock_quantity for bs in branch_stocks)
@@ -442,6 +456,30 @@ async def get_products_with_multi_branch_stock(
     
     return result
 
+@router.get("/sync")
+async def sync_catalog(
+    cursor: Optional[str] = None,
+    branch_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=2000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Sincronización incremental del catálogo para las cajas.
+
+    Sin cursor (o con uno inválido/vencido) devuelve el snapshot completo
+    (full=true) paginado. Con el cursor de la respuesta anterior devuelve
+    solo los productos cuyo precio, datos o stock de la sucursal cambiaron
+    (upserts) y los dados de baja (deleted). Mientras has_more sea true,
+    seguir pidiendo con el cursor recibido; guardar el último cursor para
+    la próxima sincronización.
+    """
+    branch_id = branch_id or current_user.branch_id or 1
+    if not db.query(Branch.id).filter(Branch.id == branch_id).first():
+        raise HTTPException(status_code=404, detail="Branch not found")
+
+    return CatalogSyncService(db).changes(branch_id, cursor=cursor, limit=limit)
+
 @router.get("/{product_id}", response_model=ProductSchema)
 async def get_product(
     product_id: int,
@@ -537,8 +575,8 @@ async def create_product(
             )
             db.add(branch_stock)
 
-        # Actualizar el stock global del producto
-        db_product.stock_quantity = initial_stock
+        # Stock global: lo mantienen los triggers a partir de BranchStock
+        sync_stock_total(db, db_product)
 
         db.commit()
         db.refresh(db_product)
@@ -654,15 +692,28 @@ async def adjust_product_stock(
     if stock_data.new_stock < 0:
         raise HTTPException(status_code=400, detail="Stock cannot be negative")
     
-    old_stock = product.stock_quantity
+    if product.has_sizes:
+        raise HTTPException(
+            status_code=400,
+            detail="Products with sizes are adjusted per size (POST /products/{id}/sizes)"
+        )
+    
+    # The adjustment applies to the current user's branch (the product total follows via triggers)
+    user_branch_id = current_user.branch_id or 1
+    branch_stock = db.query(BranchStock).filter(
+        BranchStock.product_id == product.id,
+        BranchStock.branch_id == user_branch_id
+    ).first()
+    old_stock = branch_stock.stock_quantity if branch_stock else 0
     
     if old_stock != stock_data.new_stock:
         movement_type = "IN" if stock_data.new_stock > old_stock else "OUT"
         quantity = abs(stock_data.new_stock - old_stock)
         
-        # Create inventory movement
+        # Create inventory movement for the branch row
         inventory_movement = InventoryMovement(
             product_id=product.id,
+            branch_id=user_branch_id,
             movement_type=movement_type,
             quantity=quantity,
             previous_stock=old_stock,
@@ -672,34 +723,22 @@ async def adjust_product_stock(
         )
         db.add(inventory_movement)
         
-        # Update product stock
-        product.stock_quantity = stock_data.new_stock
+        if branch_stock:
+            # Update existing BranchStock
+            branch_stock.stock_quantity = stock_data.new_stock
+            print(f"📦 Updated BranchStock for product {product.id} in branch {user_branch_id}: {old_stock} → {stock_data.new_stock}")
+        else:
+            # Create new BranchStock entry
+            branch_stock = BranchStock(
+                product_id=product.id,
+                branch_id=user_branch_id,
+                stock_quantity=stock_data.new_stock,
+                min_stock=product.min_stock
+            )
+            db.add(branch_stock)
+            print(f"📦 Created new BranchStock for product {product.id} in branch {user_branch_id}: {stock_data.new_stock}")
         
-        # For products without sizes, also update BranchStock for current user's branch
-        if not product.has_sizes:
-            user_branch_id = current_user.branch_id or 1
-            
-            # Find or create BranchStock for this product and branch
-            branch_stock = db.query(BranchStock).filter(
-                BranchStock.product_id == product.id,
-                BranchStock.branch_id == user_branch_id
-            ).first()
-            
-            if branch_stock:
-                # Update existing BranchStock
-                old_branch_stock = branch_stock.stock_quantity
-                branch_stock.stock_quantity = stock_data.new_stock
-                print(f"📦 Updated BranchStock for product {product.id} in branch {user_branch_id}: {old_branch_stock} → {stock_data.new_stock}")
-            else:
-                # Create new BranchStock entry
-                branch_stock = BranchStock(
-                    product_id=product.id,
-                    branch_id=user_branch_id,
-                    stock_quantity=stock_data.new_stock,
-                    min_stock=product.min_stock
-                )
-                db.add(branch_stock)
-                print(f"📦 Created new BranchStock for product {product.id} in branch {user_branch_id}: {stock_data.new_stock}")
+        sync_stock_total(db, product)
         
         db.commit()
         db.refresh(product)
@@ -709,7 +748,7 @@ async def adjust_product_stock(
             product_id=product.id,
             old_stock=old_stock,
             new_stock=stock_data.new_stock,
-            branch_id=current_user.branch_id or 1,
+            branch_id=user_branch_id,
             user_name=current_user.full_name
         )
         
@@ -720,7 +759,7 @@ async def adjust_product_stock(
                 product_name=product.name,
                 current_stock=stock_data.new_stock,
                 min_stock=product.min_stock,
-                branch_id=current_user.branch_id or 1
+                branch_id=user_branch_id
             )
     
     return {
@@ -746,13 +785,11 @@ async def import_products_preview(
         )
     
     try:
-        # Leer archivo
+        # Leer archivo (pandas se importa recién acá, no al arrancar la API)
+        import pandas as pd
+
         content = await file.read()
-        
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-        else:
-            df = pd.read_excel(io.BytesIO(content))
+        df = read_import_file(file.filename, content)
         
         # Validar columnas requeridas
         required_columns = ['codigo_barra', 'modelo', 'efectivo']
@@ -942,6 +979,7 @@ async def import_products_bulk(
     Columnas esperadas: codigo_barra, modelo, efectivo
     
     Rate limit: 10 imports per hour to prevent system overload.
+    Para archivos grandes usar POST /products/import/async.
     """
     if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
         raise HTTPException(
@@ -962,139 +1000,73 @@ async def import_products_bulk(
     try:
         # Leer archivo
         content = await file.read()
+        df = read_import_file(file.filename, content)
         
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-        else:
-            df = pd.read_excel(io.BytesIO(content))
-        
-        # Validar columnas requeridas
-        required_columns = ['codigo_barra', 'modelo', 'efectivo']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            import_log.status = "FAILED"
-            import_log.error_details = f"Columnas faltantes: {', '.join(missing_columns)}"
-            import_log.completed_at = datetime.now()
-            db.commit()
-            raise HTTPException(
-                status_code=400,
-                detail=f"Columnas requeridas faltantes: {', '.join(missing_columns)}"
-            )
-        
-        # Procesar productos
-        total_rows = len(df)
-        successful_rows = 0
-        failed_rows = 0
-        errors = []
-        
-        # Obtener o crear categoría "Importados"
-        category = db.query(Category).filter(Category.name == "Importados").first()
-        if not category:
-            category = Category(name="Importados", description="Productos importados masivamente")
-            db.add(category)
-            db.commit()
-            db.refresh(category)
-        
-        for index, row in df.iterrows():
-            try:
-                # Validar datos
-                if pd.isna(row['codigo_barra']) or pd.isna(row['modelo']) or pd.isna(row['efectivo']):
-                    failed_rows += 1
-                    errors.append({
-                        "row": index + 1,
-                        "error": "Datos requeridos faltantes"
-                    })
-                    continue
-                
-                codigo_barra = str(row['codigo_barra']).strip()
-                modelo = str(row['modelo']).strip()
-                precio = float(row['efectivo'])
-                
-                # Verificar si el producto ya existe por código de barras
-                existing_product = db.query(Product).filter(Product.barcode == codigo_barra).first()
-                if existing_product:
-                    failed_rows += 1
-                    errors.append({
-                        "row": index + 1,
-                        "error": f"Producto con código de barras {codigo_barra} ya existe"
-                    })
-                    continue
-                
-                # Crear SKU único basado en el modelo
-                sku_base = modelo.replace(' ', '_').upper()
-                sku_counter = 1
-                sku = sku_base
-                
-                while db.query(Product).filter(Product.sku == sku).first():
-                    sku = f"{sku_base}_{sku_counter}"
-                    sku_counter += 1
-                
-                # Crear producto con stock en 0 (se configurará por sucursal)
-                product = Product(
-                    name=modelo,
-                    sku=sku,
-                    barcode=codigo_barra,
-                    price=precio,
-                    cost=precio * 0.7,  # Costo estimado al 70% del precio
-                    stock_quantity=0,  # Stock global inicial 0
-                    min_stock=5,
-                    category_id=category.id,
-                    has_sizes=False
-                )
-
-                db.add(product)
-                db.flush()  # Para obtener el ID del producto
-
-                # Crear BranchStock en 0 para todas las sucursales activas
-                active_branches = db.query(Branch).filter(Branch.is_active == True).all()
-
-                for branch in active_branches:
-                    branch_stock = BranchStock(
-                        product_id=product.id,
-                        branch_id=branch.id,
-                        stock_quantity=0,  # Stock inicial en 0 para cada sucursal
-                        min_stock=product.min_stock
-                    )
-                    db.add(branch_stock)
-
-                successful_rows += 1
-                
-            except Exception as e:
-                failed_rows += 1
-                errors.append({
-                    "row": index + 1,
-                    "error": str(e)
-                })
-        
-        # Actualizar log de importación
-        import_log.total_rows = total_rows
-        import_log.successful_rows = successful_rows
-        import_log.failed_rows = failed_rows
-        import_log.status = "COMPLETED"
-        import_log.completed_at = datetime.now()
-        
-        if errors:
-            import_log.error_details = f"Errores en {len(errors)} filas"
-        
-        db.commit()
+        result = BulkOperationsService(db).import_legacy_products(df, import_log)
         
         return BulkImportResponse(
             import_log_id=import_log.id,
-            message=f"Importación completada: {successful_rows} exitosos, {failed_rows} fallidos",
-            total_rows=total_rows,
-            successful_rows=successful_rows,
-            failed_rows=failed_rows,
-            errors=errors[:10]  # Solo los primeros 10 errores
+            message=f"Importación completada: {result['successful_rows']} exitosos, {result['failed_rows']} fallidos",
+            total_rows=result["total_rows"],
+            successful_rows=result["successful_rows"],
+            failed_rows=result["failed_rows"],
+            errors=result["errors"][:10]  # Solo los primeros 10 errores
         )
         
     except Exception as e:
+        db.rollback()
         import_log.status = "FAILED"
         import_log.error_details = str(e)
         import_log.completed_at = datetime.now()
         db.commit()
         raise HTTPException(status_code=500, detail=f"Error procesando archivo: {str(e)}")
 
+@router.post("/import/async", response_model=JobEnqueuedResponse, status_code=202)
+@limiter.limit(RateLimits.BULK_IMPORT)  # 10 requests per hour
+async def import_products_bulk_async(
+    request: Request,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_manager_or_admin)
+):
+    """
+    Encolar importación masiva de productos (mismo formato que /products/import).
+    
+    El archivo se guarda en la cola de trabajos y lo procesa job_worker.py,
+    sin ocupar un worker HTTP ni una conexión del pool durante la importación.
+    Consultar el avance en GET /jobs/{job_id}; el resultado final queda
+    además en el ImportLog devuelto.
+    """
+    if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
+        raise HTTPException(
+            status_code=400, 
+            detail="Formato de archivo no soportado. Use CSV o Excel."
+        )
+    
+    import_log = ImportLog(
+        filename=file.filename,
+        user_id=current_user.id,
+        status="PROCESSING"
+    )
+    db.add(import_log)
+    db.commit()
+    db.refresh(import_log)
+    
+    job = JobService(db).enqueue(
+        "product_import",
+        payload={"filename": file.filename, "import_log_id": import_log.id},
+        user_id=current_user.id,
+        input_data=await file.read()
+    )
+    
+    return JobEnqueuedResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        status_url=f"/jobs/{job.id}",
+        import_log_id=import_log.id
+    )
+
 @router.get("/{product_id}/stock-by-branch")
 async def get_product_stock_by_branch(
     product_id: int,
@@ -1157,14 +1129,14 @@ async def get_product_sizes_by_branch(
     # Obtener todas las sucursales activas
     branches = db.query(Branch).filter(Branch.is_active == True).all()
     
-    # Obtener todos los talles para este producto en todas las sucursales
+    # Obtener todos los talles para este producto en todas las sucursales (ya ordenados)
     product_sizes = db.query(ProductSize).filter(
         ProductSize.product_id == product_id
-    ).all()
+    ).order_by(ProductSize.sort_rank, ProductSize.size).all()
     
     # Organizar datos por sucursal y talle
     branch_data = {}
-    all_sizes = set()
+    all_sizes = {}
     
     for branch in branches:
         branch_data[branch.id] = {
@@ -1177,7 +1149,7 @@ async def get_product_sizes_by_branch(
     for size_stock in product_sizes:
         branch_id = size_stock.branch_id
         size = size_stock.size
-        all_sizes.add(size)
+        all_sizes.setdefault(size, None)
         
         if branch_id in branch_data:
             branch_data[branch_id]["sizes"][size] = {
@@ -1185,10 +1157,8 @@ async def get_product_sizes_by_branch(
                 "stock_quantity": size_stock.stock_quantity
             }
     
-    # Convertir all_sizes a lista ordenada
-    all_sizes_list = sorted(list(all_sizes), key=lambda x: (
-        int(x) if x.isdigit() else ord(x[0]) if len(x) == 1 else len(x)
-    ))
+    # Talles en el orden de la consulta (sort_rank)
+    all_sizes_list = list(all_sizes)
     
     # Asegurarse de que todas las sucursales tengan todos los talles (con stock 0 si no existen)
     for branch_id in branch_data:
@@ -1244,46 +1214,36 @@ async def get_available_sizes_for_pos(
     # Get sizes with stock > 0 for current branch
     branch_id = current_user.branch_id or 1
     
-    # Get all sizes with stock for this product and branch
-    available_sizes = db.query(ProductSize).filter(
+    # Get all sizes with stock for this product and branch, ordered by the indexed rank
+    available_sizes = db.query(ProductSize.size, ProductSize.stock_quantity).filter(
         ProductSize.product_id == product_id,
         ProductSize.branch_id == branch_id,
         ProductSize.stock_quantity > 0
-    ).all()
-    
-    # Simple sorting: numeric first, then alphabetic
-    def sort_key(size_obj):
-        size = size_obj.size
-        try:
-            return (0, int(size))  # Numeric sizes first
-        except ValueError:
-            return (1, size)  # Then alphabetic (XS, S, M, L, etc.)
-    
-    sorted_sizes = sorted(available_sizes, key=sort_key)
+    ).order_by(ProductSize.sort_rank, ProductSize.size).all()
     
     # Build response
     sizes_list = [
         {
-            "size": size.size,
-            "stock_quantity": size.stock_quantity
+            "size": size,
+            "stock_quantity": stock_quantity
         }
-        for size in sorted_sizes
+        for size, stock_quantity in available_sizes
     ]
     
-    # Get all valid sizes for this category
-    from utils.size_validators import get_valid_sizes_for_product, get_size_display_info
-    all_valid_sizes = get_valid_sizes_for_product(db, product_id)
-    size_info = get_size_display_info(product.category.name if product.category else "")
+    # Get all valid sizes for this category (precomputed tables, no extra query)
+    from utils.size_validators import get_valid_sizes_for_category, get_size_display_info
+    category_name = product.category.name if product.category else None
+    size_info = get_size_display_info(category_name or "")
     
     return {
         "product_id": product_id,
         "product_name": product.name,
         "has_sizes": True,
-        "category_name": product.category.name if product.category else None,
+        "category_name": category_name,
         "category_type": size_info.get("category_type"),
         "size_type_label": size_info.get("size_type_label"),
         "available_sizes": sizes_list,
-        "all_valid_sizes": all_valid_sizes
+        "all_valid_sizes": get_valid_sizes_for_category(category_name) if category_name else []
     }
 
 def calculate_total_stock_from_sizes(db: Session, product_id: int, branch_id: int) -> int:
@@ -1318,50 +1278,52 @@ async def manage_product_sizes(
     
     branch_id = current_user.branch_id or 1
     
-    # Validar talles según la categoría del producto
-    from utils.size_validators import validate_sizes_for_product, get_size_display_info
+    # Validar la grilla de talles según la categoría del producto (diferencia de conjuntos)
+    from utils.size_validators import validate_sizes_for_category, get_size_display_info
     
+    category_name = product.category.name if product.category else None
     sizes_to_validate = [size_info.size for size_info in size_data.sizes]
-    validation_result = validate_sizes_for_product(db, sizes_to_validate, product_id)
+    validation_result = validate_sizes_for_category(sizes_to_validate, category_name or "")
     
     if validation_result["invalid"]:
-        size_info = get_size_display_info(product.category.name if product.category else "")
+        size_info = get_size_display_info(category_name or "")
         raise HTTPException(
             status_code=400,
-            detail=f"Talles inválidos para esta categoría ({product.category.name if product.category else 'Sin categoría'}): {', '.join(validation_result['invalid'])}. Talles válidos: {', '.join(size_info['valid_sizes'])}"
+            detail=f"Talles inválidos para esta categoría ({category_name or 'Sin categoría'}): {', '.join(validation_result['invalid'])}. Talles válidos: {', '.join(size_info['valid_sizes'])}"
         )
     
-    # Actualizar o crear stock por talle
-    for size_info in size_data.sizes:
-        existing_size = db.query(ProductSize).filter(
+    # Actualizar o crear stock por talle (una consulta para toda la grilla)
+    existing_sizes = {
+        size.size: size for size in db.query(ProductSize).filter(
             ProductSize.product_id == product_id,
-            ProductSize.branch_id == branch_id,
-            ProductSize.size == size_info.size
-        ).first()
-        
-        if existing_size:
-            existing_size.stock_quantity = size_info.stock_quantity
-            existing_size.updated_at = datetime.now()
-        else:
-            new_size = ProductSize(
-                product_id=product_id,
-                branch_id=branch_id,
-                size=size_info.size,
-                stock_quantity=size_info.stock_quantity
-            )
-            db.add(new_size)
+            ProductSize.branch_id == branch_id
+        ).all()
+    }
     
-    # Commit los cambios de talles primero
-    db.commit()
+    # Triggers de stock en modo masivo: un único delta para products
+    with bulk_stock_mode(db):
+        for size_info in size_data.sizes:
+            existing_size = existing_sizes.get(size_info.size)
+            
+            if existing_size:
+                existing_size.stock_quantity = size_info.stock_quantity
+                existing_size.updated_at = datetime.now()
+            else:
+                new_size = ProductSize(
+                    product_id=product_id,
+                    branch_id=branch_id,
+                    size=size_info.size,
+                    stock_quantity=size_info.stock_quantity
+                )
+                db.add(new_size)
+        db.flush()
     
-    # Calcular y actualizar el stock general del producto (suma de TODAS las sucursales)
+    # Stock general del producto (suma de TODAS las sucursales): ya lo
+    # aplicaron los triggers al enviar los talles
     old_stock = product.stock_quantity
-    # Usar el método del modelo que suma todas las sucursales
-    total_stock = product.calculate_total_stock()
-    product.stock_quantity = total_stock
+    total_stock = sync_stock_total(db, product)
     product.updated_at = datetime.now()
     
-    # Commit el cambio del stock general
     db.commit()
     
     # Notificar cambio de inventario via WebSocket
@@ -1400,7 +1362,7 @@ async def get_product_sizes(
     sizes = db.query(ProductSize).filter(
         ProductSize.product_id == product_id,
         ProductSize.branch_id == branch_id
-    ).all()
+    ).order_by(ProductSize.sort_rank, ProductSize.size).all()
     
     return {
         "product_id": product_id,
@@ -1483,9 +1445,8 @@ async def adjust_branch_stock(
     )
     db.add(movement)
     
-    # Recalcular stock global del producto
-    total_stock = product.calculate_total_stock()
-    product.stock_quantity = total_stock
+    # Stock global del producto: lo mantienen los triggers a partir de BranchStock
+    total_stock = sync_stock_total(db, product)
     
     db.commit()
     
@@ -1549,7 +1510,7 @@ async def get_all_products_stock_by_branch(
                 "branch_name": bs.branch.name,
                 "stock_quantity": bs.stock_quantity,
                 "available_stock": bs.available_stock,
-                # "reserved_stock": bs.reserved_stock,
+                "reserved_stock": bs.reserved_stock,
                 "min_stock": bs.min_stock,
                 "low_stock": bs.stock_quantity <= bs.min_stock
             }
@@ -1578,6 +1539,8 @@ async def bulk_price_update(
     - Productos específicos de una marca (brand="Nike", product_ids=[1,2,3])
     - Productos específicos sin filtro de marca (brand=None, product_ids=[1,2,3])
 
+    Para catálogos grandes usar POST /products/bulk-price-update/async.
+
     Args:
         update_data: Datos de actualización (marca, productos, porcentaje)
 
@@ -1585,101 +1548,36 @@ async def bulk_price_update(
         Respuesta con productos actualizados y errores
     """
     try:
-        updated_products = []
-        errors = []
-
-        # Construir query base
-        query = db.query(Product).filter(Product.is_active == True)
-
-        # Filtrar por marca si se especifica (buscar en ambos campos)
-        if update_data.brand:
-            query = query.outerjoin(Brand, Product.brand_id == Brand.id).filter(
-                or_(
-                    func.lower(Product.brand) == func.lower(update_data.brand),
-                    func.lower(Brand.name) == func.lower(update_data.brand)
-                )
-            )
-
-        # Filtrar por IDs de productos si se especifican
-        if update_data.product_ids:
-            query = query.filter(Product.id.in_(update_data.product_ids))
-
-        # Obtener productos a actualizar
-        products_to_update = query.all()
-
-        if not products_to_update:
-            return BulkPriceUpdateResponse(
-                message="No se encontraron productos para actualizar",
-                total_products_updated=0,
-                updated_products=[],
-                errors=[]
-            )
-
-        # Calcular factor de multiplicación
-        multiplier = 1 + (update_data.percentage / 100)
-
-        # Actualizar cada producto
-        for product in products_to_update:
-            try:
-                old_price = float(product.price)
-                old_ecommerce_price = float(product.ecommerce_price) if product.ecommerce_price else None
-
-                # Actualizar precio principal
-                new_price = round(old_price * multiplier, 2)
-                product.price = new_price
-
-                # Actualizar precio de ecommerce si se solicita
-                new_ecommerce_price = None
-                if update_data.update_ecommerce_price and product.ecommerce_price:
-                    new_ecommerce_price = round(float(product.ecommerce_price) * multiplier, 2)
-                    product.ecommerce_price = new_ecommerce_price
-
-                product.updated_at = datetime.now()
-
-                updated_products.append({
-                    "id": product.id,
-                    "name": product.name,
-                    "sku": product.sku,
-                    "brand": product.brand_rel.name if product.brand_rel else product.brand,
-                    "old_price": old_price,
-                    "new_price": new_price,
-                    "old_ecommerce_price": old_ecommerce_price,
-                    "new_ecommerce_price": new_ecommerce_price
-                })
-
-            except Exception as e:
-                errors.append({
-                    "product_id": product.id,
-                    "product_name": product.name,
-                    "error": str(e)
-                })
-
-        # Commit los cambios
-        db.commit()
-
-        # Preparar mensaje de respuesta
-        if update_data.brand and update_data.product_ids:
-            message = f"Precios actualizados para {len(updated_products)} productos de la marca {update_data.brand}"
-        elif update_data.brand:
-            message = f"Precios actualizados para {len(updated_products)} productos de la marca {update_data.brand}"
-        elif update_data.product_ids:
-            message = f"Precios actualizados para {len(updated_products)} productos seleccionados"
-        else:
-            message = f"Precios actualizados para {len(updated_products)} productos"
-
-        percentage_sign = "+" if update_data.percentage > 0 else ""
-        message += f" ({percentage_sign}{update_data.percentage}%)"
-
-        return BulkPriceUpdateResponse(
-            message=message,
-            total_products_updated=len(updated_products),
-            updated_products=updated_products,
-            errors=errors
-        )
+        return BulkOperationsService(db).update_prices(update_data)
 
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error al actualizar precios: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/bulk-price-update/async", response_model=JobEnqueuedResponse, status_code=202)
+async def bulk_price_update_async(
+    update_data: BulkPriceUpdateRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_manager_or_admin)
+):
+    """
+    Encolar actualización masiva de precios (mismos parámetros que /bulk-price-update).
+
+    Consultar el avance y el resultado en GET /jobs/{job_id}.
+    """
+    job = JobService(db).enqueue(
+        "bulk_price_update",
+        payload=update_data.model_dump(),
+        user_id=current_user.id,
+        priority=JobService.PRIORITY_HIGH
+    )
+
+    return JobEnqueuedResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        status_url=f"/jobs/{job.id}"
+    )
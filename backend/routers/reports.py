@@ -42,6 +42,11 @@ Características:
     - Validación de permisos automática
     - Manejo de errores HTTP
 
+Base de datos:
+    - Todas las lecturas usan get_read_db: réplica de lectura
+      (READ_DATABASE_URL) con fallback al primario, para no competir con
+      el checkout por el pool del primario
+
 Service Layer:
     - ReportsService: Toda la lógica de negocio
     - Validación de branch_access por rol
@@ -60,7 +65,7 @@ from sqlalchemy.orm import Session
 from datetime import date
 from typing import Optional, List
 
-from database import get_db
+from database import get_read_db
 from app.models import User
 from app.services.reports_service import ReportsService
 from app.schemas.reports import (
@@ -81,7 +86,7 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 @router.get("/dashboard", response_model=DashboardStats)
 async def get_dashboard_stats(
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -115,7 +120,7 @@ async def get_sales_report(
     start_date: date,
     end_date: date,
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -157,7 +162,7 @@ async def get_detailed_sales_report(
     start_date: date,
     end_date: date,
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -201,7 +206,7 @@ async def get_daily_sales(
     start_date: date,
     end_date: date,
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -239,7 +244,7 @@ async def get_products_chart_data(
     end_date: date,
     limit: int = 10,
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -277,7 +282,7 @@ async def get_products_chart_data(
 async def get_branches_chart_data(
     start_date: date,
     end_date: date,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -314,7 +319,7 @@ async def get_brands_chart_data(
     end_date: date,
     limit: int = 10,
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -363,7 +368,7 @@ async def get_sales_list(
     page_size: int = 25,
     order_by: str = "created_at",
     order_dir: str = "desc",
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
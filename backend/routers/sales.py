@@ -6,7 +6,8 @@ Integración con inventario y notificaciones en tiempo real.
 
 Endpoints:
     GET /sales: Lista ventas con filtros avanzados
-    POST /sales: Crear venta (valida stock, actualiza inventario)
+    POST /sales: Crear venta (valida stock, actualiza inventario; acepta Idempotency-Key)
+    POST /sales/offline-batch: Sincronizar lote de ventas de una caja sin conexión
     GET /sales/{id}: Detalle de venta con ítems
     PATCH /sales/{id}/status: Cambiar estado (e-commerce orders)
     DELETE /sales/{id}: Cancelar venta (revierte stock)
@@ -65,17 +66,20 @@ Características:
     - WebSocket real-time updates
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import desc, func, or_
 from typing import List, Optional
 from datetime import datetime, date, time, timedelta
 from decimal import Decimal
-from database import get_db
+from database import get_db, get_read_db
 from app.models import Sale, SaleItem, Product, User, InventoryMovement, SaleType, OrderStatus, ProductSize, BranchStock, Branch
 from app.schemas import Sale as SaleSchema, SaleCreate, SaleStatusUpdate, SalesReport, DashboardStats, DailySales, ChartData
+from app.schemas import OfflineSaleBatch, OfflineSaleBatchResult
 from auth_compat import get_current_active_user, require_manager_or_admin
 from websocket_manager import notify_new_sale, notify_inventory_change, notify_low_stock, notify_dashboard_update
 from app.services.stock_service import StockConflictError
+from app.core.idempotency import idempotent
+from config.settings import settings
 import uuid
 from pydantic import ValidationError
 
@@ -150,7 +154,12 @@ async def get_sales(
             # Only sales WITHOUT WhatsApp record
             query = query.filter(~whatsapp_sale_exists)
 
-    sales = query.order_by(desc(Sale.created_at)).offset(skip).limit(limit).all()
+    # Relaciones del schema cargadas por lote (sin consultas por venta)
+    sales = query.options(
+        selectinload(Sale.branch),
+        selectinload(Sale.user).selectinload(User.branch),
+        selectinload(Sale.sale_items).selectinload(SaleItem.product).selectinload(Product.category)
+    ).order_by(desc(Sale.created_at)).offset(skip).limit(limit).all()
     return sales
 
 @router.get("/{sale_id}", response_model=SaleSchema)
@@ -173,24 +182,28 @@ async def get_sale(
     return sale
 
 @router.post("/", response_model=SaleSchema)
+@idempotent("POST /sales/", response_model=SaleSchema, resource=Sale)
 async def create_sale(
+    request: Request,
     sale: SaleCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Crea venta con validación de stock y optimistic locking.
+    Crea venta con decremento de stock condicional atómico.
     
     Utiliza SaleService para lógica de negocio protegida.
-    Maneja race conditions con HTTP 409 para reintentos del cliente.
+    Deadlocks detectados por la BD se devuelven como HTTP 409 para reintentos del cliente.
+    Los reintentos deben enviar el mismo header Idempotency-Key: si la venta
+    ya se creó, reciben la respuesta original sin volver a descontar stock.
     
     Flujo:
-        1. SaleService valida stock + crea Sale + decrementa inventario (con locking)
+        1. SaleService crea Sale + decrementa inventario de todos los ítems en una transacción
         2. Enviar notificaciones WebSocket
     
     Errors:
         400: Stock insuficiente, producto no existe, validación falla
-        409: Conflicto de stock (otro usuario modificó simultáneamente) - RETRY
+        409: Conflicto de stock (deadlock entre ventas simultáneas) - RETRY
         500: Error interno
     """
     from app.services.sale_service import SaleService
@@ -202,7 +215,7 @@ async def create_sale(
         # Determine branch
         branch_id = sale.branch_id or current_user.branch_id or 1
         
-        # Create sale with stock protection (optimistic locking)
+        # Create sale with atomic stock decrement (all items or none)
         db_sale = sale_service.create_sale(
             sale_data=sale,
             user_id=current_user.id,
@@ -285,6 +298,73 @@ async def create_sale(
             detail=f"Internal server error: {str(e)}"
         )
 
+@router.post("/offline-batch", response_model=OfflineSaleBatchResult)
+async def sync_offline_sales(
+    batch: OfflineSaleBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Sincroniza ventas registradas por una caja sin conexión.
+    
+    Aplica el lote en el orden recibido y en una sola transacción (un
+    SAVEPOINT por venta), por el mismo camino que POST /sales. Devuelve un
+    resultado por venta: las que no tienen stock se informan como
+    stock_conflict y no frenan al resto. Reenviar un lote es seguro: las
+    ventas ya sincronizadas vuelven como duplicate (client_uuid).
+    
+    Errors:
+        400: Lote más grande que OFFLINE_SYNC_MAX_BATCH
+        403: Sucursal distinta a la del usuario (salvo ADMIN)
+        409: Deadlock de stock; no se aplicó nada, reintentar el lote
+    """
+    from app.services.sale_service import SaleService
+
+    if len(batch.sales) > settings.offline_sync_max_batch:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote supera el máximo de {settings.offline_sync_max_batch} ventas"
+        )
+
+    branch_id = batch.branch_id or current_user.branch_id or 1
+    if current_user.role.value != "ADMIN" and current_user.branch_id and branch_id != current_user.branch_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to sync sales for this branch"
+        )
+
+    try:
+        results = SaleService(db).create_offline_batch(
+            sales=batch.sales,
+            user_id=current_user.id,
+            branch_id=branch_id
+        )
+    except StockConflictError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Stock conflict: {str(e)}. No sale of the batch was applied. Please retry the batch."
+        )
+
+    counts = {status_name: 0 for status_name in ("created", "duplicate", "stock_conflict", "error")}
+    for result in results:
+        counts[result["status"]] += 1
+
+    if counts["created"]:
+        # Una sola actualización del dashboard por lote
+        await notify_dashboard_update(
+            branch_id=branch_id,
+            update_type="offline_sync",
+            data={"created": counts["created"], "user_name": current_user.full_name}
+        )
+
+    return {
+        "created": counts["created"],
+        "duplicates": counts["duplicate"],
+        "conflicts": counts["stock_conflict"],
+        "errors": counts["error"],
+        "results": results
+    }
+
 @router.put("/{sale_id}/status")
 async def update_sale_status(
     sale_id: int,
@@ -330,26 +410,21 @@ async def cancel_sale(
     if sale.order_status == OrderStatus.CANCELLED:
         raise HTTPException(status_code=400, detail="Sale already cancelled")
     
-    # Restore inventory
-    for sale_item in sale.sale_items:
-        product = db.query(Product).filter(Product.id == sale_item.product_id).first()
-        if product:
-            old_stock = product.stock_quantity
-            new_stock = old_stock + sale_item.quantity
-            product.stock_quantity = new_stock
-            
-            # Create inventory movement
-            inventory_movement = InventoryMovement(
-                product_id=product.id,
-                movement_type="IN",
-                quantity=sale_item.quantity,
-                previous_stock=old_stock,
-                new_stock=new_stock,
-                reference_id=sale.id,
-                reference_type="SALE_CANCELLATION",
-                notes=f"Sale cancellation {sale.sale_number}"
-            )
-            db.add(inventory_movement)
+    # Pending e-commerce orders only hold reserved stock: release it
+    # instead of restoring inventory that was never deducted
+    from app.services.reservation_service import ReservationService
+    if ReservationService(db).release(sale.id):
+        sale.order_status = OrderStatus.CANCELLED
+        db.commit()
+        return {"message": "Sale cancelled successfully"}
+    
+    # Restore inventory in the branch (and size) each item was taken from;
+    # the stock triggers keep the product total
+    from app.services.inventory_service import adjust_stock_for_sale
+    from app.services.stock_consistency_service import sync_stock_total
+    adjust_stock_for_sale(db, sale, operation="revert")
+    for product in {sale_item.product for sale_item in sale.sale_items}:
+        sync_stock_total(db, product)
     
     # Update sale status
     sale.order_status = OrderStatus.CANCELLED
@@ -360,7 +435,7 @@ async def cancel_sale(
 @router.get("/reports/dashboard", response_model=DashboardStats)
 async def get_dashboard_stats(
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get real-time dashboard statistics from database"""
@@ -481,7 +556,7 @@ async def get_sales_report(
         Product.name,
         func.sum(SaleItem.quantity).label('total_quantity'),
         func.sum(SaleItem.total_price).label('total_revenue')
-    ).join(SaleItem).join(Sale).filter(
+    ).join(SaleItem).join(SaleItem.sale).filter(
         Sale.created_at >= start_date,
         Sale.created_at <= end_datetime,
         Sale.order_status != OrderStatus.CANCELLED,
@@ -596,7 +671,7 @@ async def get_products_chart_data(
     products_query = db.query(
         Product.name,
         func.sum(SaleItem.quantity).label('total_quantity')
-    ).join(SaleItem).join(Sale).filter(
+    ).join(SaleItem).join(SaleItem.sale).filter(
         Sale.created_at >= start_date,
         Sale.created_at <= end_datetime,
         Sale.order_status != OrderStatus.CANCELLED,
@@ -0,0 +1,57 @@
+"""
+Archivo frío de ventas: exporta meses cerrados a Parquet y los borra de la BD.
+
+Sin argumentos lista los meses vencidos (anteriores a SALES_ARCHIVE_AFTER_MONTHS)
+sin archivar nada. Ver app/services/sales_archive_service.py.
+
+Uso:
+    docker compose exec backend python scripts/archive_sales.py
+    docker compose exec backend python scripts/archive_sales.py --due
+    docker compose exec backend python scripts/archive_sales.py --month 2025-03
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Agregar backend al path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import SessionLocal
+from app.services.sales_archive_service import SalesArchiveError, SalesArchiveService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivo frío de ventas en Parquet")
+    parser.add_argument("--month", help="Archivar un mes (YYYY-MM)")
+    parser.add_argument("--due", action="store_true", help="Archivar todos los meses vencidos")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        service = SalesArchiveService(db)
+        print(f"Archivo: {service.archive.root}")
+        print(f"Meses archivados: {', '.join(f'{m:%Y-%m}' for m in service.archive.months()) or 'ninguno'}")
+
+        if args.month:
+            results = [service.archive_month(date.fromisoformat(f"{args.month}-01"))]
+        elif args.due:
+            results = service.archive_due()
+        else:
+            due = service.due_months()
+            print(f"Meses vencidos: {', '.join(f'{m:%Y-%m}' for m in due) or 'ninguno'}")
+            return
+
+        for result in results:
+            print(f"  {result['month']}: {result['sales']} ventas, {result['sale_items']} líneas, "
+                  f"{result['whatsapp_sales']} pedidos WhatsApp, total {result['total_amount']}")
+    except SalesArchiveError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
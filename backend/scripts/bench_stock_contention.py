@@ -0,0 +1,190 @@
+"""
+Benchmark de contención de stock: muchos vendedores sobre un mismo SKU.
+
+Lanza N vendedores concurrentes (threads, cada uno con su sesión) que
+venden 1 unidad del mismo producto en la misma sucursal vía
+SaleService.create_sale hasta agotar el stock. Reporta throughput,
+tasa de 409 (StockConflictError), rechazos por stock insuficiente (400)
+y verifica que no haya sobreventa.
+
+Requiere PostgreSQL (SQLite serializa escrituras y no mide contención real).
+Crea un producto temporal y lo elimina al terminar junto con sus ventas.
+
+Uso:
+    docker compose exec backend python scripts/bench_stock_contention.py
+    docker compose exec backend python scripts/bench_stock_contention.py --sellers 50 --stock 2000
+"""
+
+import argparse
+import sys
+import threading
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+# Agregar backend al path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import SessionLocal
+from app.models import (
+    Branch, BranchStock, Category, InventoryMovement, Product, Sale, SaleItem, User
+)
+from app.schemas.common import SaleType
+from app.schemas.sale import SaleCreate, SaleItemCreate
+from app.services.sale_service import SaleService
+from app.services.stock_service import StockConflictError
+
+
+def setup_product(stock: int):
+    """Crear producto temporal con stock en la primera sucursal activa."""
+    db = SessionLocal()
+    try:
+        branch = db.query(Branch).filter(Branch.is_active == True).first()
+        user = db.query(User).first()
+        category = db.query(Category).first()
+        if not branch or not user or not category:
+            raise SystemExit("❌ Se requiere al menos una sucursal, un usuario y una categoría")
+
+        sku = f"BENCH-{uuid.uuid4().hex[:8].upper()}"
+        product = Product(
+            name=f"Benchmark {sku}",
+            sku=sku,
+            category_id=category.id,
+            price=Decimal("10.00"),
+            cost=Decimal("5.00"),
+            stock_quantity=stock,
+            min_stock=0,
+            is_active=True,
+            has_sizes=False
+        )
+        db.add(product)
+        db.flush()
+        db.add(BranchStock(product_id=product.id, branch_id=branch.id, stock_quantity=stock))
+        db.commit()
+        return product.id, branch.id, user.id
+    finally:
+        db.close()
+
+
+def cleanup_product(product_id: int) -> None:
+    """Eliminar ventas, movimientos y stock del producto temporal."""
+    db = SessionLocal()
+    try:
+        sale_ids = [
+            row.sale_id for row in
+            db.query(SaleItem.sale_id).filter(SaleItem.product_id == product_id).all()
+        ]
+        db.query(InventoryMovement).filter(InventoryMovement.product_id == product_id).delete(synchronize_session=False)
+        db.query(SaleItem).filter(SaleItem.product_id == product_id).delete(synchronize_session=False)
+        if sale_ids:
+            db.query(Sale).filter(Sale.id.in_(sale_ids)).delete(synchronize_session=False)
+        db.query(BranchStock).filter(BranchStock.product_id == product_id).delete(synchronize_session=False)
+        db.query(Product).filter(Product.id == product_id).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def seller(product_id: int, branch_id: int, user_id: int, stats: dict, lock: threading.Lock,
+           start_event: threading.Event) -> None:
+    """Vender 1 unidad por vez hasta que el producto se agote."""
+    sale_data = SaleCreate(
+        sale_type=SaleType.POS,
+        branch_id=branch_id,
+        payment_method="cash",
+        items=[SaleItemCreate(product_id=product_id, quantity=1, unit_price=Decimal("10.00"))]
+    )
+    start_event.wait()
+    while True:
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            SaleService(db).create_sale(sale_data=sale_data, user_id=user_id, branch_id=branch_id)
+            elapsed = time.perf_counter() - started
+            with lock:
+                stats["ok"] += 1
+                stats["latencies"].append(elapsed)
+        except StockConflictError:
+            with lock:
+                stats["conflict"] += 1
+        except ValueError:
+            # Stock agotado: el vendedor termina
+            with lock:
+                stats["insufficient"] += 1
+            return
+        except Exception as e:
+            with lock:
+                stats["error"] += 1
+                stats["last_error"] = str(e)
+            return
+        finally:
+            db.close()
+
+
+def percentile(values, pct: float) -> float:
+    """Percentil simple por posición sobre valores ordenados."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de contención de stock en un SKU")
+    parser.add_argument("--sellers", type=int, default=50, help="Vendedores concurrentes")
+    parser.add_argument("--stock", type=int, default=1000, help="Stock inicial del SKU")
+    parser.add_argument("--keep", action="store_true", help="No eliminar el producto temporal")
+    args = parser.parse_args()
+
+    product_id, branch_id, user_id = setup_product(args.stock)
+    print(f"🚀 {args.sellers} vendedores sobre producto {product_id} (stock {args.stock})")
+
+    stats = {"ok": 0, "conflict": 0, "insufficient": 0, "error": 0, "latencies": [], "last_error": None}
+    lock = threading.Lock()
+    start_event = threading.Event()
+    threads = [
+        threading.Thread(target=seller, args=(product_id, branch_id, user_id, stats, lock, start_event))
+        for _ in range(args.sellers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    start_event.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        final_stock = db.query(BranchStock.stock_quantity).filter(
+            BranchStock.product_id == product_id,
+            BranchStock.branch_id == branch_id
+        ).scalar()
+    finally:
+        db.close()
+
+    attempts = stats["ok"] + stats["conflict"]
+    latencies_ms = [value * 1000 for value in stats["latencies"]]
+    print("\n📊 Resultados")
+    print(f"   Ventas confirmadas: {stats['ok']} en {elapsed:.2f}s ({stats['ok'] / elapsed:.1f} ventas/s)")
+    print(f"   Tasa de 409: {stats['conflict']}/{attempts} ({(stats['conflict'] / attempts * 100) if attempts else 0:.2f}%)")
+    print(f"   Rechazos por stock agotado: {stats['insufficient']}")
+    print(f"   Errores: {stats['error']}" + (f" (último: {stats['last_error']})" if stats["last_error"] else ""))
+    print(f"   Latencia p50/p95/p99: {percentile(latencies_ms, 0.50):.1f} / "
+          f"{percentile(latencies_ms, 0.95):.1f} / {percentile(latencies_ms, 0.99):.1f} ms")
+    print(f"   Stock final: {final_stock}")
+
+    oversold = final_stock < 0 or stats["ok"] + final_stock != args.stock
+    if not args.keep:
+        cleanup_product(product_id)
+
+    if oversold:
+        print("❌ Invariante roto: ventas confirmadas + stock final != stock inicial")
+        sys.exit(1)
+    print("✅ Sin sobreventa")
+
+
+if __name__ == "__main__":
+    main()
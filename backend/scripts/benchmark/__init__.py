@@ -0,0 +1,20 @@
+"""
+Suite de benchmarks reproducibles del backend.
+
+    - datagen: generador de datos sintéticos en masa (COPY en PostgreSQL,
+      inserts por lotes en otros motores), determinístico por semilla
+    - scenarios: escenarios guionados contra la app ASGI en proceso
+      (checkout, escaneo de código de barras, catálogo, reportes, listado
+      de ventas) con latencia y consultas por request
+    - report: percentiles, baseline JSON y comparación entre commits
+    - checkout_load: cajas concurrentes con SKUs calientes contra
+      SaleService/StockService; verifica invariantes de inventario
+    - startup: perfil de imports del cold start de la API y objetivo de tiempo
+
+Uso (siempre contra una base dedicada, nunca la de producción):
+    python -m scripts.benchmark generate --database-url postgresql://.../pos_bench --preset large
+    python -m scripts.benchmark run --database-url postgresql://.../pos_bench --output baseline.json
+    python -m scripts.benchmark compare baseline.json current.json --threshold 0.2
+    python -m scripts.benchmark checkout-load --database-url postgresql://.../pos_bench --registers 40
+    python -m scripts.benchmark startup
+"""
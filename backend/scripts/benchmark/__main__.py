@@ -0,0 +1,286 @@
+"""
+CLI de la suite de benchmarks.
+
+La URL de la base es obligatoria (--database-url o BENCH_DATABASE_URL) y
+se fija en DATABASE_URL antes de importar la app, para no apuntar por
+error a la base configurada en el entorno.
+
+Uso:
+    python -m scripts.benchmark generate --database-url postgresql://postgres:password@db:5432/pos_bench --preset large
+    python -m scripts.benchmark generate --database-url ... --preset small --sales 100000 --seed 7
+    python -m scripts.benchmark run --database-url ... --iterations 200 --output bench-$(git rev-parse --short HEAD).json
+    python -m scripts.benchmark run --database-url ... --scenarios checkout,barcode_scan
+    python -m scripts.benchmark compare baseline.json current.json --threshold 0.2
+    python -m scripts.benchmark checkout-load --database-url ... --registers 40 --branches 4 --skew 1.2 --duration 60
+    python -m scripts.benchmark checkout-load --database-url ... --registers 20 --pool-size 5 --max-overflow 0 \\
+        --hold-connections 3 --hold-ms 500
+    python -m scripts.benchmark startup --top 30 --budget 2.5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Agregar backend al path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+
+def _use_database(url: str) -> None:
+    if not url:
+        raise SystemExit("❌ Indicar --database-url o BENCH_DATABASE_URL (una base dedicada al benchmark)")
+    os.environ["DATABASE_URL"] = url
+
+
+def cmd_generate(args) -> None:
+    _use_database(args.database_url)
+    from database import engine, init_db
+    from scripts.benchmark.datagen import PRESETS, generate
+
+    overrides = {
+        key: getattr(args, key) for key in ("branches", "products", "sales", "seed")
+        if getattr(args, key) is not None
+    }
+    spec = PRESETS[args.preset]._replace(**overrides)
+    print(f"🚀 Generando dataset '{args.preset}' en {engine.dialect.name}: {spec._asdict()}")
+
+    init_db()
+    started = time.perf_counter()
+
+    def progress(table: str, rows: int) -> None:
+        print(f"   {table}: {rows:,} filas ({time.perf_counter() - started:.0f}s)")
+
+    try:
+        counts = generate(engine, spec, batch_size=args.batch_size, progress=progress)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    print(f"✅ Dataset generado en {time.perf_counter() - started:.0f}s: {counts}")
+
+
+def cmd_run(args) -> None:
+    _use_database(args.database_url)
+    from fastapi.testclient import TestClient
+
+    from database import SessionLocal, engine
+    from main import app
+    from scripts.benchmark.report import build_report, format_table, save_report
+    from scripts.benchmark.scenarios import SCENARIOS, load_context, run_scenario
+
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"❌ Escenarios desconocidos: {', '.join(unknown)} (disponibles: {', '.join(SCENARIOS)})")
+
+    db = SessionLocal()
+    try:
+        context = load_context(db)
+        dataset = {
+            "products": db.execute(_count("products")).scalar(),
+            "sales": db.execute(_count("sales")).scalar(),
+        }
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    finally:
+        db.close()
+
+    results = {}
+    with TestClient(app) as client:
+        for name in names:
+            print(f"⏱️  {name} ({args.warmup} warmup + {args.iterations} iteraciones)")
+            results[name] = run_scenario(client, context, SCENARIOS[name], args.iterations,
+                                         warmup=args.warmup, seed=args.seed)
+
+    report = build_report(results, engine.dialect.name, dataset)
+    print("\n📊 Resultados (ms)")
+    print(format_table(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\n💾 Baseline guardado en {args.output}")
+
+
+def cmd_compare(args) -> None:
+    from scripts.benchmark.report import compare, format_table, load_report
+
+    baseline, current = load_report(args.baseline), load_report(args.current)
+    print(f"📊 {baseline['meta']['git_commit']} → {current['meta']['git_commit']}")
+    print(format_table(current))
+    regressions = compare(baseline, current, threshold=args.threshold)
+    if regressions:
+        print("\n❌ Regresiones:")
+        for regression in regressions:
+            print(f"   {regression}")
+        sys.exit(1)
+    print("\n✅ Sin regresiones")
+
+
+def cmd_checkout_load(args) -> None:
+    _use_database(args.database_url)
+    # El pool se dimensiona al importar database: fijarlo antes
+    for option, variable in (("pool_size", "DB_POOL_SIZE"), ("max_overflow", "DB_MAX_OVERFLOW"),
+                             ("pool_timeout", "DB_POOL_TIMEOUT")):
+        if getattr(args, option) is not None:
+            os.environ[variable] = str(getattr(args, option))
+    from database import SessionLocal, engine, init_db
+    from scripts.benchmark.checkout_load import (
+        LoadConfig, check_invariants, cleanup_fixture, run_load, setup_fixture
+    )
+
+    init_db()
+    if engine.dialect.name != "postgresql":
+        print("⚠️  Sin PostgreSQL no hay contención real (SQLite serializa escrituras)")
+    config = LoadConfig(
+        registers=args.registers, branches=args.branches, products=args.products,
+        stock=args.stock, skew=args.skew, max_items=args.max_items, duration=args.duration,
+        max_checkouts=args.max_checkouts, seed=args.seed,
+        hold_connections=args.hold_connections, hold_ms=args.hold_ms
+    )
+
+    db = SessionLocal()
+    try:
+        fixture = setup_fixture(db, config)
+    finally:
+        db.close()
+    print(f"🚀 {config.registers} cajas en {config.branches} sucursales, {config.products} productos "
+          f"(stock {config.stock}, skew {config.skew}) durante {config.duration:.0f}s [{fixture.run_id}]")
+
+    results = run_load(SessionLocal, fixture, config)
+    db = SessionLocal()
+    try:
+        violations = check_invariants(db, fixture, results)
+        if not args.keep:
+            cleanup_fixture(db, fixture)
+    finally:
+        db.close()
+
+    latency, locks = results["latency_ms"], results["lock_waits"]
+    print("\n📊 Resultados")
+    print(f"   Checkouts: {results['checkouts']} en {results['duration_s']}s ({results['throughput_per_s']}/s)")
+    print(f"   Tasa de 409: {results['conflicts']}/{results['attempts']} ({results['conflict_rate'] * 100:.2f}%), "
+          f"reintentos agotados: {results['retries_exhausted']}")
+    print(f"   Rechazos por stock agotado: {results['rejected_insufficient_stock']}")
+    print(f"   Errores: {results['errors']}" + (f" (último: {results['last_error']})" if results["last_error"] else ""))
+    print(f"   Latencia p50/p95/p99: {latency['p50']} / {latency['p95']} / {latency['p99']} ms")
+    pool = results["pool"]
+    print(f"   Pool: espera promedio {pool['avg_wait_ms']} ms en {pool['checkouts']} checkouts, "
+          f"timeouts {pool['timeouts']}")
+    if locks["sampled"]:
+        print(f"   Esperas de lock: máx {locks['max_waiting']} sesiones, prom {locks['avg_waiting']}, "
+              f"~{locks['wait_seconds']}s-sesión, deadlocks {locks['deadlocks']}")
+
+    if args.output:
+        report = {key: value for key, value in results.items() if key != "sold"}
+        report["invariant_violations"] = violations
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+
+    failed = False
+    if violations:
+        print(f"\n❌ {len(violations)} violaciones de invariantes de inventario:")
+        for violation in violations[:20]:
+            print(f"   {violation}")
+        failed = True
+    if results["errors"]:
+        print("\n❌ Errores inesperados durante la prueba")
+        failed = True
+    if args.max_conflict_rate is not None and results["conflict_rate"] > args.max_conflict_rate:
+        print(f"\n❌ Tasa de 409 {results['conflict_rate']:.2%} supera {args.max_conflict_rate:.2%}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("\n✅ Invariantes de inventario OK")
+
+
+def cmd_startup(args) -> None:
+    from scripts.benchmark.startup import COLD_START_BUDGET_SECONDS, format_profile, profile_startup
+
+    if args.budget is None:
+        args.budget = COLD_START_BUDGET_SECONDS
+    profile = profile_startup(top=args.top)
+    print(format_profile(profile))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(profile, output, indent=2, ensure_ascii=False)
+
+    failed = False
+    if profile["heavy_loaded"]:
+        print(f"\n❌ Dependencias pesadas importadas al arrancar: {', '.join(profile['heavy_loaded'])}")
+        failed = True
+    if profile["wall_s"] > args.budget:
+        print(f"\n❌ Cold start {profile['wall_s']}s supera el objetivo de {args.budget}s")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"\n✅ Cold start dentro del objetivo ({args.budget}s)")
+
+
+def _count(table: str):
+    from sqlalchemy import text
+    return text(f"SELECT COUNT(*) FROM {table}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m scripts.benchmark", description="Benchmarks del backend")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    default_url = os.getenv("BENCH_DATABASE_URL")
+
+    generate = subparsers.add_parser("generate", help="Generar el dataset sintético")
+    generate.add_argument("--database-url", default=default_url)
+    generate.add_argument("--preset", choices=("tiny", "small", "medium", "large"), default="small")
+    generate.add_argument("--branches", type=int, help="Sucursales (pisa el preset)")
+    generate.add_argument("--products", type=int, help="Productos (pisa el preset)")
+    generate.add_argument("--sales", type=int, help="Ventas (pisa el preset)")
+    generate.add_argument("--seed", type=int, help="Semilla (pisa el preset)")
+    generate.add_argument("--batch-size", type=int, default=10_000, help="Filas por COPY/insert")
+    generate.set_defaults(func=cmd_generate)
+
+    run = subparsers.add_parser("run", help="Correr los escenarios y reportar percentiles")
+    run.add_argument("--database-url", default=default_url)
+    run.add_argument("--scenarios", help="Lista separada por comas (default: todos)")
+    run.add_argument("--iterations", type=int, default=100, help="Requests medidos por escenario")
+    run.add_argument("--warmup", type=int, default=10, help="Requests previos sin medir")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--output", help="Archivo JSON del baseline")
+    run.set_defaults(func=cmd_run)
+
+    compare = subparsers.add_parser("compare", help="Comparar dos baselines (exit 1 si hay regresiones)")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.2, help="Tolerancia de p95 (0.2 = 20%%)")
+    compare.set_defaults(func=cmd_compare)
+
+    load = subparsers.add_parser("checkout-load", help="Carga concurrente de checkout (exit 1 si se rompe el inventario)")
+    load.add_argument("--database-url", default=default_url)
+    load.add_argument("--registers", type=int, default=20, help="Cajas concurrentes")
+    load.add_argument("--branches", type=int, default=4, help="Sucursales")
+    load.add_argument("--products", type=int, default=200, help="Productos temporales")
+    load.add_argument("--stock", type=int, default=200, help="Stock inicial por producto/sucursal/talle")
+    load.add_argument("--skew", type=float, default=1.2, help="Exponente Zipf de SKUs calientes (0 = uniforme)")
+    load.add_argument("--max-items", type=int, default=4, help="Productos por carrito como máximo")
+    load.add_argument("--duration", type=float, default=30.0, help="Duración en segundos")
+    load.add_argument("--max-checkouts", type=int, help="Checkouts por caja (corta antes de --duration)")
+    load.add_argument("--max-conflict-rate", type=float, help="Falla si la tasa de 409 la supera (0.05 = 5%%)")
+    load.add_argument("--hold-connections", type=int, default=0,
+                      help="Conexiones retenidas por reportes lentos simulados (presión sobre el pool)")
+    load.add_argument("--hold-ms", type=float, default=200.0, help="Milisegundos que se retiene cada conexión")
+    load.add_argument("--pool-size", type=int, help="DB_POOL_SIZE para la prueba")
+    load.add_argument("--max-overflow", type=int, help="DB_MAX_OVERFLOW para la prueba")
+    load.add_argument("--pool-timeout", type=float, help="DB_POOL_TIMEOUT para la prueba")
+    load.add_argument("--seed", type=int, default=42)
+    load.add_argument("--keep", action="store_true", help="No eliminar los datos temporales")
+    load.add_argument("--output", help="Archivo JSON con los resultados")
+    load.set_defaults(func=cmd_checkout_load)
+
+    startup = subparsers.add_parser("startup", help="Perfil de imports del arranque (exit 1 si supera el objetivo)")
+    startup.add_argument("--top", type=int, default=20, help="Módulos más caros a listar")
+    startup.add_argument("--budget", type=float, help="Objetivo de cold start en segundos (default: COLD_START_BUDGET_SECONDS)")
+    startup.add_argument("--output", help="Archivo JSON con el perfil")
+    startup.set_defaults(func=cmd_startup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,511 @@
+"""
+Prueba de carga de checkout concurrente con contención de stock.
+
+Simula N cajas repartidas en M sucursales que cobran carritos realistas
+(1 a max_items productos, cantidades mayormente de 1) contra
+SaleService.create_sale, cada caja en su hilo y con su sesión: el mismo
+camino de StockService que usa POST /sales/. La elección de productos
+sigue una distribución Zipf (skew): unos pocos SKUs calientes concentran
+la mayoría de las ventas, que es donde aparecen los locks de fila.
+
+Mide:
+    - Throughput de checkouts confirmados
+    - Tasa de 409 (StockConflictError: deadlock/serialización); la caja
+      reintenta hasta max_retries veces con backoff
+    - Rechazos por stock agotado (400) y errores inesperados
+    - Latencia p50/p95/p99 de los checkouts confirmados
+    - Esperas de lock (PostgreSQL): muestreo de pg_stat_activity con
+      wait_event_type = 'Lock' y deadlocks de pg_stat_database
+    - Espera por conexiones del pool (db_pool_checkout_wait_seconds) y
+      timeouts del pool
+
+Presión sobre el pool (hold_connections): hilos que simulan reportes
+lentos reteniendo conexiones hold_ms cada vez, para medir la latencia del
+checkout cuando el pool está casi agotado (combinar con DB_POOL_SIZE /
+DB_MAX_OVERFLOW chicos).
+
+Invariantes verificadas al terminar (cualquier violación falla la prueba):
+    - Ningún stock negativo
+    - Stock inicial - stock final == unidades confirmadas por las cajas
+      == unidades en sale_items, por producto/sucursal/talle
+    - Movimientos OUT de inventario == unidades vendidas por producto/sucursal
+    - Ventas en la base == checkouts confirmados
+    - PostgreSQL: Product.stock_quantity (triggers de delta) == suma de
+      las filas de stock
+
+Crea sus propias sucursales, usuario y productos (prefijo LOAD-) con stock
+limitado y los elimina al terminar. Requiere PostgreSQL para medir
+contención real (SQLite serializa escrituras).
+"""
+
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from decimal import Decimal
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Branch, BranchStock, InventoryMovement, Product, ProductSize, Sale, SaleItem, User
+)
+from app.models.enums import UserRole
+from app.schemas.common import SaleType
+from app.schemas.sale import SaleCreate, SaleItemCreate
+from app.services.config_service import ConfigService
+from app.services.sale_service import SaleService
+from app.core.metrics import db_pool_checkout_wait, db_pool_timeouts
+from app.services.stock_service import StockConflictError
+from scripts.benchmark.report import percentile
+
+LOAD_PREFIX = "LOAD-"
+LOAD_SIZES = ("S", "M", "L")
+LOAD_PAYMENT_METHODS = ("CASH", "CARD", "TRANSFER")
+
+# (product_id, branch_id, size) → unidades
+StockKey = Tuple[int, int, Optional[str]]
+
+
+class LoadConfig(NamedTuple):
+    """Parámetros de la prueba de carga."""
+    registers: int = 20
+    branches: int = 4
+    products: int = 200
+    sized_ratio: float = 0.3
+    stock: int = 200                      # Por producto/sucursal (o por talle)
+    skew: float = 1.2                     # Exponente Zipf; 0 = uniforme
+    max_items: int = 4
+    duration: float = 30.0                # Segundos
+    max_checkouts: Optional[int] = None   # Por caja (None = hasta duration)
+    max_retries: int = 3
+    hold_connections: int = 0             # Conexiones retenidas por "reportes lentos"
+    hold_ms: float = 200.0
+    seed: int = 42
+
+
+class LoadFixture(NamedTuple):
+    """Datos temporales creados para la prueba."""
+    run_id: str
+    branch_ids: List[int]
+    user_id: int
+    products: List[Tuple[int, Decimal, bool]]  # (id, precio, has_sizes), del más al menos vendido
+    initial: Dict[StockKey, int]
+
+
+def setup_fixture(db: Session, config: LoadConfig) -> LoadFixture:
+    """Crea sucursales, un vendedor y productos con stock limitado."""
+    ConfigService(db).ensure_default_payment_methods()
+    run_id = uuid.uuid4().hex[:8].upper()
+    rng = random.Random(config.seed)
+
+    branches = [
+        Branch(name=f"{LOAD_PREFIX}{run_id} Sucursal {i + 1}", is_active=True)
+        for i in range(config.branches)
+    ]
+    db.add_all(branches)
+    db.flush()
+
+    user = User(
+        email=f"load_{run_id.lower()}@load.example.com",
+        username=f"load_{run_id.lower()}",
+        full_name=f"Carga {run_id}",
+        hashed_password="!",
+        role=UserRole.SELLER,
+        branch_id=branches[0].id,
+        is_active=True
+    )
+    db.add(user)
+
+    products = []
+    for i in range(config.products):
+        price = Decimal(rng.randrange(1_000, 20_000)) / 100
+        products.append(Product(
+            name=f"{LOAD_PREFIX}{run_id} Producto {i + 1}",
+            sku=f"{LOAD_PREFIX}{run_id}-{i + 1:05d}",
+            price=price,
+            cost=price / 2,
+            min_stock=0,
+            is_active=True,
+            has_sizes=rng.random() < config.sized_ratio
+        ))
+    db.add_all(products)
+    db.flush()
+
+    initial: Dict[StockKey, int] = {}
+    for product in products:
+        for branch in branches:
+            if product.has_sizes:
+                for size in LOAD_SIZES:
+                    db.add(ProductSize(product_id=product.id, branch_id=branch.id, size=size,
+                                       stock_quantity=config.stock))
+                    initial[(product.id, branch.id, size)] = config.stock
+            else:
+                db.add(BranchStock(product_id=product.id, branch_id=branch.id,
+                                   stock_quantity=config.stock))
+                initial[(product.id, branch.id, None)] = config.stock
+    db.commit()
+
+    return LoadFixture(
+        run_id=run_id,
+        branch_ids=[branch.id for branch in branches],
+        user_id=user.id,
+        products=[(product.id, product.price, product.has_sizes) for product in products],
+        initial=initial
+    )
+
+
+def cleanup_fixture(db: Session, fixture: LoadFixture) -> None:
+    """Elimina ventas, movimientos, stock, productos, usuario y sucursales de la prueba."""
+    product_ids = [product_id for product_id, _, _ in fixture.products]
+    sale_ids = [row.id for row in db.query(Sale.id).filter(Sale.user_id == fixture.user_id).all()]
+    db.query(InventoryMovement).filter(InventoryMovement.product_id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(SaleItem).filter(SaleItem.product_id.in_(product_ids)).delete(synchronize_session=False)
+    if sale_ids:
+        db.query(Sale).filter(Sale.id.in_(sale_ids)).delete(synchronize_session=False)
+    db.query(ProductSize).filter(ProductSize.product_id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(BranchStock).filter(BranchStock.product_id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(Product).filter(Product.id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id == fixture.user_id).delete(synchronize_session=False)
+    db.query(Branch).filter(Branch.id.in_(fixture.branch_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def run_load(
+    session_factory: Callable[[], Session],
+    fixture: LoadFixture,
+    config: LoadConfig,
+    lock_sample_interval: float = 0.05
+) -> Dict:
+    """
+    Corre las cajas concurrentes y devuelve las métricas de la prueba.
+
+    El resultado incluye "sold" (unidades confirmadas por clave de stock)
+    para check_invariants.
+    """
+    ranks = range(1, len(fixture.products) + 1)
+    cum_weights = []
+    total = 0.0
+    for rank in ranks:
+        total += 1 / rank ** config.skew
+        cum_weights.append(total)
+
+    stop = threading.Event()
+    start = threading.Event()
+    registers = [_RegisterStats() for _ in range(config.registers)]
+    threads = [
+        threading.Thread(
+            target=_register,
+            args=(index, session_factory, fixture, config, cum_weights, registers[index], start, stop),
+            name=f"register-{index}"
+        )
+        for index in range(config.registers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    holders = [
+        threading.Thread(target=_hold_connection, args=(session_factory, config.hold_ms, start, stop),
+                         name=f"pool-holder-{index}")
+        for index in range(config.hold_connections)
+    ]
+    for thread in holders:
+        thread.start()
+
+    monitor = _LockMonitor(session_factory, stop, lock_sample_interval)
+    monitor.start()
+
+    waits_before = (db_pool_checkout_wait.count(), db_pool_checkout_wait.total())
+    timeouts_before = db_pool_timeouts.value()
+    started = time.perf_counter()
+    start.set()
+    deadline = started + config.duration
+    while any(thread.is_alive() for thread in threads) and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    stop.set()
+    for thread in threads + holders:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    monitor.join()
+    pool_checkouts = db_pool_checkout_wait.count() - waits_before[0]
+    pool_wait_s = db_pool_checkout_wait.total() - waits_before[1]
+
+    sold: Counter = Counter()
+    latencies: List[float] = []
+    for stats in registers:
+        sold.update(stats.sold)
+        latencies.extend(stats.latencies_ms)
+    checkouts = sum(stats.checkouts for stats in registers)
+    conflicts = sum(stats.conflicts for stats in registers)
+    attempts = checkouts + conflicts + sum(stats.rejected + stats.errors for stats in registers)
+    errors = [stats.last_error for stats in registers if stats.last_error]
+
+    return {
+        "config": config._asdict(),
+        "duration_s": round(elapsed, 2),
+        "checkouts": checkouts,
+        "throughput_per_s": round(checkouts / elapsed, 1) if elapsed else 0.0,
+        "attempts": attempts,
+        "conflicts": conflicts,
+        "conflict_rate": round(conflicts / attempts, 4) if attempts else 0.0,
+        "retries_exhausted": sum(stats.gave_up for stats in registers),
+        "rejected_insufficient_stock": sum(stats.rejected for stats in registers),
+        "errors": sum(stats.errors for stats in registers),
+        "last_error": errors[-1] if errors else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+        },
+        "lock_waits": monitor.summary(),
+        "pool": {
+            "checkouts": pool_checkouts,
+            "avg_wait_ms": round(pool_wait_s / pool_checkouts * 1000, 3) if pool_checkouts else 0.0,
+            "timeouts": db_pool_timeouts.value() - timeouts_before,
+        },
+        "sold": dict(sold),
+    }
+
+
+def check_invariants(db: Session, fixture: LoadFixture, results: Dict) -> List[str]:
+    """Violaciones de las invariantes de inventario (lista vacía = OK)."""
+    product_ids = [product_id for product_id, _, _ in fixture.products]
+    violations: List[str] = []
+
+    final: Dict[StockKey, int] = {}
+    for row in db.query(BranchStock.product_id, BranchStock.branch_id, BranchStock.stock_quantity).filter(
+        BranchStock.product_id.in_(product_ids)
+    ):
+        final[(row.product_id, row.branch_id, None)] = row.stock_quantity
+    for row in db.query(ProductSize.product_id, ProductSize.branch_id, ProductSize.size,
+                        ProductSize.stock_quantity).filter(ProductSize.product_id.in_(product_ids)):
+        final[(row.product_id, row.branch_id, row.size)] = row.stock_quantity
+
+    recorded: Dict[StockKey, int] = {
+        (row.product_id, row.branch_id, row.size): int(row.units)
+        for row in db.query(
+            SaleItem.product_id, Sale.branch_id, SaleItem.size, func.sum(SaleItem.quantity).label("units")
+        ).join(Sale, Sale.id == SaleItem.sale_id).filter(
+            SaleItem.product_id.in_(product_ids)
+        ).group_by(SaleItem.product_id, Sale.branch_id, SaleItem.size)
+    }
+
+    sold = results["sold"]
+    for key, initial in fixture.initial.items():
+        remaining = final.get(key)
+        if remaining is None:
+            violations.append(f"{_describe(key)}: fila de stock desaparecida")
+            continue
+        consumed = initial - remaining
+        if remaining < 0:
+            violations.append(f"{_describe(key)}: stock negativo ({remaining})")
+        if consumed != sold.get(key, 0):
+            violations.append(
+                f"{_describe(key)}: descontado {consumed} != confirmado por las cajas {sold.get(key, 0)}"
+            )
+        if consumed != recorded.get(key, 0):
+            violations.append(f"{_describe(key)}: descontado {consumed} != sale_items {recorded.get(key, 0)}")
+
+    by_product_branch: Counter = Counter()
+    for (product_id, branch_id, _), units in sold.items():
+        by_product_branch[(product_id, branch_id)] += units
+    movements = {
+        (row.product_id, row.branch_id): -int(row.units)
+        for row in db.query(
+            InventoryMovement.product_id, InventoryMovement.branch_id,
+            func.sum(InventoryMovement.quantity).label("units")
+        ).filter(
+            InventoryMovement.product_id.in_(product_ids),
+            InventoryMovement.movement_type == "OUT"
+        ).group_by(InventoryMovement.product_id, InventoryMovement.branch_id)
+    }
+    for key in set(by_product_branch) | set(movements):
+        if by_product_branch.get(key, 0) != movements.get(key, 0):
+            violations.append(
+                f"producto {key[0]} sucursal {key[1]}: movimientos OUT {movements.get(key, 0)} "
+                f"!= vendido {by_product_branch.get(key, 0)}"
+            )
+
+    sales = db.query(func.count(Sale.id)).filter(Sale.user_id == fixture.user_id).scalar()
+    if sales != results["checkouts"]:
+        violations.append(f"ventas en la base {sales} != checkouts confirmados {results['checkouts']}")
+
+    if db.get_bind().dialect.name == "postgresql":
+        totals: Counter = Counter()
+        for (product_id, _, _), remaining in final.items():
+            totals[product_id] += remaining
+        for product_id, counter in db.query(Product.id, Product.stock_quantity).filter(Product.id.in_(product_ids)):
+            if counter != totals[product_id]:
+                violations.append(
+                    f"producto {product_id}: stock_quantity {counter} != suma de stock {totals[product_id]}"
+                )
+
+    return violations
+
+
+class _RegisterStats:
+    """Contadores de una caja (solo los escribe su hilo)."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.conflicts = 0
+        self.gave_up = 0
+        self.rejected = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.latencies_ms: List[float] = []
+        self.sold: Counter = Counter()
+
+
+def _register(
+    index: int,
+    session_factory: Callable[[], Session],
+    fixture: LoadFixture,
+    config: LoadConfig,
+    cum_weights: List[float],
+    stats: _RegisterStats,
+    start: threading.Event,
+    stop: threading.Event
+) -> None:
+    """Una caja: cobra carritos hasta que se pida parar o llegue a max_checkouts."""
+    rng = random.Random(f"{config.seed}:{index}")
+    branch_id = fixture.branch_ids[index % len(fixture.branch_ids)]
+    start.wait()
+
+    while not stop.is_set():
+        if config.max_checkouts is not None and stats.checkouts >= config.max_checkouts:
+            return
+        lines = _cart(rng, fixture, config, cum_weights)
+        sale_data = SaleCreate(
+            sale_type=SaleType.POS,
+            branch_id=branch_id,
+            payment_method=rng.choice(LOAD_PAYMENT_METHODS),
+            items=[
+                SaleItemCreate(product_id=product_id, quantity=quantity, unit_price=price, size=size)
+                for product_id, price, size, quantity in lines
+            ]
+        )
+
+        for attempt in range(config.max_retries + 1):
+            db = session_factory()
+            try:
+                started = time.perf_counter()
+                SaleService(db).create_sale(sale_data=sale_data, user_id=fixture.user_id, branch_id=branch_id)
+                stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+                stats.checkouts += 1
+                for product_id, _, size, quantity in lines:
+                    stats.sold[(product_id, branch_id, size)] += quantity
+                break
+            except StockConflictError:
+                stats.conflicts += 1
+                if attempt == config.max_retries:
+                    stats.gave_up += 1
+                else:
+                    time.sleep(rng.uniform(0, 0.01 * 2 ** attempt))
+            except ValueError as e:
+                if "Insufficient stock" in str(e):
+                    stats.rejected += 1
+                else:
+                    stats.errors += 1
+                    stats.last_error = str(e)
+                break
+            except Exception as e:
+                stats.errors += 1
+                stats.last_error = f"{type(e).__name__}: {e}"
+                break
+            finally:
+                db.close()
+
+
+def _hold_connection(
+    session_factory: Callable[[], Session],
+    hold_ms: float,
+    start: threading.Event,
+    stop: threading.Event
+) -> None:
+    """Reporte lento simulado: toma una conexión, la retiene hold_ms y la devuelve."""
+    start.wait()
+    while not stop.is_set():
+        db = session_factory()
+        try:
+            db.execute(text("SELECT 1"))
+            stop.wait(hold_ms / 1000)
+        except Exception:
+            # Pool agotado: lo cuenta db_pool_timeouts, el hilo sigue presionando
+            pass
+        finally:
+            db.close()
+
+
+def _cart(
+    rng: random.Random,
+    fixture: LoadFixture,
+    config: LoadConfig,
+    cum_weights: List[float]
+) -> List[Tuple[int, Decimal, Optional[str], int]]:
+    """Líneas (producto, precio, talle, cantidad) sin productos repetidos."""
+    picks = rng.choices(fixture.products, cum_weights=cum_weights, k=rng.randint(1, config.max_items))
+    lines = {}
+    for product_id, price, has_sizes in picks:
+        if product_id not in lines:
+            size = rng.choice(LOAD_SIZES) if has_sizes else None
+            lines[product_id] = (product_id, price, size, rng.choices((1, 2, 3), weights=(80, 15, 5))[0])
+    return list(lines.values())
+
+
+def _describe(key: StockKey) -> str:
+    product_id, branch_id, size = key
+    return f"producto {product_id} sucursal {branch_id}" + (f" talle {size}" if size else "")
+
+
+class _LockMonitor(threading.Thread):
+    """Muestrea sesiones esperando locks (solo PostgreSQL) mientras corre la prueba."""
+
+    def __init__(self, session_factory: Callable[[], Session], stop: threading.Event, interval: float):
+        super().__init__(name="lock-monitor", daemon=True)
+        self.session_factory = session_factory
+        self.stop = stop
+        self.interval = interval
+        self.samples: List[int] = []
+        self.deadlocks: Optional[int] = None
+
+    def run(self) -> None:
+        db = self.session_factory()
+        try:
+            if db.get_bind().dialect.name != "postgresql":
+                return
+            deadlocks_before = self._deadlocks(db)
+            while not self.stop.wait(self.interval):
+                self.samples.append(db.execute(text(
+                    "SELECT count(*) FROM pg_stat_activity "
+                    "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                )).scalar())
+                # Cada muestra en su transacción: pg_stat_activity es una foto por transacción
+                db.rollback()
+            # pg_stat_database se actualiza de forma asíncrona; el valor es aproximado
+            time.sleep(0.5)
+            self.deadlocks = self._deadlocks(db) - deadlocks_before
+        finally:
+            db.close()
+
+    @staticmethod
+    def _deadlocks(db: Session) -> int:
+        value = db.execute(text(
+            "SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()"
+        )).scalar()
+        db.rollback()
+        return int(value or 0)
+
+    def summary(self) -> Dict:
+        if not self.samples:
+            return {"sampled": False}
+        return {
+            "sampled": True,
+            "max_waiting": max(self.samples),
+            "avg_waiting": round(sum(self.samples) / len(self.samples), 2),
+            # Segundos-sesión esperando locks ≈ Σ(sesiones en espera × intervalo)
+            "wait_seconds": round(sum(self.samples) * self.interval, 2),
+            "deadlocks": self.deadlocks,
+        }
@@ -0,0 +1,324 @@
+"""
+Generador de datos sintéticos para benchmarks.
+
+Arma sucursales, categorías, usuarios, productos (con y sin talles), stock
+y un historial de ventas con sus items. Todo sale de un random.Random con
+semilla: la misma semilla y el mismo preset producen el mismo dataset, así
+las mediciones de distintos commits son comparables.
+
+Las filas se escriben con ids explícitos y sin pasar por el ORM:
+    - PostgreSQL: COPY ... FROM STDIN (CSV) por lote y setval de las
+      secuencias al terminar, luego ANALYZE
+    - Otros motores (SQLite en tests): insert() de SQLAlchemy Core por lote
+
+Los datos quedan marcados con el prefijo BENCH- (SKU, nombres, números de
+venta) y el usuario bench_admin; el generador se niega a correr dos veces
+sobre la misma base.
+"""
+
+import csv
+import enum
+import io
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.models import (
+    Branch, BranchStock, Category, Product, ProductSize, Sale, SaleItem, User
+)
+from app.models.enums import OrderStatus, SaleType, UserRole
+from utils.size_validators import size_sort_rank
+
+BENCH_PREFIX = "BENCH-"
+BENCH_ADMIN_USERNAME = "bench_admin"
+BENCH_PASSWORD = "bench1234"
+
+# Talles de los productos con talles (una fila por sucursal y talle)
+BENCH_SIZES = ("S", "M", "L", "XL")
+
+# Stock inicial alto para que el escenario de checkout no agote productos
+BENCH_STOCK = 1_000_000
+
+PAYMENT_METHODS = ("cash", "card", "transfer")
+
+
+class DatasetSpec(NamedTuple):
+    """Tamaño y forma del dataset sintético."""
+    branches: int
+    categories: int
+    products: int
+    sales: int
+    sized_ratio: float = 0.4       # Proporción de productos con talles
+    max_items_per_sale: int = 3
+    ecommerce_ratio: float = 0.2   # Proporción de ventas e-commerce
+    days: int = 365                # Ventas repartidas en los últimos N días
+    seed: int = 42
+
+
+PRESETS: Dict[str, DatasetSpec] = {
+    "tiny": DatasetSpec(branches=2, categories=3, products=40, sales=200),
+    "small": DatasetSpec(branches=3, categories=10, products=2_000, sales=50_000),
+    "medium": DatasetSpec(branches=5, categories=25, products=10_000, sales=500_000),
+    "large": DatasetSpec(branches=10, categories=50, products=50_000, sales=5_000_000),
+}
+
+
+def generate(
+    engine: Engine,
+    spec: DatasetSpec,
+    batch_size: int = 10_000,
+    progress: Optional[Callable[[str, int], None]] = None
+) -> Dict[str, int]:
+    """
+    Genera el dataset completo y devuelve la cantidad de filas por tabla.
+
+    Cada tabla (y cada lote de ventas) se confirma en su propia transacción,
+    así un dataset grande no deja una transacción abierta por horas.
+
+    Raises:
+        ValueError: Si la base ya tiene datos de benchmark.
+    """
+    from auth import get_password_hash
+
+    rng = random.Random(spec.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    counts: Dict[str, int] = {}
+    report = progress or (lambda table, rows: None)
+
+    with engine.connect() as connection:
+        existing = connection.execute(
+            select(func.count()).select_from(User.__table__).where(User.username == BENCH_ADMIN_USERNAME)
+        ).scalar()
+        if existing:
+            raise ValueError("La base ya tiene datos de benchmark; usar una base nueva")
+
+        branch_ids = _write(connection, Branch.__table__, [
+            {"name": f"{BENCH_PREFIX}Sucursal {i + 1}", "address": f"Calle {i + 1}",
+             "is_active": True, "created_at": now, "updated_at": now}
+            for i in range(spec.branches)
+        ], counts, report)
+
+        category_ids = _write(connection, Category.__table__, [
+            {"name": f"{BENCH_PREFIX}Categoría {i + 1}", "is_active": True,
+             "created_at": now, "updated_at": now}
+            for i in range(spec.categories)
+        ], counts, report)
+
+        hashed_password = get_password_hash(BENCH_PASSWORD)
+        users = [{
+            "email": "bench_admin@bench.example.com", "username": BENCH_ADMIN_USERNAME,
+            "full_name": "Benchmark Admin", "hashed_password": hashed_password,
+            "role": UserRole.ADMIN, "branch_id": branch_ids[0], "is_active": True,
+            "created_at": now, "updated_at": now
+        }]
+        users.extend({
+            "email": f"bench_seller{i + 1}@bench.example.com", "username": f"bench_seller{i + 1}",
+            "full_name": f"Benchmark Vendedor {i + 1}", "hashed_password": hashed_password,
+            "role": UserRole.SELLER, "branch_id": branch_id, "is_active": True,
+            "created_at": now, "updated_at": now
+        } for i, branch_id in enumerate(branch_ids))
+        user_ids = _write(connection, User.__table__, users, counts, report)
+        seller_by_branch = dict(zip(branch_ids, user_ids[1:]))
+
+        products = []
+        for i in range(spec.products):
+            price = Decimal(rng.randrange(1_000, 50_000)) / 100
+            products.append({
+                "name": f"{BENCH_PREFIX}Producto {i + 1}",
+                "sku": f"{BENCH_PREFIX}{i + 1:07d}",
+                "barcode": f"{BENCH_PREFIX}{i + 1:010d}",
+                "category_id": rng.choice(category_ids),
+                "brand": f"Marca {rng.randrange(1, 21)}",
+                "price": price,
+                "cost": (price * Decimal("0.6")).quantize(Decimal("0.01")),
+                "stock_quantity": BENCH_STOCK * spec.branches,
+                "min_stock": 5,
+                "is_active": True,
+                "show_in_ecommerce": True,
+                "has_sizes": rng.random() < spec.sized_ratio,
+                "created_at": now,
+                "updated_at": now,
+            })
+        product_ids = _write(connection, Product.__table__, products, counts, report, batch_size)
+        catalog = [
+            (product_id, product["price"], product["has_sizes"])
+            for product_id, product in zip(product_ids, products)
+        ]
+        del products
+
+        _write(connection, BranchStock.__table__, (
+            {"branch_id": branch_id, "product_id": product_id, "stock_quantity": BENCH_STOCK,
+             "min_stock": 5, "created_at": now, "updated_at": now}
+            for product_id, _, has_sizes in catalog if not has_sizes
+            for branch_id in branch_ids
+        ), counts, report, batch_size)
+
+        _write(connection, ProductSize.__table__, (
+            {"product_id": product_id, "branch_id": branch_id, "size": size,
+             "sort_rank": size_sort_rank(size), "stock_quantity": BENCH_STOCK // len(BENCH_SIZES),
+             "created_at": now, "updated_at": now}
+            for product_id, _, has_sizes in catalog if has_sizes
+            for branch_id in branch_ids
+            for size in BENCH_SIZES
+        ), counts, report, batch_size)
+
+        _write_sales(connection, spec, rng, now, branch_ids, seller_by_branch, catalog,
+                     counts, report, batch_size)
+
+        if connection.dialect.name == "postgresql":
+            for table in (Branch, Category, User, Product, BranchStock, ProductSize, Sale, SaleItem):
+                name = table.__tablename__
+                connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {name}))"
+                )
+                connection.exec_driver_sql(f"ANALYZE {name}")
+            connection.commit()
+
+    return counts
+
+
+def _write_sales(
+    connection: Connection,
+    spec: DatasetSpec,
+    rng: random.Random,
+    now: datetime,
+    branch_ids: List[int],
+    seller_by_branch: Dict[int, int],
+    catalog: list,
+    counts: Dict[str, int],
+    report: Callable[[str, int], None],
+    batch_size: int
+) -> None:
+    """Ventas e items por lotes; los ids se asignan acá para enlazar items sin RETURNING."""
+    sale_id = _next_id(connection, Sale.__table__)
+    item_id = _next_id(connection, SaleItem.__table__)
+    span_seconds = spec.days * 24 * 3600
+    counts.setdefault("sales", 0)
+    counts.setdefault("sale_items", 0)
+
+    remaining = spec.sales
+    while remaining > 0:
+        sales, items = [], []
+        for _ in range(min(batch_size, remaining)):
+            branch_id = rng.choice(branch_ids)
+            created_at = now - timedelta(seconds=rng.randrange(span_seconds))
+            is_ecommerce = rng.random() < spec.ecommerce_ratio
+            subtotal = Decimal("0")
+            for _ in range(rng.randint(1, spec.max_items_per_sale)):
+                product_id, price, has_sizes = rng.choice(catalog)
+                quantity = rng.randint(1, 3)
+                total_price = price * quantity
+                subtotal += total_price
+                items.append({
+                    "id": item_id, "sale_id": sale_id, "product_id": product_id,
+                    "quantity": quantity, "unit_price": price, "total_price": total_price,
+                    "size": rng.choice(BENCH_SIZES) if has_sizes else None,
+                    "fulfillment_branch_id": branch_id, "created_at": created_at,
+                })
+                item_id += 1
+            sales.append({
+                "id": sale_id,
+                "sale_number": f"{BENCH_PREFIX}{sale_id:09d}",
+                "sale_type": SaleType.ECOMMERCE if is_ecommerce else SaleType.POS,
+                "branch_id": branch_id,
+                "user_id": seller_by_branch[branch_id],
+                "subtotal": subtotal,
+                "tax_amount": Decimal("0"),
+                "discount_amount": Decimal("0"),
+                "total_amount": subtotal,
+                "payment_method": rng.choice(PAYMENT_METHODS),
+                "order_status": OrderStatus.DELIVERED if is_ecommerce else OrderStatus.PENDING,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+            sale_id += 1
+
+        _bulk_insert(connection, Sale.__table__, sales)
+        _bulk_insert(connection, SaleItem.__table__, items)
+        connection.commit()
+        counts["sales"] += len(sales)
+        counts["sale_items"] += len(items)
+        report("sales", counts["sales"])
+        remaining -= len(sales)
+
+
+def _write(
+    connection: Connection,
+    table,
+    rows: Iterable[dict],
+    counts: Dict[str, int],
+    report: Callable[[str, int], None],
+    batch_size: int = 10_000
+) -> List[int]:
+    """Escribe las filas por lotes con ids consecutivos y devuelve los ids asignados."""
+    next_id = _next_id(connection, table)
+    ids: List[int] = []
+    batch: List[dict] = []
+    for row in rows:
+        row["id"] = next_id
+        ids.append(next_id)
+        next_id += 1
+        batch.append(row)
+        if len(batch) >= batch_size:
+            _bulk_insert(connection, table, batch)
+            batch = []
+    _bulk_insert(connection, table, batch)
+    connection.commit()
+    counts[table.name] = len(ids)
+    report(table.name, len(ids))
+    return ids
+
+
+def _next_id(connection: Connection, table) -> int:
+    return (connection.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _bulk_insert(connection: Connection, table, rows: List[dict]) -> None:
+    """COPY en PostgreSQL, executemany de Core en el resto."""
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql":
+        _copy_rows(connection, table, rows)
+    else:
+        connection.execute(table.insert(), rows)
+
+
+def _copy_rows(connection: Connection, table, rows: List[dict]) -> None:
+    """COPY ... FROM STDIN con el cursor de psycopg2 de la conexión actual."""
+    columns = list(rows[0].keys())
+    for column in table.columns:
+        # Defaults de Python que Core aplicaría en un insert() y COPY no
+        if column.name not in rows[0] and column.default is not None and column.default.is_scalar:
+            columns.append(column.name)
+            for row in rows:
+                row[column.name] = column.default.arg
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _copy_value(value):
+    """Valor en CSV de COPY: None → NULL (campo vacío), enums por nombre."""
+    if value is None:
+        return None
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
@@ -0,0 +1,117 @@
+"""
+Resumen de mediciones, baseline JSON y comparación entre corridas.
+
+Formato del baseline:
+    {
+      "meta": {"git_commit": "...", "created_at": "...", "dialect": "postgresql", "dataset": {...}},
+      "scenarios": {
+        "checkout": {"iterations": 200, "p50_ms": 12.1, "p95_ms": 20.4, "p99_ms": 31.0,
+                     "mean_ms": 13.2, "queries_per_request": 14.0, "errors": 0},
+        ...
+      }
+    }
+"""
+
+import json
+import platform
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Percentil con interpolación lineal (pct entre 0 y 1)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(latencies_ms: Sequence[float], queries: Sequence[int], errors: int) -> Dict:
+    """Percentiles de latencia y consultas promedio por request de un escenario."""
+    count = len(latencies_ms)
+    return {
+        "iterations": count,
+        "p50_ms": round(percentile(latencies_ms, 0.50), 2),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 2),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 2),
+        "mean_ms": round(sum(latencies_ms) / count, 2) if count else 0.0,
+        "queries_per_request": round(sum(queries) / count, 2) if count else 0.0,
+        "max_queries": max(queries) if queries else 0,
+        "errors": errors,
+    }
+
+
+def build_report(scenarios: Dict[str, Dict], dialect: str, dataset: Dict) -> Dict:
+    """Reporte completo con metadatos para comparar corridas de distintos commits."""
+    return {
+        "meta": {
+            "git_commit": _git_commit(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "dialect": dialect,
+            "dataset": dataset,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def save_report(report: Dict, path: str) -> None:
+    Path(path).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def load_report(path: str) -> Dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.2) -> List[str]:
+    """
+    Regresiones de current respecto de baseline.
+
+    Regresión = p95 más de threshold (proporción) por encima del baseline,
+    más consultas por request que en el baseline (el conteo es determinístico,
+    no tiene tolerancia) o errores nuevos. Los escenarios que no están en
+    ambas corridas se ignoran.
+    """
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        result = current.get("scenarios", {}).get(name)
+        if result is None:
+            continue
+        if base["p95_ms"] and result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {base['p95_ms']:.1f} → {result['p95_ms']:.1f} ms "
+                f"(+{(result['p95_ms'] / base['p95_ms'] - 1) * 100:.0f}%)"
+            )
+        if result["queries_per_request"] > base["queries_per_request"]:
+            regressions.append(
+                f"{name}: consultas/request {base['queries_per_request']} → {result['queries_per_request']}"
+            )
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name}: errores {base['errors']} → {result['errors']}")
+    return regressions
+
+
+def format_table(report: Dict) -> str:
+    """Tabla de texto para la consola."""
+    lines = [f"{'escenario':<20}{'p50':>9}{'p95':>9}{'p99':>9}{'consultas':>11}{'errores':>9}"]
+    for name, result in report["scenarios"].items():
+        lines.append(
+            f"{name:<20}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+            f"{result['queries_per_request']:>11.1f}{result['errors']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
@@ -0,0 +1,152 @@
+"""
+Escenarios guionados contra la app ASGI en proceso.
+
+Cada escenario arma un request (método, URL, cuerpo) a partir del dataset
+de benchmark y se ejecuta con el TestClient de FastAPI: pasa por todo el
+stack (middlewares, dependencias, serialización) sin red ni servidor, así
+la medición refleja el código y la base, no el transporte.
+
+Por request se mide la latencia y la cantidad de consultas SQL
+(capture_queries de database.py).
+"""
+
+import random
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import Product, User
+from database import capture_queries
+from scripts.benchmark.datagen import BENCH_ADMIN_USERNAME, BENCH_PREFIX, BENCH_SIZES
+from scripts.benchmark.report import summarize
+
+# Productos del dataset que se cargan para armar requests
+_CONTEXT_PRODUCTS = 2_000
+
+# (método, URL, cuerpo JSON)
+Request = Tuple[str, str, Optional[dict]]
+
+
+class BenchContext(NamedTuple):
+    """Datos del dataset que usan los escenarios para armar requests."""
+    headers: Dict[str, str]
+    branch_id: int
+    products: List[Tuple[int, str, float, bool]]  # (id, barcode, price, has_sizes)
+
+
+class Scenario(NamedTuple):
+    """Escenario: nombre y función que arma el request de cada iteración."""
+    name: str
+    build: Callable[[random.Random, BenchContext], Request]
+    expected_status: int = 200
+
+
+def load_context(db: Session) -> BenchContext:
+    """Token del admin de benchmark y una muestra de productos del dataset."""
+    from auth import create_access_token
+
+    admin = db.query(User).filter(User.username == BENCH_ADMIN_USERNAME).first()
+    if admin is None:
+        raise ValueError("No hay datos de benchmark; correr primero 'generate'")
+
+    rows = db.query(Product.id, Product.barcode, Product.price, Product.has_sizes).filter(
+        Product.sku.like(f"{BENCH_PREFIX}%")
+    ).order_by(Product.id).limit(_CONTEXT_PRODUCTS).all()
+
+    token = create_access_token(data={"sub": admin.username})
+    return BenchContext(
+        headers={"Authorization": f"Bearer {token}"},
+        branch_id=admin.branch_id,
+        products=[(row.id, row.barcode, float(row.price), bool(row.has_sizes)) for row in rows]
+    )
+
+
+def _checkout(rng: random.Random, context: BenchContext) -> Request:
+    items = []
+    for product_id, _, price, has_sizes in rng.sample(context.products, min(3, len(context.products))):
+        item = {"product_id": product_id, "quantity": 1, "unit_price": price}
+        if has_sizes:
+            item["size"] = rng.choice(BENCH_SIZES)
+        items.append(item)
+    return "POST", "/sales/", {
+        "sale_type": "POS",
+        "branch_id": context.branch_id,
+        "payment_method": "cash",
+        "items": items,
+    }
+
+
+def _barcode_scan(rng: random.Random, context: BenchContext) -> Request:
+    return "GET", f"/products/barcode/{rng.choice(context.products)[1]}", None
+
+
+def _catalog(rng: random.Random, context: BenchContext) -> Request:
+    offset = rng.randrange(0, max(1, len(context.products) - 24))
+    return "GET", f"/ecommerce/products/search?limit=24&offset={offset}&sort=price_asc", None
+
+
+def _reports_sales(rng: random.Random, context: BenchContext) -> Request:
+    end = date.today()
+    start = end - timedelta(days=rng.choice((7, 30, 90)))
+    return "GET", f"/reports/sales?start_date={start}&end_date={end}", None
+
+
+def _reports_dashboard(rng: random.Random, context: BenchContext) -> Request:
+    return "GET", "/reports/dashboard", None
+
+
+def _sales_list(rng: random.Random, context: BenchContext) -> Request:
+    return "GET", f"/sales/?skip={rng.randrange(0, 500)}&limit=50", None
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario for scenario in (
+        Scenario("checkout", _checkout),
+        Scenario("barcode_scan", _barcode_scan),
+        Scenario("catalog", _catalog),
+        Scenario("reports_sales", _reports_sales),
+        Scenario("reports_dashboard", _reports_dashboard),
+        Scenario("sales_list", _sales_list),
+    )
+}
+
+
+def run_scenario(
+    client,
+    context: BenchContext,
+    scenario: Scenario,
+    iterations: int,
+    warmup: int = 5,
+    seed: int = 42
+) -> Dict:
+    """
+    Ejecuta warmup + iterations requests del escenario y devuelve su resumen.
+
+    El warmup llena caches (config, índice del catálogo) y no se mide.
+    """
+    rng = random.Random(f"{seed}:{scenario.name}")
+    latencies: List[float] = []
+    queries: List[int] = []
+    errors = 0
+    last_error = None
+
+    for iteration in range(warmup + iterations):
+        method, url, body = scenario.build(rng, context)
+        with capture_queries() as stats:
+            started = time.perf_counter()
+            response = client.request(method, url, json=body, headers=context.headers)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if iteration < warmup:
+            continue
+        latencies.append(elapsed_ms)
+        queries.append(stats.count)
+        if response.status_code != scenario.expected_status:
+            errors += 1
+            last_error = f"{response.status_code} {url}: {response.text[:200]}"
+
+    result = summarize(latencies, queries, errors)
+    if last_error:
+        result["last_error"] = last_error
+    return result
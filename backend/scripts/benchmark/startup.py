@@ -0,0 +1,122 @@
+"""
+Cold start de la API: tiempo de `import main` en un proceso nuevo.
+
+Corre `python -X importtime -c "import main"` en un subproceso (sin
+módulos ya cacheados por el proceso que mide), parsea el reporte de
+importtime y devuelve el tiempo total, los módulos más caros y qué
+dependencias pesadas quedaron cargadas. Las pesadas (pandas, pyarrow,
+openpyxl, cloudinary, httpx) sólo se importan dentro de los endpoints que
+las usan; si alguna aparece al arrancar es una regresión.
+
+El objetivo (COLD_START_BUDGET_SECONDS) es el wall time del subproceso,
+intérprete incluido, y lo verifica tests/unit/test_cold_start.py.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+
+COLD_START_BUDGET_SECONDS = 3.0
+
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "openpyxl", "cloudinary", "httpx")
+
+_PROBE = (
+    "import json, sys\n"
+    "import {module}\n"
+    "print(json.dumps([name for name in {heavy!r} if name in sys.modules]))\n"
+)
+
+
+class ImportTiming(NamedTuple):
+    """Una línea del reporte de -X importtime (microsegundos)."""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """Líneas 'import time: self | cumulative | módulo' del stderr de -X importtime."""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # encabezado
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        timings.append(ImportTiming(
+            module=stripped,
+            self_us=int(fields[0]),
+            cumulative_us=int(fields[1]),
+            depth=(len(name) - len(stripped) - 1) // 2,
+        ))
+    return timings
+
+
+def profile_startup(module: str = "main", top: int = 20, env: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Importa `module` en un intérprete nuevo y reporta el cold start.
+
+    Returns:
+        dict con wall_s (subproceso completo), import_s (acumulado de
+        `module`), top (módulos con más tiempo acumulado, sin contar el
+        propio `module`), first_party (routers y app.* por tiempo propio)
+        y heavy_loaded (dependencias pesadas cargadas al arrancar)
+    """
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=str(BACKEND_DIR),
+        env=dict(os.environ, **(env or {})),
+        capture_output=True,
+        text=True,
+    )
+    wall_s = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}: {completed.stderr.strip().splitlines()[-1:]}")
+
+    timings = parse_importtime(completed.stderr)
+    root = next((timing for timing in timings if timing.module == module and timing.depth == 0), None)
+    ranked = sorted((t for t in timings if t.module != module), key=lambda t: t.cumulative_us, reverse=True)
+    first_party = sorted(
+        (t for t in timings if t.module.split(".")[0] in ("app", "routers", "services", "config")),
+        key=lambda t: t.self_us, reverse=True
+    )
+    return {
+        "module": module,
+        "wall_s": round(wall_s, 3),
+        "import_s": round(root.cumulative_us / 1e6, 3) if root else None,
+        "top": [_as_dict(t) for t in ranked[:top]],
+        "first_party": [_as_dict(t) for t in first_party[:top]],
+        "heavy_loaded": json.loads(completed.stdout.strip().splitlines()[-1]),
+    }
+
+
+def format_profile(profile: Dict) -> str:
+    """Tabla legible del perfil de arranque."""
+    lines = [
+        f"import {profile['module']}: {profile['import_s']}s (proceso completo {profile['wall_s']}s)",
+        "",
+        f"{'acumulado ms':>13} {'propio ms':>10}  módulo",
+    ]
+    for timing in profile["top"]:
+        lines.append(f"{timing['cumulative_ms']:>13} {timing['self_ms']:>10}  {timing['module']}")
+    lines.append("")
+    lines.append("Dependencias pesadas cargadas al arrancar: " + (", ".join(profile["heavy_loaded"]) or "ninguna"))
+    return "\n".join(lines)
+
+
+def _as_dict(timing: ImportTiming) -> Dict:
+    return {
+        "module": timing.module,
+        "self_ms": round(timing.self_us / 1000, 1),
+        "cumulative_ms": round(timing.cumulative_us / 1000, 1),
+    }
@@ -9,9 +9,10 @@ import os
 
 # Import our FastAPI app and dependencies
 from main import app
-from database import get_db, Base
+from database import get_db, Base, capture_queries
 from app.models import User, Branch, Category, Product, Sale, SaleItem
 from auth import get_current_active_user
+from app.core.cache import clear_all_caches
 
 # Test database URL - use SQLite for tests
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -50,6 +51,8 @@ def db_session():
         session.close()
         # Drop all tables after test
         Base.metadata.drop_all(bind=engine)
+        # Cached reads may point at rows from the dropped database
+        clear_all_caches()
 
 
 @pytest.fixture(scope="function")
@@ -350,4 +353,25 @@ def test_import_log(db_session, test_admin_user):
     db_session.add(import_log)
     db_session.commit()
     db_session.refresh(import_log)
-    return import_log
\ No newline at end of file
+    return import_log
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Query budget assertion for endpoint regression tests.
+
+    Usage:
+        with assert_max_queries(5):
+            client.get("/products/multi-branch-stock", headers=auth_headers_admin)
+    """
+    from contextlib import contextmanager
+
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        with capture_queries() as stats:
+            yield stats
+        if stats.count > limit:
+            executed = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(stats.statements))
+            pytest.fail(f"Expected at most {limit} queries, {stats.count} were executed:\n{executed}")
+
+    return _assert_max_queries
@@ -0,0 +1,76 @@
+"""
+Unit tests for the process-wide SystemConfig/EcommerceConfig/WhatsAppConfig cache.
+"""
+
+import pytest
+from sqlalchemy import event, text
+
+from app.models import SystemConfig, WhatsAppConfig
+from app.services.app_config_service import AppConfigService
+from config.settings import settings
+
+
+@pytest.mark.unit
+class TestAppConfigService:
+    """Test cached reads, write-through updates and version-stamp reloads."""
+
+    @pytest.fixture
+    def statements(self, db_session):
+        captured = []
+
+        def record(conn, cursor, statement, *args):
+            captured.append(statement)
+
+        event.listen(db_session.bind, "before_cursor_execute", record)
+        yield captured
+        event.remove(db_session.bind, "before_cursor_execute", record)
+
+    def test_currency_read_is_cached_and_never_writes(self, client, db_session, auth_headers_admin,
+                                                      statements, monkeypatch):
+        monkeypatch.setattr(settings, "app_config_check_seconds", 3600)
+
+        first = client.get("/config/currency", headers=auth_headers_admin)
+        assert first.json()["default_currency"] == "ARS"
+        assert db_session.query(SystemConfig).count() == 0
+
+        updated = client.put("/config/currency", headers=auth_headers_admin,
+                             json={"default_currency": "USD", "currency_symbol": "US$"})
+        assert updated.status_code == 200
+
+        statements.clear()
+        AppConfigService(db_session).get_currency()
+        assert statements == []
+        assert client.get("/config/currency", headers=auth_headers_admin).json()["currency_symbol"] == "US$"
+
+    def test_change_from_another_worker_reloads_on_version_check(self, db_session, monkeypatch):
+        db_session.add(SystemConfig(default_currency="ARS", currency_symbol="$", currency_position="before",
+                                    decimal_places=2, default_tax_rate=0, session_timeout=30))
+        db_session.commit()
+        service = AppConfigService(db_session)
+        monkeypatch.setattr(settings, "app_config_check_seconds", 3600)
+        service.warm()
+
+        # Raw SQL bypasses ORM events, like a write handled by another worker
+        db_session.execute(text(
+            "UPDATE system_config SET decimal_places = 0, updated_at = '2099-01-01 00:00:00'"
+        ))
+        db_session.commit()
+        assert service.get_currency()["decimal_places"] == 2
+
+        monkeypatch.setattr(settings, "app_config_check_seconds", 0)
+        assert service.get_currency()["decimal_places"] == 0
+
+    def test_orm_change_invalidates_and_values_are_copies(self, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "app_config_check_seconds", 3600)
+        config = WhatsAppConfig(business_phone="+5491100000000", business_name="Tienda", is_active=True)
+        db_session.add(config)
+        db_session.commit()
+        service = AppConfigService(db_session)
+
+        cached = service.get("whatsapp")
+        cached.business_name = "Modificado"
+        assert service.get("whatsapp").business_name == "Tienda"
+
+        config.is_active = False
+        db_session.commit()
+        assert service.get("whatsapp") is None
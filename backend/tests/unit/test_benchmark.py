@@ -0,0 +1,50 @@
+"""
+Unit tests for the benchmark data generator, scenario runner and baseline comparison.
+"""
+
+import pytest
+
+from app.models import Product, ProductSize, Sale, SaleItem
+from scripts.benchmark.datagen import PRESETS, generate
+from scripts.benchmark.report import compare, percentile
+from scripts.benchmark.scenarios import SCENARIOS, load_context, run_scenario
+
+
+@pytest.mark.unit
+class TestBenchmark:
+    """Test deterministic bulk generation, in-process scenarios and regression detection."""
+
+    def test_generate_is_consistent(self, db_session):
+        spec = PRESETS["tiny"]._replace(products=20, sales=50)
+
+        counts = generate(db_session.get_bind(), spec, batch_size=16)
+
+        assert counts["products"] == 20
+        assert counts["sales"] == db_session.query(Sale).count() == 50
+        assert counts["sale_items"] == db_session.query(SaleItem).count()
+        for sale in db_session.query(Sale).all():
+            assert sale.total_amount == sum(item.total_price for item in sale.sale_items)
+        assert db_session.query(ProductSize).filter(ProductSize.sort_rank == 0).count() == 0
+        with pytest.raises(ValueError):
+            generate(db_session.get_bind(), spec)
+
+    def test_scenarios_report_latency_and_queries(self, client, db_session):
+        generate(db_session.get_bind(), PRESETS["tiny"])
+        context = load_context(db_session)
+        assert len(context.products) == db_session.query(Product).count()
+
+        for name in ("checkout", "barcode_scan", "sales_list"):
+            result = run_scenario(client, context, SCENARIOS[name], iterations=3, warmup=1)
+            assert result["errors"] == 0, result.get("last_error")
+            assert result["iterations"] == 3
+            assert result["queries_per_request"] > 0
+            assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+    def test_compare_flags_regressions(self):
+        assert percentile([1, 2, 3, 4], 0.5) == 2.5
+        base = {"scenarios": {"catalog": {"p95_ms": 10.0, "queries_per_request": 2, "errors": 0}}}
+        same = {"scenarios": {"catalog": {"p95_ms": 11.0, "queries_per_request": 2, "errors": 0}}}
+        worse = {"scenarios": {"catalog": {"p95_ms": 15.0, "queries_per_request": 3, "errors": 1}}}
+
+        assert compare(base, same, threshold=0.2) == []
+        assert len(compare(base, worse, threshold=0.2)) == 3
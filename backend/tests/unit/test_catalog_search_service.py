@@ -0,0 +1,96 @@
+"""
+Unit tests for the in-memory faceted catalog search.
+"""
+
+import pytest
+
+from app.models import Brand, Product, ProductSize
+from app.services.catalog_search_service import CatalogSearchService, catalog_index_cache
+
+
+@pytest.mark.unit
+class TestCatalogSearchService:
+    """Test faceted filtering, counts and index invalidation."""
+
+    @pytest.fixture
+    def catalog(self, db_session, test_product, test_product_with_sizes, test_branch):
+        brand = Brand(name="Nike", is_active=True)
+        db_session.add(brand)
+        db_session.flush()
+        test_product_with_sizes.brand_id = brand.id
+        test_product_with_sizes.ecommerce_price = 30000
+        db_session.add_all([
+            ProductSize(product_id=test_product_with_sizes.id, branch_id=test_branch.id, size="M", stock_quantity=3),
+            ProductSize(product_id=test_product_with_sizes.id, branch_id=test_branch.id, size="L", stock_quantity=2,
+                        reserved_stock=2),
+        ])
+        db_session.commit()
+        return {"plain": test_product, "sized": test_product_with_sizes, "brand": brand}
+
+    def test_facet_counts_ignore_own_filter(self, db_session, catalog, test_category):
+        result = CatalogSearchService(db_session).search(brands=["Nike"])
+
+        assert [product["id"] for product in result["data"]] == [catalog["sized"].id]
+        assert result["total"] == 1
+        # Brand counts are computed without the brand filter
+        assert result["facets"]["brands"] == [{"id": catalog["brand"].id, "name": "Nike", "count": 1}]
+        assert result["facets"]["sizes"] == [{"size": "M", "count": 1}]
+        assert result["facets"]["categories"] == [
+            {"id": catalog["sized"].category_id, "name": "Indumentaria", "count": 1}
+        ]
+        assert result["facets"]["price_ranges"] == [{"min": 25000.0, "max": 50000.0, "count": 1}]
+
+        unfiltered = CatalogSearchService(db_session).search(category_ids=[test_category.id])
+        assert [product["id"] for product in unfiltered["data"]] == [catalog["plain"].id]
+        assert {item["name"]: item["count"] for item in unfiltered["facets"]["categories"]} == {
+            "Indumentaria": 1, "Test Category": 1
+        }
+
+    def test_default_order_search_and_pagination(self, db_session, catalog):
+        service = CatalogSearchService(db_session)
+
+        # Featured products (ecommerce_price) first
+        assert [p["id"] for p in service.search()["data"]] == [catalog["sized"].id, catalog["plain"].id]
+        assert [p["id"] for p in service.search(sort="price_asc")["data"]] == [catalog["plain"].id, catalog["sized"].id]
+        assert [p["id"] for p in service.search(offset=1, limit=1)["data"]] == [catalog["plain"].id]
+        assert [p["id"] for p in service.search(search="remera tal")["data"]] == [catalog["sized"].id]
+        assert service.search(min_price=20, max_price=100)["total"] == 0
+
+        with pytest.raises(ValueError):
+            service.search(sort="rating")
+
+    def test_index_rebuilt_after_catalog_change(self, db_session, catalog, test_category):
+        service = CatalogSearchService(db_session)
+        assert service.search()["total"] == 2
+
+        db_session.add(Product(name="Gorra", sku="GORRA-1", category_id=test_category.id, price=15,
+                               show_in_ecommerce=True, is_active=True))
+        db_session.flush()
+        assert catalog_index_cache.get("catalog") is not None
+
+        db_session.commit()
+        assert service.search(search="gorra")["total"] == 1
+
+    def test_stock_change_updates_index_in_place(self, db_session, catalog):
+        service = CatalogSearchService(db_session)
+        index = service.get_index()
+        assert [product["id"] for product in service.search(in_stock=True)["data"]] == [catalog["plain"].id]
+
+        catalog["plain"].reserved_stock = catalog["plain"].stock_quantity
+        catalog["sized"].stock_quantity = 5
+        db_session.query(ProductSize).filter_by(product_id=catalog["sized"].id, size="L").one().reserved_stock = 0
+        db_session.commit()
+
+        result = service.search(in_stock=True)
+        assert catalog_index_cache.get("catalog") is index
+        assert [product["id"] for product in result["data"]] == [catalog["sized"].id]
+        assert result["data"][0]["stock"] == 5
+        assert sorted(item["size"] for item in result["facets"]["sizes"]) == ["L", "M"]
+
+    def test_search_endpoint(self, client, catalog):
+        response = client.get("/ecommerce/products/search", params={"size": ["M", "XL"], "featured": False})
+
+        assert response.status_code == 200
+        assert response.json()["total"] == 0
+        assert response.json()["facets"]["sizes"] == []
+        assert client.get("/ecommerce/products/search", params={"sort": "rating"}).status_code == 400
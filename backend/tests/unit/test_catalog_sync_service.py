@@ -0,0 +1,88 @@
+"""
+Unit tests for the POS catalog delta sync.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import BranchStock, ProductSize
+from app.services.catalog_sync_service import CatalogSyncService, encode_cursor
+from config.settings import settings
+
+
+@pytest.mark.unit
+class TestCatalogSyncService:
+    """Test full snapshot paging, deltas and cursor fallback."""
+
+    @pytest.fixture
+    def catalog(self, db_session, test_product, test_product_with_sizes, test_branch, monkeypatch):
+        monkeypatch.setattr(settings, "catalog_sync_overlap_seconds", 0)
+        base = datetime.now() - timedelta(hours=1)
+        test_product.updated_at = base
+        test_product_with_sizes.updated_at = base
+        size = ProductSize(product_id=test_product_with_sizes.id, branch_id=test_branch.id, size="M",
+                           stock_quantity=4, reserved_stock=1, updated_at=base + timedelta(minutes=1))
+        db_session.add(size)
+        for stock in db_session.query(BranchStock).all():
+            stock.updated_at = base
+        db_session.commit()
+        return {"plain": test_product, "sized": test_product_with_sizes, "size": size, "base": base}
+
+    def _sync(self, service, branch, cursor=None, limit=None):
+        pages = []
+        while True:
+            page = service.changes(branch.id, cursor=cursor, limit=limit)
+            pages.append(page)
+            cursor = page["cursor"]
+            if not page["has_more"]:
+                return pages, cursor
+
+    def test_full_snapshot_is_paged_in_change_order(self, db_session, catalog, test_branch):
+        pages, _ = self._sync(CatalogSyncService(db_session), test_branch, limit=1)
+
+        assert [page["full"] for page in pages] == [True, True]
+        assert [[p["id"] for p in page["upserts"]] for page in pages] == [
+            [catalog["plain"].id], [catalog["sized"].id]
+        ]
+        plain, sized = pages[0]["upserts"][0], pages[1]["upserts"][0]
+        assert (plain["price"], plain["stock"], plain["available"]) == (10.99, 100, 100)
+        assert (sized["stock"], sized["available"], sized["sizes"]) == (4, 3, {"M": 3})
+
+    def test_delta_returns_only_changes_and_deletes(self, db_session, catalog, test_branch):
+        service = CatalogSyncService(db_session)
+        _, cursor = self._sync(service, test_branch)
+
+        later = catalog["base"] + timedelta(minutes=5)
+        catalog["size"].stock_quantity = 2
+        catalog["size"].updated_at = later
+        catalog["plain"].is_active = False
+        catalog["plain"].updated_at = later
+        db_session.commit()
+
+        pages, cursor = self._sync(service, test_branch, cursor=cursor)
+        assert pages[0]["full"] is False
+        assert [p["id"] for p in pages[0]["upserts"]] == [catalog["sized"].id]
+        assert pages[0]["upserts"][0]["sizes"] == {"M": 1}
+        assert pages[0]["deleted"] == [catalog["plain"].id]
+
+        page = service.changes(test_branch.id, cursor=cursor)
+        assert (page["upserts"], page["deleted"], page["has_more"]) == ([], [], False)
+
+    def test_overlap_window_and_cursor_fallback(self, db_session, catalog, test_branch, monkeypatch):
+        service = CatalogSyncService(db_session)
+        _, cursor = self._sync(service, test_branch)
+
+        monkeypatch.setattr(settings, "catalog_sync_overlap_seconds", 30)
+        assert [p["id"] for p in service.changes(test_branch.id, cursor=cursor)["upserts"]] == [catalog["sized"].id]
+
+        assert service.changes(test_branch.id, cursor="not-a-cursor")["full"] is True
+        stale = encode_cursor(datetime.now() - timedelta(days=30), None)
+        assert service.changes(test_branch.id, cursor=stale)["full"] is True
+
+    def test_sync_endpoint(self, client, auth_headers_admin, catalog):
+        response = client.get("/products/sync", headers=auth_headers_admin, params={"limit": 1})
+
+        assert response.status_code == 200
+        assert response.json()["has_more"] is True
+        assert client.get("/products/sync", headers=auth_headers_admin, params={"branch_id": 999}).status_code == 404
@@ -0,0 +1,53 @@
+"""
+Unit tests for the concurrent checkout load tool and its inventory invariants.
+"""
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models import BranchStock, Product
+from scripts.benchmark.checkout_load import (
+    LoadConfig, check_invariants, cleanup_fixture, run_load, setup_fixture
+)
+
+
+@pytest.mark.unit
+class TestCheckoutLoad:
+    """Test skewed carts against SaleService and detection of broken stock invariants."""
+
+    @pytest.fixture
+    def config(self):
+        return LoadConfig(registers=1, branches=2, products=10, stock=4, duration=30,
+                          max_checkouts=15, skew=1.5)
+
+    def test_run_keeps_inventory_consistent(self, db_session, config):
+        session_factory = sessionmaker(bind=db_session.get_bind())
+        fixture = setup_fixture(db_session, config)
+
+        results = run_load(session_factory, fixture, config)
+
+        assert results["errors"] == 0, results["last_error"]
+        assert results["checkouts"] == 15
+        assert results["latency_ms"]["p50"] > 0
+        assert check_invariants(db_session, fixture, results) == []
+
+        hottest = fixture.products[0][0]
+        assert sum(units for (product_id, _, _), units in results["sold"].items() if product_id == hottest) > 0
+
+        cleanup_fixture(db_session, fixture)
+        assert db_session.query(Product).filter(Product.id == hottest).count() == 0
+
+    def test_oversell_is_reported(self, db_session, config):
+        session_factory = sessionmaker(bind=db_session.get_bind())
+        fixture = setup_fixture(db_session, config._replace(sized_ratio=0))
+        results = run_load(session_factory, fixture, config._replace(max_checkouts=3))
+
+        row = db_session.query(BranchStock).filter(
+            BranchStock.product_id == fixture.products[-1][0]
+        ).first()
+        row.stock_quantity = -1
+        db_session.commit()
+
+        violations = check_invariants(db_session, fixture, results)
+        assert any("stock negativo" in violation for violation in violations)
+        assert any("sale_items" in violation for violation in violations)
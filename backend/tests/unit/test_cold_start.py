@@ -0,0 +1,41 @@
+"""
+Unit tests for the API cold-start profile: import budget, deferred heavy
+dependencies and the development create_all lifespan hook.
+"""
+
+import pytest
+
+from scripts.benchmark.startup import COLD_START_BUDGET_SECONDS, parse_importtime, profile_startup
+
+
+@pytest.mark.unit
+class TestColdStart:
+    """Test that importing main stays light and fast."""
+
+    def test_import_main_within_budget_without_heavy_dependencies(self):
+        profile = profile_startup(top=5)
+
+        assert profile["heavy_loaded"] == []
+        assert profile["wall_s"] < COLD_START_BUDGET_SECONDS
+        assert profile["import_s"] is not None and profile["top"]
+
+    def test_development_import_does_not_touch_database(self, tmp_path):
+        database = tmp_path / "cold.db"
+
+        profile_startup(top=1, env={"ENVIRONMENT": "development", "DATABASE_URL": f"sqlite:///{database}"})
+
+        assert not database.exists()
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "import time:       300 |        420 | json\n"
+        )
+
+        timings = parse_importtime(output)
+
+        assert [(t.module, t.self_us, t.cumulative_us, t.depth) for t in timings] == [
+            ("json.decoder", 120, 120, 1),
+            ("json", 300, 420, 0),
+        ]
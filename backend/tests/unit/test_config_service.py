@@ -0,0 +1,114 @@
+"""
+Unit tests for the cached branch configuration snapshot.
+"""
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, text
+
+from app.models import BranchPaymentMethod, BranchTaxRate, PaymentMethod, TaxRate
+from app.services.config_service import ConfigService
+from config.settings import settings
+
+
+@pytest.mark.unit
+class TestBranchConfigSnapshot:
+    """Test tax/payment resolution from the snapshot and its invalidation."""
+
+    @pytest.fixture
+    def config(self, db_session, test_branch):
+        cash = PaymentMethod(name="Efectivo", code="CASH", is_active=True)
+        card = PaymentMethod(name="Tarjetas", code="CARD", is_active=True)
+        system_tax = TaxRate(name="IVA 21%", rate=Decimal("21.00"), is_default=True, is_active=True)
+        branch_tax = TaxRate(name="IVA 10.5%", rate=Decimal("10.50"), is_active=True)
+        db_session.add_all([cash, card, system_tax, branch_tax])
+        db_session.flush()
+        db_session.add(BranchPaymentMethod(branch_id=test_branch.id, payment_method_id=card.id, is_active=False))
+        db_session.commit()
+        return {"cash": cash, "card": card, "system_tax": system_tax, "branch_tax": branch_tax}
+
+    @pytest.fixture
+    def statements(self, db_session):
+        captured = []
+
+        def record(conn, cursor, statement, *args):
+            captured.append(statement)
+
+        event.listen(db_session.bind, "before_cursor_execute", record)
+        yield captured
+        event.remove(db_session.bind, "before_cursor_execute", record)
+
+    def test_resolves_without_queries_once_loaded(self, db_session, config, test_branch, statements):
+        service = ConfigService(db_session)
+        branch_id, cash_id = test_branch.id, config["cash"].id
+        service.get_branch_snapshot(branch_id)
+        statements.clear()
+
+        assert service.get_tax_rate_for_branch(branch_id)[1] == "IVA 21%"
+        assert service.validate_payment_method("CASH", branch_id).id == cash_id
+        assert service.validate_payment_method("efectivo", branch_id).code == "CASH"
+        with pytest.raises(ValueError, match="not available"):
+            service.validate_payment_method("CARD", branch_id)
+        with pytest.raises(ValueError, match="not found"):
+            service.validate_payment_method("CRYPTO", branch_id)
+        assert statements == []
+
+        # Without branch the branch override does not apply
+        assert service.validate_payment_method("CARD").id == config["card"].id
+
+        snapshot = service.get_branch_snapshot(test_branch.id)
+        with pytest.raises(AttributeError):
+            snapshot.tax_rate = None
+        with pytest.raises(TypeError):
+            snapshot.payment_methods["CASH"] = None
+
+    def test_config_change_invalidates_after_commit(self, db_session, config, test_branch):
+        service = ConfigService(db_session)
+        assert service.get_tax_rate_for_branch(test_branch.id)[2] == Decimal("21.00")
+
+        db_session.add(BranchTaxRate(branch_id=test_branch.id, tax_rate_id=config["branch_tax"].id, is_default=True))
+        db_session.flush()
+        assert service.get_tax_rate_for_branch(test_branch.id)[2] == Decimal("21.00")
+
+        db_session.commit()
+        assert service.get_tax_rate_for_branch(test_branch.id)[2] == Decimal("10.50")
+
+    def test_change_from_another_worker_reloads_on_version_check(self, db_session, config, test_branch,
+                                                                 monkeypatch):
+        service = ConfigService(db_session)
+        monkeypatch.setattr(settings, "branch_config_check_seconds", 0)
+        assert service.validate_payment_method("CASH", test_branch.id)
+        monkeypatch.setattr(settings, "branch_config_check_seconds", 3600)
+
+        # Raw SQL bypasses ORM events, like a write handled by another worker
+        db_session.execute(text(
+            "UPDATE payment_methods SET is_active = 0, updated_at = '2099-01-01 00:00:00' WHERE code = 'CASH'"
+        ))
+        db_session.commit()
+        assert service.validate_payment_method("CASH", test_branch.id)
+
+        monkeypatch.setattr(settings, "branch_config_check_seconds", 0)
+        with pytest.raises(ValueError, match="not active"):
+            service.validate_payment_method("CASH", test_branch.id)
+
+    def test_payment_method_endpoint_invalidates(self, client, db_session, auth_headers_admin, config, test_branch):
+        service = ConfigService(db_session)
+        assert service.validate_payment_method("CASH", test_branch.id)
+
+        response = client.put(f"/config/payment-methods/{config['cash'].id}", headers=auth_headers_admin,
+                              json={"is_active": False})
+
+        assert response.status_code == 200
+        with pytest.raises(ValueError, match="not active"):
+            service.validate_payment_method("CASH", test_branch.id)
+
+    def test_payment_methods_read_does_not_write(self, client, db_session, auth_headers_admin):
+        response = client.get("/config/payment-methods", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert response.json() == []
+        assert db_session.query(PaymentMethod).count() == 0
+
+        assert ConfigService(db_session).ensure_default_payment_methods() == 3
+        assert ConfigService(db_session).ensure_default_payment_methods() == 0
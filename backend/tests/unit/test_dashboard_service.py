@@ -0,0 +1,72 @@
+"""
+Unit tests for the consolidated e-commerce dashboard aggregation.
+"""
+
+import pytest
+
+from app.models import Sale, WhatsAppSale
+from app.models.enums import OrderStatus, SaleType
+from app.services.dashboard_service import EcommerceDashboardService
+
+
+@pytest.mark.unit
+class TestEcommerceDashboardService:
+    """Test conditional aggregation, WhatsApp join and caching."""
+
+    def _sale(self, number, status, total, branch, sale_type=SaleType.ECOMMERCE, customer_name=None):
+        return Sale(
+            sale_number=number,
+            sale_type=sale_type,
+            branch_id=branch.id,
+            customer_name=customer_name,
+            subtotal=total,
+            tax_amount=0,
+            total_amount=total,
+            order_status=status
+        )
+
+    @pytest.fixture
+    def sales(self, db_session, test_branch, test_product):
+        sales = [
+            self._sale("EC-1", OrderStatus.PENDING, 100, test_branch),
+            self._sale("EC-2", OrderStatus.DELIVERED, 50, test_branch, customer_name="Ana"),
+            self._sale("EC-3", OrderStatus.CANCELLED, 999, test_branch),
+            self._sale("POS-1", None, 70, test_branch, sale_type=SaleType.POS),
+        ]
+        db_session.add_all(sales)
+        db_session.flush()
+        db_session.add(WhatsAppSale(sale_id=sales[0].id, customer_whatsapp="+5491100000000",
+                                    customer_name="Carlos"))
+        db_session.commit()
+        return sales
+
+    def test_stats_and_status_counts(self, db_session, sales):
+        detailed = EcommerceDashboardService(db_session).get_detailed()
+
+        assert detailed["stats"] == {
+            "total_online_products": 1,
+            "total_online_sales": 150.0,
+            "total_online_orders": 3,
+            "pending_orders": 1,
+            "delivered_orders": 1,
+            "conversion_rate": 33.33
+        }
+        assert {row["status"]: row["count"] for row in detailed["orders_by_status"]} == {
+            "PENDING": 1, "DELIVERED": 1, "CANCELLED": 1
+        }
+        recent = {row["sale_number"]: row for row in detailed["recent_sales"]}
+        assert recent["EC-1"]["customer_name"] == "Carlos"
+        assert recent["EC-1"]["is_whatsapp"] is True
+        assert recent["EC-2"]["is_whatsapp"] is False
+        assert "POS-1" not in recent
+        assert sum(day["total"] for day in detailed["sales_by_day"]) == 150.0
+
+    def test_stats_shared_and_invalidated_by_sale_commit(self, db_session, sales, test_branch):
+        service = EcommerceDashboardService(db_session)
+        assert service.get_stats()["total_online_orders"] == 3
+        assert service.get_detailed()["stats"] is service.get_stats()
+
+        db_session.add(self._sale("EC-4", OrderStatus.PENDING, 10, test_branch))
+        db_session.commit()
+
+        assert service.get_stats()["pending_orders"] == 2
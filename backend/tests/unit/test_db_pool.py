@@ -0,0 +1,73 @@
+"""
+Unit tests for connection pool sizing, PgBouncer mode and pool-exhaustion diagnostics.
+"""
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool
+
+from app.core.db_pool import PoolHolders, engine_options, resolve_pool_config
+from app.core.metrics import db_pool_timeouts
+from config.settings import settings
+from database import MeteredQueuePool, _current_route, track_queries
+
+
+@pytest.mark.unit
+class TestDbPool:
+    """Test settings-driven sizing per role, PgBouncer options and holder attribution."""
+
+    def test_sizing_per_role_and_worker(self, monkeypatch):
+        monkeypatch.setattr(settings, "db_connection_budget", 60)
+        monkeypatch.setattr(settings, "web_concurrency", 4)
+        config = resolve_pool_config()
+        assert (config.role, config.pool_size, config.max_overflow) == ("api", 5, 10)
+
+        monkeypatch.setattr(settings, "db_pool_role", "jobs")
+        monkeypatch.setattr(settings, "job_worker_threads", 4)
+        assert resolve_pool_config()[3:5] == (5, 2)
+
+        monkeypatch.setattr(settings, "db_pool_size", 3)
+        monkeypatch.setattr(settings, "db_max_overflow", 0)
+        assert resolve_pool_config()[3:5] == (3, 0)
+
+    def test_pgbouncer_mode(self, monkeypatch):
+        monkeypatch.setattr(settings, "db_pool_mode", "pgbouncer")
+        config = resolve_pool_config()
+        assert config.pre_ping is False
+
+        options = engine_options(config, "postgresql+psycopg://u:p@bouncer/db", MeteredQueuePool)
+        assert options["poolclass"] is NullPool and options["pool_pre_ping"] is False
+        assert options["connect_args"] == {"prepare_threshold": None}
+        assert "connect_args" not in engine_options(config, "postgresql://u:p@bouncer/db", MeteredQueuePool)
+
+    def test_holders_and_exhaustion(self, tmp_path, caplog):
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=MeteredQueuePool,
+                               pool_size=1, max_overflow=0, pool_timeout=0.05)
+        holders = PoolHolders(_current_route)
+        holders.attach(engine)
+        timeouts = db_pool_timeouts.value()
+
+        with track_queries("GET /reports/sales"):
+            connection = engine.connect()
+        assert holders.by_owner()[0]["owner"] == "GET /reports/sales"
+
+        with caplog.at_level(logging.ERROR, logger="pos.db_pool"):
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        assert db_pool_timeouts.value() == timeouts + 1
+        assert "Pool de conexiones agotado" in caplog.text
+
+        connection.close()
+        assert holders.snapshot() == []
+        engine.dispose()
+
+    def test_pool_diagnostics_endpoint(self, client, auth_headers_admin):
+        response = client.get("/diagnostics/pool", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["config"]["role"] == "api"
+        assert isinstance(body["holders"], list)
@@ -0,0 +1,86 @@
+"""
+Unit tests for FulfillmentService multi-branch allocation policies.
+"""
+
+import pytest
+
+from app.models import BranchStock
+from app.services.fulfillment_service import FulfillmentService
+from app.services.stock_service import InsufficientStockError
+
+
+@pytest.mark.unit
+class TestFulfillmentService:
+    """Test allocation of e-commerce order lines across branches."""
+
+    @pytest.fixture
+    def second_branch_stock(self, db_session, test_product, test_branch_secondary):
+        stock = BranchStock(
+            product_id=test_product.id,
+            branch_id=test_branch_secondary.id,
+            stock_quantity=10
+        )
+        db_session.add(stock)
+        db_session.commit()
+        return stock
+
+    def _lines(self, product, *quantities):
+        return [{"product_id": product.id, "quantity": q, "size": None} for q in quantities]
+
+    def test_single_branch_when_one_covers_order(self, db_session, test_product, test_branch, second_branch_stock):
+        plan = FulfillmentService(db_session, policy="single_branch_first").plan(self._lines(test_product, 5, 3))
+
+        assert plan["branch_id"] == test_branch.id
+        assert plan["shipment_count"] == 1
+        assert [a["quantity"] for a in plan["allocations"]] == [5, 3]
+
+    def test_splits_line_when_no_branch_covers_it(self, db_session, test_product, test_branch,
+                                                  test_branch_secondary, second_branch_stock):
+        plan = FulfillmentService(db_session, policy="single_branch_first").plan(self._lines(test_product, 105))
+
+        by_branch = {a["branch_id"]: a["quantity"] for a in plan["allocations"]}
+        assert by_branch == {test_branch.id: 100, test_branch_secondary.id: 5}
+        assert plan["policy"] == "single_branch_first"
+        assert plan["branch_id"] == test_branch.id
+        assert plan["shipment_count"] == 2
+
+    def test_reserved_units_are_not_allocated(self, db_session, test_product, test_branch,
+                                              test_branch_secondary, second_branch_stock):
+        main = db_session.query(BranchStock).filter(
+            BranchStock.product_id == test_product.id,
+            BranchStock.branch_id == test_branch.id
+        ).one()
+        main.reserved_stock = 98
+        db_session.commit()
+
+        plan = FulfillmentService(db_session, policy="fewest_shipments").plan(self._lines(test_product, 4))
+
+        assert plan["branch_id"] == test_branch_secondary.id
+        assert plan["shipment_count"] == 1
+
+    def test_nearest_prefers_closest_branch(self, db_session, test_product, test_branch,
+                                            test_branch_secondary, second_branch_stock):
+        test_branch.latitude, test_branch.longitude = -34.60, -58.38
+        test_branch_secondary.latitude, test_branch_secondary.longitude = -31.42, -64.18
+        db_session.commit()
+
+        plan = FulfillmentService(db_session, policy="nearest").plan(
+            self._lines(test_product, 12), origin=(-31.40, -64.20)
+        )
+
+        assert plan["allocations"][0] == {
+            "line_index": 0, "product_id": test_product.id, "size": None,
+            "branch_id": test_branch_secondary.id, "quantity": 10
+        }
+        assert plan["allocations"][1]["branch_id"] == test_branch.id
+        assert plan["allocations"][1]["quantity"] == 2
+
+    def test_shortage_across_all_branches(self, db_session, test_product, second_branch_stock):
+        with pytest.raises(InsufficientStockError) as exc:
+            FulfillmentService(db_session).plan(self._lines(test_product, 200))
+
+        assert "disponible 110" in str(exc.value)
+
+    def test_unknown_policy(self, db_session):
+        with pytest.raises(ValueError):
+            FulfillmentService(db_session, policy="cheapest")
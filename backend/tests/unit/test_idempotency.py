@@ -0,0 +1,134 @@
+"""
+Unit tests for Idempotency-Key handling on sale creation.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import BranchStock, IdempotencyKey, IdempotencyStatus, Sale
+from app.services.idempotency_service import IdempotencyKeyReusedError, IdempotencyService
+from config.settings import settings
+
+
+@pytest.mark.unit
+class TestIdempotencyService:
+    """Test claiming, reuse detection and expiry of keys."""
+
+    def test_claim_then_duplicate(self, db_session):
+        service = IdempotencyService(db_session)
+
+        claimed, record = service.begin("POST /sales/", "abc", "hash-1")
+        assert claimed is True
+
+        claimed, existing = service.begin("POST /sales/", "abc", "hash-1")
+        assert claimed is False
+        assert existing.status == IdempotencyStatus.IN_PROGRESS.value
+
+        with pytest.raises(IdempotencyKeyReusedError):
+            service.begin("POST /sales/", "abc", "hash-2")
+
+        # Same key in another scope is independent
+        assert service.begin("POST /ecommerce/sales", "abc", "hash-2")[0] is True
+
+    def test_expired_and_abandoned_keys_are_reclaimed(self, db_session):
+        now = datetime.utcnow()
+        db_session.add_all([
+            IdempotencyKey(scope="s", key="expired", request_hash="h", status=IdempotencyStatus.COMPLETED.value,
+                           response_status=200, response_body="{}", expires_at=now - timedelta(seconds=1)),
+            IdempotencyKey(scope="s", key="abandoned", request_hash="h", status=IdempotencyStatus.IN_PROGRESS.value,
+                           created_at=now - timedelta(hours=1), expires_at=now + timedelta(hours=1)),
+        ])
+        db_session.commit()
+        service = IdempotencyService(db_session)
+
+        assert service.begin("s", "abandoned", "h")[0] is True
+        assert service.purge_expired() == 1
+        assert service.begin("s", "expired", "other")[0] is True
+
+
+@pytest.mark.unit
+class TestIdempotentSaleEndpoint:
+    """Test POST /sales/ with the Idempotency-Key header."""
+
+    def _sale(self, product, branch, quantity=2):
+        return {
+            "sale_type": "POS",
+            "branch_id": branch.id,
+            "payment_method": "cash",
+            "items": [{"product_id": product.id, "quantity": quantity, "unit_price": float(product.price)}]
+        }
+
+    def _stock(self, db_session, product, branch):
+        db_session.expire_all()
+        return db_session.query(BranchStock).filter(
+            BranchStock.product_id == product.id, BranchStock.branch_id == branch.id
+        ).one().stock_quantity
+
+    def test_retry_replays_without_second_sale(self, client, db_session, auth_headers_admin,
+                                               test_product, test_branch, mock_websocket_manager):
+        headers = {**auth_headers_admin, "Idempotency-Key": "retry-1"}
+        first = client.post("/sales/", headers=headers, json=self._sale(test_product, test_branch))
+        retry = client.post("/sales/", headers=headers, json=self._sale(test_product, test_branch))
+
+        assert first.status_code == 200
+        assert retry.status_code == 200
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert db_session.query(Sale).count() == 1
+        assert self._stock(db_session, test_product, test_branch) == 98
+
+        reused = client.post("/sales/", headers=headers, json=self._sale(test_product, test_branch, quantity=3))
+        assert reused.status_code == 422
+
+    def test_crash_after_sale_commit_replays_from_sale(self, client, db_session, auth_headers_admin, test_product,
+                                                        test_branch, mock_websocket_manager, monkeypatch):
+        headers = {**auth_headers_admin, "Idempotency-Key": "retry-3"}
+
+        def crash(*args):
+            raise RuntimeError("worker died before saving the response")
+
+        monkeypatch.setattr(IdempotencyService, "complete", crash)
+        with pytest.raises(RuntimeError):
+            client.post("/sales/", headers=headers, json=self._sale(test_product, test_branch))
+        monkeypatch.undo()
+
+        db_session.expire_all()
+        record = db_session.query(IdempotencyKey).one()
+        sale = db_session.query(Sale).one()
+        assert (record.status, record.resource_id, record.response_body) == (
+            IdempotencyStatus.COMPLETED.value, sale.id, None
+        )
+
+        retry = client.post("/sales/", headers=headers, json=self._sale(test_product, test_branch))
+        assert retry.status_code == 200
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert retry.json()["id"] == sale.id
+        assert db_session.query(Sale).count() == 1
+        assert self._stock(db_session, test_product, test_branch) == 98
+
+    def test_failed_execution_releases_key(self, client, db_session, auth_headers_admin,
+                                           test_product, test_branch, mock_websocket_manager):
+        headers = {**auth_headers_admin, "Idempotency-Key": "retry-2"}
+        failed = client.post("/sales/", headers=headers, json=self._sale(test_product, test_branch, quantity=999))
+
+        assert failed.status_code == 400
+        assert db_session.query(IdempotencyKey).count() == 0
+
+    def test_duplicate_in_flight_gets_409(self, client, db_session, auth_headers_admin,
+                                          test_product, test_branch, monkeypatch):
+        monkeypatch.setattr(settings, "idempotency_wait_seconds", 0)
+        body = json.dumps(self._sale(test_product, test_branch)).encode("utf-8")
+        # Another worker claimed the key and is still running
+        IdempotencyService(db_session).begin("POST /sales/", "busy", hashlib.sha256(body).hexdigest())
+
+        response = client.post(
+            "/sales/", content=body,
+            headers={**auth_headers_admin, "Idempotency-Key": "busy", "Content-Type": "application/json"}
+        )
+
+        assert response.status_code == 409
+        assert response.headers["Retry-After"] == "1"
+        assert db_session.query(Sale).count() == 0
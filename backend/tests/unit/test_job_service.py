@@ -0,0 +1,168 @@
+"""
+Unit tests for JobService and the background job queue.
+
+Runs the claim/execute cycle against the SQLite test database with
+handlers registered only for these tests.
+"""
+
+import threading
+
+import pytest
+from datetime import datetime, timedelta
+
+from app.models import BackgroundJob, JobStatus
+from app.services.job_service import JobHeartbeat, JobService, PermanentJobError, job_handler
+from tests.conftest import TestingSessionLocal
+
+
+@job_handler("test_echo")
+def _echo_handler(db, ctx):
+    ctx.report_progress(50, "half", force=True)
+    return {"echo": ctx.payload.get("value")}
+
+
+@job_handler("test_fail")
+def _fail_handler(db, ctx):
+    raise RuntimeError("boom")
+
+
+@job_handler("test_permanent")
+def _permanent_handler(db, ctx):
+    raise PermanentJobError("bad file")
+
+
+@job_handler("test_cancel")
+def _cancel_handler(db, ctx):
+    ctx.check_cancelled()
+    return {"ran": True}
+
+
+@pytest.mark.unit
+class TestJobQueue:
+    """Test enqueue, claim and execution of background jobs."""
+
+    @pytest.fixture
+    def service(self, db_session):
+        return JobService(db_session)
+
+    def test_enqueue_rejects_unknown_type(self, service):
+        with pytest.raises(ValueError):
+            service.enqueue("does_not_exist")
+
+    def test_claim_orders_by_priority(self, service):
+        low = service.enqueue("test_echo", priority=JobService.PRIORITY_LOW)
+        high = service.enqueue("test_echo", priority=JobService.PRIORITY_HIGH)
+
+        claimed = service.claim_next("worker-1")
+
+        assert claimed.id == high.id
+        assert claimed.status == JobStatus.RUNNING.value
+        assert claimed.attempts == 1
+        assert claimed.locked_by == "worker-1"
+        assert service.claim_next("worker-1").id == low.id
+        assert service.claim_next("worker-1") is None
+
+    def test_claim_skips_jobs_scheduled_in_future(self, service):
+        service.enqueue("test_echo", run_after=datetime.utcnow() + timedelta(minutes=5))
+        assert service.claim_next("worker-1") is None
+
+    def test_execute_completes_with_result(self, service):
+        service.enqueue("test_echo", payload={"value": 42})
+        job = service.claim_next("worker-1")
+
+        job = service.execute(job, TestingSessionLocal)
+
+        assert job.status == JobStatus.COMPLETED.value
+        assert job.progress == 100
+        assert job.result == {"echo": 42}
+        assert job.locked_by is None
+
+    def test_failed_job_is_rescheduled_then_failed(self, service):
+        service.enqueue("test_fail", max_attempts=2)
+
+        job = service.execute(service.claim_next("worker-1"), TestingSessionLocal)
+        assert job.status == JobStatus.PENDING.value
+        assert job.run_after > datetime.utcnow()
+        assert "boom" in job.error_details
+
+        # Forzar el reintento sin esperar el backoff
+        job.run_after = datetime.utcnow() - timedelta(seconds=1)
+        service.db.commit()
+
+        job = service.execute(service.claim_next("worker-1"), TestingSessionLocal)
+        assert job.status == JobStatus.FAILED.value
+        assert job.attempts == 2
+
+    def test_cancel_pending_job(self, service):
+        job = service.enqueue("test_echo")
+
+        job = service.cancel(job.id)
+
+        assert job.status == JobStatus.CANCELLED.value
+        assert service.claim_next("worker-1") is None
+
+    def test_cancel_running_job_is_cooperative(self, service):
+        service.enqueue("test_cancel")
+        job = service.claim_next("worker-1")
+
+        assert service.cancel(job.id).status == JobStatus.RUNNING.value
+
+        job = service.execute(job, TestingSessionLocal)
+        assert job.status == JobStatus.CANCELLED.value
+
+    def test_cancel_requested_job_that_fails_ends_cancelled(self, service):
+        service.enqueue("test_fail", max_attempts=3)
+        job = service.claim_next("worker-1")
+        service.cancel(job.id)
+
+        job = service.execute(job, TestingSessionLocal)
+
+        assert job.status == JobStatus.CANCELLED.value
+        assert job.error_details == "boom"
+
+    def test_requeue_stale_running_jobs(self, service):
+        service.enqueue("test_echo")
+        job = service.claim_next("worker-1")
+        job.locked_at = datetime.utcnow() - timedelta(hours=1)
+        service.db.commit()
+
+        assert service.requeue_stale_jobs(lease_seconds=60) == 1
+        service.db.refresh(job)
+        assert job.status == JobStatus.PENDING.value
+        assert job.locked_by is None
+
+    def test_permanent_failure_is_not_retried(self, service):
+        service.enqueue("test_permanent", max_attempts=3)
+
+        job = service.execute(service.claim_next("worker-1"), TestingSessionLocal)
+
+        assert job.status == JobStatus.FAILED.value
+        assert job.attempts == 1
+        assert job.error_details == "bad file"
+
+    def test_requeued_job_result_is_discarded_by_previous_owner(self, service):
+        service.enqueue("test_echo")
+        job = service.claim_next("worker-1")
+        # requeue_stale + claim por otro worker mientras worker-1 sigue ejecutando
+        job.locked_by = "worker-2"
+        service.db.commit()
+        job.locked_by = "worker-1"
+
+        job = service.execute(job, TestingSessionLocal)
+
+        assert job.status == JobStatus.RUNNING.value
+        assert job.locked_by == "worker-2"
+
+    def test_heartbeat_renews_lease_only_for_owner(self, service):
+        service.enqueue("test_echo")
+        job = service.claim_next("worker-1")
+        job.locked_at = datetime.utcnow() - timedelta(hours=1)
+        service.db.commit()
+
+        with JobHeartbeat(job.id, "worker-1", TestingSessionLocal, interval=0.01):
+            threading.Event().wait(0.1)
+
+        service.db.refresh(job)
+        assert job.locked_at > datetime.utcnow() - timedelta(minutes=1)
+        assert service.requeue_stale_jobs(lease_seconds=60) == 0
+        assert service.job_repo.heartbeat(job.id, "worker-2") is False
@@ -0,0 +1,71 @@
+"""
+Unit tests for the Prometheus metrics registry and the /metrics endpoint.
+"""
+
+import pytest
+
+from app.core.metrics import Counter, Histogram, _REGISTRY, http_requests, render_metrics, sales_created
+from config.settings import settings
+
+
+@pytest.mark.unit
+class TestMetrics:
+    """Test exposition format, HTTP instrumentation and business counters."""
+
+    def test_exposition_format(self):
+        counter = Counter("test_events_total", "Test events", ("kind",))
+        histogram = Histogram("test_latency_seconds", "Test latency", buckets=(0.1, 1.0))
+        try:
+            counter.inc("a")
+            counter.inc("a", amount=2)
+            histogram.observe(0.1)
+            histogram.observe(3)
+
+            text = render_metrics()
+            assert "# TYPE test_events_total counter" in text
+            assert 'test_events_total{kind="a"} 3' in text
+            assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+            assert 'test_latency_seconds_bucket{le="1"} 1' in text
+            assert 'test_latency_seconds_bucket{le="+Inf"} 2' in text
+            assert "test_latency_seconds_count 2" in text
+        finally:
+            _REGISTRY.remove(counter)
+            _REGISTRY.remove(histogram)
+
+    def test_metrics_endpoint(self, client, auth_headers_admin, test_product, monkeypatch):
+        monkeypatch.setattr(settings, "metrics_token", "secret")
+        before = http_requests.value("GET", "/products/{product_id}", "200")
+        client.get(f"/products/{test_product.id}", headers=auth_headers_admin)
+
+        response = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert http_requests.value("GET", "/products/{product_id}", "200") == before + 1
+        text = response.text
+        assert 'http_request_duration_seconds_count{method="GET",route="/products/{product_id}"}' in text
+        assert "http_requests_in_flight" in text
+        assert "db_pool_checkout_wait_seconds_bucket" in text
+        assert "websocket_connections 0" in text
+        assert "# TYPE background_jobs gauge" in text
+
+        assert client.get("/metrics").status_code == 401
+
+        # Without a token /metrics is only public in development
+        monkeypatch.setattr(settings, "metrics_token", "")
+        monkeypatch.setattr(settings, "environment", "production")
+        assert client.get("/metrics").status_code == 403
+        monkeypatch.setattr(settings, "environment", "development")
+        assert client.get("/metrics").status_code == 200
+
+    def test_sale_counter(self, client, auth_headers_admin, test_product, test_branch):
+        before = sales_created.value("pos")
+
+        response = client.post("/sales/", headers=auth_headers_admin, json={
+            "sale_type": "POS",
+            "branch_id": test_branch.id,
+            "items": [{"product_id": test_product.id, "quantity": 1, "unit_price": 10.99}]
+        })
+
+        assert response.status_code == 200, response.text
+        assert sales_created.value("pos") == before + 1
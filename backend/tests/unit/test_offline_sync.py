@@ -0,0 +1,82 @@
+"""
+Unit tests for batched offline register sale sync.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import BranchStock, InventoryMovement, Sale
+from app.schemas import OfflineSaleCreate
+from app.services.sale_service import SaleService
+
+
+@pytest.mark.unit
+class TestOfflineSaleBatch:
+    """Test ordered application, per-sale results and deduplication."""
+
+    def _sale(self, client_uuid, product, quantity, minutes_ago=10, product_id=None):
+        return OfflineSaleCreate(
+            sale_type="POS",
+            payment_method="cash",
+            client_uuid=client_uuid,
+            client_created_at=datetime.now() - timedelta(minutes=minutes_ago),
+            items=[{"product_id": product_id or product.id, "quantity": quantity, "unit_price": product.price}]
+        )
+
+    def _stock(self, db_session, product, branch):
+        db_session.expire_all()
+        return db_session.query(BranchStock).filter(
+            BranchStock.product_id == product.id, BranchStock.branch_id == branch.id
+        ).one().stock_quantity
+
+    def test_batch_applies_in_order_and_reports_conflicts(self, db_session, test_product, test_branch,
+                                                          test_admin_user):
+        batch = [
+            self._sale("t-1", test_product, 60, minutes_ago=30),
+            self._sale("t-2", test_product, 50),   # only 40 left
+            self._sale("t-3", test_product, 40),
+            self._sale("t-4", test_product, 1, product_id=99999),
+            self._sale("t-1", test_product, 60),   # repeated in the same batch
+        ]
+
+        results = SaleService(db_session).create_offline_batch(batch, test_admin_user.id, test_branch.id)
+
+        assert [r["status"] for r in results] == ["created", "stock_conflict", "created", "error", "duplicate"]
+        assert results[1]["sale_id"] is None
+        assert "99999" in results[3]["detail"]
+        assert results[4]["sale_id"] == results[0]["sale_id"]
+        assert self._stock(db_session, test_product, test_branch) == 0
+        assert db_session.query(Sale).count() == 2
+        assert db_session.query(InventoryMovement).count() == 2
+
+        first = db_session.get(Sale, results[0]["sale_id"])
+        assert first.client_uuid == "t-1"
+        assert first.created_at <= datetime.now() - timedelta(minutes=29)
+
+    def test_resent_batch_is_idempotent(self, db_session, test_product, test_branch, test_admin_user):
+        service = SaleService(db_session)
+        batch = [self._sale("r-1", test_product, 5), self._sale("r-2", test_product, 5)]
+
+        service.create_offline_batch(batch, test_admin_user.id, test_branch.id)
+        results = service.create_offline_batch(batch, test_admin_user.id, test_branch.id)
+
+        assert [r["status"] for r in results] == ["duplicate", "duplicate"]
+        assert self._stock(db_session, test_product, test_branch) == 90
+
+    def test_endpoint_returns_summary(self, client, auth_headers_admin, test_product, test_branch,
+                                      mock_websocket_manager):
+        payload = {
+            "branch_id": test_branch.id,
+            "sales": [
+                self._sale("e-1", test_product, 1).model_dump(mode="json"),
+                self._sale("e-2", test_product, 500).model_dump(mode="json"),
+            ]
+        }
+
+        response = client.post("/sales/offline-batch", headers=auth_headers_admin, json=payload)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["created"], body["conflicts"], body["duplicates"], body["errors"]) == (1, 1, 0, 0)
+        assert body["results"][0]["sale_number"].startswith("POS-")
@@ -0,0 +1,80 @@
+"""
+Unit tests for monthly partition helpers, SaleItem partition key propagation
+and the partition-pruned report filters.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models import OrderStatus, Sale, SaleItem, SaleType
+from app.repositories.reports import ReportsRepository
+from app.services.partition_service import (
+    PartitionService, add_months, create_partition_statements, partition_month, scanned_relations
+)
+from database import Base
+
+
+@pytest.mark.unit
+class TestPartitions:
+    """Test partition naming, DDL generation and the created_at copy on sale items."""
+
+    def test_month_helpers_and_statements(self):
+        assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+        assert partition_month("sale_items_p2026_10") == ("sale_items", date(2026, 10, 1))
+        assert partition_month("sales_default") is None
+
+        statements = create_partition_statements("sales", date(2026, 12, 1))
+
+        assert statements[0].startswith("CREATE TABLE sales_p2026_12 (LIKE sales")
+        assert "FROM sales_default WHERE created_at >= '2026-12-01' AND created_at < '2027-01-01'" in statements[1]
+        # The DELETE from sales_default drops the moved sales' keys through the trigger
+        assert statements[2].startswith("DELETE FROM sales_default")
+        assert statements[3] == (
+            "INSERT INTO sale_keys (sale_id, sale_number, client_uuid) "
+            "SELECT id, sale_number, client_uuid FROM sales_p2026_12"
+        )
+        assert not any("sale_keys" in statement
+                       for statement in create_partition_statements("sale_items", date(2026, 12, 1)))
+        assert statements[-1] == (
+            "ALTER TABLE sales ATTACH PARTITION sales_p2026_12 FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')"
+        )
+
+    def test_sale_items_take_sale_created_at(self, db_session, test_branch, test_product):
+        sold_at = datetime(2025, 3, 14, 10, 30)
+        sale = Sale(
+            sale_number="PART-001", sale_type=SaleType.POS, branch_id=test_branch.id,
+            subtotal=Decimal("20"), tax_amount=Decimal("0"), discount_amount=Decimal("0"),
+            total_amount=Decimal("20"), order_status=OrderStatus.DELIVERED, created_at=sold_at
+        )
+        sale.sale_items.append(SaleItem(
+            product_id=test_product.id, quantity=2, unit_price=Decimal("10"), total_price=Decimal("20")
+        ))
+        db_session.add(sale)
+        db_session.commit()
+
+        assert sale.sale_items[0].created_at == sold_at
+        assert sale.sale_items[0].sale_id == sale.id
+        # The migration dropped every FK to the partitioned sales table
+        assert not [fk for table in Base.metadata.tables.values() for fk in table.foreign_keys
+                    if fk.column.table.name == "sales"]
+        repository = ReportsRepository(db_session)
+        top = repository.get_top_products(datetime(2025, 3, 1), datetime(2025, 3, 31, 23, 59, 59))
+        assert [(name, quantity) for name, quantity, _ in top] == [(test_product.name, 2)]
+        assert repository.get_top_products(datetime(2025, 4, 1), datetime(2025, 4, 30)) == []
+        listing = repository.get_sales_list(datetime(2025, 3, 1), datetime(2025, 3, 31, 23, 59, 59))
+        assert listing["items"][0].items_count == 1
+
+    def test_unpartitioned_database_is_noop(self, db_session):
+        service = PartitionService(db_session)
+
+        assert service.is_partitioned() is False
+        assert service.maintain(date(2026, 10, 19)) == {"created": [], "archived": []}
+        assert service.verify_report_pruning() == []
+        plan = [{"Plan": {"Node Type": "Append", "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "sales_p2026_10"},
+            {"Node Type": "Index Scan", "Relation Name": "sale_items_p2026_10"},
+        ]}}]
+        assert scanned_relations(plan) == ["sales_p2026_10", "sale_items_p2026_10"]
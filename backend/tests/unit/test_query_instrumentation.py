@@ -0,0 +1,77 @@
+"""
+Unit tests for per-request query instrumentation and query budgets of hot endpoints.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.models import BranchStock, Product, ProductSize, Sale, SaleItem
+from app.models.enums import SaleType
+from database import track_queries
+
+
+@pytest.mark.unit
+class TestQueryInstrumentation:
+    """Test Server-Timing attribution and constant query counts on list endpoints."""
+
+    def test_track_queries_and_server_timing(self, client, db_session, auth_headers_admin):
+        with track_queries() as stats:
+            db_session.execute(text("SELECT 1"))
+            db_session.execute(text("SELECT 2"))
+        assert stats.count == 2
+        assert stats.slowest_statement in ("SELECT 1", "SELECT 2")
+
+        response = client.get("/products/multi-branch-stock", headers=auth_headers_admin)
+        timing = response.headers["Server-Timing"]
+        assert timing.startswith("db;dur=")
+        assert 'queries", app;dur=' in timing
+
+    def test_failed_statement_does_not_leak_start_time(self, db_session):
+        with track_queries() as stats:
+            with pytest.raises(Exception):
+                db_session.execute(text("SELECT * FROM missing_table"))
+            db_session.rollback()
+            connection = db_session.connection()
+            db_session.execute(text("SELECT 1"))
+
+        assert stats.count == 2
+        assert connection.info.get("query_start_times") == []
+
+    def _products(self, db_session, category, branch, count):
+        for i in range(count):
+            product = Product(name=f"Producto {i}", sku=f"BUDGET-{i}", price=10, cost=5,
+                              category_id=category.id, has_sizes=i % 2 == 0, is_active=True)
+            db_session.add(product)
+            db_session.flush()
+            if product.has_sizes:
+                db_session.add(ProductSize(product_id=product.id, branch_id=branch.id, size="M", stock_quantity=3))
+            else:
+                db_session.add(BranchStock(product_id=product.id, branch_id=branch.id, stock_quantity=4))
+        db_session.commit()
+
+    def test_multi_branch_stock_budget(self, client, db_session, auth_headers_admin, assert_max_queries,
+                                       test_category, test_branch):
+        self._products(db_session, test_category, test_branch, 6)
+
+        with assert_max_queries(5):
+            response = client.get("/products/multi-branch-stock", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert sorted(item["total_stock"] for item in response.json()) == [3, 3, 3, 4, 4, 4]
+
+    def test_sales_list_budget(self, client, db_session, auth_headers_admin, assert_max_queries,
+                               test_branch, test_admin_user, test_product):
+        for i in range(5):
+            sale = Sale(sale_number=f"POS-{i}", sale_type=SaleType.POS, branch_id=test_branch.id,
+                        user_id=test_admin_user.id, subtotal=10, tax_amount=0, total_amount=10)
+            db_session.add(sale)
+            db_session.flush()
+            db_session.add(SaleItem(sale_id=sale.id, product_id=test_product.id, quantity=1,
+                                    unit_price=10, total_price=10))
+        db_session.commit()
+
+        with assert_max_queries(8):
+            response = client.get("/sales/", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert len(response.json()) == 5
@@ -0,0 +1,71 @@
+"""
+Unit tests for read-replica routing of report and dashboard queries.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+
+import database
+from config.settings import settings
+from database import Base, ReadReplica, get_read_db
+
+
+@pytest.mark.unit
+class TestReadReplica:
+    """Test replica selection, staleness tolerance and fallback to the primary."""
+
+    @pytest.fixture
+    def replica(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "read_replica_check_interval_seconds", 0)
+        engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+        Base.metadata.create_all(bind=engine)
+        replica = ReadReplica(engine)
+        monkeypatch.setattr(database, "read_replica", replica)
+        yield replica
+        engine.dispose()
+
+    def test_reports_read_from_replica(self, client, auth_headers_admin, test_product, replica):
+        response = client.get("/reports/dashboard", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        # The replica file has the schema but none of the primary's rows
+        assert response.json()["total_products"] == 0
+        assert replica.available() and replica.lag_seconds == 0
+
+    def test_falls_back_when_replica_is_stale(self, db_session, replica, monkeypatch):
+        monkeypatch.setattr(settings, "read_replica_max_lag_seconds", 10)
+        monkeypatch.setattr(ReadReplica, "_measure_lag", staticmethod(lambda connection: 60.0))
+
+        dependency = get_read_db(db_session)
+        assert next(dependency) is db_session
+        assert replica.lag_seconds == 60.0
+
+        monkeypatch.setattr(ReadReplica, "_measure_lag", staticmethod(lambda connection: 2.0))
+        dependency = get_read_db(db_session)
+        session = next(dependency)
+        assert session is not db_session and session.get_bind() is replica.engine
+        dependency.close()
+
+    def test_disconnected_wal_receiver_is_not_fresh(self):
+        def connection(receiver_status):
+            # Receive and replay LSNs are equal: the lag expression reads 0
+            row = (True, receiver_status, 0)
+            return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"),
+                                   exec_driver_sql=lambda statement: SimpleNamespace(one=lambda: row))
+
+        assert ReadReplica._measure_lag(connection("streaming")) == 0.0
+        with pytest.raises(RuntimeError, match="streaming"):
+            ReadReplica._measure_lag(connection(None))
+
+    def test_falls_back_when_replica_is_down(self, db_session, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "read_replica_check_interval_seconds", 0)
+        broken = ReadReplica(create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"))
+        monkeypatch.setattr(database, "read_replica", broken)
+
+        assert next(get_read_db(db_session)) is db_session
+        assert broken.last_error
+
+        monkeypatch.setattr(database, "read_replica", ReadReplica(None))
+        assert next(get_read_db(db_session)) is db_session
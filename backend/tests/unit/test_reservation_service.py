@@ -0,0 +1,111 @@
+"""
+Unit tests for ReservationService TTL stock holds.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import BranchStock, Product, Sale, StockReservation, ReservationStatus
+from app.services.reservation_service import ReservationService
+from app.services.stock_service import InsufficientStockError
+
+
+@pytest.mark.unit
+class TestReservationService:
+    """Test reserve / convert / release / expire lifecycle."""
+
+    @pytest.fixture
+    def pending_sale(self, db_session, test_branch):
+        sale = Sale(
+            sale_number="ECOM-RES-001",
+            sale_type="ECOMMERCE",
+            order_status="PENDING",
+            subtotal=10,
+            tax_amount=0,
+            total_amount=10,
+            branch_id=test_branch.id
+        )
+        db_session.add(sale)
+        db_session.commit()
+        return sale
+
+    def _stock(self, db_session, product_id, branch_id):
+        return db_session.query(BranchStock).filter(
+            BranchStock.product_id == product_id,
+            BranchStock.branch_id == branch_id
+        ).one()
+
+    def _reserve(self, db_session, sale, product, branch, quantity):
+        service = ReservationService(db_session)
+        service.reserve(sale.id, [
+            {"product_id": product.id, "branch_id": branch.id, "quantity": quantity}
+        ])
+        db_session.commit()
+        return service
+
+    def test_reserve_increments_counters(self, db_session, pending_sale, test_product, test_branch):
+        self._reserve(db_session, pending_sale, test_product, test_branch, 30)
+
+        stock = self._stock(db_session, test_product.id, test_branch.id)
+        db_session.refresh(test_product)
+        assert stock.stock_quantity == 100
+        assert stock.reserved_stock == 30
+        assert stock.available_stock == 70
+        assert test_product.reserved_stock == 30
+        assert test_product.calculate_total_available_stock() == 70
+
+    def test_reserve_shortage_counts_existing_holds(self, db_session, pending_sale, test_product, test_branch):
+        self._reserve(db_session, pending_sale, test_product, test_branch, 80)
+
+        with pytest.raises(InsufficientStockError):
+            ReservationService(db_session).reserve(pending_sale.id, [
+                {"product_id": test_product.id, "branch_id": test_branch.id, "quantity": 30}
+            ])
+
+        assert self._stock(db_session, test_product.id, test_branch.id).reserved_stock == 80
+        assert db_session.query(StockReservation).count() == 1
+
+    def test_convert_moves_hold_into_sale(self, db_session, pending_sale, test_product, test_branch):
+        service = self._reserve(db_session, pending_sale, test_product, test_branch, 5)
+
+        changes = service.convert(pending_sale.id, pending_sale.sale_number)
+        db_session.commit()
+
+        stock = self._stock(db_session, test_product.id, test_branch.id)
+        assert changes[0]["new_stock"] == 95
+        assert stock.stock_quantity == 95
+        assert stock.reserved_stock == 0
+        assert service.get_active(pending_sale.id) == []
+        assert service.convert(pending_sale.id) == []
+
+    def test_release_and_expiry_free_the_hold(self, db_session, pending_sale, test_product, test_branch):
+        service = self._reserve(db_session, pending_sale, test_product, test_branch, 5)
+        assert service.release(pending_sale.id) == 1
+        db_session.commit()
+        assert self._stock(db_session, test_product.id, test_branch.id).reserved_stock == 0
+
+        self._reserve(db_session, pending_sale, test_product, test_branch, 7)
+        assert service.expire_due(now=datetime.utcnow() + timedelta(days=1)) == 1
+
+        stock = self._stock(db_session, test_product.id, test_branch.id)
+        db_session.refresh(stock)
+        db_session.refresh(test_product)
+        assert stock.reserved_stock == 0
+        assert test_product.reserved_stock == 0
+        assert db_session.query(StockReservation).filter(
+            StockReservation.status == ReservationStatus.EXPIRED.value
+        ).count() == 1
+
+    def test_size_on_product_without_sizes_reserves_branch_stock(
+        self, db_session, pending_sale, test_product, test_branch
+    ):
+        service = ReservationService(db_session)
+        reservations = service.reserve(pending_sale.id, [
+            {"product_id": test_product.id, "branch_id": test_branch.id, "quantity": 5, "size": "M"}
+        ])
+        db_session.commit()
+
+        assert [(r.size, r.quantity) for r in reservations] == [(None, 5)]
+        assert self._stock(db_session, test_product.id, test_branch.id).reserved_stock == 5
+        assert service.convert(pending_sale.id)[0]["new_stock"] == 95
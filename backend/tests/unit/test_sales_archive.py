@@ -0,0 +1,156 @@
+"""
+Unit tests for the Parquet cold archive of closed sales months and the
+archive-aware reports repository.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.models import OrderStatus, Sale, SaleItem, SaleType, StockReservation
+from app.repositories.reports import ReportsRepository
+from app.repositories.sales_archive import ArchiveAwareReportsRepository, SalesArchive
+from app.schemas import OfflineSaleCreate
+from app.services.partition_service import PartitionService
+from app.services.sale_service import SaleService
+from app.services.sales_archive_service import SalesArchiveError, SalesArchiveService
+from config.settings import settings
+
+TODAY = date(2026, 10, 19)
+YEAR_START, YEAR_END = datetime(2025, 1, 1), datetime(2025, 12, 31, 23, 59, 59)
+
+
+def _sale(db_session, branch, product, number, sold_at, quantity, status=OrderStatus.DELIVERED):
+    total = Decimal("10.00") * quantity
+    sale = Sale(
+        sale_number=number, sale_type=SaleType.POS, branch_id=branch.id, payment_method="CASH",
+        subtotal=total, tax_amount=Decimal("0"), discount_amount=Decimal("0"),
+        total_amount=total, order_status=status, created_at=sold_at
+    )
+    sale.sale_items.append(SaleItem(
+        product_id=product.id, quantity=quantity, unit_price=Decimal("10.00"), total_price=total
+    ))
+    db_session.add(sale)
+    db_session.commit()
+    return sale
+
+
+def _reports(repository):
+    return {
+        "total": repository.get_sales_total_for_period(YEAR_START, YEAR_END),
+        "count": repository.get_sales_count_for_period(YEAR_START, YEAR_END),
+        "top": [tuple(row) for row in repository.get_top_products(YEAR_START, YEAR_END)],
+        "branches": [tuple(row) for row in repository.get_branch_sales_chart_data(YEAR_START, YEAR_END)],
+        "types": [tuple(row) for row in repository.get_sales_by_type(YEAR_START, YEAR_END)],
+        "payments": [tuple(row) for row in repository.get_sales_by_payment_method(YEAR_START, YEAR_END)],
+    }
+
+
+@pytest.mark.unit
+class TestSalesArchive:
+    """Test month discovery, period splitting, archiving guards and the report round trip."""
+
+    def test_empty_archive_passes_through(self, db_session, tmp_path):
+        archive = SalesArchive(str(tmp_path))
+        repository = ArchiveAwareReportsRepository(db_session, archive)
+
+        assert archive.cutoff() is None
+        assert repository._split(YEAR_START, YEAR_END) == (None, (YEAR_START, YEAR_END))
+
+        (tmp_path / "month=2025-03").mkdir()
+        (tmp_path / ".staging-2025-04").mkdir()
+        cutoff = datetime(2025, 4, 1)
+        assert archive.months() == [date(2025, 3, 1)]
+        assert archive.cutoff() == cutoff
+        assert repository._split(YEAR_START, YEAR_END) == (
+            (YEAR_START, cutoff - timedelta(microseconds=1)), (cutoff, YEAR_END)
+        )
+        assert repository._split(YEAR_START, datetime(2025, 2, 1)) == ((YEAR_START, datetime(2025, 2, 1)), None)
+
+    def test_refuses_months_that_cannot_be_archived(self, db_session, tmp_path, test_branch, test_product):
+        march = _sale(db_session, test_branch, test_product, "ARC-001", datetime(2025, 3, 10), 1)
+        _sale(db_session, test_branch, test_product, "ARC-002", datetime(2025, 4, 10), 1)
+        service = SalesArchiveService(db_session, SalesArchive(str(tmp_path)))
+
+        assert service.due_months(TODAY) == [date(2025, 3, 1), date(2025, 4, 1)]
+        with pytest.raises(SalesArchiveError, match="todavía"):
+            service.archive_month(date(2025, 11, 1), TODAY)
+        with pytest.raises(SalesArchiveError, match="2025-03"):
+            service.archive_month(date(2025, 4, 1), TODAY)
+
+        db_session.add(StockReservation(
+            sale_id=march.id, product_id=test_product.id, branch_id=test_branch.id,
+            quantity=1, expires_at=datetime(2025, 3, 10, 1)
+        ))
+        db_session.commit()
+        with pytest.raises(SalesArchiveError, match="reservas"):
+            service.archive_month(date(2025, 3, 1), TODAY)
+        assert not (tmp_path / "month=2025-03").exists()
+
+    def test_archived_months_keep_report_totals(self, db_session, tmp_path, test_branch, test_product):
+        pytest.importorskip("pyarrow")
+        _sale(db_session, test_branch, test_product, "ARC-101", datetime(2025, 3, 10, 9), 2)
+        _sale(db_session, test_branch, test_product, "ARC-102", datetime(2025, 3, 20, 9), 5, OrderStatus.CANCELLED)
+        _sale(db_session, test_branch, test_product, "ARC-103", datetime(2025, 4, 2, 9), 3)
+        _sale(db_session, test_branch, test_product, "ARC-104", datetime(2025, 11, 5, 9), 4)
+        archive = SalesArchive(str(tmp_path))
+        before = _reports(ReportsRepository(db_session))
+
+        results = SalesArchiveService(db_session, archive).archive_due(TODAY)
+
+        assert [(r["month"], r["sales"], r["sale_items"]) for r in results] == [
+            ("2025-03-01", 2, 2), ("2025-04-01", 1, 1)
+        ]
+        assert archive.months() == [date(2025, 3, 1), date(2025, 4, 1)]
+        assert [number for number, in db_session.query(Sale.sale_number).all()] == ["ARC-104"]
+        assert db_session.query(SaleItem).count() == 1
+        assert _reports(ArchiveAwareReportsRepository(db_session, archive)) == before
+        assert before["total"] == Decimal("90.00") and before["count"] == 3
+
+    def test_archiving_keeps_sale_keys(self, db_session, tmp_path, test_branch, test_product, monkeypatch):
+        pytest.importorskip("pyarrow")
+        # Partitioned schema with the month still in sales_default: rows are deleted one by one
+        monkeypatch.setattr(PartitionService, "is_partitioned", lambda self: True)
+        monkeypatch.setattr(SalesArchiveService, "_exists", lambda self, name: False)
+        db_session.execute(text(
+            "CREATE TABLE sale_keys (sale_id INTEGER PRIMARY KEY, sale_number VARCHAR(50) NOT NULL UNIQUE, "
+            "client_uuid VARCHAR(36) UNIQUE)"
+        ))
+        try:
+            sale_id = _sale(db_session, test_branch, test_product, "ARC-201", datetime(2025, 3, 10, 9), 1).id
+
+            SalesArchiveService(db_session, SalesArchive(str(tmp_path))).archive_month(date(2025, 3, 1), TODAY)
+
+            assert db_session.query(Sale).count() == 0
+            assert db_session.execute(text("SELECT sale_id, sale_number FROM sale_keys")).all() == [
+                (sale_id, "ARC-201")
+            ]
+        finally:
+            db_session.rollback()
+            db_session.execute(text("DROP TABLE sale_keys"))
+            db_session.commit()
+
+    def test_sales_in_archived_months_do_not_block_archiving(self, db_session, tmp_path, test_branch,
+                                                             test_product, test_admin_user, monkeypatch):
+        (tmp_path / "month=2025-03").mkdir()
+        monkeypatch.setattr(settings, "sales_archive_dir", str(tmp_path))
+        offline = OfflineSaleCreate(
+            sale_type="POS", payment_method="cash", client_uuid="arc-late",
+            client_created_at=datetime(2025, 3, 20, 12),
+            items=[{"product_id": test_product.id, "quantity": 1, "unit_price": test_product.price}]
+        )
+
+        results = SaleService(db_session).create_offline_batch([offline], test_admin_user.id, test_branch.id)
+
+        assert results[0]["status"] == "error" and "2025-03" in results[0]["detail"]
+        assert db_session.query(Sale).count() == 0
+
+        # A stray live row in an archived month is skipped, later months are still due
+        _sale(db_session, test_branch, test_product, "ARC-301", datetime(2025, 2, 10), 1)
+        _sale(db_session, test_branch, test_product, "ARC-302", datetime(2025, 5, 10), 1)
+        service = SalesArchiveService(db_session, SalesArchive(str(tmp_path)))
+
+        assert service.due_months(TODAY) == [date(2025, 5, 1)]
+        service._check_archivable(date(2025, 5, 1), datetime(2025, 5, 1), datetime(2025, 6, 1), TODAY)
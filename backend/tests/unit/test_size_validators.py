@@ -0,0 +1,56 @@
+"""
+Unit tests for the precomputed size catalog (ranks and grid validation).
+"""
+
+import pytest
+
+from app.models import ProductSize
+from utils.size_validators import (
+    get_category_type, get_size_display_info, size_sort_rank, sort_sizes, validate_sizes_for_category
+)
+
+
+@pytest.mark.unit
+class TestSizeCatalog:
+    """Test size ranks, category resolution and the sorted size endpoints."""
+
+    def test_ranks_order_numeric_then_letters_then_others(self):
+        assert sort_sizes(["XL", "Único", "38.5", "S", "40", "38", "XXL"]) == [
+            "38", "38.5", "40", "S", "XL", "XXL", "Único"
+        ]
+        assert size_sort_rank("m") == size_sort_rank("M")
+        assert get_size_display_info("Remeras")["valid_sizes"] == ["XS", "S", "M", "L", "XL", "XXL"]
+
+    def test_category_type_and_grid_validation(self):
+        assert get_category_type("Calzado Deportivo Running") == "calzado"
+        assert get_category_type("Sin mapeo") is None
+
+        result = validate_sizes_for_category(["M", "42", "XL", "99"], "Indumentaria")
+        assert result == {"valid": ["M", "XL"], "invalid": ["42", "99"]}
+        # Unknown categories accept any size
+        assert validate_sizes_for_category(["99"], "Sin mapeo")["invalid"] == []
+
+    def test_sort_rank_tracks_size(self):
+        size = ProductSize(product_id=1, branch_id=1, size="XS", stock_quantity=1)
+        assert size.sort_rank == size_sort_rank("XS")
+        size.size = "42"
+        assert size.sort_rank == 420
+
+    def test_available_sizes_ordered_by_rank(self, client, db_session, auth_headers_admin,
+                                             test_product_with_sizes, test_branch):
+        for name in ("XL", "S", "M", "XS"):
+            db_session.add(ProductSize(product_id=test_product_with_sizes.id, branch_id=test_branch.id,
+                                       size=name, stock_quantity=2))
+        db_session.commit()
+
+        response = client.get(f"/products/{test_product_with_sizes.id}/available-sizes", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [item["size"] for item in body["available_sizes"]] == ["XS", "S", "M", "XL"]
+        assert body["category_type"] == "indumentaria"
+
+        rejected = client.post(f"/products/{test_product_with_sizes.id}/sizes", headers=auth_headers_admin,
+                               json={"sizes": [{"size": "42", "stock_quantity": 1}]})
+        assert rejected.status_code == 400
+        assert "42" in rejected.json()["detail"]
@@ -0,0 +1,62 @@
+"""
+Unit tests for the slow-query recorder and its admin endpoint.
+"""
+
+import pytest
+
+from app.core.slow_query import normalize_sql, parameter_shape, slow_query_log
+from config.settings import settings
+
+
+@pytest.mark.unit
+class TestSlowQueryLog:
+    """Test SQL normalization, route attribution and background EXPLAIN capture."""
+
+    @pytest.fixture(autouse=True)
+    def clean_log(self):
+        slow_query_log.clear()
+        yield
+        slow_query_log.wait_for_explains()
+        slow_query_log.clear()
+
+    def test_normalization_and_parameter_shape(self):
+        sql = "SELECT *  FROM sales\n WHERE id IN (%(id_1)s, %(id_2)s) AND total > 10 AND name = 'x'"
+        assert normalize_sql(sql) == "SELECT * FROM sales WHERE id IN (...) AND total > ? AND name = ?"
+        assert normalize_sql("SELECT * FROM t WHERE a = ? LIMIT ? OFFSET ?") == \
+            "SELECT * FROM t WHERE a = ? LIMIT ? OFFSET ?"
+        assert parameter_shape({"id_1": 1, "name": "x"}) == {"id_1": "int", "name": "str"}
+        assert parameter_shape([(1,), (2,)], executemany=True) == {"rows": 2, "row": ["int"]}
+
+    def test_requests_are_recorded_with_route(self, client, auth_headers_admin, test_product, monkeypatch):
+        monkeypatch.setattr(settings, "slow_query_log_enabled", True)
+        monkeypatch.setattr(settings, "slow_query_threshold_ms", 0)
+        monkeypatch.setattr(settings, "slow_query_explain", False)
+
+        client.get(f"/products/{test_product.id}", headers=auth_headers_admin)
+        monkeypatch.setattr(settings, "slow_query_log_enabled", False)
+
+        response = client.get("/diagnostics/slow-queries", headers=auth_headers_admin)
+        assert response.status_code == 200
+        body = response.json()
+        routes = {route for group in body["summary"] for route in group["routes"]}
+        assert f"GET /products/{test_product.id}" in routes
+        assert all("?" in entry["sql"] or "(...)" in entry["sql"] or "WHERE" not in entry["sql"]
+                   for entry in body["entries"])
+
+        assert client.delete("/diagnostics/slow-queries", headers=auth_headers_admin).status_code == 200
+        assert slow_query_log.entries() == []
+
+    def test_explain_is_captured_once_in_background(self, db_session, test_product, monkeypatch):
+        monkeypatch.setattr(settings, "slow_query_explain", True)
+        engine = db_session.get_bind()
+        statement = "SELECT id, name FROM products WHERE id = ?"
+
+        slow_query_log.record(engine, statement, (test_product.id,), False, 900.0, "GET /reports/sales")
+        slow_query_log.wait_for_explains()
+        slow_query_log.record(engine, statement, (test_product.id + 1,), False, 700.0, None)
+
+        entries = slow_query_log.entries()
+        assert [entry["duration_ms"] for entry in entries] == [700.0, 900.0]
+        assert entries[0]["plan"] and "products" in entries[0]["plan"]
+        summary = slow_query_log.summary()
+        assert (summary[0]["count"], summary[0]["max_ms"], summary[0]["routes"]) == (2, 900.0, ["GET /reports/sales"])
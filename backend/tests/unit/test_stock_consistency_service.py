@@ -0,0 +1,112 @@
+"""
+Unit tests for StockConsistencyService drift detection and repair.
+
+SQLite has no stock triggers, so drift is created by editing
+Product.stock_quantity directly.
+"""
+
+import pytest
+
+from app.models import BranchStock, InventoryMovement, Product, ProductSize
+from app.services.stock_consistency_service import (
+    StockConsistencyService, bulk_stock_mode, sync_stock_total
+)
+
+
+@pytest.mark.unit
+class TestStockConsistency:
+    """Test detection and repair of Product.stock_quantity drift."""
+
+    def test_no_drift_when_totals_match(self, db_session, test_product):
+        assert StockConsistencyService(db_session).find_drift() == []
+
+    def test_repairs_branch_stock_drift(self, db_session, test_product):
+        test_product.stock_quantity = 7
+        db_session.commit()
+
+        service = StockConsistencyService(db_session)
+        assert service.find_drift() == [
+            {"product_id": test_product.id, "recorded": 7, "expected": 100}
+        ]
+
+        repaired = service.repair_drift()
+
+        assert len(repaired) == 1
+        db_session.refresh(test_product)
+        assert test_product.stock_quantity == 100
+        assert service.find_drift() == []
+
+    def test_sized_products_use_size_totals(self, db_session, test_category, test_branch):
+        product = Product(
+            name="Sized", sku="SIZED-DRIFT", category_id=test_category.id,
+            price=10, stock_quantity=0, has_sizes=True
+        )
+        db_session.add(product)
+        db_session.flush()
+        with bulk_stock_mode(db_session):
+            db_session.add_all([
+                ProductSize(product_id=product.id, branch_id=test_branch.id, size="S", stock_quantity=3),
+                ProductSize(product_id=product.id, branch_id=test_branch.id, size="M", stock_quantity=4),
+            ])
+            db_session.flush()
+        db_session.commit()
+
+        StockConsistencyService(db_session).repair_drift()
+
+        db_session.refresh(product)
+        assert product.stock_quantity == 7
+
+    def test_sync_stock_total_reads_stock_rows_in_same_transaction(
+        self, db_session, test_product, test_branch_secondary
+    ):
+        branch_stock = db_session.query(BranchStock).filter(BranchStock.product_id == test_product.id).one()
+        branch_stock.stock_quantity = 40
+        db_session.add(BranchStock(
+            product_id=test_product.id, branch_id=test_branch_secondary.id, stock_quantity=5
+        ))
+
+        assert sync_stock_total(db_session, test_product) == 45
+        db_session.commit()
+
+        db_session.refresh(test_product)
+        assert test_product.stock_quantity == 45
+        assert StockConsistencyService(db_session).find_drift() == []
+
+    def test_cancelled_sale_restores_branch_stock_without_drift(
+        self, client, auth_headers_admin, db_session, test_product, test_branch, mock_websocket_manager
+    ):
+        sale = client.post("/sales/", headers=auth_headers_admin, json={
+            "sale_type": "POS",
+            "branch_id": test_branch.id,
+            "items": [{"product_id": test_product.id, "quantity": 3, "unit_price": float(test_product.price)}]
+        }).json()
+
+        response = client.delete(f"/sales/{sale['id']}", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        db_session.expire_all()
+        assert db_session.query(BranchStock).filter(
+            BranchStock.product_id == test_product.id, BranchStock.branch_id == test_branch.id
+        ).one().stock_quantity == 100
+        assert StockConsistencyService(db_session).find_drift() == []
+        movement = db_session.query(InventoryMovement).filter(InventoryMovement.quantity == 3).one()
+        assert movement.branch_id == test_branch.id
+
+    def test_stock_adjustment_moves_the_branch_row(
+        self, client, auth_headers_admin, db_session, test_product, test_branch, test_branch_secondary,
+        mock_websocket_manager
+    ):
+        db_session.add(BranchStock(product_id=test_product.id, branch_id=test_branch_secondary.id, stock_quantity=5))
+        sync_stock_total(db_session, test_product)
+        db_session.commit()
+
+        response = client.post(f"/products/{test_product.id}/adjust-stock", headers=auth_headers_admin,
+                               json={"new_stock": 120})
+
+        assert response.status_code == 200
+        assert response.json()["previous_stock"] == 100
+        movement = db_session.query(InventoryMovement).one()
+        assert (movement.branch_id, movement.quantity, movement.previous_stock, movement.new_stock) == (
+            test_branch.id, 20, 100, 120
+        )
+        assert StockConsistencyService(db_session).find_drift() == []
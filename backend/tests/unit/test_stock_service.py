@@ -0,0 +1,79 @@
+"""
+Unit tests for StockService atomic batch decrement.
+"""
+
+import pytest
+
+from app.models import BranchStock, InventoryMovement, Product, ProductSize
+from app.services.stock_service import StockService, InsufficientStockError
+
+
+@pytest.mark.unit
+class TestDecrementStockBatch:
+    """Test the conditional UPDATE ... RETURNING decrement."""
+
+    @pytest.fixture
+    def sized_product(self, db_session, test_category, test_branch):
+        product = Product(
+            name="Sized Product",
+            sku="SIZED001",
+            category_id=test_category.id,
+            price=20.00,
+            stock_quantity=5,
+            has_sizes=True
+        )
+        db_session.add(product)
+        db_session.flush()
+        db_session.add(ProductSize(product_id=product.id, branch_id=test_branch.id, size="M", stock_quantity=5))
+        db_session.commit()
+        return product
+
+    def _branch_stock(self, db_session, product_id, branch_id):
+        return db_session.query(BranchStock.stock_quantity).filter(
+            BranchStock.product_id == product_id,
+            BranchStock.branch_id == branch_id
+        ).scalar()
+
+    def test_decrements_branch_and_size_stock(self, db_session, test_product, sized_product, test_branch):
+        changes = StockService.decrement_stock_batch(
+            db_session,
+            branch_id=test_branch.id,
+            items=[
+                {"product_id": test_product.id, "quantity": 2},
+                {"product_id": test_product.id, "quantity": 3},
+                {"product_id": sized_product.id, "quantity": 1, "size": "M"},
+            ],
+            reference_id=1
+        )
+
+        by_product = {c["product_id"]: c for c in changes}
+        assert by_product[test_product.id]["quantity"] == 5
+        assert by_product[test_product.id]["previous_stock"] == 100
+        assert by_product[test_product.id]["new_stock"] == 95
+        assert by_product[sized_product.id]["size"] == "M"
+        assert by_product[sized_product.id]["new_stock"] == 4
+        assert self._branch_stock(db_session, test_product.id, test_branch.id) == 95
+        assert db_session.query(InventoryMovement).filter(InventoryMovement.reference_id == 1).count() == 2
+
+    def test_shortage_rolls_back_whole_batch(self, db_session, test_product, sized_product, test_branch):
+        with pytest.raises(InsufficientStockError) as exc:
+            StockService.decrement_stock_batch(
+                db_session,
+                branch_id=test_branch.id,
+                items=[
+                    {"product_id": test_product.id, "quantity": 2},
+                    {"product_id": sized_product.id, "quantity": 6, "size": "M"},
+                ]
+            )
+
+        assert "talle M" in str(exc.value)
+        assert self._branch_stock(db_session, test_product.id, test_branch.id) == 100
+        assert db_session.query(InventoryMovement).count() == 0
+
+    def test_size_required_for_sized_products(self, db_session, sized_product, test_branch):
+        with pytest.raises(ValueError):
+            StockService.decrement_stock_batch(
+                db_session,
+                branch_id=test_branch.id,
+                items=[{"product_id": sized_product.id, "quantity": 1}]
+            )
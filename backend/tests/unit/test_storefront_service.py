@@ -0,0 +1,106 @@
+"""
+Unit tests for the cached storefront product-detail bundle and bootstrap.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.models import BranchStock, ProductImage, ProductSize, StoreBanner
+from app.services.storefront_service import (
+    StorefrontService,
+    bump_storefront_version,
+    product_detail_cache,
+)
+
+
+@pytest.mark.unit
+class TestProductDetailBundle:
+    """Test bundle contents, caching and invalidation."""
+
+    def test_bundle_aggregates_sizes_and_orders_images(self, db_session, test_product_with_sizes,
+                                                       test_branch, test_branch_secondary):
+        product = test_product_with_sizes
+        db_session.add_all([
+            ProductSize(product_id=product.id, branch_id=test_branch.id, size="M", stock_quantity=2),
+            ProductSize(product_id=product.id, branch_id=test_branch_secondary.id, size="M", stock_quantity=3),
+            ProductSize(product_id=product.id, branch_id=test_branch.id, size="42", stock_quantity=1),
+            ProductSize(product_id=product.id, branch_id=test_branch.id, size="S", stock_quantity=4,
+                        reserved_stock=4),
+            ProductImage(product_id=product.id, image_url="b.jpg", image_order=2),
+            ProductImage(product_id=product.id, image_url="a.jpg", image_order=1, is_main=True),
+        ])
+        db_session.commit()
+
+        detail = StorefrontService(db_session).get_product_detail(product.id)
+
+        assert detail["product"]["id"] == product.id
+        assert detail["sizes"] == [{"size": "42", "stock": 1}, {"size": "M", "stock": 5}]
+        assert [image["image_url"] for image in detail["images"]] == ["a.jpg", "b.jpg"]
+
+    def test_hidden_product_returns_none(self, db_session, test_product):
+        test_product.show_in_ecommerce = False
+        db_session.commit()
+
+        assert StorefrontService(db_session).get_product_detail(test_product.id) is None
+
+    def test_cached_until_stock_change_commits(self, db_session, test_product, test_branch):
+        service = StorefrontService(db_session)
+        assert service.get_product_detail(test_product.id)["product"]["stock"] == 100
+
+        # Raw SQL bypasses the ORM listeners: the bundle stays cached
+        db_session.execute(
+            text("UPDATE products SET stock_quantity = 50 WHERE id = :id"), {"id": test_product.id}
+        )
+        db_session.commit()
+        db_session.expire_all()
+        assert service.get_product_detail(test_product.id)["product"]["stock"] == 100
+
+        stock = db_session.query(BranchStock).filter(BranchStock.product_id == test_product.id).one()
+        stock.reserved_stock = 10
+        db_session.flush()
+        assert product_detail_cache.get(test_product.id) is not None
+
+        db_session.commit()
+        assert product_detail_cache.get(test_product.id) is None
+        assert service.get_product_detail(test_product.id)["product"]["stock"] == 50
+
+
+@pytest.mark.unit
+class TestStorefrontBootstrap:
+    """Test the cacheable storefront bootstrap endpoint."""
+
+    def test_bootstrap_sends_cache_headers_and_304(self, client, test_category):
+        response = client.get("/ecommerce/bootstrap")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["categories"][0]["name"] == test_category.name
+        assert body["store_config"]["store_name"] == "POS Cesariel"
+        assert response.headers["etag"] == f'"{body["version"]}"'
+        assert "max-age=" in response.headers["cache-control"]
+        assert "last-modified" in response.headers
+
+        revalidated = client.get("/ecommerce/bootstrap", headers={"If-None-Match": response.headers["etag"]})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+
+        by_date = client.get(
+            "/ecommerce/bootstrap", headers={"If-Modified-Since": response.headers["last-modified"]}
+        )
+        assert by_date.status_code == 304
+
+    def test_content_writes_change_the_version(self, client, db_session):
+        etag = client.get("/ecommerce/bootstrap").headers["etag"]
+
+        db_session.add(StoreBanner(title="Sale", image_url="banner.jpg", is_active=True))
+        db_session.commit()
+        # Without a bump the cached payload is still served
+        assert client.get("/ecommerce/bootstrap").headers["etag"] == etag
+
+        bump_storefront_version(db_session)
+        db_session.commit()
+        response = client.get("/ecommerce/bootstrap", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["banners"][0]["title"] == "Sale"
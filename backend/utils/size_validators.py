@@ -4,9 +4,16 @@ Validadores de talles para productos del sistema POS Cesariel.
 Este módulo define los talles válidos para cada tipo de producto y proporciona
 funciones de validación para asegurar que solo se asignen talles apropiados
 según la categoría del producto.
+
+Las tablas derivadas (conjuntos de talles válidos por tipo y rango de orden
+de cada talle) se precalculan al importar el módulo, y el tipo de cada
+nombre de categoría se memoriza: validar una grilla de talles es una
+diferencia de conjuntos y ordenar talles no requiere claves en Python
+(ProductSize.sort_rank guarda el rango y los endpoints ordenan en SQL).
 """
 
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import List, Dict, FrozenSet, Optional
 from sqlalchemy.orm import Session
 
 # Definición de talles válidos por tipo de categoría
@@ -40,6 +47,80 @@ CATEGORY_NAME_TO_TYPE = {
     "gorras": "accesorios"
 }
 
+# Orden estándar de talles de letras
+LETTER_SIZE_ORDER = ["XS", "S", "M", "L", "XL", "XXL"]
+
+SIZE_TYPE_LABELS = {
+    "calzado": "Número de calzado",
+    "indumentaria": "Talle de indumentaria",
+    "accesorios": "Sin talles"
+}
+
+# Rangos de orden: numéricos por valor (admite medios números), luego letras
+# en orden estándar, luego cualquier otro talle (desempate por nombre)
+_LETTER_RANK_BASE = 100000
+OTHER_SIZE_RANK = 200000
+
+# ===== TABLAS PRECALCULADAS =====
+
+VALID_SIZE_SETS: Dict[str, FrozenSet[str]] = {
+    category_type: frozenset(sizes)
+    for category_type, sizes in VALID_SIZES_BY_CATEGORY.items()
+}
+
+_LETTER_RANKS = {
+    size: _LETTER_RANK_BASE + index * 10
+    for index, size in enumerate(LETTER_SIZE_ORDER)
+}
+
+
+def size_sort_rank(size: str) -> int:
+    """
+    Rango de orden de un talle (se guarda en ProductSize.sort_rank).
+
+    Args:
+        size (str): Talle (35, 38.5, XS, M, Único...)
+
+    Returns:
+        int: Rango; talles numéricos < letras estándar < otros
+    """
+    if not size:
+        return OTHER_SIZE_RANK
+    normalized = size.strip().upper()
+    rank = _LETTER_RANKS.get(normalized)
+    if rank is not None:
+        return rank
+    try:
+        value = float(normalized.replace(",", "."))
+    except ValueError:
+        return OTHER_SIZE_RANK
+    if 0 <= value < _LETTER_RANK_BASE / 10:
+        return int(round(value * 10))
+    return OTHER_SIZE_RANK
+
+
+# Rangos de todos los talles del catálogo (sin recalcular en cada orden)
+SIZE_SORT_RANKS: Dict[str, int] = {
+    size: size_sort_rank(size)
+    for sizes in VALID_SIZES_BY_CATEGORY.values()
+    for size in sizes
+}
+
+_SIZE_DISPLAY = {
+    category_type: sorted(sizes, key=lambda s: SIZE_SORT_RANKS[s])
+    for category_type, sizes in VALID_SIZES_BY_CATEGORY.items()
+}
+
+
+@lru_cache(maxsize=512)
+def _category_type(category_name_lower: str) -> Optional[str]:
+    """Tipo de categoría memorizado por nombre en minúsculas."""
+    for name_pattern, category_type in CATEGORY_NAME_TO_TYPE.items():
+        if name_pattern in category_name_lower:
+            return category_type
+    return None
+
+
 def get_category_type(category_name: str) -> Optional[str]:
     """
     Determina el tipo de categoría basado en el nombre.
@@ -52,15 +133,9 @@ def get_category_type(category_name: str) -> Optional[str]:
     """
     if not category_name:
         return None
-        
-    category_name_lower = category_name.lower()
-    
-    for name_pattern, category_type in CATEGORY_NAME_TO_TYPE.items():
-        if name_pattern in category_name_lower:
-            return category_type
     
-    # Si no coincide con ningún patrón, retornar None (permitir cualquier talle)
-    return None
+    # Si no coincide con ningún patrón, retorna None (permitir cualquier talle)
+    return _category_type(category_name.lower())
 
 def get_valid_sizes_for_category(category_name: str) -> List[str]:
     """
@@ -73,7 +148,27 @@ def get_valid_sizes_for_category(category_name: str) -> List[str]:
         List[str]: Lista de talles válidos para la categoría
     """
     category_type = get_category_type(category_name)
-    return VALID_SIZES_BY_CATEGORY.get(category_type, [])
+    return list(VALID_SIZES_BY_CATEGORY.get(category_type, []))
+
+def get_valid_size_set(category_name: str) -> FrozenSet[str]:
+    """
+    Conjunto de talles válidos para una categoría (vacío = cualquier talle).
+    
+    Args:
+        category_name (str): Nombre de la categoría
+        
+    Returns:
+        FrozenSet[str]: Talles válidos precalculados
+    """
+    return VALID_SIZE_SETS.get(get_category_type(category_name), frozenset())
+
+def _product_category_name(db: Session, product_id: int) -> Optional[str]:
+    """Nombre de la categoría del producto (una sola consulta)."""
+    from app.models import Product, Category
+    
+    return db.query(Category.name).join(
+        Product, Product.category_id == Category.id
+    ).filter(Product.id == product_id).scalar()
 
 def get_valid_sizes_for_product(db: Session, product_id: int) -> List[str]:
     """
@@ -86,13 +181,11 @@ def get_valid_sizes_for_product(db: Session, product_id: int) -> List[str]:
     Returns:
         List[str]: Lista de talles válidos para el producto
     """
-    from app.models import Product, Category
-    
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product or not product.category:
+    category_name = _product_category_name(db, product_id)
+    if not category_name:
         return []
     
-    return get_valid_sizes_for_category(product.category.name)
+    return get_valid_sizes_for_category(category_name)
 
 def is_valid_size_for_category(size: str, category_name: str) -> bool:
     """
@@ -105,8 +198,7 @@ def is_valid_size_for_category(size: str, category_name: str) -> bool:
     Returns:
         bool: True si el talle es válido para la categoría
     """
-    valid_sizes = get_valid_sizes_for_category(category_name)
-    return size in valid_sizes
+    return size in get_valid_size_set(category_name)
 
 def is_valid_size_for_product(db: Session, size: str, product_id: int) -> bool:
     """
@@ -120,38 +212,54 @@ def is_valid_size_for_product(db: Session, size: str, product_id: int) -> bool:
     Returns:
         bool: True si el talle es válido para el producto
     """
-    valid_sizes = get_valid_sizes_for_product(db, product_id)
-    return size in valid_sizes
+    return is_valid_size_for_category(size, _product_category_name(db, product_id) or "")
 
-def validate_sizes_for_product(db: Session, sizes: List[str], product_id: int) -> Dict[str, List[str]]:
+def validate_sizes_for_category(sizes: List[str], category_name: str) -> Dict[str, List[str]]:
     """
-    Valida una lista de talles para un producto y retorna los válidos e inválidos.
+    Valida una grilla de talles contra los talles de una categoría.
     
     Args:
-        db (Session): Sesión de base de datos
         sizes (List[str]): Lista de talles a validar
-        product_id (int): ID del producto
+        category_name (str): Nombre de la categoría
         
     Returns:
-        Dict[str, List[str]]: Diccionario con 'valid' e 'invalid' talles
+        Dict[str, List[str]]: Diccionario con 'valid' e 'invalid' talles (en el orden recibido)
     """
-    valid_sizes = get_valid_sizes_for_product(db, product_id)
+    valid_sizes = get_valid_size_set(category_name)
     
     # Si no hay talles válidos definidos (categoría no reconocida), aceptar todos
     if not valid_sizes:
         return {
-            "valid": sizes,
+            "valid": list(sizes),
             "invalid": []
         }
     
-    valid = [size for size in sizes if size in valid_sizes]
-    invalid = [size for size in sizes if size not in valid_sizes]
+    rejected = set(sizes) - valid_sizes
+    if not rejected:
+        return {
+            "valid": list(sizes),
+            "invalid": []
+        }
     
     return {
-        "valid": valid,
-        "invalid": invalid
+        "valid": [size for size in sizes if size not in rejected],
+        "invalid": [size for size in sizes if size in rejected]
     }
 
+def validate_sizes_for_product(db: Session, sizes: List[str], product_id: int) -> Dict[str, List[str]]:
+    """
+    Valida una lista de talles para un producto y retorna los válidos e inválidos.
+    
+    Args:
+        db (Session): Sesión de base de datos
+        sizes (List[str]): Lista de talles a validar
+        product_id (int): ID del producto
+        
+    Returns:
+        Dict[str, List[str]]: Diccionario con 'valid' e 'invalid' talles
+    """
+    return validate_sizes_for_category(sizes, _product_category_name(db, product_id) or "")
+
 def sort_sizes(sizes: List[str]) -> List[str]:
     """
     Ordena una lista de talles de forma lógica (números primero, luego letras).
@@ -162,24 +270,7 @@ def sort_sizes(sizes: List[str]) -> List[str]:
     Returns:
         List[str]: Lista de talles ordenada
     """
-    numeric_sizes = []
-    text_sizes = []
-    
-    for size in sizes:
-        try:
-            numeric_sizes.append((int(size), size))
-        except ValueError:
-            text_sizes.append(size)
-    
-    # Ordenar talles numéricos por número
-    numeric_sizes.sort(key=lambda x: x[0])
-    numeric_sorted = [size for _, size in numeric_sizes]
-    
-    # Ordenar talles de texto según el orden estándar
-    size_order = ["XS", "S", "M", "L", "XL", "XXL"]
-    text_sorted = sorted(text_sizes, key=lambda x: size_order.index(x) if x in size_order else 999)
-    
-    return numeric_sorted + text_sorted
+    return sorted(sizes, key=lambda size: (SIZE_SORT_RANKS.get(size) or size_sort_rank(size), size))
 
 def get_size_display_info(category_name: str) -> Dict[str, any]:
     """
@@ -192,15 +283,11 @@ def get_size_display_info(category_name: str) -> Dict[str, any]:
         Dict[str, any]: Información de display (tipo, talles válidos, orden)
     """
     category_type = get_category_type(category_name)
-    valid_sizes = VALID_SIZES_BY_CATEGORY.get(category_type, [])
+    valid_sizes = _SIZE_DISPLAY.get(category_type, [])
     
     return {
         "category_type": category_type,
-        "valid_sizes": sort_sizes(valid_sizes),
+        "valid_sizes": list(valid_sizes),
         "has_sizes": len(valid_sizes) > 0,
-        "size_type_label": {
-            "calzado": "Número de calzado",
-            "indumentaria": "Talle de indumentaria", 
-            "accesorios": "Sin talles"
-        }.get(category_type, "Talle")
-    }
\ No newline at end of file
+        "size_type_label": SIZE_TYPE_LABELS.get(category_type, "Talle")
+    }
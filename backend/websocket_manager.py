@@ -6,6 +6,8 @@ from datetime import datetime
 import logging
 import time
 
+from app.core.metrics import gauge_family, register_collector
+
 logger = logging.getLogger(__name__)
 
 
@@ -233,6 +235,20 @@ class ConnectionManager:
 # Instancia global del manager
 manager = ConnectionManager()
 
+
+def _websocket_metrics():
+    """Conexiones WebSocket del proceso para /metrics."""
+    yield gauge_family("websocket_connections", "Conexiones WebSocket activas", [({}, manager.get_connection_count())])
+    yield gauge_family(
+        "websocket_branch_connections",
+        "Conexiones WebSocket activas por sucursal",
+        [({"branch_id": str(branch_id)}, manager.get_branch_connection_count(branch_id))
+         for branch_id in manager.get_connected_branches()]
+    )
+
+
+register_collector(_websocket_metrics)
+
 # Funciones de utilidad para enviar notificaciones específicas
 
 